@@ -0,0 +1,215 @@
+"""
+This module provides verified, timestamped backups of task repositories with retention.
+
+Every backup is a directory named after the UTC time it was taken, holding the
+copies written by `TaskRepository.backup` and a `manifest.json` with their
+checksums. A backup is written under a hidden temporary name, verified and only
+then renamed, so a listed backup is always complete.
+"""
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from daily_tasks.repository import TaskRepository
+
+MANIFEST_NAME = 'manifest.json'
+BACKUP_NAME_FORMAT = '%Y%m%dT%H%M%S%fZ'
+
+
+def create_backup(repository: TaskRepository, backup_dir: str, keep: Optional[int] = None) -> str:
+    """
+    Back up every task list of a repository while it stays in use.
+
+    Args:
+        repository: The repository to back up.
+        backup_dir: The directory holding the backups; created if missing.
+        keep: The number of most recent backups to keep, or None to keep all of them.
+
+    Returns:
+        The path of the new backup.
+
+    Raises:
+        ValueError: If the repository does not support backups or the backup fails verification.
+    """
+    os.makedirs(backup_dir, exist_ok=True)
+    created_at = datetime.now(timezone.utc)
+    name = created_at.strftime(BACKUP_NAME_FORMAT)
+    temp_path = os.path.join(backup_dir, f'.{name}.tmp')
+    path = os.path.join(backup_dir, name)
+    os.makedirs(temp_path)
+    try:
+        file_names = repository.backup(temp_path)
+        manifest = {
+            'created_at': created_at.isoformat(),
+            'repository': type(repository).__name__,
+            'files': {file_name: _file_checksum(os.path.join(temp_path, file_name)) for file_name in file_names},
+        }
+        with open(os.path.join(temp_path, MANIFEST_NAME), 'w', encoding='utf-8') as fh:
+            json.dump(manifest, fh, indent=4)
+            fh.flush()
+            os.fsync(fh.fileno())
+        verify_backup(temp_path)
+        os.replace(temp_path, path)
+    except BaseException:
+        shutil.rmtree(temp_path, ignore_errors=True)
+        raise
+    if keep is not None:
+        prune_backups(backup_dir, keep)
+    return path
+
+
+def verify_backup(path: str) -> Dict[str, str]:
+    """
+    Check that a backup is complete and readable.
+
+    Every file listed in the manifest must match its checksum; SQLite databases
+    must also pass `PRAGMA integrity_check` and JSON files must parse.
+
+    Args:
+        path: The path of the backup directory.
+
+    Returns:
+        The checksums of the backed up files by file name.
+
+    Raises:
+        ValueError: If the backup is incomplete or corrupted.
+    """
+    manifest_path = os.path.join(path, MANIFEST_NAME)
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as fh:
+            files = json.load(fh)['files']
+    except (OSError, ValueError, KeyError) as e:
+        raise ValueError(f"Backup {path} has no readable manifest: {e}") from e
+    for file_name, checksum in files.items():
+        file_path = os.path.join(path, file_name)
+        if not os.path.isfile(file_path):
+            raise ValueError(f"Backup {path} is missing {file_name}")
+        if _file_checksum(file_path) != checksum:
+            raise ValueError(f"Backup file {file_name} does not match its checksum")
+        if file_name.endswith(('.db', '.sqlite', '.sqlite3')):
+            _check_database(file_path)
+        elif file_name.endswith('.json'):
+            try:
+                with open(file_path, 'r', encoding='utf-8') as fh:
+                    json.load(fh)
+            except ValueError as e:
+                raise ValueError(f"Backup file {file_name} is not valid JSON: {e}") from e
+    return files
+
+
+def list_backups(backup_dir: str) -> List[str]:
+    """
+    List the complete backups in a directory.
+
+    Args:
+        backup_dir: The directory holding the backups.
+
+    Returns:
+        The paths of the backups, oldest first.
+    """
+    if not os.path.isdir(backup_dir):
+        return []
+    return [
+        os.path.join(backup_dir, name) for name in sorted(os.listdir(backup_dir))
+        if not name.startswith('.') and os.path.isfile(os.path.join(backup_dir, name, MANIFEST_NAME))
+    ]
+
+
+def prune_backups(backup_dir: str, keep: int) -> int:
+    """
+    Delete all but the most recent backups in a directory.
+
+    Args:
+        backup_dir: The directory holding the backups.
+        keep: The number of most recent backups to keep.
+
+    Returns:
+        The number of deleted backups.
+    """
+    backups = list_backups(backup_dir)
+    stale = backups[:max(len(backups) - max(keep, 1), 0)]
+    for path in stale:
+        shutil.rmtree(path)
+    return len(stale)
+
+
+def _file_checksum(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _check_database(path: str):
+    conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+    try:
+        result = conn.execute('PRAGMA integrity_check').fetchone()[0]
+    except sqlite3.DatabaseError as e:
+        raise ValueError(f"Backup database {os.path.basename(path)} is corrupted: {e}") from e
+    finally:
+        conn.close()
+    if result != 'ok':
+        raise ValueError(f"Backup database {os.path.basename(path)} failed the integrity check: {result}")
+
+
+class BackupScheduler:
+    """
+    Back up a repository at a fixed interval from a background thread.
+
+    The first backup is taken once the newest existing backup is `interval_hours`
+    old, so restarting the application does not reset the schedule.
+    """
+
+    def __init__(self, repository: TaskRepository, backup_dir: str, interval_hours: float, keep: int):
+        """
+        Initialize the scheduler.
+
+        Args:
+            repository: The repository to back up.
+            backup_dir: The directory holding the backups.
+            interval_hours: The time between two backups.
+            keep: The number of most recent backups to keep.
+        """
+        self.repository = repository
+        self.backup_dir = backup_dir
+        self.interval = interval_hours * 3600
+        self.keep = keep
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start the backup thread."""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._backup_loop, name='task-backup', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the backup thread, waiting for a running backup to finish."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def _first_delay(self) -> float:
+        backups = list_backups(self.backup_dir)
+        if not backups:
+            return 0
+        created_at = datetime.strptime(os.path.basename(backups[-1]), BACKUP_NAME_FORMAT)
+        age = (datetime.now(timezone.utc) - created_at.replace(tzinfo=timezone.utc)).total_seconds()
+        return min(max(self.interval - age, 0), self.interval)
+
+    def _backup_loop(self):
+        delay = self._first_delay()
+        while not self._stop.wait(delay):
+            try:
+                create_backup(self.repository, self.backup_dir, self.keep)
+            except (OSError, ValueError, sqlite3.Error) as e:
+                print(f"Scheduled backup failed: {e}")
+            delay = self.interval
@@ -0,0 +1,51 @@
+"""
+This module provides transparent compression of large task descriptions.
+"""
+import zlib
+from typing import Optional
+
+from daily_tasks.models import CompressionSettings
+
+ZLIB_ENCODING = "zlib"
+
+
+def compress_description(description: str, settings: CompressionSettings) -> Optional[bytes]:
+    """
+    Compress a description if it is large enough to be worth it.
+
+    Args:
+        description: The description to compress.
+        settings: The compression settings.
+
+    Returns:
+        The zlib-compressed UTF-8 bytes of the description, or None if the description
+        should be stored as plain text.
+    """
+    if not settings.enabled:
+        return None
+    data = description.encode("utf-8")
+    if len(data) < settings.min_description_size:
+        return None
+    compressed = zlib.compress(data, settings.level)
+    if len(compressed) >= len(data):
+        return None
+    return compressed
+
+
+def decompress_description(data: bytes, encoding: str = ZLIB_ENCODING) -> str:
+    """
+    Decompress a description stored by `compress_description`.
+
+    Args:
+        data: The compressed bytes.
+        encoding: The encoding the description was stored with.
+
+    Returns:
+        The description.
+
+    Raises:
+        ValueError: If the encoding is not supported.
+    """
+    if encoding != ZLIB_ENCODING:
+        raise ValueError(f"Unsupported description encoding: {encoding}")
+    return zlib.decompress(data).decode("utf-8")
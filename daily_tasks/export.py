@@ -0,0 +1,98 @@
+"""
+This module provides streaming export of tasks from any task repository.
+"""
+import csv
+import gzip
+import io
+import json
+import os
+from enum import Enum
+
+from daily_tasks.models import DEFAULT_TASK_LIST, Task
+from daily_tasks.repository import TaskRepository
+from daily_tasks.serialization import BinaryTaskWriter, task_fields
+
+
+class ExportFormat(Enum):
+    """
+    Enum class for export formats.
+    """
+    NDJSON = "ndjson"
+    CSV = "csv"
+    BINARY = "binary"
+
+
+def export_tasks(
+    repository: TaskRepository,
+    output_path: str,
+    export_format: ExportFormat = ExportFormat.NDJSON,
+    compress: bool = False,
+    batch_size: int = 500,
+) -> int:
+    """
+    Export all tasks of the current task list of a repository to a file.
+
+    Tasks are streamed from the repository and written one at a time, so memory
+    use does not depend on the number of tasks exported.
+
+    Args:
+        repository: The repository to export tasks from.
+        output_path: The path of the file to write.
+        export_format: The format to write the tasks in.
+        compress: Whether to gzip the output.
+        batch_size: The number of tasks to fetch from the repository at a time.
+
+    Returns:
+        The number of exported tasks.
+    """
+    export_format = ExportFormat(export_format)
+    opener = gzip.open if compress else open
+
+    count = 0
+    with opener(output_path, "wb") as fh:
+        tasks = repository.iter_tasks(batch_size=batch_size, include_archived=True)
+        if export_format == ExportFormat.BINARY:
+            writer = BinaryTaskWriter(fh)
+            for task in tasks:
+                writer.write(task)
+                count += 1
+            return count
+
+        with io.TextIOWrapper(fh, encoding="utf-8", newline="") as text_fh:
+            if export_format == ExportFormat.NDJSON:
+                for task in tasks:
+                    text_fh.write(json.dumps(task.model_dump(mode="json")))
+                    text_fh.write("\n")
+                    count += 1
+            else:
+                writer = csv.DictWriter(text_fh, fieldnames=task_fields())
+                writer.writeheader()
+                for task in tasks:
+                    writer.writerow(_csv_row(task))
+                    count += 1
+    return count
+
+
+def task_list_export_path(output_path: str, task_list: str) -> str:
+    """
+    Get the file a task list is exported to; the default list keeps using `output_path` itself.
+
+    Args:
+        output_path: The export path given for the default task list.
+        task_list: The name of the task list.
+
+    Returns:
+        The path of the export file of the task list.
+    """
+    if task_list == DEFAULT_TASK_LIST:
+        return output_path
+    root, extension = os.path.splitext(output_path)
+    if extension == ".gz":
+        root, inner_extension = os.path.splitext(root)
+        extension = inner_extension + extension
+    return f"{root}.{task_list}{extension}"
+
+
+def _csv_row(task: Task) -> dict:
+    row = task.model_dump(mode="json")
+    return {key: "" if value is None else value for key, value in row.items()}
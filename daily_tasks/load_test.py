@@ -0,0 +1,423 @@
+"""
+This module provides a load generator that drives a TaskManager with concurrent simulated clients.
+
+Run it as `python -m daily_tasks.load_test <repository>`; see `--help` for the options.
+"""
+import argparse
+import math
+import multiprocessing
+import os
+import random
+import threading
+import time
+from enum import Enum
+from typing import Callable, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from daily_tasks.config import load_config
+from daily_tasks.models import Settings, Preferences, Task, TaskFilter
+from daily_tasks.task_manager import TaskManager
+from daily_tasks.ui import UI
+
+DEFAULT_MIX = {"create": 1, "edit": 2, "view": 3, "filter": 3, "complete": 1, "delete": 0.5}
+
+# A sample is (wall clock time the operation finished, operation, latency in seconds, error name or None).
+Sample = Tuple[float, str, float, Optional[str]]
+
+
+class LoadTestMode(Enum):
+    """
+    Enum class for the ways simulated clients are run.
+    """
+    INPROCESS = "inprocess"
+    THREAD = "thread"
+    PROCESS = "process"
+
+
+class LatencyStats(BaseModel):
+    """
+    Throughput, error and latency statistics of a set of operations.
+
+    Attributes:
+        operations (int): The number of operations.
+        errors (int): The number of operations that raised an exception.
+        throughput (float): Operations per second.
+        error_rate (float): The fraction of operations that failed.
+        p50_ms (float): The median latency in milliseconds.
+        p95_ms (float): The 95th percentile latency in milliseconds.
+        p99_ms (float): The 99th percentile latency in milliseconds.
+    """
+    operations: int = 0
+    errors: int = 0
+    throughput: float = 0.0
+    error_rate: float = 0.0
+    p50_ms: float = 0.0
+    p95_ms: float = 0.0
+    p99_ms: float = 0.0
+
+
+class IntervalStats(LatencyStats):
+    """
+    Statistics of the operations that finished within one reporting interval.
+
+    Attributes:
+        start (float): The start of the interval, in seconds since the load test started.
+    """
+    start: float
+
+
+class LoadTestReport(BaseModel):
+    """
+    Result of a load test.
+
+    Attributes:
+        repository (str): The repository type under test.
+        mode (str): How the clients were run.
+        clients (int): The number of simulated clients.
+        duration (float): The measured duration in seconds.
+        total (LatencyStats): Statistics over all operations.
+        per_operation (dict): Statistics per operation type.
+        intervals (list): Statistics per reporting interval, in time order.
+        errors (dict): The number of failures per exception type.
+    """
+    repository: str
+    mode: str
+    clients: int
+    duration: float
+    total: LatencyStats
+    per_operation: Dict[str, LatencyStats]
+    intervals: List[IntervalStats]
+    errors: Dict[str, int]
+
+
+class _HeadlessUI(UI):
+    """UI that never launches, so a TaskManager can be driven directly."""
+
+    def register_callbacks(self, *args, **kwargs):
+        pass
+
+    def launch(self):
+        pass
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    """
+    Parse an operation mix such as `create=1,edit=2,filter=5`.
+
+    Args:
+        text: Comma separated `operation=weight` pairs.
+
+    Returns:
+        A mapping of operation name to relative weight.
+
+    Raises:
+        ValueError: If an operation is unknown or a weight is not a non-negative number.
+    """
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in DEFAULT_MIX:
+            raise ValueError(f"Unknown operation {name!r}; options are {', '.join(DEFAULT_MIX)}")
+        mix[name] = float(weight) if weight else 1.0
+        if mix[name] < 0:
+            raise ValueError(f"Weight of {name} must not be negative")
+    if not any(mix.values()):
+        raise ValueError("At least one operation must have a positive weight")
+    return mix
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """
+    Get a nearest-rank percentile of sorted values.
+
+    Args:
+        values: The values, sorted in ascending order.
+        fraction: The percentile as a fraction between 0 and 1.
+
+    Returns:
+        The percentile, or 0 if there are no values.
+    """
+    if not values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(values)))
+    return values[rank - 1]
+
+
+class _Client:
+    """A simulated client issuing a random mix of operations against a TaskManager."""
+
+    def __init__(self, task_manager: TaskManager, client_id: int, mix: Dict[str, float], initial_tasks: int):
+        self.task_manager = task_manager
+        self.client_id = client_id
+        self.random = random.Random(client_id)
+        self.operations = [name for name in mix if mix[name] > 0]
+        self.weights = [mix[name] for name in self.operations]
+        # Clients only touch tasks they created, so their deletes never fail each other's edits.
+        self.task_ids: List[int] = []
+        self.created = 0
+        for _ in range(initial_tasks):
+            self._create()
+
+    def step(self) -> Sample:
+        operation = self.random.choices(self.operations, self.weights)[0]
+        handler: Callable[[], None] = getattr(self, f"_{operation}")
+        error = None
+        started = time.perf_counter()
+        try:
+            handler()
+        except Exception as e:  # pylint: disable=broad-except
+            error = type(e).__name__
+        latency = time.perf_counter() - started
+        return time.time(), operation, latency, error
+
+    def _pick_task_id(self) -> int:
+        if not self.task_ids:
+            self._create()
+        return self.random.choice(self.task_ids)
+
+    def _create(self):
+        self.created += 1
+        task = Task(
+            title=f"Load client {self.client_id} task {self.created}",
+            description="Generated by the load test. " * self.random.randint(1, 20),
+        )
+        self.task_manager.handle_create_task(task)
+        self.task_ids.append(task.id)
+
+    def _edit(self):
+        self.task_manager.handle_edit_task(self._pick_task_id(), {"description": f"Edited at {time.time()}"})
+
+    def _view(self):
+        self.task_manager.handle_view_task_by_id(self._pick_task_id())
+
+    def _filter(self):
+        self.task_manager.handle_filter_tasks(self.random.choice([f.value for f in TaskFilter]))
+
+    def _complete(self):
+        self.task_manager.handle_complete_task(self._pick_task_id())
+
+    def _delete(self):
+        task_id = self._pick_task_id()
+        self.task_ids.remove(task_id)
+        self.task_manager.handle_delete_task(task_id)
+
+
+def _create_task_manager(settings: Settings, preferences: Preferences, repository: str) -> TaskManager:
+    from daily_tasks.main import _get_repository_class
+    repository_class = _get_repository_class(repository)
+    if repository_class is None:
+        raise ValueError(f"Unknown repository type: {repository}")
+    return TaskManager(settings, preferences, _HeadlessUI, repository_class)
+
+
+def _run_clients(clients: List[_Client], deadline: float) -> List[Sample]:
+    """Run clients in turn on the current thread until the deadline."""
+    samples = []
+    while time.time() < deadline:
+        for client in clients:
+            samples.append(client.step())
+    return samples
+
+
+def _run_process(args) -> List[Sample]:
+    settings, preferences, repository, client_id, mix, initial_tasks, start, deadline = args
+    task_manager = _create_task_manager(settings, preferences, repository)
+    client = _Client(task_manager, client_id, mix, initial_tasks)
+    time.sleep(max(0.0, start - time.time()))
+    return _run_clients([client], deadline)
+
+
+def run_load_test(
+    settings: Settings,
+    preferences: Preferences,
+    repository: str,
+    clients: int = 4,
+    duration: float = 10.0,
+    mode: LoadTestMode = LoadTestMode.THREAD,
+    mix: Dict[str, float] = None,
+    interval: float = 1.0,
+    initial_tasks: int = 10,
+) -> LoadTestReport:
+    """
+    Drive a TaskManager with simulated clients and measure its behaviour.
+
+    Args:
+        settings: The settings of the repository under test.
+        preferences: The application preferences.
+        repository: The repository type to test; one of the types accepted by `main`.
+        clients: The number of simulated clients.
+        duration: How long to generate load for, in seconds.
+        mode: Whether clients take turns on one thread, run on their own threads
+            sharing one TaskManager, or run in their own processes each with its own TaskManager.
+        mix: The relative weight of each operation; defaults to `DEFAULT_MIX`.
+        interval: The length of each reporting interval, in seconds.
+        initial_tasks: The number of tasks each client creates before the measurement starts.
+
+    Returns:
+        The load test report.
+    """
+    mode = LoadTestMode(mode)
+    mix = mix or DEFAULT_MIX
+
+    if mode == LoadTestMode.PROCESS:
+        # Give the processes time to start and create their initial tasks before the clock starts.
+        start = time.time() + 1.0 + initial_tasks * 0.01
+        deadline = start + duration
+        with multiprocessing.Pool(clients) as pool:
+            results = pool.map(_run_process, [
+                (settings, preferences, repository, client_id, mix, initial_tasks, start, deadline)
+                for client_id in range(clients)
+            ])
+        samples = [sample for result in results for sample in result]
+    else:
+        task_manager = _create_task_manager(settings, preferences, repository)
+        simulated = [_Client(task_manager, client_id, mix, initial_tasks) for client_id in range(clients)]
+        start = time.time()
+        deadline = start + duration
+        if mode == LoadTestMode.INPROCESS:
+            samples = _run_clients(simulated, deadline)
+        else:
+            results: List[List[Sample]] = [[] for _ in simulated]
+
+            def run(index: int):
+                results[index] = _run_clients([simulated[index]], deadline)
+
+            threads = [threading.Thread(target=run, args=(index,)) for index in range(len(simulated))]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            samples = [sample for result in results for sample in result]
+        close = getattr(task_manager.repository, "close", None)
+        if close is not None:
+            close()
+
+    return _build_report(samples, repository, mode, clients, start, duration, interval)
+
+
+def _stats(samples: List[Sample], duration: float) -> LatencyStats:
+    latencies = sorted(sample[2] for sample in samples)
+    errors = sum(1 for sample in samples if sample[3] is not None)
+    return LatencyStats(
+        operations=len(samples),
+        errors=errors,
+        throughput=len(samples) / duration if duration > 0 else 0.0,
+        error_rate=errors / len(samples) if samples else 0.0,
+        p50_ms=percentile(latencies, 0.50) * 1000,
+        p95_ms=percentile(latencies, 0.95) * 1000,
+        p99_ms=percentile(latencies, 0.99) * 1000,
+    )
+
+
+def _build_report(
+    samples: List[Sample],
+    repository: str,
+    mode: LoadTestMode,
+    clients: int,
+    start: float,
+    duration: float,
+    interval: float,
+) -> LoadTestReport:
+    # Operations still running at the deadline are counted in the last interval.
+    interval_count = max(1, math.ceil(duration / interval))
+
+    by_operation: Dict[str, List[Sample]] = {}
+    by_interval: Dict[int, List[Sample]] = {}
+    errors: Dict[str, int] = {}
+    for sample in samples:
+        by_operation.setdefault(sample[1], []).append(sample)
+        index = min(max(0, int((sample[0] - start) // interval)), interval_count - 1)
+        by_interval.setdefault(index, []).append(sample)
+        if sample[3] is not None:
+            errors[sample[3]] = errors.get(sample[3], 0) + 1
+
+    intervals = []
+    for index in range(interval_count):
+        interval_start = index * interval
+        length = min(interval, duration - interval_start)
+        stats = _stats(by_interval.get(index, []), length)
+        intervals.append(IntervalStats(start=interval_start, **stats.model_dump()))
+
+    return LoadTestReport(
+        repository=repository,
+        mode=mode.value,
+        clients=clients,
+        duration=duration,
+        total=_stats(samples, duration),
+        per_operation={name: _stats(group, duration) for name, group in sorted(by_operation.items())},
+        intervals=intervals,
+        errors=errors,
+    )
+
+
+def format_report(report: LoadTestReport) -> str:
+    """
+    Format a load test report as a plain text table.
+
+    Args:
+        report: The report to format.
+
+    Returns:
+        The formatted report.
+    """
+    def row(label: str, stats: LatencyStats) -> str:
+        return (
+            f"{label:>10} {stats.operations:>8} {stats.throughput:>10.1f} {stats.error_rate:>7.2%} "
+            f"{stats.p50_ms:>9.2f} {stats.p95_ms:>9.2f} {stats.p99_ms:>9.2f}"
+        )
+
+    header = f"{'':>10} {'ops':>8} {'ops/s':>10} {'errors':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+    lines = [
+        f"{report.repository} / {report.mode} / {report.clients} clients / {report.duration:.1f}s",
+        header,
+    ]
+    lines.extend(row(f"{stats.start:g}s", stats) for stats in report.intervals)
+    lines.append("")
+    lines.extend(row(name, stats) for name, stats in report.per_operation.items())
+    lines.append(row("total", report.total))
+    if report.errors:
+        lines.append("errors: " + ", ".join(f"{name}={count}" for name, count in sorted(report.errors.items())))
+    return "\n".join(lines)
+
+
+def main():
+    """
+    Entry point of the load test harness.
+    """
+    settings, preferences = load_config(os.environ.get("DT_CONFIG_PATH"))
+
+    parser = argparse.ArgumentParser(description="Drive a TaskManager with concurrent simulated clients")
+    parser.add_argument("repository", type=str, help="Repository type to test; options are 'json', 'sqlite' or 'memory'")
+    parser.add_argument(
+        "--clients",
+        type=str,
+        default="4",
+        help="Number of simulated clients; a comma separated list runs one test per count, e.g. 1,2,4,8"
+    )
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of load per test")
+    parser.add_argument(
+        "--mode",
+        type=str,
+        default=LoadTestMode.THREAD.value,
+        help="How clients run; options are 'inprocess', 'thread' or 'process'"
+    )
+    parser.add_argument("--mix", type=str, help="Operation weights, e.g. create=1,edit=2,view=3,filter=3")
+    parser.add_argument("--interval", type=float, default=1.0, help="Seconds per reporting interval")
+    parser.add_argument("--initial-tasks", type=int, default=10, help="Tasks each client creates before measuring")
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix) if args.mix else DEFAULT_MIX
+    for clients in [int(count) for count in args.clients.split(",")]:
+        report = run_load_test(
+            settings, preferences, args.repository,
+            clients=clients, duration=args.duration, mode=args.mode, mix=mix,
+            interval=args.interval, initial_tasks=args.initial_tasks,
+        )
+        print(format_report(report))
+        print()
+
+
+if __name__ == "__main__":
+    main()
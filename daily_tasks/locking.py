@@ -0,0 +1,97 @@
+"""
+This module provides the reader/writer lock used to make task repositories thread-safe.
+"""
+import threading
+from contextlib import contextmanager
+
+
+class ReadWriteLock:
+    """
+    Reader/writer lock allowing concurrent readers and a single writer.
+
+    Waiting writers take precedence over new readers, so a steady stream of reads
+    cannot starve writes. Both lock modes are re-entrant, and the writing thread
+    may also take read locks; upgrading a read lock to a write lock is not allowed.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._waiting_writers = 0
+        self._writer = None
+        self._write_depth = 0
+        self._local = threading.local()
+
+    def _held_reads(self) -> int:
+        return getattr(self._local, 'reads', 0)
+
+    def acquire_read(self):
+        """Acquire the lock for reading, waiting while a writer holds or waits for it."""
+        me = threading.get_ident()
+        with self._condition:
+            if self._writer != me and self._held_reads() == 0:
+                while self._writer is not None or self._waiting_writers:
+                    self._condition.wait()
+            self._readers += 1
+        self._local.reads = self._held_reads() + 1
+
+    def release_read(self):
+        """Release a read lock taken by this thread."""
+        if self._held_reads() == 0:
+            raise RuntimeError("Cannot release a read lock that is not held")
+        self._local.reads -= 1
+        with self._condition:
+            self._readers -= 1
+            if self._readers == 0:
+                self._condition.notify_all()
+
+    def acquire_write(self):
+        """
+        Acquire the lock for writing, waiting until no other thread holds it.
+
+        Raises:
+            RuntimeError: If this thread holds a read lock but not the write lock.
+        """
+        me = threading.get_ident()
+        with self._condition:
+            if self._writer == me:
+                self._write_depth += 1
+                return
+            if self._held_reads():
+                raise RuntimeError("Cannot upgrade a read lock to a write lock")
+            self._waiting_writers += 1
+            try:
+                while self._writer is not None or self._readers:
+                    self._condition.wait()
+            finally:
+                self._waiting_writers -= 1
+            self._writer = me
+            self._write_depth = 1
+
+    def release_write(self):
+        """Release the write lock held by this thread."""
+        with self._condition:
+            if self._writer != threading.get_ident():
+                raise RuntimeError("Cannot release a write lock that is not held")
+            self._write_depth -= 1
+            if self._write_depth == 0:
+                self._writer = None
+                self._condition.notify_all()
+
+    @contextmanager
+    def read(self):
+        """Hold the lock for reading."""
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write(self):
+        """Hold the lock for writing."""
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
@@ -5,11 +5,55 @@ import argparse
 import os
 
 from daily_tasks.config import load_config
+from daily_tasks.models import JSONSettings, SQLiteSettings, SyncConflictPolicy
 from daily_tasks.ui import UI
 from daily_tasks.repository import TaskRepository
 from daily_tasks.task_manager import TaskManager
 
 
+def _get_repository_class(repository: str) -> TaskRepository:
+    if repository == "json":
+        from daily_tasks.repository.json_task_repository import JSONTaskRepository
+        return JSONTaskRepository
+    elif repository == "sqlite":
+        from daily_tasks.repository.sqlite_task_repository import SQLiteTaskRepository
+        return SQLiteTaskRepository
+    elif repository == "sharded-sqlite":
+        from daily_tasks.repository.sharded_sqlite_task_repository import ShardedSQLiteTaskRepository
+        return ShardedSQLiteTaskRepository
+    elif repository == "memory":
+        from daily_tasks.repository.memory_task_repository import MemoryTaskRepository
+        return MemoryTaskRepository
+    elif repository == "ndjson":
+        from daily_tasks.repository.ndjson_task_repository import NDJSONTaskRepository
+        return NDJSONTaskRepository
+    return None
+
+
+def _open_repository_file(path: str, settings, preferences) -> TaskRepository:
+    """Open the JSON or SQLite repository stored at a path, chosen by its extension."""
+    if os.path.splitext(path)[1] in (".db", ".sqlite", ".sqlite3"):
+        from daily_tasks.repository.sqlite_task_repository import SQLiteTaskRepository
+        settings = settings.model_copy(update={"sqlite_settings": SQLiteSettings(db_path=path)})
+        return SQLiteTaskRepository(dt_settings=settings, dt_preferences=preferences)
+    from daily_tasks.repository.json_task_repository import JSONTaskRepository
+    settings = settings.model_copy(update={"json_settings": JSONSettings(tasks_path=os.path.abspath(path))})
+    return JSONTaskRepository(dt_settings=settings, dt_preferences=preferences)
+
+
+def _get_ui_class(ui: str) -> UI:
+    if ui == "gtk":
+        from daily_tasks.ui.gtk_ui import GTKTaskOverview
+        return GTKTaskOverview
+    elif ui == "cmdline":
+        from daily_tasks.ui.command_line_ui import CommandLineUI
+        return CommandLineUI
+    elif ui == "server":
+        from daily_tasks.ui.server_ui import ServerUI
+        return ServerUI
+    return None
+
+
 def main():
     """
     Entry point of the daily_tasks application.
@@ -22,28 +66,155 @@ def main():
     parser.add_argument(
         "repository",
         type=str,
-        help="Specify the repository type to use; options are 'json' or 'sqlite'"
+        help="Specify the repository type to use; options are 'json', 'sqlite', 'sharded-sqlite', 'memory' or 'ndjson'"
+    )
+    parser.add_argument(
+        "ui",
+        type=str,
+        nargs="?",
+        help="Specify the UI type; options are 'gtk', 'cmdline' or 'server'"
+    )
+    parser.add_argument(
+        "--export",
+        type=str,
+        metavar="PATH",
+        help="Export the default task list to PATH and every other list next to it, named after the list, and exit"
+    )
+    parser.add_argument(
+        "--export-format",
+        type=str,
+        default="ndjson",
+        help="Specify the export format; options are 'ndjson', 'csv' or 'binary'"
+    )
+    parser.add_argument("--gzip", action="store_true", help="Compress the export with gzip")
+    parser.add_argument(
+        "--migrate-to",
+        type=str,
+        metavar="REPOSITORY",
+        help="Copy every task list into the given repository type and exit"
+    )
+    parser.add_argument("--checkpoint", type=str, metavar="PATH", help="Checkpoint file used to resume a migration")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Number of tasks copied per migration batch")
+    parser.add_argument(
+        "--recompress",
+        action="store_true",
+        help="Re-encode stored task descriptions to match the compression settings and exit"
+    )
+    parser.add_argument(
+        "--dedup",
+        action="store_true",
+        help="Delete tasks with the same title and description as an earlier task and exit"
+    )
+    parser.add_argument(
+        "--sync",
+        type=str,
+        metavar="PATH",
+        help="Sync every task list with the tasks JSON file or SQLite database at PATH and exit"
+    )
+    parser.add_argument(
+        "--conflict-policy",
+        type=str,
+        default=SyncConflictPolicy.KEEP_BOTH.value,
+        help="Specify how tasks edited on both sides are synced; options are 'keep_both', 'local' or 'remote'"
     )
-    parser.add_argument("ui", type=str, help="Specify the UI type; options are 'gtk' or 'cmdline'")
+    parser.add_argument(
+        "--sync-state",
+        type=str,
+        metavar="PATH",
+        help="Sync state file of this pair of repositories; defaults to PATH.sync-state.db next to --sync"
+    )
+    parser.add_argument(
+        "--backup",
+        type=str,
+        metavar="DIR",
+        help="Back up every task list into a new timestamped directory in DIR and exit"
+    )
+    parser.add_argument("--verify-backup", type=str, metavar="PATH", help="Verify the backup at PATH and exit")
     args = parser.parse_args()
 
-    repository: str = args.repository
-    repository_class: TaskRepository = None
-    if repository == "json":
-        from daily_tasks.repository.json_task_repository import JSONTaskRepository
-        repository_class = JSONTaskRepository
-    elif repository == "sqlite":
-        from daily_tasks.repository.sqlite_task_repository import SQLiteTaskRepository
-        repository_class = SQLiteTaskRepository
+    repository_class = _get_repository_class(args.repository)
+    if repository_class is None:
+        parser.error(f"Unknown repository type: {args.repository}")
 
-    ui: str = args.ui
-    ui_class: UI = None
-    if ui == "gtk":
-        from daily_tasks.ui.gtk_ui import GTKTaskOverview
-        ui_class = GTKTaskOverview
-    elif ui == "cmdline":
-        from daily_tasks.ui.command_line_ui import CommandLineUI
-        ui_class = CommandLineUI
+    if args.export:
+        from daily_tasks.export import export_tasks, task_list_export_path
+        repository = repository_class(dt_settings=settings, dt_preferences=preferences)
+        for task_list in repository.task_lists():
+            repository.use_task_list(task_list)
+            path = task_list_export_path(args.export, task_list)
+            count = export_tasks(repository, path, args.export_format, compress=args.gzip)
+            print(f"{task_list}: exported {count} tasks to {path}")
+        return
+
+    if args.migrate_to:
+        from daily_tasks.migration import migrate_tasks
+        target_class = _get_repository_class(args.migrate_to)
+        if target_class is None:
+            parser.error(f"Unknown repository type: {args.migrate_to}")
+        source = repository_class(dt_settings=settings, dt_preferences=preferences)
+        target = target_class(dt_settings=settings, dt_preferences=preferences)
+        for task_list in source.task_lists():
+            source.use_task_list(task_list)
+            target.use_task_list(task_list)
+            result = migrate_tasks(source, target, batch_size=args.batch_size, checkpoint_path=args.checkpoint)
+            print(
+                f"{task_list}: migrated {result.copied} tasks; target holds {result.count} tasks "
+                f"(checksum {result.checksum})"
+            )
+        return
+
+    if args.recompress:
+        repository = repository_class(dt_settings=settings, dt_preferences=preferences)
+        rewritten = 0
+        for task_list in repository.task_lists():
+            repository.use_task_list(task_list)
+            rewritten += repository.recompress_descriptions()
+        print(f"Recompressed {rewritten} task descriptions")
+        return
+
+    if args.dedup:
+        repository = repository_class(dt_settings=settings, dt_preferences=preferences)
+        deleted = 0
+        for task_list in repository.task_lists():
+            repository.use_task_list(task_list)
+            deleted += repository.deduplicate_tasks()
+        print(f"Deleted {deleted} duplicate tasks")
+        return
+
+    if args.verify_backup:
+        from daily_tasks.backup import verify_backup
+        try:
+            files = verify_backup(args.verify_backup)
+        except ValueError as e:
+            parser.exit(1, f"{e}\n")
+        print(f"Backup {args.verify_backup} is intact ({len(files)} files)")
+        return
+
+    if args.backup:
+        from daily_tasks.backup import create_backup
+        repository = repository_class(dt_settings=settings, dt_preferences=preferences)
+        path = create_backup(repository, args.backup, keep=settings.backup_settings.keep)
+        print(f"Backed up all task lists to {path}")
+        return
+
+    if args.sync:
+        from daily_tasks.sync import sync_repositories
+        local = repository_class(dt_settings=settings, dt_preferences=preferences)
+        remote = _open_repository_file(args.sync, settings, preferences)
+        state_path = args.sync_state or f"{args.sync}.sync-state.db"
+        for task_list in sorted(set(local.task_lists()) | set(remote.task_lists())):
+            local.use_task_list(task_list)
+            remote.use_task_list(task_list)
+            result = sync_repositories(local, remote, args.conflict_policy, state_path)
+            print(
+                f"{task_list}: pulled {result.pulled}, pushed {result.pushed}, deleted {result.deleted} tasks; "
+                f"{result.conflicts} conflicts"
+            )
+        return
+
+    ui_class = _get_ui_class(args.ui)
+    if ui_class is None:
+        parser.error(f"Unknown UI type: {args.ui}")
 
     task_manager = TaskManager(settings, preferences, ui_class, repository_class)
     task_manager.run()
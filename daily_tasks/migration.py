@@ -0,0 +1,146 @@
+"""
+This module provides resumable, batched migration of tasks between task repositories.
+"""
+import hashlib
+import json
+import os
+from typing import Dict, Optional, Tuple
+
+from pydantic import BaseModel
+
+from daily_tasks.models import Task
+from daily_tasks.repository import TaskRepository
+
+
+class MigrationResult(BaseModel):
+    """
+    Result of a migration.
+
+    Attributes:
+        copied (int): The number of tasks copied by this run.
+        count (int): The number of tasks in the target after the migration.
+        checksum (str): The checksum shared by the source and target.
+    """
+    copied: int
+    count: int
+    checksum: str
+
+
+def repository_checksum(repository: TaskRepository, batch_size: int = 1000) -> Tuple[int, str]:
+    """
+    Compute the row count and a checksum over every task of a repository.
+
+    Args:
+        repository: The repository to checksum.
+        batch_size: The number of tasks to fetch from the repository at a time.
+
+    Returns:
+        A tuple with the number of tasks and the hex digest of their contents.
+    """
+    digest = hashlib.sha256()
+    count = 0
+    for task in repository.iter_tasks(batch_size=batch_size, include_archived=True):
+        digest.update(_canonical_bytes(task))
+        count += 1
+    return count, digest.hexdigest()
+
+
+def migrate_tasks(
+    source: TaskRepository,
+    target: TaskRepository,
+    batch_size: int = 1000,
+    checkpoint_path: Optional[str] = None,
+) -> MigrationResult:
+    """
+    Copy every task of the current task list of one repository to another, keeping task IDs.
+
+    Tasks are copied in ID order, `batch_size` at a time. After each batch the last
+    copied ID is written to `checkpoint_path`, under the repository types and the
+    task list, so an interrupted migration resumes where it stopped and one
+    checkpoint file serves every list of a migration. Once all tasks are copied,
+    the row counts and checksums of both lists are compared and the entry of the
+    list is removed from the checkpoint.
+
+    Args:
+        source: The repository to copy tasks from; its current task list is copied.
+        target: The repository to copy tasks to; its current task list receives the tasks.
+        batch_size: The number of tasks to copy at a time.
+        checkpoint_path: The path of the checkpoint file; checkpointing is disabled if not provided.
+
+    Returns:
+        The result of the migration.
+
+    Raises:
+        ValueError: If the target does not match the source after the migration.
+    """
+    checkpoint_key = _checkpoint_key(source, target)
+    last_id = _read_checkpoint(checkpoint_path).get(checkpoint_key, {}).get(target.task_list)
+    if last_id is not None:
+        print(f"Resuming migration of {target.task_list} after task {last_id}")
+
+    copied = 0
+    batch: list[Task] = []
+    for task in source.iter_tasks(batch_size=batch_size, after_id=last_id, include_archived=True):
+        batch.append(task)
+        if len(batch) >= batch_size:
+            copied += _copy_batch(target, batch, checkpoint_path, checkpoint_key)
+            batch = []
+    if batch:
+        copied += _copy_batch(target, batch, checkpoint_path, checkpoint_key)
+
+    source_count, source_checksum = repository_checksum(source, batch_size)
+    target_count, target_checksum = repository_checksum(target, batch_size)
+    if source_count != target_count:
+        raise ValueError(f"Migration row count mismatch: source has {source_count}, target has {target_count}")
+    if source_checksum != target_checksum:
+        raise ValueError("Migration checksum mismatch between source and target")
+
+    _write_checkpoint(checkpoint_path, checkpoint_key, target.task_list, None)
+
+    return MigrationResult(copied=copied, count=target_count, checksum=target_checksum)
+
+
+def _copy_batch(target: TaskRepository, batch: list[Task], checkpoint_path: Optional[str], checkpoint_key: str) -> int:
+    target.insert_tasks(batch)
+    _write_checkpoint(checkpoint_path, checkpoint_key, target.task_list, batch[-1].id)
+    return len(batch)
+
+
+def _canonical_bytes(task: Task) -> bytes:
+    return json.dumps(task.model_dump(mode="json"), sort_keys=True).encode("utf-8") + b"\n"
+
+
+def _checkpoint_key(source: TaskRepository, target: TaskRepository) -> str:
+    return f"{type(source).__name__}->{type(target).__name__}"
+
+
+def _read_checkpoint(checkpoint_path: Optional[str]) -> Dict[str, Dict[str, int]]:
+    """Read the last copied ID of every task list, keyed by the repository types of the migration."""
+    if checkpoint_path is None or not os.path.exists(checkpoint_path):
+        return {}
+    with open(checkpoint_path, "r", encoding="utf-8") as fh:
+        checkpoint = json.load(fh)
+    # Checkpoints of older versions held a single "last_id" with no task list, so they cannot be resumed.
+    return {key: value for key, value in checkpoint.items() if isinstance(value, dict)}
+
+
+def _write_checkpoint(checkpoint_path: Optional[str], checkpoint_key: str, task_list: str, last_id: Optional[int]):
+    """Record the last copied ID of a task list, or drop the list once it is migrated."""
+    if checkpoint_path is None:
+        return
+    checkpoint = _read_checkpoint(checkpoint_path)
+    task_lists = checkpoint.setdefault(checkpoint_key, {})
+    if last_id is None:
+        task_lists.pop(task_list, None)
+    else:
+        task_lists[task_list] = last_id
+    if not task_lists:
+        del checkpoint[checkpoint_key]
+    if not checkpoint:
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        return
+    temp_path = f"{checkpoint_path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as fh:
+        json.dump(checkpoint, fh)
+    os.replace(temp_path, checkpoint_path)
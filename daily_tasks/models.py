@@ -1,19 +1,102 @@
+import hashlib
+import json
+from datetime import date, datetime
 from enum import Enum
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel
 
+UPCOMING_DAYS = 7
+DEFAULT_TASK_LIST = "default"
+DESCRIPTION_PREVIEW_LENGTH = 50
+
+
+def description_preview(description: str, limit: int = DESCRIPTION_PREVIEW_LENGTH) -> str:
+    """
+    Get the display text for a task description.
+
+    Args:
+        description: The full description.
+        limit: The number of characters of the description to keep.
+
+    Returns:
+        The display text for the description.
+    """
+    return description[:limit] + '...'
+
+
+def content_hash(title: str, description: str) -> str:
+    """
+    Get the hash used to detect duplicate tasks.
+
+    Titles and descriptions are compared ignoring case, surrounding whitespace and
+    repeated whitespace, so re-imported copies of a task hash the same.
+
+    Args:
+        title: The title of the task.
+        description: The description of the task.
+
+    Returns:
+        The hex SHA-256 digest of the normalized title and description.
+    """
+    normalized = '\x1f'.join(' '.join(text.split()).casefold() for text in (title, description))
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
 
 class JSONSettings(BaseModel):
     tasks_path: str
+    archive_path: Optional[str] = None
+    use_snapshot: bool = True
+    compact: bool = False
 
 
 class SQLiteSettings(BaseModel):
     db_path: str
+    shard_count: int = 4
+    shard_workers: Optional[int] = None
+
+
+class MemorySettings(BaseModel):
+    snapshot_path: Optional[str] = None
+    snapshot_interval: float = 5.0
+    append_log: bool = True
+    fsync_log: bool = False
+
+
+class NDJSONSettings(BaseModel):
+    tasks_path: Optional[str] = None
+    compaction_interval: float = 30.0
+    compaction_ratio: float = 0.5
+    fsync: bool = False
+
+
+class ArchiveSettings(BaseModel):
+    enabled: bool = True
+    archive_after_days: int = 30
+
+
+class CompressionSettings(BaseModel):
+    enabled: bool = True
+    min_description_size: int = 4096
+    level: int = 6
+
+
+class BackupSettings(BaseModel):
+    enabled: bool = False
+    directory: Optional[str] = None
+    interval_hours: float = 24.0
+    keep: int = 7
+    pages_per_step: int = 100
 
 
 class Settings(BaseModel):
     json_settings: JSONSettings
     sqlite_settings: SQLiteSettings
+    memory_settings: MemorySettings = MemorySettings()
+    ndjson_settings: NDJSONSettings = NDJSONSettings()
+    archive_settings: ArchiveSettings = ArchiveSettings()
+    compression_settings: CompressionSettings = CompressionSettings()
+    backup_settings: BackupSettings = BackupSettings()
+    task_list: str = DEFAULT_TASK_LIST
 
 
 class GTKUIPreferences(BaseModel):
@@ -23,8 +106,20 @@ class GTKUIPreferences(BaseModel):
     max_window_height: int
 
 
+class ServerUIPreferences(BaseModel):
+    host: str = "127.0.0.1"
+    port: int = 8765
+    max_concurrent_requests: int = 8
+    keep_alive_timeout: float = 15.0
+    default_page_size: int = 50
+    max_page_size: int = 500
+    max_batch_size: int = 100
+    max_body_size: int = 1048576
+
+
 class Preferences(BaseModel):
     gtk_ui: GTKUIPreferences
+    server_ui: ServerUIPreferences = ServerUIPreferences()
 
 
 class TaskFilter(Enum):
@@ -34,6 +129,9 @@ class TaskFilter(Enum):
     ALL = "all"
     COMPLETED = "completed"
     ACTIVE = "active"
+    TODAY = "today"
+    OVERDUE = "overdue"
+    UPCOMING = "upcoming"
 
 
 class Task(BaseModel):
@@ -45,17 +143,212 @@ class Task(BaseModel):
         title (str): The title of the task.
         description (str): The description of the task.
         completed (bool): Whether the task is completed or not.
+        version (int): The version of the task, incremented on every update.
+        due_date (date): The day the task is due, if any.
+        completed_at (datetime): When the task was completed, if it is.
     """
     id: Optional[int] = None
     title: str
     description: str
     completed: bool = False
+    version: int = 1
+    due_date: Optional[date] = None
+    completed_at: Optional[datetime] = None
 
-    def description_display_text(self, limit=50) -> str:
+    def description_display_text(self, limit=DESCRIPTION_PREVIEW_LENGTH) -> str:
         """
         Get the display text for the description.
 
         Returns:
             The display text for the description.
         """
-        return self.description[:limit] + '...'
+        return description_preview(self.description, limit)
+
+    def content_hash(self) -> str:
+        """
+        Get the hash used to detect duplicates of the task.
+
+        Returns:
+            The content hash of the title and description.
+        """
+        return content_hash(self.title, self.description)
+
+    def sync_digest(self) -> int:
+        """
+        Get the digest used to compare copies of the task held by different repositories.
+
+        Every field except the ID is hashed, so the digest is known before an ID is
+        allocated; it is truncated to a signed 64-bit integer so SQLite can store it.
+
+        Returns:
+            The digest of the task.
+        """
+        canonical = json.dumps(self.model_dump(mode='json', exclude={'id'}), sort_keys=True)
+        return int.from_bytes(hashlib.sha256(canonical.encode('utf-8')).digest()[:8], 'big', signed=True)
+
+    def summary(self) -> "TaskSummary":
+        """
+        Get the summary projection of the task.
+
+        Returns:
+            The task summary.
+        """
+        return TaskSummary(
+            id=self.id,
+            title=self.title,
+            completed=self.completed,
+            version=self.version,
+            due_date=self.due_date,
+            description_preview=self.description_display_text(),
+        )
+
+
+class TaskSummary(BaseModel):
+    """
+    Projection of a task for list views, without its full description.
+
+    Attributes:
+        id (int): The unique identifier of the task.
+        title (str): The title of the task.
+        completed (bool): Whether the task is completed or not.
+        version (int): The version of the task.
+        due_date (date): The day the task is due, if any.
+        description_preview (str): The display text of the description.
+    """
+    id: int
+    title: str
+    completed: bool = False
+    version: int = 1
+    due_date: Optional[date] = None
+    description_preview: str = ""
+
+    def description_display_text(self, limit=DESCRIPTION_PREVIEW_LENGTH) -> str:
+        """
+        Get the display text for the description.
+
+        Returns:
+            The precomputed display text for the description.
+        """
+        return self.description_preview
+
+
+class TaskStats(BaseModel):
+    """
+    Task counts of a task list.
+
+    Attributes:
+        total (int): The number of tasks, including archived ones.
+        active (int): The number of tasks that are not completed.
+        completed (int): The number of completed tasks, including archived ones.
+        archived (int): The number of archived tasks.
+    """
+    total: int = 0
+    active: int = 0
+    completed: int = 0
+    archived: int = 0
+
+    def display_text(self) -> str:
+        """
+        Get the display text for the counts.
+
+        Returns:
+            The display text for the counts.
+        """
+        return f"{self.active} active / {self.completed} done"
+
+
+class TaskChange(BaseModel):
+    """
+    Entry of a repository change feed.
+
+    Attributes:
+        sequence (int): The global, monotonically increasing sequence number of the change.
+        task_id (int): The ID of the changed task.
+        operation (str): The kind of change; one of 'insert', 'update', 'delete', 'archive' or 'restore'.
+        version (int): The version of the task after the change, or before it for deletes.
+    """
+    sequence: int
+    task_id: int
+    operation: str
+    version: Optional[int] = None
+
+
+class RangeDigest(BaseModel):
+    """
+    Summary of the tasks within a range of IDs, compared to find where two repositories differ.
+
+    Attributes:
+        count (int): The number of tasks in the range.
+        digest (str): The hex SHA-256 of the IDs and sync digests of the tasks, in ID order.
+        max_id (int): The highest task ID in the range, if any.
+    """
+    count: int = 0
+    digest: str
+    max_id: Optional[int] = None
+
+
+class SyncConflictPolicy(Enum):
+    """
+    Enum class for how a sync resolves a task edited differently in both repositories.
+    """
+    KEEP_BOTH = "keep_both"
+    LOCAL = "local"
+    REMOTE = "remote"
+
+
+class RecurrenceFrequency(Enum):
+    """
+    Enum class for how often a recurring task repeats.
+    """
+    DAILY = "daily"
+    WEEKDAYS = "weekdays"
+    WEEKLY = "weekly"
+
+
+class RecurrenceRule(BaseModel):
+    """
+    Rule of a recurring task, stored once for the whole series.
+
+    Attributes:
+        id (int): The unique identifier of the rule.
+        title (str): The title of every occurrence.
+        description (str): The description of every occurrence.
+        frequency (str): A `RecurrenceFrequency` value.
+        interval (int): The number of days, or weeks for weekly rules, between occurrences; weekday rules ignore it.
+        start_date (date): The day of the first occurrence.
+        end_date (date): The last day an occurrence may fall on, if any.
+        exception_dates (List[date]): The sorted days whose occurrence was materialized as a task or skipped.
+    """
+    id: Optional[int] = None
+    title: str
+    description: str
+    frequency: str = RecurrenceFrequency.DAILY.value
+    interval: int = 1
+    start_date: date
+    end_date: Optional[date] = None
+    exception_dates: List[date] = []
+
+
+class Occurrence(BaseModel):
+    """
+    Occurrence of a recurring task on a given day, expanded from its rule.
+
+    Attributes:
+        recurrence_id (int): The ID of the rule the occurrence belongs to.
+        occurrence_date (date): The day of the occurrence.
+        title (str): The title of the occurrence.
+        description (str): The description of the occurrence.
+    """
+    recurrence_id: int
+    occurrence_date: date
+    title: str
+    description: str
+
+    def to_task(self) -> Task:
+        """
+        Get a new task for the occurrence, due on its day.
+
+        Returns:
+            The task object, without an ID.
+        """
+        return Task(title=self.title, description=self.description, due_date=self.occurrence_date)
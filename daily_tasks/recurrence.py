@@ -0,0 +1,144 @@
+"""
+This module provides the lazy expansion of recurring tasks into occurrences.
+
+A recurring task is stored once as a `RecurrenceRule`; its occurrences are only
+computed for the date window being looked at and never stored, until one is
+completed or edited and becomes a real task.
+"""
+import bisect
+import heapq
+import json
+import os
+import tempfile
+from datetime import date, timedelta
+from typing import Dict, Iterable, Iterator
+
+from daily_tasks.models import Occurrence, RecurrenceFrequency, RecurrenceRule
+
+
+def validate_recurrence_rule(rule: RecurrenceRule) -> RecurrenceRule:
+    """
+    Check that a recurrence rule can be expanded.
+
+    Args:
+        rule: The rule to check.
+
+    Returns:
+        The rule, with its exception dates sorted.
+
+    Raises:
+        ValueError: If the frequency is unknown, the interval is not positive or the end date is before the start date.
+    """
+    if rule.frequency not in {frequency.value for frequency in RecurrenceFrequency}:
+        raise ValueError(f"{rule.frequency} is not a valid recurrence frequency")
+    if rule.interval < 1:
+        raise ValueError("The recurrence interval must be at least 1")
+    if rule.end_date is not None and rule.end_date < rule.start_date:
+        raise ValueError("The recurrence end date must not be before its start date")
+    rule.exception_dates = sorted(set(rule.exception_dates))
+    return rule
+
+
+def iter_occurrences(rule: RecurrenceRule, start: date, end: date) -> Iterator[Occurrence]:
+    """
+    Generate the occurrences of a rule within a date window, in date order.
+
+    The first occurrence in the window is computed directly from the start date of
+    the rule, and the exception dates are located with bisect, so the cost depends
+    on the size of the window only, not on how long the series has been running.
+
+    Args:
+        rule: The rule to expand.
+        start: The first day of the window.
+        end: The last day of the window.
+
+    Returns:
+        An iterator of occurrences.
+    """
+    first = max(start, rule.start_date)
+    last = end if rule.end_date is None else min(end, rule.end_date)
+    if last < first:
+        return
+    if rule.frequency == RecurrenceFrequency.WEEKLY.value:
+        step = 7 * rule.interval
+    elif rule.frequency == RecurrenceFrequency.WEEKDAYS.value:
+        step = 1
+    else:
+        step = rule.interval
+    offset = (first - rule.start_date).days % step
+    if offset:
+        first += timedelta(days=step - offset)
+    low = bisect.bisect_left(rule.exception_dates, first)
+    high = bisect.bisect_right(rule.exception_dates, last)
+    exception_dates = set(rule.exception_dates[low:high])
+    day = first
+    while day <= last:
+        is_weekend = rule.frequency == RecurrenceFrequency.WEEKDAYS.value and day.weekday() >= 5
+        if not is_weekend and day not in exception_dates:
+            yield Occurrence(
+                recurrence_id=rule.id, occurrence_date=day, title=rule.title, description=rule.description
+            )
+        day += timedelta(days=step)
+
+
+def merge_occurrences(rules: Iterable[RecurrenceRule], start: date, end: date) -> Iterator[Occurrence]:
+    """
+    Generate the occurrences of several rules within a date window, ordered by day and rule ID.
+
+    Args:
+        rules: The rules to expand.
+        start: The first day of the window.
+        end: The last day of the window.
+
+    Returns:
+        An iterator of occurrences.
+    """
+    return heapq.merge(
+        *(iter_occurrences(rule, start, end) for rule in rules),
+        key=lambda occurrence: (occurrence.occurrence_date, occurrence.recurrence_id),
+    )
+
+
+def read_recurrence_rules(path: str) -> Dict[int, RecurrenceRule]:
+    """
+    Read the recurrence rules stored in a JSON file.
+
+    Args:
+        path: The path of the file.
+
+    Returns:
+        The rules by ID; empty if the file does not exist.
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as fh:
+        return {record['id']: RecurrenceRule(**record) for record in json.load(fh)}
+
+
+def write_recurrence_rules(path: str, rules: Iterable[RecurrenceRule]):
+    """
+    Replace the recurrence rules stored in a JSON file.
+
+    The rules are written to a temporary file that is renamed over the target, so
+    readers never observe a partially written file.
+
+    Args:
+        path: The path of the file.
+        rules: The rules to store.
+    """
+    content = json.dumps([rule.model_dump(mode='json') for rule in rules], indent=4)
+    fd, temp_path = tempfile.mkstemp(
+        dir=os.path.dirname(path) or '.',
+        prefix=f'.{os.path.basename(path)}.',
+        suffix='.tmp',
+    )
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as fh:
+            fh.write(content)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
@@ -1,10 +1,220 @@
 """
 This module defines an abstract base class for a task repository.
 """
+import bisect
+import hashlib
+import re
+import struct
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from datetime import date, datetime, timedelta, timezone
+from itertools import takewhile
+from typing import Callable, ContextManager, Dict, Any, Hashable, Iterable, Iterator, List, Optional, Set, Tuple
 
-from daily_tasks.models import Task, Settings, Preferences, TaskFilter
+from daily_tasks.models import (
+    Task, TaskStats, TaskSummary, Settings, Preferences, TaskFilter, Occurrence, RangeDigest, RecurrenceRule,
+    UPCOMING_DAYS,
+)
+from daily_tasks.recurrence import iter_occurrences, merge_occurrences, validate_recurrence_rule
+
+
+class VersionConflictError(ValueError):
+    """Raised when a conditional update finds a task at a different version than expected."""
+
+    def __init__(self, task_id: int, expected_version: int, current_version: int):
+        super().__init__(
+            f"Task with ID {task_id} is at version {current_version}, expected version {expected_version}"
+        )
+        self.task_id = task_id
+        self.expected_version = expected_version
+        self.current_version = current_version
+
+
+DUE_DATE_FILTERS = (TaskFilter.TODAY.value, TaskFilter.OVERDUE.value, TaskFilter.UPCOMING.value)
+
+
+def due_date_window(filter_text: str, today: date = None) -> Tuple[Optional[date], Optional[date]]:
+    """Get the inclusive range of due dates selected by a due date filter.
+
+    Args:
+        filter_text: One of the `TaskFilter.TODAY`, `TaskFilter.OVERDUE` or `TaskFilter.UPCOMING` values.
+        today: The current date; defaults to `date.today()`.
+
+    Returns:
+        A tuple of the first and last due date; None means unbounded.
+    """
+    today = today or date.today()
+    if filter_text == TaskFilter.TODAY.value:
+        return today, today
+    if filter_text == TaskFilter.OVERDUE.value:
+        return None, today - timedelta(days=1)
+    if filter_text == TaskFilter.UPCOMING.value:
+        return today + timedelta(days=1), today + timedelta(days=UPCOMING_DAYS)
+    raise ValueError(f"{filter_text} is not a due date filter option")
+
+
+# The fields of a task an update may change; the others are managed by the repository.
+EDITABLE_TASK_FIELDS = ('title', 'description', 'completed', 'due_date', 'completed_at')
+
+
+def validate_task_changes(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Check the fields of a task update and parse their values as the `Task` model does.
+
+    Args:
+        data: The fields to update; `id` and `version` are ignored.
+
+    Returns:
+        The fields to update, with parsed values.
+
+    Raises:
+        ValueError: If a field cannot be updated or a value is invalid for it.
+    """
+    changes = {key: value for key, value in data.items() if key not in ('id', 'version')}
+    unknown_fields = sorted(set(changes) - set(EDITABLE_TASK_FIELDS))
+    if unknown_fields:
+        raise ValueError(f"Task fields cannot be updated: {', '.join(map(str, unknown_fields))}")
+    task = Task(**{'title': '', 'description': '', **changes})
+    return {key: getattr(task, key) for key in changes}
+
+
+def apply_completion_changes(task: Task, changes: Dict[str, Any]) -> Dict[str, Any]:
+    """Stamp or clear `completed_at` when an update changes the completion state of a task.
+
+    Args:
+        task: The task before the update.
+        changes: The fields to update.
+
+    Returns:
+        The fields to update, including `completed_at` if it changes.
+    """
+    if 'completed' not in changes or 'completed_at' in changes:
+        return changes
+    if not changes['completed']:
+        return {**changes, 'completed_at': None}
+    if task.completed_at is None:
+        return {**changes, 'completed_at': datetime.now(timezone.utc)}
+    return changes
+
+
+def as_utc(value: datetime) -> datetime:
+    """Convert a datetime to UTC, taking naive values to be in UTC as the stored timestamps are.
+
+    Args:
+        value: The datetime to convert.
+
+    Returns:
+        The timezone-aware datetime in UTC.
+    """
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+_DIGEST_ENTRY = struct.Struct("<qq")
+
+
+def summarize_id_range(digests: Iterable[Tuple[int, int]]) -> RangeDigest:
+    """Summarize the tasks of an ID range from their IDs and sync digests.
+
+    Args:
+        digests: Pairs of task ID and `Task.sync_digest`, in ID order.
+
+    Returns:
+        The summary of the range.
+    """
+    digest = hashlib.sha256()
+    count = 0
+    task_id = None
+    for task_id, sync_digest in digests:
+        digest.update(_DIGEST_ENTRY.pack(task_id, sync_digest))
+        count += 1
+    return RangeDigest(count=count, digest=digest.hexdigest(), max_id=task_id)
+
+
+class SyncDigestCache:
+    """Sync digests of the tasks of one list by ID, for backends that do not store them.
+
+    The IDs are kept sorted and a digest is computed the first time a range
+    summary covers its task, then kept until the task is written again, so
+    summarizing a range only hashes the cached digests of the tasks inside it.
+    Backends report every write with `changed` or `removed` and call `clear`
+    when they reload their tasks. Callers hold the lock of their repository.
+    """
+
+    def __init__(self):
+        self._ids: Optional[List[int]] = None
+        self._digests: Dict[int, int] = {}
+
+    def clear(self):
+        """Forget every task, so the next summary lists the IDs again."""
+        self._ids = None
+        self._digests = {}
+
+    def changed(self, task_id: int):
+        """Record that a task was created or written."""
+        self._digests.pop(task_id, None)
+        if self._ids is not None:
+            position = bisect.bisect_left(self._ids, task_id)
+            if position == len(self._ids) or self._ids[position] != task_id:
+                self._ids.insert(position, task_id)
+
+    def removed(self, task_id: int):
+        """Record that a task was deleted."""
+        self._digests.pop(task_id, None)
+        if self._ids is not None:
+            position = bisect.bisect_left(self._ids, task_id)
+            if position < len(self._ids) and self._ids[position] == task_id:
+                del self._ids[position]
+
+    def range_digest(
+        self,
+        start_id: Optional[int],
+        end_id: Optional[int],
+        task_ids: Callable[[], Iterable[int]],
+        sync_digest: Callable[[int], int],
+    ) -> RangeDigest:
+        """Summarize the tasks with IDs in `[start_id, end_id)`.
+
+        Args:
+            start_id: The first ID of the range; unbounded if None.
+            end_id: The ID past the end of the range; unbounded if None.
+            task_ids: Lists the IDs of every task, archived ones included; only called on first use.
+            sync_digest: Computes the sync digest of a task by ID, for the tasks not cached yet.
+
+        Returns:
+            The summary of the range.
+        """
+        if self._ids is None:
+            self._ids = sorted(task_ids())
+        low = 0 if start_id is None else bisect.bisect_left(self._ids, start_id)
+        high = len(self._ids) if end_id is None else bisect.bisect_left(self._ids, end_id)
+        digests = self._digests
+        pairs = []
+        for task_id in self._ids[low:high]:
+            digest = digests.get(task_id)
+            if digest is None:
+                digest = digests[task_id] = sync_digest(task_id)
+            pairs.append((task_id, digest))
+        return summarize_id_range(pairs)
+
+
+TASK_LIST_NAME_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+
+def validate_task_list_name(name: str) -> str:
+    """Check that a task list name can be used as a file name and partition key.
+
+    Args:
+        name: The name of the task list.
+
+    Returns:
+        The name.
+
+    Raises:
+        ValueError: If the name is empty, too long or contains characters other than letters, digits, '_' and '-'.
+    """
+    if not isinstance(name, str) or not TASK_LIST_NAME_PATTERN.match(name):
+        raise ValueError(f"Invalid task list name: {name!r}; use up to 64 letters, digits, '_' or '-'")
+    return name
 
 
 class TaskRepository(ABC):
@@ -19,6 +229,8 @@ class TaskRepository(ABC):
 
         self.dt_settings = dt_settings
         self.dt_preferences = dt_preferences
+        # Every operation is scoped to the current task list.
+        self.task_list = validate_task_list_name(dt_settings.task_list)
 
     @abstractmethod
     def create_task(self, task: Task) -> Task:
@@ -43,15 +255,19 @@ class TaskRepository(ABC):
         """
 
     @abstractmethod
-    def update_task(self, task_id: int, data: Dict[str, Any]) -> Task:
-        """Update a task with new data.
+    def update_task(self, task_id: int, data: Dict[str, Any], expected_version: int = None) -> Task:
+        """Update a task with new data and increment its version.
 
         Args:
             task_id: The task object to update.
             data: The new data to update the task with.
+            expected_version: If provided, only update the task if it is still at this version.
 
         Returns:
             task object
+
+        Raises:
+            VersionConflictError: If the task is not at `expected_version`.
         """
 
     @abstractmethod
@@ -77,9 +293,438 @@ class TaskRepository(ABC):
     def filter_tasks(self, filter_text: TaskFilter) -> list[Task]:
         """Filter tasks by text.
 
+        The due date filters select tasks due today, active tasks due before today,
+        and tasks due within the next `UPCOMING_DAYS` days, ordered by due date.
+
         Args:
             filter_text: The text to filter tasks by.
 
         Returns:
             A list of task objects.
         """
+
+    @abstractmethod
+    def insert_tasks(self, tasks: List[Task]):
+        """Insert tasks keeping their IDs, replacing any existing task with the same ID.
+
+        Args:
+            tasks: The task objects to insert; every task must have an ID.
+
+        Returns:
+            None
+        """
+
+    @abstractmethod
+    def list_recurrences(self) -> List[RecurrenceRule]:
+        """List the recurrence rules of the current task list.
+
+        Returns:
+            The rules, in ID order.
+        """
+
+    @abstractmethod
+    def save_recurrence(self, rule: RecurrenceRule) -> RecurrenceRule:
+        """Store a recurrence rule of the current task list, replacing the rule with the same ID.
+
+        Args:
+            rule: The rule to store; a rule without an ID is given the next free one.
+
+        Returns:
+            The stored rule.
+        """
+
+    @abstractmethod
+    def delete_recurrence(self, recurrence_id: int):
+        """Delete a recurrence rule; tasks materialized from it are kept.
+
+        Args:
+            recurrence_id: The ID of the rule to delete.
+
+        Raises:
+            ValueError: If the rule with the given ID is not found.
+        """
+
+    def tasks_due_between(self, start: Optional[date], end: Optional[date]) -> List[Task]:
+        """List tasks due within a date window, ordered by due date.
+
+        Args:
+            start: The first due date to include; unbounded if None.
+            end: The last due date to include; unbounded if None.
+
+        Returns:
+            A list of task objects.
+        """
+        tasks = [
+            task for task in self.iter_tasks()
+            if task.due_date is not None
+            and (start is None or task.due_date >= start)
+            and (end is None or task.due_date <= end)
+        ]
+        return sorted(tasks, key=lambda task: (task.due_date, task.id))
+
+    def change_token(self) -> Optional[Hashable]:
+        """Get a value that changes whenever the tasks of the current list may have changed.
+
+        It is meant to be polled before `task_versions`, so a cache of the tasks is
+        only compared with the repository when something was written. Backends
+        should override this with a check that reads no tasks; the default
+        implementation cannot tell.
+
+        Returns:
+            A value equal to the previous one if no task was changed since, or None
+            if the repository cannot tell cheaply.
+        """
+        return None
+
+    def task_versions(self, task_ids: List[int] = None) -> Dict[int, int]:
+        """Get the current version of tasks without loading their contents.
+
+        Clients holding cached tasks can compare these versions to decide which
+        tasks need to be fetched again.
+
+        Args:
+            task_ids: The IDs of the tasks to look up; all tasks if not provided.
+
+        Returns:
+            A mapping of task ID to version; unknown IDs are omitted.
+        """
+        wanted = None if task_ids is None else set(task_ids)
+        return {
+            task.id: task.version
+            for task in self.iter_tasks()
+            if wanted is None or task.id in wanted
+        }
+
+    def range_digest(self, start_id: int = None, end_id: int = None) -> RangeDigest:
+        """Summarize the tasks with IDs in `[start_id, end_id)`, archived ones included.
+
+        Repositories holding the same tasks in a range have the same summary, so
+        a sync only needs to look inside the ranges whose summaries differ.
+        Backends should override this to read stored digests; the default
+        implementation hashes the tasks from `iter_tasks`.
+
+        Args:
+            start_id: The first ID of the range; unbounded if None.
+            end_id: The ID past the end of the range; unbounded if None.
+
+        Returns:
+            The summary of the range.
+        """
+        tasks = self.iter_tasks(after_id=None if start_id is None else start_id - 1, include_archived=True)
+        if end_id is not None:
+            tasks = takewhile(lambda task: task.id < end_id, tasks)
+        return summarize_id_range((task.id, task.sync_digest()) for task in tasks)
+
+    def max_task_id(self) -> int:
+        """Get the highest task ID in use, archived tasks included.
+
+        Backends sharing one ID space between task lists return the highest ID of
+        any list; the default implementation reads the current list.
+
+        Returns:
+            The highest ID, or 0 if there are no tasks.
+        """
+        return self.range_digest().max_id or 0
+
+    def taken_task_ids(self, task_ids: List[int]) -> Set[int]:
+        """Find which of the given IDs belong to tasks of other task lists.
+
+        `insert_tasks` refuses these IDs. The default implementation suits backends
+        keeping one ID space per task list, where no ID is ever taken.
+
+        Args:
+            task_ids: The IDs to look up.
+
+        Returns:
+            The IDs held by another task list.
+        """
+        return set()
+
+    def archive_completed_tasks(self, older_than: datetime = None) -> int:
+        """Move completed tasks out of the hot storage used by `list_tasks`.
+
+        Archived tasks are still returned by `read_task` and the completed filter.
+        Backends without an archive tier keep every task hot.
+
+        Args:
+            older_than: Archive tasks completed at or before this time; defaults to
+                `archive_settings.archive_after_days` ago.
+
+        Returns:
+            The number of archived tasks.
+        """
+        return 0
+
+    def iter_tasks(
+        self, batch_size: int = 500, after_id: int = None, include_archived: bool = False
+    ) -> Iterator[Task]:
+        """Iterate over all tasks in ID order without materializing them all at once.
+
+        Backends should override this to stream from their storage; the default
+        implementation falls back to `list_tasks`.
+
+        Args:
+            batch_size: The number of tasks to fetch from storage at a time.
+            after_id: Only yield tasks with an ID greater than this one.
+            include_archived: Whether to include archived tasks.
+
+        Returns:
+            An iterator of task objects.
+        """
+        for task in sorted(self.list_tasks(), key=lambda task: task.id):
+            if after_id is None or task.id > after_id:
+                yield task
+
+    def list_task_summaries(self, filter_text: str = TaskFilter.ALL.value) -> List[TaskSummary]:
+        """List the summaries of the tasks matching a filter, for list views.
+
+        Summaries carry a short description preview instead of the full description,
+        which is only loaded when a task is read. Backends should override this to
+        avoid reading full descriptions; the default implementation falls back to
+        `filter_tasks`.
+
+        Args:
+            filter_text: A `TaskFilter` value; defaults to all tasks.
+
+        Returns:
+            The list of task summaries, in the same order as `filter_tasks`.
+        """
+        return [task.summary() for task in self.filter_tasks(filter_text)]
+
+    def count_tasks(self, filter_text: str = TaskFilter.ALL.value) -> int:
+        """Count the tasks matching a filter without loading them.
+
+        Backends should override this with counters or aggregate queries; the
+        default implementation falls back to `filter_tasks`.
+
+        Args:
+            filter_text: A `TaskFilter` value; defaults to all tasks.
+
+        Returns:
+            The number of tasks `filter_tasks` would return.
+        """
+        return len(self.filter_tasks(filter_text))
+
+    def stats(self) -> TaskStats:
+        """Get the task counts of the current task list.
+
+        Returns:
+            The task counts.
+        """
+        completed = self.count_tasks(TaskFilter.COMPLETED.value)
+        active = self.count_tasks(TaskFilter.ACTIVE.value)
+        hot = self.count_tasks(TaskFilter.ALL.value)
+        return TaskStats(total=active + completed, active=active, completed=completed, archived=active + completed - hot)
+
+    def find_duplicate(self, task: Task) -> Optional[Task]:
+        """Find a task of the current list with the same content as a task.
+
+        Tasks are duplicates when their titles and descriptions match after the
+        normalization of `Task.content_hash`. Archived tasks are not considered.
+        Backends that keep a content hash index override this to avoid the scan.
+
+        Args:
+            task: The task to look for; its ID is ignored.
+
+        Returns:
+            The duplicate with the lowest ID, or None if there is none.
+        """
+        task_hash = task.content_hash()
+        duplicates = [existing_task for existing_task in self.list_tasks() if existing_task.content_hash() == task_hash]
+        return min(duplicates, key=lambda existing_task: existing_task.id, default=None)
+
+    def create_tasks(self, tasks: List[Task], skip_duplicates: bool = False) -> List[Task]:
+        """Create new tasks in order.
+
+        Args:
+            tasks: The task objects to create.
+            skip_duplicates: Whether to skip tasks that duplicate an existing task
+                or an earlier task of the batch instead of creating them.
+
+        Returns:
+            The created tasks.
+        """
+        created_tasks = []
+        for task in tasks:
+            if skip_duplicates and self.find_duplicate(task) is not None:
+                continue
+            created_tasks.append(self.create_task(task))
+        return created_tasks
+
+    def deduplicate_tasks(self) -> int:
+        """Delete the duplicate tasks of the current list, keeping the one with the lowest ID.
+
+        Returns:
+            The number of deleted tasks.
+        """
+        seen = set()
+        duplicate_ids = []
+        for task in sorted(self.list_tasks(), key=lambda task: task.id):
+            task_hash = task.content_hash()
+            if task_hash in seen:
+                duplicate_ids.append(task.id)
+            seen.add(task_hash)
+        for task_id in duplicate_ids:
+            self.delete_task(task_id)
+        return len(duplicate_ids)
+
+    def recompress_descriptions(self) -> int:
+        """Rewrite stored descriptions in place to match the current compression settings.
+
+        Descriptions that grew past `compression_settings.min_description_size` are
+        compressed and ones that no longer qualify are stored as plain text again.
+        Backends that do not compress descriptions have nothing to rewrite.
+
+        Returns:
+            The number of rewritten tasks.
+        """
+        return 0
+
+    def create_recurrence(self, rule: RecurrenceRule) -> RecurrenceRule:
+        """Create a new recurrence rule.
+
+        Args:
+            rule: The rule to create.
+
+        Returns:
+            The created rule.
+
+        Raises:
+            ValueError: If the rule cannot be expanded.
+        """
+        rule.id = None
+        return self.save_recurrence(validate_recurrence_rule(rule))
+
+    def read_recurrence(self, recurrence_id: int) -> RecurrenceRule:
+        """Read a recurrence rule by its ID.
+
+        Args:
+            recurrence_id: The ID of the rule to read.
+
+        Returns:
+            The rule.
+
+        Raises:
+            ValueError: If the rule with the given ID is not found.
+        """
+        for rule in self.list_recurrences():
+            if rule.id == recurrence_id:
+                return rule
+        raise ValueError(f"Recurrence with ID {recurrence_id} not found")
+
+    def iter_occurrences(self, start: date, end: date) -> Iterator[Occurrence]:
+        """Generate the occurrences of all recurrence rules within a date window.
+
+        Only the rules are read from storage; occurrences are computed as the
+        iterator is consumed, so the window size does not change what is read.
+
+        Args:
+            start: The first day of the window.
+            end: The last day of the window.
+
+        Returns:
+            An iterator of occurrences, ordered by day and rule ID.
+        """
+        return merge_occurrences(self.list_recurrences(), start, end)
+
+    def materialize_occurrence(
+        self, recurrence_id: int, occurrence_date: date, changes: Dict[str, Any] = None
+    ) -> Task:
+        """Turn an occurrence into a real task, e.g. because it is completed or edited.
+
+        The task is created from the rule, due on the day of the occurrence and with
+        `changes` applied, and the day is added to the exception dates of the rule so
+        the occurrence is no longer expanded.
+
+        Args:
+            recurrence_id: The ID of the rule of the occurrence.
+            occurrence_date: The day of the occurrence.
+            changes: The fields to set on the task.
+
+        Returns:
+            The created task.
+
+        Raises:
+            ValueError: If the rule is not found or has no pending occurrence on that day.
+        """
+        rule = self._pending_occurrence_rule(recurrence_id, occurrence_date)
+        task = next(iter_occurrences(rule, occurrence_date, occurrence_date)).to_task()
+        if changes:
+            task = Task(**{**task.model_dump(), **{key: value for key, value in changes.items() if key != 'id'}})
+        # The task is created first, so a failure in between shows the occurrence twice instead of losing it.
+        created_task = self.create_task(task)
+        rule.exception_dates = sorted({*rule.exception_dates, occurrence_date})
+        self.save_recurrence(rule)
+        return created_task
+
+    def skip_occurrence(self, recurrence_id: int, occurrence_date: date):
+        """Drop a single occurrence of a recurring task without creating a task for it.
+
+        Args:
+            recurrence_id: The ID of the rule of the occurrence.
+            occurrence_date: The day of the occurrence.
+
+        Raises:
+            ValueError: If the rule is not found or has no pending occurrence on that day.
+        """
+        rule = self._pending_occurrence_rule(recurrence_id, occurrence_date)
+        rule.exception_dates = sorted({*rule.exception_dates, occurrence_date})
+        self.save_recurrence(rule)
+
+    def _pending_occurrence_rule(self, recurrence_id: int, occurrence_date: date) -> RecurrenceRule:
+        rule = self.read_recurrence(recurrence_id)
+        if next(iter_occurrences(rule, occurrence_date, occurrence_date), None) is None:
+            raise ValueError(f"Recurrence with ID {recurrence_id} has no pending occurrence on {occurrence_date}")
+        return rule
+
+    def backup(self, directory: str) -> List[str]:
+        """Copy the storage of every task list into a directory while the repository stays in use.
+
+        Each task list is copied in a consistent state; writers are blocked for
+        short moments at most.
+
+        Args:
+            directory: The existing, empty directory to write the copies to.
+
+        Returns:
+            The names of the written files.
+
+        Raises:
+            ValueError: If the backend does not support backups.
+        """
+        raise ValueError(f"{type(self).__name__} does not support backups")
+
+    def transaction(self) -> ContextManager[None]:
+        """Group the operations of a `with` block into a single unit of work.
+
+        The changes made by the block are committed at once when it exits and all
+        of them are rolled back if it raises. Operations inside the block see its
+        changes, while other threads wait for it to finish before writing. A
+        transaction opened inside another one on the same thread joins it.
+
+        Returns:
+            A context manager enclosing the unit of work.
+
+        Raises:
+            ValueError: If the backend does not support transactions.
+        """
+        raise ValueError(f"{type(self).__name__} does not support transactions")
+
+    def task_lists(self) -> List[str]:
+        """Get the names of all task lists, including the current one.
+
+        Returns:
+            The sorted list of task list names.
+        """
+        return [self.task_list]
+
+    def use_task_list(self, name: str):
+        """Scope all further operations to another task list, creating it if needed.
+
+        Args:
+            name: The name of the task list.
+
+        Raises:
+            ValueError: If the name is not a valid task list name.
+        """
+        self.task_list = validate_task_list_name(name)
@@ -2,13 +2,44 @@
 This module defines a concrete implementation of a task repository using JSON files.
 """
 import os
+import sys
 import json
-from typing import Dict, Any
+import base64
+import bisect
+import heapq
+import hashlib
+import mmap
+import struct
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable, Dict, Any, Hashable, Iterator, List, Optional, Tuple
 
-from daily_tasks.repository import TaskRepository
-from daily_tasks.models import Task, TaskFilter
+try:
+    import fcntl
+except ImportError:
+    # Advisory locking is unavailable on this platform; writes remain atomic.
+    fcntl = None
+
+from daily_tasks.repository import (
+    TaskRepository, SyncDigestCache, VersionConflictError, DUE_DATE_FILTERS, TASK_LIST_NAME_PATTERN,
+    apply_completion_changes, as_utc, due_date_window, validate_task_changes, validate_task_list_name,
+)
+from daily_tasks.models import Task, TaskFilter, RangeDigest, RecurrenceRule, DEFAULT_TASK_LIST
+from daily_tasks.locking import ReadWriteLock
+from daily_tasks.compression import compress_description, decompress_description
+from daily_tasks.recurrence import read_recurrence_rules, write_recurrence_rules
+from daily_tasks.serialization import decode_header, encode_header, encode_record, iter_records, task_fields
 
 MAX_TASKS_PER_FILE = 2000
+# Tasks files of lists other than the default one are named `<tasks_path stem>.<list name>.tasks.json`.
+TASK_LIST_SUFFIX = '.tasks.json'
+
+SNAPSHOT_MAGIC = b"DTS2"
+# mtime_ns and size of the JSON file the snapshot was built from, the SHA-256 of its contents,
+# and the number of tasks, which tells a snapshot cut between two records from a complete one.
+_SNAPSHOT_HEADER = struct.Struct("<qq32sq")
 
 class JSONTaskRepository(TaskRepository):
     """Concrete implementation of a task repository using JSON files."""
@@ -22,8 +53,38 @@ class JSONTaskRepository(TaskRepository):
         elif self.dt_settings.json_settings.tasks_path is None:
             raise ValueError("json_settings.tasks_path must be provided")
 
-        tasks_path = self.dt_settings.json_settings.tasks_path
-        os.makedirs(os.path.dirname(tasks_path), exist_ok=True)
+        self.base_tasks_path = self.dt_settings.json_settings.tasks_path
+        os.makedirs(os.path.dirname(self.base_tasks_path), exist_ok=True)
+        self.use_snapshot = self.dt_settings.json_settings.use_snapshot
+        self.compact = self.dt_settings.json_settings.compact
+        # Threads share the in-memory tasks: reads run concurrently, while writes and
+        # reloads of a file changed by another process hold the lock exclusively.
+        self._rwlock = ReadWriteLock()
+        self._archive_lock = threading.Lock()
+        # The thread running a transaction, and the file writes it defers to its commit by path.
+        self._transaction_owner: Optional[int] = None
+        self._pending_writes: Dict[str, Callable[[], None]] = {}
+        self._pending_recurrences: Optional[dict[int, RecurrenceRule]] = None
+        self._open_task_list(self.task_list)
+
+    def _task_list_path(self, name: str) -> str:
+        """Get the tasks file of a task list; the default list keeps using `tasks_path` itself."""
+        if name == DEFAULT_TASK_LIST:
+            return self.base_tasks_path
+        return f'{os.path.splitext(self.base_tasks_path)[0]}.{name}{TASK_LIST_SUFFIX}'
+
+    def _task_list_files(self, name: str) -> Tuple[str, str, str]:
+        """Get the tasks, archive and recurrences files of a task list."""
+        tasks_path = self._task_list_path(name)
+        archive_path = self.dt_settings.json_settings.archive_path
+        if archive_path is not None and name != DEFAULT_TASK_LIST:
+            archive_path = f'{os.path.splitext(archive_path)[0]}.{name}.json'
+        archive_path = archive_path or f'{os.path.splitext(tasks_path)[0]}.archive.json'
+        return tasks_path, archive_path, f'{os.path.splitext(tasks_path)[0]}.recurrences.json'
+
+    def _open_task_list(self, name: str):
+        """Point the repository at the files of a task list and load its tasks."""
+        tasks_path, archive_path, recurrences_path = self._task_list_files(name)
         if not os.path.exists(tasks_path):
             with open(tasks_path, 'w+', encoding='utf-8') as fh:
                 fh.write('[]')
@@ -31,33 +92,459 @@ class JSONTaskRepository(TaskRepository):
         else:
             print(f'Using existing tasks file at {tasks_path}')
 
+        self.task_list = name
         self.tasks_path = tasks_path
+        self.lock_path = f'{tasks_path}.lock'
+        self.snapshot_path = f'{tasks_path}.snapshot'
+        self.archive_path = archive_path
+        self.recurrences_path = recurrences_path
         self.tasks: dict[int, Task] = {}
+        # (due_date, id) pairs of tasks with a due date, kept sorted for bisect range lookups.
+        self.due_index: list[tuple[date, int]] = []
+        self.completed_count = 0
+        # Sorted IDs of the tasks by content hash, for duplicate detection without a scan.
+        self.hash_index: dict[str, list[int]] = {}
         self.next_id = None
-        self.load_tasks()
+        self._signature: Optional[Tuple[int, int, int]] = None
+        # Encoded JSON fragments and snapshot records by task ID, reused by saves until the task changes.
+        self._json_fragments: dict[int, bytes] = {}
+        self._snapshot_records: dict[int, bytes] = {}
+        # Archived tasks are only read from disk when a lookup falls through to them.
+        self._archive: Optional[dict[int, Task]] = None
+        self._archive_signature: Optional[Tuple[int, int, int]] = None
+        # Archive file signature and record count, so counts do not build the archived tasks.
+        self._archive_count: Optional[Tuple[Tuple[int, int, int], int]] = None
+        # Sync digests of hot and archived tasks, so range summaries do not serialize tasks.
+        self._sync_digests = SyncDigestCache()
+        with self._file_lock(exclusive=False):
+            self.load_tasks()
+
+    def task_lists(self) -> List[str]:
+        """
+        Get the names of all task lists.
+
+        Each list other than the default one is stored in its own tasks file next
+        to `tasks_path`, so the lists are found by name without opening any file.
+
+        Returns:
+            The sorted list of task list names.
+        """
+        directory = os.path.dirname(self.base_tasks_path) or '.'
+        prefix = f'{os.path.basename(os.path.splitext(self.base_tasks_path)[0])}.'
+        names = {DEFAULT_TASK_LIST, self.task_list}
+        for file_name in os.listdir(directory):
+            if file_name.startswith(prefix) and file_name.endswith(TASK_LIST_SUFFIX):
+                name = file_name[len(prefix):-len(TASK_LIST_SUFFIX)]
+                if TASK_LIST_NAME_PATTERN.match(name):
+                    names.add(name)
+        return sorted(names)
+
+    def use_task_list(self, name: str):
+        """
+        Switch to another task list, creating its tasks file if needed.
+
+        Only the tasks of the new list are loaded; other lists are never read.
+        The switch applies to every thread using this repository.
+
+        Args:
+            name: The name of the task list.
+        """
+        validate_task_list_name(name)
+        if self._in_transaction():
+            raise ValueError("Cannot switch task lists inside a transaction")
+        with self._rwlock.write():
+            self._open_task_list(name)
 
     def load_tasks(self):
-        """Load all tasks"""
+        """
+        Load all tasks.
+
+        If a binary snapshot matching the current tasks file exists, tasks are read
+        from it without parsing or validating the JSON; otherwise the JSON is parsed
+        and the snapshot is rebuilt for the next start.
+        """
         print(f'Loading tasks from {self.tasks_path}')
-        with open(self.tasks_path, 'r', encoding='utf-8') as fh:
-            records = json.load(fh)
-            for record in records:
-                task = Task(**record)
-                self.tasks[task.id] = task
-            self.next_id = len(records) + 1
+        with open(self.tasks_path, 'rb') as fh:
+            signature = self._file_signature(fh.fileno())
+            content = fh.read()
+        content_hash = hashlib.sha256(content).digest()
+        self._json_fragments, self._snapshot_records = {}, {}
+
+        tasks = self._load_snapshot(signature, content_hash) if self.use_snapshot else None
+        if tasks is None:
+            tasks = {}
+            for record in json.loads(content):
+                task = self._record_to_task(record)
+                tasks[task.id] = task
+            if self.use_snapshot:
+                self._write_snapshot(tasks, signature, content_hash)
+
+        self.tasks = tasks
+        self.due_index = sorted((task.due_date, task.id) for task in tasks.values() if task.due_date is not None)
+        # Kept up to date by _index_task and _unindex_task, so counts never scan the tasks.
+        self.completed_count = sum(1 for task in tasks.values() if task.completed)
+        self.hash_index = {}
+        for task_id in sorted(tasks):
+            self.hash_index.setdefault(tasks[task_id].content_hash(), []).append(task_id)
+        self.next_id = max(self.tasks, default=0) + 1
+        self._signature = signature
+        self._sync_digests.clear()
 
     def _save_tasks(self):
-        """Save all tasks"""
-        if len(self.tasks) == 0:
-            with open(self.tasks_path, 'w', encoding='utf-8') as fh:
-                fh.write('[]')
-                return
-        elif len(self.tasks) >= MAX_TASKS_PER_FILE:
+        """
+        Save all tasks.
+
+        The file is assembled from the cached JSON fragment of each task, so only
+        tasks invalidated since the last save are encoded again.
+        """
+        if len(self.tasks) >= MAX_TASKS_PER_FILE:
             raise ValueError(f"Maximum number of tasks per file exceeded: {MAX_TASKS_PER_FILE}; Delete some tasks first.")
+        if self._defer_write(self.tasks_path, self._save_tasks):
+            self.next_id = max(self.tasks, default=0) + 1
+            return
+
+        # Rebuilt rather than updated in place, which also drops the fragments of removed tasks.
+        fragments = self._json_fragments
+        self._json_fragments = {
+            task_id: fragments.get(task_id) or self._encode_task(task) for task_id, task in self.tasks.items()
+        }
+        if not self._json_fragments:
+            content = b'[]'
+        elif self.compact:
+            content = b'[' + b','.join(self._json_fragments.values()) + b']'
+        else:
+            content = b'[\n' + b',\n'.join(self._json_fragments.values()) + b'\n]'
+        self._signature = self._write_atomically(self.tasks_path, content)
+        self.next_id = max(self.tasks, default=0) + 1
+        if self.use_snapshot:
+            self._write_snapshot(self.tasks, self._signature, hashlib.sha256(content).digest())
+
+    def _encode_task(self, task: Task) -> bytes:
+        """
+        Encode a task as it appears in the tasks file.
+
+        Indented fragments are nested one level deep, so joining them gives the
+        same bytes as `json.dumps` of the whole list with `indent=4`.
+        """
+        if self.compact:
+            return json.dumps(self._task_to_record(task), separators=(',', ':')).encode('utf-8')
+        lines = json.dumps(self._task_to_record(task), indent=4).split('\n')
+        return '\n'.join(f'    {line}' for line in lines).encode('utf-8')
+
+    def _invalidate_task(self, task_id: int):
+        """Drop the cached encodings of a task whose contents changed."""
+        self._json_fragments.pop(task_id, None)
+        self._snapshot_records.pop(task_id, None)
+        self._sync_digests.changed(task_id)
+
+    def _task_to_record(self, task: Task) -> Dict[str, Any]:
+        """
+        Convert a task to its JSON record.
+
+        Large descriptions are stored zlib-compressed and base64-encoded under
+        `description_zlib`, next to an uncompressed `description_preview`.
+        """
+        record = task.model_dump(mode='json')
+        compressed = compress_description(task.description, self.dt_settings.compression_settings)
+        if compressed is not None:
+            del record['description']
+            record['description_preview'] = task.description_display_text()
+            record['description_zlib'] = base64.b64encode(compressed).decode('ascii')
+        return record
+
+    @staticmethod
+    def _record_to_task(record: Dict[str, Any]) -> Task:
+        if 'description_zlib' in record:
+            record = dict(record)
+            record.pop('description_preview', None)
+            record['description'] = decompress_description(base64.b64decode(record.pop('description_zlib')))
+        return Task(**record)
+
+    def _write_atomically(self, path: str, content: bytes, sync: bool = True) -> Tuple[int, int, int]:
+        """
+        Replace a file with new content.
+
+        The content is written to a temporary file in the same directory and renamed
+        over the target, so readers never observe a partially written file.
+
+        Returns:
+            The signature of the new file.
+        """
+        fd, temp_path = tempfile.mkstemp(
+            dir=os.path.dirname(path) or '.',
+            prefix=f'.{os.path.basename(path)}.',
+            suffix='.tmp',
+        )
+        try:
+            with os.fdopen(fd, 'wb') as fh:
+                fh.write(content)
+                fh.flush()
+                if sync:
+                    os.fsync(fh.fileno())
+                signature = self._file_signature(fh.fileno())
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return signature
+
+    def _load_snapshot(self, signature: Tuple[int, int, int], content_hash: bytes) -> Optional[dict[int, Task]]:
+        """
+        Load tasks from the binary snapshot if it was built from the current tasks file.
+
+        The snapshot is memory-mapped and its records are trusted, so tasks are
+        constructed without pydantic validation. Values are copied out of the map
+        as they are decoded, so no view into it outlives the read.
+
+        Returns:
+            The tasks by ID, or None if there is no valid snapshot.
+        """
+        try:
+            with open(self.snapshot_path, 'rb') as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                if buffer[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+                    return None
+                mtime_ns, size, snapshot_hash, count = _SNAPSHOT_HEADER.unpack_from(buffer, len(SNAPSHOT_MAGIC))
+                if (mtime_ns, size, snapshot_hash) != (signature[0], signature[1], content_hash):
+                    return None
+                fields, offset = decode_header(buffer, len(SNAPSHOT_MAGIC) + _SNAPSHOT_HEADER.size)
+                if fields != task_fields():
+                    return None
+                tasks = {}
+                records = iter_records(buffer, offset, fields)
+                try:
+                    for values in records:
+                        task = Task.model_construct(**values)
+                        tasks[task.id] = task
+                finally:
+                    records.close()
+                return tasks if len(tasks) == count else None
+        except (OSError, ValueError, IndexError, BufferError, struct.error):
+            # A truncated or corrupt snapshot is only a stale cache; the tasks file is read instead.
+            return None
+
+    def _write_snapshot(self, tasks: dict[int, Task], signature: Tuple[int, int, int], content_hash: bytes):
+        """Rebuild the binary snapshot for the given tasks file contents, reusing cached records."""
+        fields = task_fields()
+        records = self._snapshot_records
+        self._snapshot_records = {
+            task_id: records.get(task_id) or encode_record(task.model_dump(), fields)
+            for task_id, task in tasks.items()
+        }
+        content = b''.join([
+            SNAPSHOT_MAGIC,
+            _SNAPSHOT_HEADER.pack(signature[0], signature[1], content_hash, len(self._snapshot_records)),
+            encode_header(fields),
+            *self._snapshot_records.values(),
+        ])
+        try:
+            # The snapshot is only a cache of the tasks file, so it is not fsynced.
+            self._write_atomically(self.snapshot_path, content, sync=False)
+        except OSError as e:
+            print(f'Could not write tasks snapshot to {self.snapshot_path}: {e}')
 
-        with open(self.tasks_path, 'w', encoding='utf-8') as fh:
-            json.dump([task.model_dump() for task in self.tasks.values()], fh, indent=4)
-            self.next_id = len(self.tasks) + 1
+    def _load_archive(self) -> dict[int, Task]:
+        """Get the archived tasks, reading the archive file only if it changed since the last read."""
+        with self._archive_lock:
+            return self._read_archive()
+
+    def _read_archive(self) -> dict[int, Task]:
+        if self.archive_path in self._pending_writes:
+            # Changed by the current transaction and not written yet.
+            return self._archive
+        try:
+            stat = os.stat(self.archive_path)
+        except FileNotFoundError:
+            self._archive, self._archive_signature = {}, None
+            return self._archive
+        if self._archive is None or (stat.st_mtime_ns, stat.st_size, stat.st_ino) != self._archive_signature:
+            with open(self.archive_path, 'rb') as fh:
+                signature = self._file_signature(fh.fileno())
+                records = json.loads(fh.read())
+            self._archive = {record['id']: self._record_to_task(record) for record in records}
+            self._archive_signature = signature
+            self._sync_digests.clear()
+        return self._archive
+
+    def _count_archive(self) -> int:
+        """Count the archived tasks, parsing the archive file at most once per change and never validating it."""
+        with self._archive_lock:
+            if self.archive_path in self._pending_writes:
+                return len(self._archive)
+            try:
+                stat = os.stat(self.archive_path)
+            except FileNotFoundError:
+                return 0
+            signature = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+            if self._archive is not None and signature == self._archive_signature:
+                return len(self._archive)
+            if self._archive_count is None or self._archive_count[0] != signature:
+                with open(self.archive_path, 'rb') as fh:
+                    signature = self._file_signature(fh.fileno())
+                    self._archive_count = signature, len(json.loads(fh.read()))
+            return self._archive_count[1]
+
+    def _has_archive(self) -> bool:
+        """Check whether the current list has an archive file, or one the current transaction is going to write."""
+        return self.archive_path in self._pending_writes or os.path.exists(self.archive_path)
+
+    def _save_archive(self):
+        if self._defer_write(self.archive_path, self._save_archive):
+            return
+        records = [self._task_to_record(task) for task in self._archive.values()]
+        if self.compact:
+            content = json.dumps(records, separators=(',', ':'))
+        else:
+            content = json.dumps(records, indent=4)
+        self._archive_signature = self._write_atomically(self.archive_path, content.encode('utf-8'))
+
+    def _allocate_id(self) -> int:
+        """Get the next task ID, past the IDs of both hot and archived tasks."""
+        if not self._has_archive():
+            return self.next_id
+        return max(self.next_id, max(self._load_archive(), default=0) + 1)
+
+    def _index_task(self, task: Task):
+        if task.completed:
+            self.completed_count += 1
+        bisect.insort(self.hash_index.setdefault(task.content_hash(), []), task.id)
+        if task.due_date is not None:
+            bisect.insort(self.due_index, (task.due_date, task.id))
+
+    def _unindex_task(self, task: Task):
+        if task.completed:
+            self.completed_count -= 1
+        task_hash = task.content_hash()
+        task_ids = self.hash_index.get(task_hash, [])
+        if task.id in task_ids:
+            task_ids.remove(task.id)
+            if not task_ids:
+                del self.hash_index[task_hash]
+        if task.due_date is not None:
+            position = bisect.bisect_left(self.due_index, (task.due_date, task.id))
+            if position < len(self.due_index) and self.due_index[position] == (task.due_date, task.id):
+                del self.due_index[position]
+
+    @staticmethod
+    def _file_signature(fd: int) -> Tuple[int, int, int]:
+        stat = os.fstat(fd)
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def _is_stale(self) -> bool:
+        """Check whether the tasks file was changed by another process since it was loaded."""
+        try:
+            stat = os.stat(self.tasks_path)
+        except FileNotFoundError:
+            return False
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino) != self._signature
+
+    def _refresh(self):
+        """Reload the tasks if the file was changed by another process."""
+        if self._is_stale():
+            self.load_tasks()
+
+    @contextmanager
+    def _file_lock(self, exclusive: bool, lock_path: str = None):
+        """
+        Hold an advisory lock on the tasks file.
+
+        Args:
+            exclusive: Whether to take an exclusive (write) lock instead of a shared (read) lock.
+            lock_path: The lock file of another task list; defaults to the one of the current list.
+        """
+        # The thread running a transaction already holds the exclusive lock of the current list.
+        if fcntl is None or (self._in_transaction() and lock_path in (None, self.lock_path)):
+            yield
+            return
+        with open(lock_path or self.lock_path, 'a+', encoding='utf-8') as fh:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+
+    @contextmanager
+    def _locked(self, exclusive: bool = False):
+        """
+        Lock the tasks file and the in-memory tasks, making sure they are current.
+
+        The file lock is always taken before the thread lock, so threads and
+        processes acquire them in the same order.
+
+        Args:
+            exclusive: Whether the caller is going to write to the tasks file.
+        """
+        with self._file_lock(exclusive):
+            if exclusive:
+                with self._rwlock.write():
+                    self._refresh()
+                    yield
+                return
+            if self._is_stale():
+                with self._rwlock.write():
+                    self._refresh()
+            with self._rwlock.read():
+                yield
+
+    def _in_transaction(self) -> bool:
+        """Check whether the current thread is running a transaction."""
+        return self._transaction_owner == threading.get_ident()
+
+    def _defer_write(self, path: str, write: Callable[[], None]) -> bool:
+        """
+        Leave a file write to the commit of the transaction of the current thread, if there is one.
+
+        Returns:
+            Whether the write was deferred.
+        """
+        if not self._in_transaction():
+            return False
+        self._pending_writes[path] = write
+        return True
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """
+        Apply the operations of the block to the in-memory tasks and write each changed file once when it exits.
+
+        The tasks file is locked exclusively for the whole block. The changed files
+        are written in the order they were first changed, keeping the crash safety
+        order of the first operation. If the block raises, the files were never
+        written and the tasks are reloaded from them.
+        """
+        if self._in_transaction():
+            yield
+            return
+        with self._locked(exclusive=True):
+            self._transaction_owner = threading.get_ident()
+            try:
+                yield
+                self._transaction_owner = None
+                for write in self._pending_writes.values():
+                    write()
+            except BaseException:
+                self._transaction_owner = None
+                self.load_tasks()
+                with self._archive_lock:
+                    self._archive = None
+                raise
+            finally:
+                self._transaction_owner = None
+                self._pending_writes = {}
+                self._pending_recurrences = None
+
+    def _read_recurrences(self) -> dict[int, RecurrenceRule]:
+        """Read the recurrence rules of the current list, including the changes of the current transaction."""
+        if self._in_transaction() and self._pending_recurrences is not None:
+            return self._pending_recurrences
+        return read_recurrence_rules(self.recurrences_path)
+
+    def _write_recurrences(self, rules: dict[int, RecurrenceRule]):
+        path = self.recurrences_path
+        if self._defer_write(path, lambda: write_recurrence_rules(path, rules.values())):
+            self._pending_recurrences = rules
+            return
+        write_recurrence_rules(path, rules.values())
 
     def create_task(self, task: Task) -> Task:
         """
@@ -69,11 +556,78 @@ class JSONTaskRepository(TaskRepository):
         Returns:
             The created task object.
         """
-        task.id = self.next_id
-        self.tasks[task.id] = task
-        self._save_tasks()
+        with self._locked(exclusive=True):
+            task.id = self._allocate_id()
+            task.version = 1
+            if task.completed and task.completed_at is None:
+                task.completed_at = datetime.now(timezone.utc)
+            self.tasks[task.id] = task
+            self._invalidate_task(task.id)
+            self._index_task(task)
+            self._save_tasks()
         return task
 
+    def create_tasks(self, tasks: List[Task], skip_duplicates: bool = False) -> List[Task]:
+        """
+        Create new tasks in order, writing the file once.
+
+        Args:
+            tasks: The task objects to create.
+            skip_duplicates: Whether to skip tasks that duplicate an existing task
+                or an earlier task of the batch instead of creating them.
+
+        Returns:
+            The created tasks.
+        """
+        created_tasks = []
+        with self._locked(exclusive=True):
+            next_id = self._allocate_id()
+            for task in tasks:
+                if skip_duplicates and task.content_hash() in self.hash_index:
+                    continue
+                task.id = next_id
+                task.version = 1
+                if task.completed and task.completed_at is None:
+                    task.completed_at = datetime.now(timezone.utc)
+                self.tasks[task.id] = task
+                self._invalidate_task(task.id)
+                self._index_task(task)
+                created_tasks.append(task)
+                next_id += 1
+            if created_tasks:
+                self._save_tasks()
+        return created_tasks
+
+    def find_duplicate(self, task: Task) -> Optional[Task]:
+        """
+        Find a task of the current list with the same content as a task.
+
+        Args:
+            task: The task to look for; its ID is ignored.
+
+        Returns:
+            The duplicate with the lowest ID, or None if there is none.
+        """
+        with self._locked():
+            task_ids = self.hash_index.get(task.content_hash())
+            return self.tasks[task_ids[0]] if task_ids else None
+
+    def deduplicate_tasks(self) -> int:
+        """
+        Delete the duplicate tasks of the current list, keeping the one with the lowest ID.
+
+        Returns:
+            The number of deleted tasks.
+        """
+        with self._locked(exclusive=True):
+            duplicate_ids = [task_id for task_ids in self.hash_index.values() for task_id in task_ids[1:]]
+            for task_id in duplicate_ids:
+                self._unindex_task(self.tasks.pop(task_id))
+                self._sync_digests.removed(task_id)
+            if duplicate_ids:
+                self._save_tasks()
+        return len(duplicate_ids)
+
     def read_task(self, task_id: int) -> Task:
         """
         Read a task by its ID.
@@ -84,32 +638,54 @@ class JSONTaskRepository(TaskRepository):
         Returns:
             The task object.
         """
-        task = self.tasks.get(task_id)
+        with self._locked():
+            task = self.tasks.get(task_id)
+            if task is None and self._has_archive():
+                task = self._load_archive().get(task_id)
         if task is None:
             raise ValueError(f"Task with ID {task_id} not found")
         return task
 
-    def update_task(self, task_id: int, data: Dict[str, Any]) -> Task:
+    def update_task(self, task_id: int, data: Dict[str, Any], expected_version: int = None) -> Task:
         """
-        Update a task with new data.
+        Update a task with new data and increment its version.
 
         Args:
             task_id: The task object to update.
             data: The new data to update the task with.
+            expected_version: If provided, only update the task if it is still at this version.
 
         Returns:
             None
 
         Raises:
             ValueError: If the task with the given ID is not found.
+            VersionConflictError: If the task is not at `expected_version`.
         """
-        task = self.tasks.get(task_id)
-        if task is None:
-            raise ValueError(f"Task with ID {task_id} not found")
-        task.__dict__.update(data)
-        self.tasks[task_id] = task
-        self._save_tasks()
-        return task
+        with self._locked(exclusive=True):
+            task = self.tasks.get(task_id)
+            archived = False
+            if task is None and self._has_archive():
+                task = self._load_archive().get(task_id)
+                archived = task is not None
+            if task is None:
+                raise ValueError(f"Task with ID {task_id} not found")
+            if expected_version is not None and task.version != expected_version:
+                raise VersionConflictError(task_id, expected_version, task.version)
+            changes = validate_task_changes(data)
+            changes = apply_completion_changes(task, changes)
+            updated_task = Task(**{**task.model_dump(), **changes, 'version': task.version + 1})
+            if not archived:
+                self._unindex_task(task)
+            self.tasks[task_id] = updated_task
+            self._invalidate_task(task_id)
+            self._index_task(updated_task)
+            self._save_tasks()
+            if archived:
+                # Updated tasks move back to the hot tier.
+                del self._archive[task_id]
+                self._save_archive()
+        return updated_task
 
     def delete_task(self, task_id: int):
         """
@@ -124,10 +700,272 @@ class JSONTaskRepository(TaskRepository):
         Raises:
             ValueError: If the task with the given ID is not found.
         """
-        task = self.tasks.pop(task_id, None)
-        if task is None:
-            raise ValueError(f"Task with ID {task_id} not found")
-        self._save_tasks()
+        with self._locked(exclusive=True):
+            task = self.tasks.pop(task_id, None)
+            if task is None and self._has_archive():
+                if self._load_archive().pop(task_id, None) is not None:
+                    self._sync_digests.removed(task_id)
+                    self._save_archive()
+                    return
+            if task is None:
+                raise ValueError(f"Task with ID {task_id} not found")
+            self._unindex_task(task)
+            self._sync_digests.removed(task_id)
+            self._save_tasks()
+
+    def archive_completed_tasks(self, older_than: datetime = None) -> int:
+        """
+        Move old completed tasks from the tasks file to the archive file.
+
+        Args:
+            older_than: Archive tasks completed at or before this time; defaults to
+                `archive_settings.archive_after_days` ago.
+
+        Returns:
+            The number of archived tasks.
+        """
+        if older_than is None:
+            older_than = datetime.now(timezone.utc) - timedelta(
+                days=self.dt_settings.archive_settings.archive_after_days
+            )
+        older_than = as_utc(older_than)
+        with self._locked(exclusive=True):
+            expired = [
+                task for task in self.tasks.values()
+                if task.completed and task.completed_at is not None and as_utc(task.completed_at) <= older_than
+            ]
+            if not expired:
+                return 0
+            archive = self._load_archive()
+            for task in expired:
+                archive[task.id] = task
+            # Write the archive first so a crash in between leaves duplicates, not lost tasks.
+            self._save_archive()
+            for task in expired:
+                del self.tasks[task.id]
+                self._unindex_task(task)
+            self._save_tasks()
+        return len(expired)
+
+    def list_recurrences(self) -> List[RecurrenceRule]:
+        """
+        List the recurrence rules of the current task list.
+
+        Returns:
+            The rules, in ID order.
+        """
+        with self._locked():
+            rules = self._read_recurrences()
+        return [rules[rule_id] for rule_id in sorted(rules)]
+
+    def save_recurrence(self, rule: RecurrenceRule) -> RecurrenceRule:
+        """
+        Store a recurrence rule in the recurrences file of the current task list.
+
+        Args:
+            rule: The rule to store; a rule without an ID is given the next free one.
+
+        Returns:
+            The stored rule.
+        """
+        with self._locked(exclusive=True):
+            rules = self._read_recurrences()
+            if rule.id is None:
+                rule.id = max(rules, default=0) + 1
+            rules[rule.id] = rule
+            self._write_recurrences(rules)
+        return rule
+
+    def delete_recurrence(self, recurrence_id: int):
+        """
+        Delete a recurrence rule from the recurrences file of the current task list.
+
+        Args:
+            recurrence_id: The ID of the rule to delete.
+
+        Raises:
+            ValueError: If the rule with the given ID is not found.
+        """
+        with self._locked(exclusive=True):
+            rules = self._read_recurrences()
+            if rules.pop(recurrence_id, None) is None:
+                raise ValueError(f"Recurrence with ID {recurrence_id} not found")
+            self._write_recurrences(rules)
+
+    def recompress_descriptions(self) -> int:
+        """
+        Rewrite the tasks and archive files so every description is stored as the
+        current compression settings require.
+
+        As in `SQLiteTaskRepository`, only tasks whose description changes between
+        compressed and plain text are counted, and a file is only written if one
+        of its tasks changes.
+
+        Returns:
+            The number of rewritten tasks.
+        """
+        with self._locked(exclusive=True):
+            changed_ids = self._recompressed_ids(self.tasks, self.tasks_path)
+            if changed_ids:
+                for task_id in changed_ids:
+                    self._invalidate_task(task_id)
+                self._save_tasks()
+            rewritten = len(changed_ids)
+            if self._has_archive():
+                archived_changed_ids = self._recompressed_ids(self._load_archive(), self.archive_path)
+                if archived_changed_ids:
+                    self._save_archive()
+                rewritten += len(archived_changed_ids)
+        return rewritten
+
+    def _recompressed_ids(self, tasks: dict[int, Task], path: str) -> List[int]:
+        """Get the IDs of the tasks whose description is stored otherwise than the compression settings require."""
+        try:
+            with open(path, 'rb') as fh:
+                compressed_ids = {record['id'] for record in json.loads(fh.read()) if 'description_zlib' in record}
+        except FileNotFoundError:
+            compressed_ids = set()
+        settings = self.dt_settings.compression_settings
+        return [
+            task_id for task_id, task in tasks.items()
+            if (task_id in compressed_ids) != (compress_description(task.description, settings) is not None)
+        ]
+
+    def change_token(self) -> Hashable:
+        """
+        Get the list and the signature of its tasks file, which every save and every writer in another process changes.
+        """
+        try:
+            stat = os.stat(self.tasks_path)
+        except FileNotFoundError:
+            return self.task_list, None
+        return self.task_list, (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def range_digest(self, start_id: int = None, end_id: int = None) -> RangeDigest:
+        """
+        Summarize the tasks with IDs in `[start_id, end_id)`, archived ones included, from cached sync digests.
+
+        Args:
+            start_id: The first ID of the range; unbounded if None.
+            end_id: The ID past the end of the range; unbounded if None.
+
+        Returns:
+            The summary of the range.
+        """
+        with self._locked():
+            archive = self._load_archive() if self._has_archive() else {}
+
+            def sync_digest(task_id: int) -> int:
+                task = self.tasks.get(task_id)
+                return (archive[task_id] if task is None else task).sync_digest()
+
+            return self._sync_digests.range_digest(
+                start_id, end_id, lambda: self.tasks.keys() | archive.keys(), sync_digest
+            )
+
+    def task_versions(self, task_ids: list[int] = None) -> Dict[int, int]:
+        """
+        Get the current version of tasks without copying their contents.
+
+        Args:
+            task_ids: The IDs of the tasks to look up; all tasks if not provided.
+
+        Returns:
+            A mapping of task ID to version; unknown IDs are omitted.
+        """
+        with self._locked():
+            if task_ids is None:
+                return {task_id: task.version for task_id, task in self.tasks.items()}
+            return {task_id: self.tasks[task_id].version for task_id in task_ids if task_id in self.tasks}
+
+    def insert_tasks(self, tasks: list[Task]):
+        """
+        Insert tasks keeping their IDs, replacing any existing task with the same ID.
+
+        All tasks are written to the file in a single save.
+
+        Args:
+            tasks: The task objects to insert; every task must have an ID.
+
+        Returns:
+            None
+        """
+        if any(task.id is None for task in tasks):
+            raise ValueError("Tasks must have an ID to be inserted")
+        with self._locked(exclusive=True):
+            if self._has_archive():
+                archive = self._load_archive()
+                unarchived = [task.id for task in tasks if archive.pop(task.id, None) is not None]
+                if unarchived:
+                    self._save_archive()
+            for task in tasks:
+                previous_task = self.tasks.get(task.id)
+                if previous_task is not None:
+                    self._unindex_task(previous_task)
+                self.tasks[task.id] = task.model_copy()
+                self._invalidate_task(task.id)
+                self._index_task(task)
+            self._save_tasks()
+
+    def backup(self, directory: str) -> List[str]:
+        """
+        Copy the tasks, archive and recurrences files of every task list into a directory.
+
+        The files of a list are read while holding a shared lock on its tasks file,
+        which writers hold exclusively, so each list is copied in a consistent state
+        while readers carry on. The snapshot is a cache of the tasks file and is not
+        copied.
+
+        Args:
+            directory: The existing, empty directory to write the copies to.
+
+        Returns:
+            The names of the written files.
+        """
+        file_names = []
+        for name in self.task_lists():
+            paths = self._task_list_files(name)
+            with self._file_lock(exclusive=False, lock_path=f'{paths[0]}.lock'):
+                contents = []
+                for path in paths:
+                    if os.path.exists(path):
+                        with open(path, 'rb') as fh:
+                            contents.append((os.path.basename(path), fh.read()))
+            for file_name, content in contents:
+                with open(os.path.join(directory, file_name), 'wb') as fh:
+                    fh.write(content)
+                    fh.flush()
+                    os.fsync(fh.fileno())
+                file_names.append(file_name)
+        return file_names
+
+    def iter_tasks(
+        self, batch_size: int = 500, after_id: int = None, include_archived: bool = False
+    ) -> Iterator[Task]:
+        """
+        Iterate over all tasks in ID order.
+
+        Tasks are already held in memory, so they are yielded straight from the
+        task map instead of being copied into a new list.
+
+        Args:
+            batch_size: Unused; tasks are not fetched from storage.
+            after_id: Only yield tasks with an ID greater than this one.
+            include_archived: Whether to include archived tasks.
+
+        Returns:
+            An iterator of task objects.
+        """
+        with self._locked():
+            tasks = self.tasks
+            archive = self._load_archive() if include_archived else {}
+        task_ids = heapq.merge(sorted(tasks), sorted(archive))
+        for task_id in task_ids:
+            if after_id is not None and task_id <= after_id:
+                continue
+            task = tasks.get(task_id) or archive.get(task_id)
+            if task is not None:
+                yield task
 
     def list_tasks(self) -> list[Task]:
         """
@@ -136,8 +974,9 @@ class JSONTaskRepository(TaskRepository):
         Returns:
             A list of task objects.
         """
-        return list(self.tasks.values())
-    
+        with self._locked():
+            return list(self.tasks.values())
+
     def filter_tasks(self, filter_text: TaskFilter) -> list[Task]:
         """
         Filter tasks by text.
@@ -148,13 +987,70 @@ class JSONTaskRepository(TaskRepository):
         Returns:
             A list of task objects.
         """
+        with self._locked():
+            tasks = list(self.tasks.values())
+
         if filter_text == TaskFilter.ACTIVE.value:
-            return [task for task in self.tasks.values() if not task.completed]
+            return [task for task in tasks if not task.completed]
 
         if filter_text == TaskFilter.COMPLETED.value:
-            return [task for task in self.tasks.values() if task.completed]
+            with self._locked():
+                archived_tasks = list(self._load_archive().values()) if self._has_archive() else []
+            return [task for task in tasks if task.completed] + archived_tasks
 
         if filter_text == TaskFilter.ALL.value:
-            return list(self.tasks.values())
+            return tasks
+
+        if filter_text in DUE_DATE_FILTERS:
+            start, end = due_date_window(filter_text)
+            tasks = self.tasks_due_between(start, end)
+            if filter_text == TaskFilter.OVERDUE.value:
+                return [task for task in tasks if not task.completed]
+            return tasks
+
+        raise ValueError(f"{filter_text} is not a valid filter option")
+
+    def count_tasks(self, filter_text: str = TaskFilter.ALL.value) -> int:
+        """
+        Count the tasks matching a filter from the maintained counters and indexes.
 
+        Args:
+            filter_text: A `TaskFilter` value; defaults to all tasks.
+
+        Returns:
+            The number of tasks `filter_tasks` would return.
+        """
+        with self._locked():
+            if filter_text == TaskFilter.ALL.value:
+                return len(self.tasks)
+            if filter_text == TaskFilter.ACTIVE.value:
+                return len(self.tasks) - self.completed_count
+            if filter_text == TaskFilter.COMPLETED.value:
+                return self.completed_count + self._count_archive()
+            if filter_text in DUE_DATE_FILTERS:
+                start, end = due_date_window(filter_text)
+                low = 0 if start is None else bisect.bisect_left(self.due_index, (start, -1))
+                high = len(self.due_index) if end is None else bisect.bisect_right(self.due_index, (end, sys.maxsize))
+                if filter_text != TaskFilter.OVERDUE.value:
+                    return high - low
+                return sum(1 for _, task_id in self.due_index[low:high] if not self.tasks[task_id].completed)
         raise ValueError(f"{filter_text} is not a valid filter option")
+
+    def tasks_due_between(self, start: Optional[date], end: Optional[date]) -> list[Task]:
+        """
+        List tasks due within a date window, ordered by due date.
+
+        The window is located in the sorted due date index with bisect, so only
+        the tasks inside it are visited.
+
+        Args:
+            start: The first due date to include; unbounded if None.
+            end: The last due date to include; unbounded if None.
+
+        Returns:
+            A list of task objects.
+        """
+        with self._locked():
+            low = 0 if start is None else bisect.bisect_left(self.due_index, (start, -1))
+            high = len(self.due_index) if end is None else bisect.bisect_right(self.due_index, (end, sys.maxsize))
+            return [self.tasks[task_id] for _, task_id in self.due_index[low:high]]
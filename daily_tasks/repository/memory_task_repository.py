@@ -0,0 +1,497 @@
+"""
+This module defines an in-memory task repository persisted by background snapshots.
+"""
+import atexit
+import bisect
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime, timezone
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+from daily_tasks.models import Task, TaskFilter, RangeDigest, RecurrenceRule
+from daily_tasks.recurrence import read_recurrence_rules, write_recurrence_rules
+from daily_tasks.repository import (
+    TaskRepository, SyncDigestCache, VersionConflictError, DUE_DATE_FILTERS, TASK_LIST_NAME_PATTERN,
+    apply_completion_changes, due_date_window, validate_task_changes, validate_task_list_name,
+)
+from daily_tasks.serialization import decode_header, encode_header, encode_record, iter_records, task_fields
+
+LIST_FIELD = 'list_id'
+# Recurrence rules are written next to the snapshot, one `<snapshot_path>.<list name>.recurrences.json` file per list.
+RECURRENCES_SUFFIX = '.recurrences.json'
+DEFAULT_BACKUP_SNAPSHOT_NAME = 'tasks.snapshot'
+
+
+def _write_snapshot_file(path: str, lists: Dict[str, List[Task]]):
+    """
+    Atomically write the tasks of task lists to a snapshot file.
+
+    Args:
+        path: The path of the snapshot file.
+        lists: The tasks by task list name.
+    """
+    fields = task_fields() + [LIST_FIELD]
+    fd, temp_path = tempfile.mkstemp(
+        dir=os.path.dirname(path) or '.',
+        prefix=f'.{os.path.basename(path)}.',
+        suffix='.tmp',
+    )
+    try:
+        with os.fdopen(fd, 'wb') as fh:
+            fh.write(encode_header(fields))
+            for name, tasks in lists.items():
+                for task in tasks:
+                    fh.write(encode_record({**task.model_dump(), LIST_FIELD: name}, fields))
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+class MemoryTaskRepository(TaskRepository):
+    """
+    Task repository that serves every operation from in-memory dicts and indexes.
+
+    If `memory_settings.snapshot_path` is set, the tasks of all lists are written
+    to a binary snapshot by a background thread every `snapshot_interval` seconds
+    while there are unsaved changes. With `append_log` enabled, every change is
+    also appended to `<snapshot_path>.log` before the operation returns, so
+    changes made since the last snapshot survive a crash; without it, at most
+    `snapshot_interval` seconds of changes can be lost.
+
+    Recurrence rules change rarely and are written to their own file on every
+    change instead.
+
+    A transaction holds the lock for its whole block and appends its changes to
+    the log as a single line when it commits, so a crash replays all of them or
+    none.
+
+    Without a snapshot path nothing is persisted, which makes a fast backend for
+    tests and benchmarks.
+    """
+
+    def __init__(self, *args, **kwargs):
+        """Initialize the MemoryTaskRepository."""
+        super().__init__(*args, **kwargs)
+        memory_settings = self.dt_settings.memory_settings
+        self.snapshot_path = memory_settings.snapshot_path
+        self.log_path = f'{self.snapshot_path}.log' if self.snapshot_path else None
+        # The log is renamed here while a snapshot is written, so a crash in
+        # between never loses the changes it holds.
+        self.rotated_log_path = f'{self.log_path}.1' if self.log_path else None
+        self.snapshot_interval = memory_settings.snapshot_interval
+        self.fsync_log = memory_settings.fsync_log
+
+        self._lock = threading.RLock()
+        self._snapshot_lock = threading.Lock()
+        self._lists: dict[str, dict[int, Task]] = {}
+        # (due_date, id) pairs of tasks with a due date per list, kept sorted for bisect range lookups.
+        self._due_indexes: dict[str, list[tuple[date, int]]] = {}
+        self._completed_counts: dict[str, int] = {}
+        self._recurrences: dict[str, dict[int, RecurrenceRule]] = {}
+        # Sorted IDs of the tasks by content hash per list, for duplicate detection without a scan.
+        self._hash_indexes: dict[str, dict[str, list[int]]] = {}
+        # Sync digests per list, so range summaries do not serialize tasks.
+        self._sync_digests: dict[str, SyncDigestCache] = {}
+        self.next_id = 1
+        # Counts the changes to tasks of any list, so caches can tell cheaply whether to look again.
+        self._generation = 0
+        self._dirty = False
+        self._log = None
+        # While a transaction runs: the tasks it changed as they were before it, by list and ID,
+        # the log entries it made and the lists whose recurrence rules it changed.
+        self._undo: Optional[dict[Tuple[str, int], Optional[Task]]] = None
+        self._pending_log: List[Dict[str, Any]] = []
+        self._pending_recurrences: set[str] = set()
+
+        if self.snapshot_path:
+            os.makedirs(os.path.dirname(self.snapshot_path) or '.', exist_ok=True)
+            self._load()
+            if memory_settings.append_log:
+                self._log = open(self.log_path, 'a', encoding='utf-8')
+        self._select_list(self.task_list)
+
+        self._stop = threading.Event()
+        self._snapshot_thread = None
+        if self.snapshot_path:
+            self._snapshot_thread = threading.Thread(
+                target=self._snapshot_loop, name='task-snapshot', daemon=True
+            )
+            self._snapshot_thread.start()
+            atexit.register(self.close)
+
+    def _select_list(self, name: str):
+        self.task_list = name
+        self.tasks = self._lists.setdefault(name, {})
+        self.due_index = self._due_indexes.setdefault(name, [])
+
+    def _load(self):
+        """Load the snapshot, then replay the logs written since it was taken."""
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, 'rb') as fh:
+                buffer = fh.read()
+            fields, offset = decode_header(buffer)
+            for values in iter_records(buffer, offset, fields):
+                name = values.pop(LIST_FIELD)
+                # The snapshot was written from validated tasks, so validation is skipped.
+                self._put(name, Task.model_construct(**values))
+        for path in (self.rotated_log_path, self.log_path):
+            if os.path.exists(path):
+                self._replay_log(path)
+        self._dirty = False
+        directory = os.path.dirname(self.snapshot_path) or '.'
+        prefix = f'{os.path.basename(self.snapshot_path)}.'
+        for file_name in os.listdir(directory):
+            if file_name.startswith(prefix) and file_name.endswith(RECURRENCES_SUFFIX):
+                name = file_name[len(prefix):-len(RECURRENCES_SUFFIX)]
+                if TASK_LIST_NAME_PATTERN.match(name):
+                    self._recurrences[name] = read_recurrence_rules(os.path.join(directory, file_name))
+
+    def _replay_log(self, path: str):
+        with open(path, 'r', encoding='utf-8') as fh:
+            for line in fh:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn final line from a crash mid-append; everything before it is intact.
+                    break
+                # A transaction is logged as one batch of entries.
+                for change in entry['entries'] if entry['op'] == 'batch' else [entry]:
+                    if change['op'] == 'put':
+                        self._put(change['list'], Task(**change['task']))
+                    elif change['op'] == 'delete':
+                        self._remove(change['list'], change['id'])
+
+    def _put(self, name: str, task: Task):
+        tasks = self._lists.setdefault(name, {})
+        due_index = self._due_indexes.setdefault(name, [])
+        previous_task = tasks.get(task.id)
+        if self._undo is not None:
+            self._undo.setdefault((name, task.id), previous_task)
+        if previous_task is not None:
+            self._unindex(name, previous_task)
+        tasks[task.id] = task
+        if task.completed:
+            self._completed_counts[name] = self._completed_counts.get(name, 0) + 1
+        bisect.insort(self._hash_indexes.setdefault(name, {}).setdefault(task.content_hash(), []), task.id)
+        if task.due_date is not None:
+            bisect.insort(due_index, (task.due_date, task.id))
+        self.next_id = max(self.next_id, task.id + 1)
+        self._generation += 1
+        if name in self._sync_digests:
+            self._sync_digests[name].changed(task.id)
+
+    def _remove(self, name: str, task_id: int) -> Optional[Task]:
+        task = self._lists.get(name, {}).pop(task_id, None)
+        if task is not None:
+            if self._undo is not None:
+                self._undo.setdefault((name, task_id), task)
+            self._unindex(name, task)
+            self._generation += 1
+            if name in self._sync_digests:
+                self._sync_digests[name].removed(task_id)
+        return task
+
+    def _unindex(self, name: str, task: Task):
+        if task.completed:
+            self._completed_counts[name] -= 1
+        hash_index = self._hash_indexes[name]
+        task_hash = task.content_hash()
+        hash_index[task_hash].remove(task.id)
+        if not hash_index[task_hash]:
+            del hash_index[task_hash]
+        if task.due_date is not None:
+            self._due_indexes[name].remove((task.due_date, task.id))
+
+    def _record(self, entry: Dict[str, Any]):
+        """Append a change to the log, if enabled, and mark the snapshot as stale."""
+        if self._undo is not None:
+            self._pending_log.append(entry)
+            return
+        self._dirty = True
+        if self._log is None:
+            return
+        self._log.write(json.dumps(entry) + '\n')
+        self._log.flush()
+        if self.fsync_log:
+            os.fsync(self._log.fileno())
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """
+        Hold the lock for the block and log its changes as one entry when it exits.
+
+        If the block raises, the tasks it changed are put back as they were.
+        """
+        with self._lock:
+            if self._undo is not None:
+                yield
+                return
+            self._undo = {}
+            next_id = self.next_id
+            recurrences = {
+                name: {rule_id: rule.model_copy(deep=True) for rule_id, rule in rules.items()}
+                for name, rules in self._recurrences.items()
+            }
+            try:
+                yield
+            except BaseException:
+                undo, self._undo = self._undo, None
+                for (name, task_id), task in undo.items():
+                    self._remove(name, task_id)
+                    if task is not None:
+                        self._put(name, task)
+                # Restored tasks were moved to the end, so the lists are put back in ID order, in place.
+                for name in {name for name, _ in undo}:
+                    tasks = sorted(self._lists[name].items())
+                    self._lists[name].clear()
+                    self._lists[name].update(tasks)
+                self.next_id = next_id
+                self._recurrences = recurrences
+                raise
+            finally:
+                self._undo = None
+                entries, self._pending_log = self._pending_log, []
+                names, self._pending_recurrences = self._pending_recurrences, set()
+            if entries:
+                self._record({'op': 'batch', 'entries': entries})
+            for name in names:
+                self._save_recurrences(name)
+
+    def snapshot(self):
+        """
+        Write all task lists to the snapshot file and discard the replayed log.
+
+        The log is rotated while the lock is held, so the snapshot and the new log
+        together always hold every change; the snapshot itself is written outside
+        the lock.
+        """
+        if not self.snapshot_path:
+            return
+        with self._snapshot_lock:
+            self._write_snapshot()
+
+    def _write_snapshot(self):
+        with self._lock:
+            lists = {name: list(tasks.values()) for name, tasks in self._lists.items()}
+            self._dirty = False
+            if self._log is not None:
+                self._log.close()
+                if os.path.exists(self.rotated_log_path):
+                    # Left behind by a crash or a failed snapshot; keep its entries ahead of the new ones.
+                    with open(self.log_path, 'rb') as src, open(self.rotated_log_path, 'ab') as dst:
+                        shutil.copyfileobj(src, dst)
+                    os.remove(self.log_path)
+                else:
+                    os.replace(self.log_path, self.rotated_log_path)
+                self._log = open(self.log_path, 'a', encoding='utf-8')
+
+        _write_snapshot_file(self.snapshot_path, lists)
+        stale_logs = [self.rotated_log_path] if self._log is not None else [self.rotated_log_path, self.log_path]
+        for path in stale_logs:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def backup(self, directory: str) -> List[str]:
+        """
+        Write the tasks of all task lists, as of one moment, to a snapshot file in a directory.
+
+        The tasks and recurrence rules are copied while the lock is held and
+        written outside of it. The snapshot is named like `snapshot_path`, or
+        `DEFAULT_BACKUP_SNAPSHOT_NAME` if snapshots are disabled, and can be
+        loaded by pointing `snapshot_path` at it.
+
+        Args:
+            directory: The existing, empty directory to write the copy to.
+
+        Returns:
+            The names of the written files.
+        """
+        with self._lock:
+            lists = {name: list(tasks.values()) for name, tasks in self._lists.items()}
+            recurrences = {name: list(rules.values()) for name, rules in self._recurrences.items() if rules}
+        snapshot_name = os.path.basename(self.snapshot_path) if self.snapshot_path else DEFAULT_BACKUP_SNAPSHOT_NAME
+        _write_snapshot_file(os.path.join(directory, snapshot_name), lists)
+        file_names = [snapshot_name]
+        for name, rules in recurrences.items():
+            file_names.append(f'{snapshot_name}.{name}{RECURRENCES_SUFFIX}')
+            write_recurrence_rules(os.path.join(directory, file_names[-1]), rules)
+        return file_names
+
+    def _snapshot_loop(self):
+        while not self._stop.wait(self.snapshot_interval):
+            if self._dirty:
+                self.snapshot()
+
+    def close(self):
+        """Stop the snapshot thread and write a final snapshot of unsaved changes."""
+        if self._snapshot_thread is None:
+            return
+        self._stop.set()
+        self._snapshot_thread.join()
+        self._snapshot_thread = None
+        atexit.unregister(self.close)
+        if self._dirty:
+            self.snapshot()
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    def create_task(self, task: Task) -> Task:
+        with self._lock:
+            task.id = self.next_id
+            task.version = 1
+            if task.completed and task.completed_at is None:
+                task.completed_at = datetime.now(timezone.utc)
+            self._put(self.task_list, task)
+            self._record({'op': 'put', 'list': self.task_list, 'task': task.model_dump(mode='json')})
+        return task
+
+    def read_task(self, task_id: int) -> Task:
+        task = self.tasks.get(task_id)
+        if task is None:
+            raise ValueError(f"Task with ID {task_id} not found")
+        return task
+
+    def update_task(self, task_id: int, data: Dict[str, Any], expected_version: int = None) -> Task:
+        with self._lock:
+            task = self.tasks.get(task_id)
+            if task is None:
+                raise ValueError(f"Task with ID {task_id} not found")
+            if expected_version is not None and task.version != expected_version:
+                raise VersionConflictError(task_id, expected_version, task.version)
+            changes = validate_task_changes(data)
+            changes = apply_completion_changes(task, changes)
+            updated_task = Task(**{**task.model_dump(), **changes, 'version': task.version + 1})
+            self._put(self.task_list, updated_task)
+            self._record({'op': 'put', 'list': self.task_list, 'task': updated_task.model_dump(mode='json')})
+        return updated_task
+
+    def delete_task(self, task_id: int):
+        with self._lock:
+            if self._remove(self.task_list, task_id) is None:
+                raise ValueError(f"Task with ID {task_id} not found")
+            self._record({'op': 'delete', 'list': self.task_list, 'id': task_id})
+
+    def insert_tasks(self, tasks: List[Task]):
+        if any(task.id is None for task in tasks):
+            raise ValueError("Tasks must have an ID to be inserted")
+        with self._lock:
+            for task in tasks:
+                task = task.model_copy()
+                self._put(self.task_list, task)
+                self._record({'op': 'put', 'list': self.task_list, 'task': task.model_dump(mode='json')})
+
+    def list_tasks(self) -> List[Task]:
+        with self._lock:
+            return list(self.tasks.values())
+
+    def filter_tasks(self, filter_text: TaskFilter) -> List[Task]:
+        tasks = self.list_tasks()
+        if filter_text == TaskFilter.ALL.value:
+            return tasks
+        if filter_text == TaskFilter.ACTIVE.value:
+            return [task for task in tasks if not task.completed]
+        if filter_text == TaskFilter.COMPLETED.value:
+            return [task for task in tasks if task.completed]
+        if filter_text in DUE_DATE_FILTERS:
+            start, end = due_date_window(filter_text)
+            tasks = self.tasks_due_between(start, end)
+            if filter_text == TaskFilter.OVERDUE.value:
+                return [task for task in tasks if not task.completed]
+            return tasks
+        raise ValueError(f"{filter_text} is not a valid filter option")
+
+    def count_tasks(self, filter_text: str = TaskFilter.ALL.value) -> int:
+        with self._lock:
+            if filter_text == TaskFilter.ALL.value:
+                return len(self.tasks)
+            if filter_text == TaskFilter.COMPLETED.value:
+                return self._completed_counts.get(self.task_list, 0)
+            if filter_text == TaskFilter.ACTIVE.value:
+                return len(self.tasks) - self._completed_counts.get(self.task_list, 0)
+        return len(self.filter_tasks(filter_text))
+
+    def find_duplicate(self, task: Task) -> Optional[Task]:
+        with self._lock:
+            task_ids = self._hash_indexes.get(self.task_list, {}).get(task.content_hash())
+            return self.tasks[task_ids[0]] if task_ids else None
+
+    def tasks_due_between(self, start: Optional[date], end: Optional[date]) -> List[Task]:
+        with self._lock:
+            low = 0 if start is None else bisect.bisect_left(self.due_index, (start, -1))
+            high = len(self.due_index) if end is None else bisect.bisect_right(self.due_index, (end, sys.maxsize))
+            return [self.tasks[task_id] for _, task_id in self.due_index[low:high]]
+
+    def change_token(self) -> Tuple[str, int]:
+        with self._lock:
+            return self.task_list, self._generation
+
+    def range_digest(self, start_id: int = None, end_id: int = None) -> RangeDigest:
+        with self._lock:
+            tasks = self.tasks
+            cache = self._sync_digests.setdefault(self.task_list, SyncDigestCache())
+            return cache.range_digest(start_id, end_id, lambda: tasks, lambda task_id: tasks[task_id].sync_digest())
+
+    def task_versions(self, task_ids: List[int] = None) -> Dict[int, int]:
+        with self._lock:
+            if task_ids is None:
+                return {task_id: task.version for task_id, task in self.tasks.items()}
+            return {task_id: self.tasks[task_id].version for task_id in task_ids if task_id in self.tasks}
+
+    def iter_tasks(
+        self, batch_size: int = 500, after_id: int = None, include_archived: bool = False
+    ) -> Iterator[Task]:
+        with self._lock:
+            task_ids = sorted(self.tasks)
+        if after_id is not None:
+            task_ids = task_ids[bisect.bisect_right(task_ids, after_id):]
+        tasks = self.tasks
+        for task_id in task_ids:
+            task = tasks.get(task_id)
+            if task is not None:
+                yield task
+
+    def list_recurrences(self) -> List[RecurrenceRule]:
+        with self._lock:
+            rules = self._recurrences.get(self.task_list, {})
+            return [rules[rule_id] for rule_id in sorted(rules)]
+
+    def save_recurrence(self, rule: RecurrenceRule) -> RecurrenceRule:
+        with self._lock:
+            rules = self._recurrences.setdefault(self.task_list, {})
+            if rule.id is None:
+                rule.id = max(rules, default=0) + 1
+            rules[rule.id] = rule
+            self._save_recurrences()
+        return rule
+
+    def delete_recurrence(self, recurrence_id: int):
+        with self._lock:
+            if self._recurrences.get(self.task_list, {}).pop(recurrence_id, None) is None:
+                raise ValueError(f"Recurrence with ID {recurrence_id} not found")
+            self._save_recurrences()
+
+    def _save_recurrences(self, name: str = None):
+        name = name or self.task_list
+        if self._undo is not None:
+            self._pending_recurrences.add(name)
+        elif self.snapshot_path:
+            path = f'{self.snapshot_path}.{name}{RECURRENCES_SUFFIX}'
+            write_recurrence_rules(path, self._recurrences[name].values())
+
+    def task_lists(self) -> List[str]:
+        with self._lock:
+            return sorted(set(self._lists) | set(self._recurrences) | {self.task_list})
+
+    def use_task_list(self, name: str):
+        with self._lock:
+            self._select_list(validate_task_list_name(name))
@@ -0,0 +1,673 @@
+"""
+This module defines a task repository storing one task per line in an append-only NDJSON file.
+"""
+import atexit
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime, timezone
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from daily_tasks.models import Task, TaskFilter, RangeDigest, RecurrenceRule, DEFAULT_TASK_LIST
+from daily_tasks.recurrence import read_recurrence_rules, write_recurrence_rules
+from daily_tasks.repository import (
+    TaskRepository, SyncDigestCache, VersionConflictError, DUE_DATE_FILTERS, TASK_LIST_NAME_PATTERN,
+    apply_completion_changes, due_date_window, validate_task_changes, validate_task_list_name,
+)
+
+# Tasks files of lists other than the default one are named `<tasks_path stem>.<list name>.tasks.ndjson`.
+TASK_LIST_SUFFIX = '.tasks.ndjson'
+# Recurrence rules are kept in `<tasks file>.recurrences.json`.
+RECURRENCES_SUFFIX = '.recurrences.json'
+# Deleting a task appends `{"id": <id>, "deleted": true}`.
+TOMBSTONE_FIELD = 'deleted'
+# The records of a transaction are enclosed in `{"transaction": "begin"}` and `{"transaction": "commit"}`.
+TRANSACTION_FIELD = 'transaction'
+TRANSACTION_BEGIN = 'begin'
+TRANSACTION_COMMIT = 'commit'
+# Files with fewer dead bytes than this are not worth compacting, whatever their share.
+MIN_COMPACTION_BYTES = 64 * 1024
+
+INDEX_MAGIC = b"DTNX"
+# Inode of the tasks file the index was built from and the number of its bytes the index covers.
+_INDEX_HEADER = struct.Struct("<QQ")
+# ID, offset, length, version, completed flag and due date ordinal (0 without a due date) of a live record.
+_INDEX_ENTRY = struct.Struct("<qQIq?i")
+
+
+class _IndexEntry(NamedTuple):
+    offset: int
+    length: int
+    version: int
+    completed: bool
+    due_ordinal: int
+
+
+def _write_file(path: str, content: bytes):
+    """Atomically replace a cache file; it can be rebuilt, so it is not fsynced."""
+    fd, temp_path = tempfile.mkstemp(
+        dir=os.path.dirname(path) or '.',
+        prefix=f'.{os.path.basename(path)}.',
+        suffix='.tmp',
+    )
+    try:
+        with os.fdopen(fd, 'wb') as fh:
+            fh.write(content)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def _encode_line(record: Dict[str, Any]) -> bytes:
+    # json.dumps escapes newlines inside strings, so every record is exactly one line.
+    return json.dumps(record, separators=(',', ':')).encode('utf-8')
+
+
+class NDJSONTaskRepository(TaskRepository):
+    """
+    Task repository storing one JSON task record per line, read through mmap.
+
+    Creating or updating a task appends its new record and deleting one appends a
+    tombstone, so writes never rewrite the file. An in-memory index maps the ID of
+    every live task to the offset of its latest record, along with the fields the
+    filters and counters need, so `read_task` decodes a single record and memory
+    grows with the number of tasks rather than with their contents. The index is
+    persisted to `<tasks file>.idx` by the background thread, on close and after
+    compactions; records appended after it was written are replayed on open, and
+    a record torn by a crash is truncated.
+
+    The background thread also compacts the tasks file once dead records take more
+    than `ndjson_settings.compaction_ratio` of it. Live records are copied without
+    holding the lock, so writers only wait while the records appended in the
+    meantime are copied and the new file is renamed into place.
+
+    The records written by a transaction are enclosed in begin and commit markers;
+    records after a begin marker without its commit are dropped on open, like a
+    torn record.
+
+    The files are owned by a single process at a time.
+    """
+
+    def __init__(self, *args, **kwargs):
+        """Initialize the NDJSONTaskRepository."""
+        super().__init__(*args, **kwargs)
+        ndjson_settings = self.dt_settings.ndjson_settings
+        if ndjson_settings.tasks_path is None:
+            raise ValueError("ndjson_settings.tasks_path must be provided")
+
+        self.base_tasks_path = ndjson_settings.tasks_path
+        os.makedirs(os.path.dirname(self.base_tasks_path) or '.', exist_ok=True)
+        self.compaction_interval = ndjson_settings.compaction_interval
+        self.compaction_ratio = ndjson_settings.compaction_ratio
+        self.fsync = ndjson_settings.fsync
+
+        self._lock = threading.RLock()
+        # Held for a whole compaction or backup, so the list is not switched or rewritten under them.
+        self._compaction_lock = threading.Lock()
+        self._fh = None
+        self._map: Optional[mmap.mmap] = None
+        # While a transaction runs: the index entries it changed as they were before it, the
+        # offset of its begin marker once it has written, and its changes to the recurrence rules.
+        self._undo: Optional[dict[int, Optional[_IndexEntry]]] = None
+        self._transaction_offset: Optional[int] = None
+        self._pending_recurrences: Optional[dict[int, RecurrenceRule]] = None
+        # Counts the appends and rollbacks, so caches can tell cheaply whether the index changed.
+        self._generation = 0
+        self._open_task_list(self.task_list)
+
+        self._stop = threading.Event()
+        self._compaction_thread = threading.Thread(
+            target=self._compaction_loop, name='task-compaction', daemon=True
+        )
+        self._compaction_thread.start()
+        atexit.register(self.close)
+
+    def _task_list_path(self, name: str) -> str:
+        """Get the tasks file of a task list; the default list keeps using `tasks_path` itself."""
+        if name == DEFAULT_TASK_LIST:
+            return self.base_tasks_path
+        return f'{os.path.splitext(self.base_tasks_path)[0]}.{name}{TASK_LIST_SUFFIX}'
+
+    def _open_task_list(self, name: str):
+        """Point the repository at the files of a task list and load its index."""
+        self.task_list = name
+        self.tasks_path = self._task_list_path(name)
+        self.index_path = f'{self.tasks_path}.idx'
+        self.recurrences_path = f'{self.tasks_path}{RECURRENCES_SUFFIX}'
+        self.index: dict[int, _IndexEntry] = {}
+        # Sync digests of the live tasks, so range summaries do not decode records.
+        self._sync_digests = SyncDigestCache()
+        self._fh = open(self.tasks_path, 'ab')
+        self._size = 0
+        self._index_dirty = False
+        self._load_index()
+        self._dead_bytes = self._size - sum(entry.length + 1 for entry in self.index.values())
+        self.next_id = max(self.index, default=0) + 1
+
+    def _close_task_list(self):
+        if self._index_dirty:
+            self._write_index()
+        self._close_file()
+
+    def _close_file(self):
+        self._fh.close()
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def _load_index(self):
+        """Load the persisted index, then replay the records appended after it was written."""
+        stat = os.fstat(self._fh.fileno())
+        covered = 0
+        try:
+            with open(self.index_path, 'rb') as fh:
+                content = fh.read()
+            if content[:len(INDEX_MAGIC)] == INDEX_MAGIC:
+                inode, covered_size = _INDEX_HEADER.unpack_from(content, len(INDEX_MAGIC))
+                # The inode changes when a compaction replaces the file the index was built from.
+                if inode == stat.st_ino and covered_size <= stat.st_size:
+                    entries = memoryview(content)[len(INDEX_MAGIC) + _INDEX_HEADER.size:]
+                    for task_id, *entry in _INDEX_ENTRY.iter_unpack(entries):
+                        self.index[task_id] = _IndexEntry(*entry)
+                    covered = covered_size
+        except (OSError, struct.error):
+            self.index = {}
+            covered = 0
+        self._replay(covered, stat.st_size)
+
+    def _replay(self, start: int, end: int):
+        """
+        Apply the records between two offsets of the tasks file to the index.
+
+        Raises:
+            ValueError: If a record other than the last one cannot be decoded.
+        """
+        offset = start
+        # The offset of the begin marker of a transaction whose commit marker was not read yet, and its records.
+        transaction_offset = None
+        pending = []
+        with open(self.tasks_path, 'rb') as fh:
+            fh.seek(start)
+            for line in fh:
+                try:
+                    if not line.endswith(b'\n'):
+                        raise ValueError("unterminated record")
+                    record = json.loads(line)
+                except ValueError as e:
+                    if offset + len(line) < end:
+                        raise ValueError(f"Corrupt record at offset {offset} of {self.tasks_path}: {e}") from e
+                    break
+                marker = record.get(TRANSACTION_FIELD)
+                if marker == TRANSACTION_BEGIN:
+                    transaction_offset = offset
+                elif marker == TRANSACTION_COMMIT:
+                    for args in pending:
+                        self._apply_record(*args)
+                    transaction_offset, pending = None, []
+                elif transaction_offset is not None:
+                    pending.append((record, offset, len(line) - 1))
+                else:
+                    self._apply_record(record, offset, len(line) - 1)
+                offset += len(line)
+        if transaction_offset is not None:
+            print(
+                f'Discarding an uncommitted transaction of {end - transaction_offset} bytes '
+                f'at the end of {self.tasks_path}'
+            )
+            offset = transaction_offset
+        elif offset < end:
+            print(f'Discarding a torn record of {end - offset} bytes at the end of {self.tasks_path}')
+        if offset < end:
+            os.truncate(self.tasks_path, offset)
+        self._size = offset
+        self._index_dirty = self._index_dirty or offset > start
+
+    def _apply_record(self, record: Dict[str, Any], offset: int, length: int):
+        if record.get(TOMBSTONE_FIELD):
+            self.index.pop(record['id'], None)
+            return
+        due_date = record.get('due_date')
+        self.index[record['id']] = _IndexEntry(
+            offset, length, record.get('version', 1), bool(record.get('completed')),
+            date.fromisoformat(due_date).toordinal() if due_date else 0,
+        )
+
+    def _write_index(self):
+        stat = os.fstat(self._fh.fileno())
+        _write_file(self.index_path, b''.join([
+            INDEX_MAGIC,
+            _INDEX_HEADER.pack(stat.st_ino, self._size),
+            *(_INDEX_ENTRY.pack(task_id, *entry) for task_id, entry in self.index.items()),
+        ]))
+        self._index_dirty = False
+
+    def _append(self, records: List[Dict[str, Any]]) -> List[Tuple[int, int]]:
+        """
+        Append records to the tasks file.
+
+        Returns:
+            The offset and length of every record, without its newline.
+        """
+        lines = [_encode_line(record) for record in records]
+        begins_transaction = self._undo is not None and self._transaction_offset is None
+        if begins_transaction:
+            self._transaction_offset = self._size
+            lines.insert(0, _encode_line({TRANSACTION_FIELD: TRANSACTION_BEGIN}))
+        self._fh.write(b'\n'.join(lines) + b'\n')
+        self._fh.flush()
+        self._generation += 1
+        # A transaction is synced once, when it commits.
+        if self.fsync and self._undo is None:
+            os.fsync(self._fh.fileno())
+        positions = []
+        for line in lines:
+            positions.append((self._size, len(line)))
+            self._size += len(line) + 1
+        self._index_dirty = True
+        if begins_transaction:
+            self._dead_bytes += positions[0][1] + 1
+            del positions[0]
+        return positions
+
+    def _remember(self, task_id: int):
+        """Keep the index entry of a task as it was before the current transaction changed it."""
+        if self._undo is not None and task_id not in self._undo:
+            self._undo[task_id] = self.index.get(task_id)
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """
+        Hold the lock for the block and enclose the records it appends in transaction markers.
+
+        The tasks file is synced once, after the commit marker. If the block raises,
+        the file is truncated back to where the transaction began and the index
+        entries it changed are restored.
+        """
+        with self._lock:
+            if self._undo is not None:
+                yield
+                return
+            self._undo = {}
+            saved = (self.next_id, self._dead_bytes, self._index_dirty)
+            try:
+                yield
+            except BaseException:
+                undo, self._undo = self._undo, None
+                for task_id, entry in undo.items():
+                    if entry is None:
+                        self.index.pop(task_id, None)
+                        self._sync_digests.removed(task_id)
+                    else:
+                        self.index[task_id] = entry
+                        self._sync_digests.changed(task_id)
+                self.next_id, self._dead_bytes, self._index_dirty = saved
+                self._generation += 1
+                if self._transaction_offset is not None:
+                    if self._map is not None:
+                        self._map.close()
+                        self._map = None
+                    os.truncate(self.tasks_path, self._transaction_offset)
+                    self._size = self._transaction_offset
+                raise
+            finally:
+                self._undo = None
+                transaction_offset, self._transaction_offset = self._transaction_offset, None
+                rules, self._pending_recurrences = self._pending_recurrences, None
+            if transaction_offset is not None:
+                [(_, length)] = self._append([{TRANSACTION_FIELD: TRANSACTION_COMMIT}])
+                self._dead_bytes += length + 1
+            if rules is not None:
+                write_recurrence_rules(self.recurrences_path, rules.values())
+
+    def _write_tasks(self, tasks: List[Task]):
+        """Append the records of tasks and point the index at them."""
+        positions = self._append([task.model_dump(mode='json') for task in tasks])
+        for task, (offset, length) in zip(tasks, positions):
+            self._remember(task.id)
+            previous = self.index.get(task.id)
+            if previous is not None:
+                self._dead_bytes += previous.length + 1
+            self._sync_digests.changed(task.id)
+            self.index[task.id] = _IndexEntry(
+                offset, length, task.version, task.completed,
+                task.due_date.toordinal() if task.due_date is not None else 0,
+            )
+
+    def _read(self, entry: _IndexEntry) -> Task:
+        """Decode the record of an index entry, remapping the file if the record is past the current mapping."""
+        end = entry.offset + entry.length
+        if self._map is None or len(self._map) < end:
+            if self._map is not None:
+                self._map.close()
+            with open(self.tasks_path, 'rb') as fh:
+                self._map = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        return Task(**json.loads(self._map[entry.offset:end]))
+
+    def _read_matching(self, predicate) -> List[Task]:
+        with self._lock:
+            return [
+                self._read(self.index[task_id]) for task_id in sorted(self.index) if predicate(self.index[task_id])
+            ]
+
+    def compact(self) -> int:
+        """
+        Rewrite the tasks file without overwritten records and tombstones.
+
+        Returns:
+            The number of bytes reclaimed.
+        """
+        with self._compaction_lock:
+            with self._lock:
+                self._fh.flush()
+                end = self._size
+                live = sorted(self.index.items())
+            fd, temp_path = tempfile.mkstemp(
+                dir=os.path.dirname(self.tasks_path) or '.',
+                prefix=f'.{os.path.basename(self.tasks_path)}.',
+                suffix='.tmp',
+            )
+            try:
+                with os.fdopen(fd, 'wb') as out:
+                    # Records before `end` never change, so they are copied without the lock.
+                    offsets = {}
+                    position = 0
+                    if live:
+                        with open(self.tasks_path, 'rb') as src, \
+                                mmap.mmap(src.fileno(), end, access=mmap.ACCESS_READ) as buffer:
+                            for task_id, entry in live:
+                                out.write(buffer[entry.offset:entry.offset + entry.length + 1])
+                                offsets[task_id] = position
+                                position += entry.length + 1
+                    with self._lock:
+                        # Records appended in the meantime are copied as they are.
+                        with open(self.tasks_path, 'rb') as src:
+                            src.seek(end)
+                            out.write(src.read(self._size - end))
+                        out.flush()
+                        os.fsync(out.fileno())
+                        reclaimed = self._size - out.tell()
+                        self.index = {
+                            task_id: entry._replace(
+                                offset=offsets[task_id] if entry.offset < end else position + entry.offset - end
+                            )
+                            for task_id, entry in self.index.items()
+                        }
+                        self._size = out.tell()
+                        self._close_file()
+                        os.replace(temp_path, self.tasks_path)
+                        self._fh = open(self.tasks_path, 'ab')
+                        self._dead_bytes = self._size - sum(entry.length + 1 for entry in self.index.values())
+                        self._write_index()
+            except BaseException:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+        return reclaimed
+
+    def _needs_compaction(self) -> bool:
+        with self._lock:
+            return (
+                self._dead_bytes >= MIN_COMPACTION_BYTES and self._dead_bytes > self.compaction_ratio * self._size
+            )
+
+    def _compaction_loop(self):
+        while not self._stop.wait(self.compaction_interval):
+            if self._needs_compaction():
+                self.compact()
+            elif self._index_dirty:
+                with self._lock:
+                    self._write_index()
+
+    def close(self):
+        """Stop the compaction thread and persist the index."""
+        if self._compaction_thread is None:
+            return
+        self._stop.set()
+        self._compaction_thread.join()
+        self._compaction_thread = None
+        atexit.unregister(self.close)
+        with self._lock:
+            self._close_task_list()
+
+    def create_task(self, task: Task) -> Task:
+        return self.create_tasks([task])[0]
+
+    def create_tasks(self, tasks: List[Task], skip_duplicates: bool = False) -> List[Task]:
+        """
+        Create new tasks in order with a single append.
+
+        Args:
+            tasks: The task objects to create.
+            skip_duplicates: Whether to skip tasks that duplicate an existing task
+                or an earlier task of the batch instead of creating them.
+
+        Returns:
+            The created tasks.
+        """
+        seen = {task.content_hash() for task in self.iter_tasks()} if skip_duplicates else set()
+        created_tasks = []
+        with self._lock:
+            for task in tasks:
+                if skip_duplicates:
+                    task_hash = task.content_hash()
+                    if task_hash in seen:
+                        continue
+                    seen.add(task_hash)
+                task.id = self.next_id
+                task.version = 1
+                if task.completed and task.completed_at is None:
+                    task.completed_at = datetime.now(timezone.utc)
+                created_tasks.append(task)
+                self.next_id += 1
+            if created_tasks:
+                self._write_tasks(created_tasks)
+        return created_tasks
+
+    def read_task(self, task_id: int) -> Task:
+        with self._lock:
+            entry = self.index.get(task_id)
+            if entry is None:
+                raise ValueError(f"Task with ID {task_id} not found")
+            return self._read(entry)
+
+    def update_task(self, task_id: int, data: Dict[str, Any], expected_version: int = None) -> Task:
+        with self._lock:
+            task = self.read_task(task_id)
+            if expected_version is not None and task.version != expected_version:
+                raise VersionConflictError(task_id, expected_version, task.version)
+            changes = validate_task_changes(data)
+            changes = apply_completion_changes(task, changes)
+            updated_task = Task(**{**task.model_dump(), **changes, 'version': task.version + 1})
+            self._write_tasks([updated_task])
+        return updated_task
+
+    def delete_task(self, task_id: int):
+        with self._lock:
+            self._remember(task_id)
+            entry = self.index.pop(task_id, None)
+            if entry is None:
+                raise ValueError(f"Task with ID {task_id} not found")
+            [(_, length)] = self._append([{'id': task_id, TOMBSTONE_FIELD: True}])
+            self._dead_bytes += entry.length + 1 + length + 1
+            self._sync_digests.removed(task_id)
+
+    def insert_tasks(self, tasks: List[Task]):
+        if any(task.id is None for task in tasks):
+            raise ValueError("Tasks must have an ID to be inserted")
+        if not tasks:
+            return
+        with self._lock:
+            self._write_tasks([task.model_copy() for task in tasks])
+            self.next_id = max(self.next_id, max(task.id for task in tasks) + 1)
+
+    def list_tasks(self) -> List[Task]:
+        return list(self.iter_tasks())
+
+    def filter_tasks(self, filter_text: TaskFilter) -> List[Task]:
+        if filter_text == TaskFilter.ALL.value:
+            return self.list_tasks()
+        if filter_text in (TaskFilter.ACTIVE.value, TaskFilter.COMPLETED.value):
+            completed = filter_text == TaskFilter.COMPLETED.value
+            return self._read_matching(lambda entry: entry.completed == completed)
+        if filter_text in DUE_DATE_FILTERS:
+            start, end = due_date_window(filter_text)
+            tasks = self.tasks_due_between(start, end)
+            if filter_text == TaskFilter.OVERDUE.value:
+                return [task for task in tasks if not task.completed]
+            return tasks
+        raise ValueError(f"{filter_text} is not a valid filter option")
+
+    def count_tasks(self, filter_text: str = TaskFilter.ALL.value) -> int:
+        with self._lock:
+            entries = list(self.index.values())
+        if filter_text == TaskFilter.ALL.value:
+            return len(entries)
+        if filter_text == TaskFilter.COMPLETED.value:
+            return sum(1 for entry in entries if entry.completed)
+        if filter_text == TaskFilter.ACTIVE.value:
+            return sum(1 for entry in entries if not entry.completed)
+        if filter_text in DUE_DATE_FILTERS:
+            start, end = _ordinal_window(*due_date_window(filter_text))
+            overdue = filter_text == TaskFilter.OVERDUE.value
+            return sum(
+                1 for entry in entries
+                if entry.due_ordinal and start <= entry.due_ordinal <= end and not (overdue and entry.completed)
+            )
+        raise ValueError(f"{filter_text} is not a valid filter option")
+
+    def tasks_due_between(self, start: Optional[date], end: Optional[date]) -> List[Task]:
+        start_ordinal, end_ordinal = _ordinal_window(start, end)
+        tasks = self._read_matching(
+            lambda entry: entry.due_ordinal and start_ordinal <= entry.due_ordinal <= end_ordinal
+        )
+        return sorted(tasks, key=lambda task: (task.due_date, task.id))
+
+    def change_token(self) -> Tuple[str, int]:
+        with self._lock:
+            return self.task_list, self._generation
+
+    def range_digest(self, start_id: int = None, end_id: int = None) -> RangeDigest:
+        with self._lock:
+            return self._sync_digests.range_digest(
+                start_id, end_id, lambda: self.index, lambda task_id: self._read(self.index[task_id]).sync_digest()
+            )
+
+    def task_versions(self, task_ids: List[int] = None) -> Dict[int, int]:
+        with self._lock:
+            if task_ids is None:
+                return {task_id: entry.version for task_id, entry in self.index.items()}
+            return {task_id: self.index[task_id].version for task_id in task_ids if task_id in self.index}
+
+    def iter_tasks(
+        self, batch_size: int = 500, after_id: int = None, include_archived: bool = False
+    ) -> Iterator[Task]:
+        with self._lock:
+            task_ids = sorted(task_id for task_id in self.index if after_id is None or task_id > after_id)
+        batch_size = max(batch_size, 1)
+        for start in range(0, len(task_ids), batch_size):
+            with self._lock:
+                batch = [
+                    self._read(self.index[task_id])
+                    for task_id in task_ids[start:start + batch_size] if task_id in self.index
+                ]
+            yield from batch
+
+    def list_recurrences(self) -> List[RecurrenceRule]:
+        with self._lock:
+            rules = self._read_recurrences()
+        return [rules[rule_id] for rule_id in sorted(rules)]
+
+    def save_recurrence(self, rule: RecurrenceRule) -> RecurrenceRule:
+        with self._lock:
+            rules = self._read_recurrences()
+            if rule.id is None:
+                rule.id = max(rules, default=0) + 1
+            rules[rule.id] = rule
+            self._write_recurrences(rules)
+        return rule
+
+    def delete_recurrence(self, recurrence_id: int):
+        with self._lock:
+            rules = self._read_recurrences()
+            if rules.pop(recurrence_id, None) is None:
+                raise ValueError(f"Recurrence with ID {recurrence_id} not found")
+            self._write_recurrences(rules)
+
+    def _read_recurrences(self) -> dict[int, RecurrenceRule]:
+        if self._pending_recurrences is not None:
+            return self._pending_recurrences
+        return read_recurrence_rules(self.recurrences_path)
+
+    def _write_recurrences(self, rules: dict[int, RecurrenceRule]):
+        """Write the recurrence rules of the current list, or keep them for the commit of the current transaction."""
+        if self._undo is not None:
+            self._pending_recurrences = rules
+        else:
+            write_recurrence_rules(self.recurrences_path, rules.values())
+
+    def backup(self, directory: str) -> List[str]:
+        """
+        Copy the tasks and recurrences files of every task list into a directory.
+
+        The tasks file only grows between compactions, so the current list is
+        copied up to its size at the start of the backup without blocking writers.
+        The index is rebuilt from the copy when it is opened.
+
+        Args:
+            directory: The existing, empty directory to write the copies to.
+
+        Returns:
+            The names of the written files.
+        """
+        file_names = []
+        with self._compaction_lock:
+            with self._lock:
+                self._fh.flush()
+                current_size = self._size
+            for name in self.task_lists():
+                tasks_path = self._task_list_path(name)
+                for path in (tasks_path, f'{tasks_path}{RECURRENCES_SUFFIX}'):
+                    if not os.path.exists(path):
+                        continue
+                    file_name = os.path.basename(path)
+                    with open(path, 'rb') as src, open(os.path.join(directory, file_name), 'wb') as dst:
+                        dst.write(src.read(current_size if path == self.tasks_path else -1))
+                        dst.flush()
+                        os.fsync(dst.fileno())
+                    file_names.append(file_name)
+        return file_names
+
+    def task_lists(self) -> List[str]:
+        directory = os.path.dirname(self.base_tasks_path) or '.'
+        prefix = f'{os.path.basename(os.path.splitext(self.base_tasks_path)[0])}.'
+        names = {DEFAULT_TASK_LIST, self.task_list}
+        for file_name in os.listdir(directory):
+            if file_name.startswith(prefix) and file_name.endswith(TASK_LIST_SUFFIX):
+                name = file_name[len(prefix):-len(TASK_LIST_SUFFIX)]
+                if TASK_LIST_NAME_PATTERN.match(name):
+                    names.add(name)
+        return sorted(names)
+
+    def use_task_list(self, name: str):
+        validate_task_list_name(name)
+        with self._lock:
+            if self._undo is not None:
+                raise ValueError("Cannot switch task lists inside a transaction")
+        with self._compaction_lock, self._lock:
+            if name != self.task_list:
+                self._close_task_list()
+                self._open_task_list(name)
+
+
+def _ordinal_window(start: Optional[date], end: Optional[date]) -> Tuple[int, int]:
+    """Convert an optional date window to inclusive date ordinals."""
+    return (
+        start.toordinal() if start is not None else 1,
+        end.toordinal() if end is not None else date.max.toordinal(),
+    )
@@ -0,0 +1,401 @@
+"""
+Sharded SQLite task repository implementation.
+"""
+import heapq
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from datetime import date, datetime
+from itertools import chain
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Set, Tuple
+
+from daily_tasks.models import (
+    Occurrence, RangeDigest, RecurrenceRule, Task, TaskStats, TaskSummary, Settings, Preferences, TaskFilter,
+)
+from daily_tasks.repository import TaskRepository, DUE_DATE_FILTERS, summarize_id_range, validate_task_list_name
+from daily_tasks.repository.sqlite_task_repository import MAX_TASK_ID, SQLiteTaskRepository
+
+
+class _SQLiteShard(SQLiteTaskRepository):
+    """One database of a sharded repository, holding the tasks whose ID is `shard_index` modulo `shard_count`."""
+
+    def __init__(self, dt_settings: Settings, dt_preferences: Preferences, shard_index: int, shard_count: int):
+        self.shard_index = shard_index
+        self.shard_count = shard_count
+        super().__init__(dt_settings, dt_preferences)
+
+    def _new_task_id_sql(self) -> Tuple[str, tuple]:
+        """
+        Allocate the smallest ID of this shard past both tables and the ID the creating call started after.
+        """
+        return (
+            '(SELECT last_id + 1 + ((? - (last_id + 1)) % ? + ?) % ? FROM ('
+            'SELECT MAX(COALESCE(MAX(id), 0), ?) AS last_id FROM ('
+            'SELECT MAX(id) AS id FROM tasks UNION ALL SELECT MAX(id) FROM tasks_archive)))'
+        ), (
+            self.shard_index, self.shard_count, self.shard_count, self.shard_count,
+            getattr(self._local, 'after_id', 0),
+        )
+
+    def create_tasks_after(self, tasks: List[Task], after_id: int) -> List[Task]:
+        """Create tasks under IDs of this shard greater than `after_id`."""
+        self._local.after_id = after_id
+        try:
+            return self.create_tasks(tasks)
+        finally:
+            self._local.after_id = 0
+
+    def existing_content_hashes(self, hashes: List[str]) -> Set[str]:
+        """Get which of the given content hashes belong to a task of the current list."""
+        found = set()
+        with self._reading() as conn:
+            for start in range(0, len(hashes), 500):
+                chunk = hashes[start:start + 500]
+                found.update(row[0] for row in conn.execute(
+                    f'SELECT content_hash FROM tasks WHERE list_id = ? AND content_hash IN ({", ".join("?" * len(chunk))})',
+                    [self.task_list, *chunk]
+                ))
+        return found
+
+    def first_ids_by_content_hash(self) -> Dict[str, int]:
+        """Get the lowest task ID of every content hash of the current list."""
+        with self._reading() as conn:
+            return dict(conn.execute(
+                'SELECT content_hash, MIN(id) FROM tasks WHERE list_id = ? GROUP BY content_hash', (self.task_list,)
+            ))
+
+    def delete_content_hashes(self, hashes: List[str]) -> int:
+        """Delete the tasks of the current list with the given content hashes."""
+        if not hashes:
+            return 0
+        with self._writing() as conn:
+            cursor = conn.cursor()
+            cursor.executemany(
+                'DELETE FROM tasks WHERE list_id = ? AND content_hash = ?',
+                [(self.task_list, task_hash) for task_hash in hashes]
+            )
+            conn.commit()
+            return cursor.rowcount
+
+    def sync_digests(self, start_id: int = None, end_id: int = None) -> List[Tuple[int, int]]:
+        """Get the IDs and stored sync digests of the tasks in `[start_id, end_id)`, in ID order."""
+        bounds = (self.task_list, 0 if start_id is None else start_id, MAX_TASK_ID if end_id is None else end_id)
+        with self._reading() as conn:
+            tables = [
+                conn.execute(
+                    f'SELECT id, sync_digest FROM {table} WHERE list_id = ? AND id >= ? AND id < ? ORDER BY id',
+                    bounds
+                )
+                for table in ('tasks', 'tasks_archive')
+            ]
+            return list(heapq.merge(*tables))
+
+
+class ShardedSQLiteTaskRepository(TaskRepository):
+    """
+    Task repository spreading tasks over `sqlite_settings.shard_count` SQLite databases by ID.
+
+    A task lives in the shard `id % shard_count`, named `<db_path stem>.shard<n><extension>`,
+    so operations on one task go straight to its database and writes to different
+    shards never wait for each other's database lock. A new task takes the next ID
+    of the shard it is spread to, allocated within that shard's insert, so
+    processes sharing the databases never allocate the same ID while IDs created
+    by one process stay sequential. Operations over the whole list run on every
+    shard on a thread pool of `sqlite_settings.shard_workers` threads and their
+    results are merged in the order `SQLiteTaskRepository` returns them.
+
+    Recurrence rules are stored in the first shard.
+    """
+
+    def __init__(self, dt_settings: Settings, dt_preferences: Preferences):
+        super().__init__(dt_settings=dt_settings, dt_preferences=dt_preferences)
+        sqlite_settings = dt_settings.sqlite_settings
+        if sqlite_settings.shard_count < 1:
+            raise ValueError("sqlite_settings.shard_count must be at least 1")
+        root, extension = os.path.splitext(sqlite_settings.db_path)
+        shard_count = sqlite_settings.shard_count
+        self.shards = [
+            _SQLiteShard(
+                dt_settings.model_copy(update={
+                    'sqlite_settings': sqlite_settings.model_copy(update={'db_path': f'{root}.shard{index}{extension}'})
+                }),
+                dt_preferences, index, shard_count,
+            )
+            for index in range(shard_count)
+        ]
+        self._executor = ThreadPoolExecutor(
+            max_workers=sqlite_settings.shard_workers or shard_count, thread_name_prefix='task-shard'
+        )
+        self._local = threading.local()
+        # The highest ID created or seen by this repository; new tasks are created past it.
+        self._id_lock = threading.Lock()
+        self._last_id = max(self._fan_out(lambda shard: shard.max_task_id()))
+
+    def _shard(self, task_id: int) -> _SQLiteShard:
+        return self.shards[task_id % len(self.shards)]
+
+    def _fan_out(self, function: Callable[[Any], Any], items: Iterable[Any] = None) -> List[Any]:
+        """Call a function for every shard, or every item, on the thread pool and collect the results in order."""
+        items = self.shards if items is None else list(items)
+        # The transactions of the shards are bound to the connections of the thread that opened them.
+        if len(items) <= 1 or getattr(self._local, 'in_transaction', False):
+            return [function(item) for item in items]
+        return list(self._executor.map(function, items))
+
+    def _by_shard(self, values: Iterable[Any], task_id: Callable[[Any], int]) -> Dict[int, List[Any]]:
+        groups = {}
+        for value in values:
+            groups.setdefault(task_id(value) % len(self.shards), []).append(value)
+        return groups
+
+    def _seen_id(self, task_id: int):
+        with self._id_lock:
+            self._last_id = max(self._last_id, task_id)
+
+    def close(self):
+        """Shut down the thread pool and close the connections of the shards."""
+        self._executor.shutdown()
+        for shard in self.shards:
+            shard.close()
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """
+        Open a transaction on every shard and commit them one after the other when the block exits.
+
+        Operations inside the block run every shard on the calling thread instead
+        of the thread pool. Each shard commits atomically, but a crash between two
+        shard commits keeps the changes of the shards committed so far.
+        """
+        if getattr(self._local, 'in_transaction', False):
+            yield
+            return
+        with ExitStack() as stack:
+            for shard in self.shards:
+                stack.enter_context(shard.transaction())
+            self._local.in_transaction = True
+            try:
+                yield
+            finally:
+                self._local.in_transaction = False
+
+    def create_task(self, task: Task) -> Task:
+        return self.create_tasks([task])[0]
+
+    def create_tasks(self, tasks: List[Task], skip_duplicates: bool = False) -> List[Task]:
+        """
+        Create new tasks in order, inserting into the shards in parallel.
+
+        Duplicates are looked up in the content hash index of every shard at once.
+
+        Args:
+            tasks: The task objects to create.
+            skip_duplicates: Whether to skip tasks that duplicate an existing task
+                or an earlier task of the batch instead of creating them.
+
+        Returns:
+            The created tasks.
+        """
+        if skip_duplicates:
+            hashes = [task.content_hash() for task in tasks]
+            seen = set().union(*self._fan_out(lambda shard: shard.existing_content_hashes(hashes)))
+            kept_tasks = []
+            for task, task_hash in zip(tasks, hashes):
+                if task_hash not in seen:
+                    seen.add(task_hash)
+                    kept_tasks.append(task)
+            tasks = kept_tasks
+        if not tasks:
+            return []
+        with self._id_lock:
+            after_id = self._last_id
+            self._last_id += len(tasks)
+        # Spreading the batch round-robin from the shard of `after_id + 1` gives it consecutive IDs.
+        groups = {}
+        for position, task in enumerate(tasks):
+            groups.setdefault((after_id + 1 + position) % len(self.shards), []).append(task)
+        self._fan_out(lambda group: self.shards[group[0]].create_tasks_after(group[1], after_id), groups.items())
+        self._seen_id(max(task.id for task in tasks))
+        return tasks
+
+    def read_task(self, task_id: int) -> Task:
+        return self._shard(task_id).read_task(task_id)
+
+    def update_task(self, task_id: int, data: Dict[str, Any], expected_version: int = None) -> Task:
+        return self._shard(task_id).update_task(task_id, data, expected_version)
+
+    def delete_task(self, task_id: int):
+        self._shard(task_id).delete_task(task_id)
+
+    def insert_tasks(self, tasks: List[Task]):
+        if any(task.id is None for task in tasks):
+            raise ValueError("Tasks must have an ID to be inserted")
+        if not tasks:
+            return
+        taken_ids = self.taken_task_ids([task.id for task in tasks])
+        if taken_ids:
+            # Checked before writing, so no shard is left with part of the tasks.
+            raise ValueError(f"Task IDs {sorted(taken_ids)} belong to another task list")
+        groups = self._by_shard(tasks, lambda task: task.id)
+        self._fan_out(lambda group: self.shards[group[0]].insert_tasks(group[1]), groups.items())
+        self._seen_id(max(task.id for task in tasks))
+
+    def max_task_id(self) -> int:
+        return max(self._fan_out(lambda shard: shard.max_task_id()))
+
+    def taken_task_ids(self, task_ids: List[int]) -> Set[int]:
+        groups = self._by_shard(task_ids, lambda task_id: task_id)
+        return set().union(*self._fan_out(
+            lambda group: self.shards[group[0]].taken_task_ids(group[1]), groups.items()
+        ))
+
+    @staticmethod
+    def _merge(results: List[list], filter_text: str) -> list:
+        """Merge the tasks or summaries returned by every shard in the order of `SQLiteTaskRepository`."""
+        if filter_text in DUE_DATE_FILTERS:
+            return list(heapq.merge(*results, key=lambda task: (task.due_date, task.id)))
+        if filter_text == TaskFilter.COMPLETED.value:
+            # Shards return their hot tasks before their archived ones, so the results are not sorted.
+            return sorted(chain.from_iterable(results), key=lambda task: task.id)
+        return list(heapq.merge(*results, key=lambda task: task.id))
+
+    def list_tasks(self) -> List[Task]:
+        return self._merge(self._fan_out(lambda shard: shard.list_tasks()), TaskFilter.ALL.value)
+
+    def filter_tasks(self, filter_text: TaskFilter) -> List[Task]:
+        return self._merge(self._fan_out(lambda shard: shard.filter_tasks(filter_text)), filter_text)
+
+    def list_task_summaries(self, filter_text: str = TaskFilter.ALL.value) -> List[TaskSummary]:
+        return self._merge(self._fan_out(lambda shard: shard.list_task_summaries(filter_text)), filter_text)
+
+    def count_tasks(self, filter_text: str = TaskFilter.ALL.value) -> int:
+        return sum(self._fan_out(lambda shard: shard.count_tasks(filter_text)))
+
+    def stats(self) -> TaskStats:
+        shard_stats = self._fan_out(lambda shard: shard.stats())
+        return TaskStats(**{
+            field: sum(getattr(stats, field) for stats in shard_stats) for field in TaskStats.model_fields
+        })
+
+    def tasks_due_between(self, start: Optional[date], end: Optional[date]) -> List[Task]:
+        results = self._fan_out(lambda shard: shard.tasks_due_between(start, end))
+        return list(heapq.merge(*results, key=lambda task: (task.due_date, task.id)))
+
+    def change_token(self) -> Tuple[Hashable, ...]:
+        return tuple(self._fan_out(lambda shard: shard.change_token()))
+
+    def task_versions(self, task_ids: List[int] = None) -> Dict[int, int]:
+        if task_ids is None:
+            results = self._fan_out(lambda shard: shard.task_versions())
+        else:
+            groups = self._by_shard(task_ids, lambda task_id: task_id)
+            results = self._fan_out(lambda group: self.shards[group[0]].task_versions(group[1]), groups.items())
+        return {task_id: version for versions in results for task_id, version in versions.items()}
+
+    def iter_tasks(
+        self, batch_size: int = 500, after_id: int = None, include_archived: bool = False
+    ) -> Iterator[Task]:
+        """
+        Stream all tasks in ID order by merging one stream per shard.
+
+        Args:
+            batch_size: The number of rows to fetch from each shard at a time.
+            after_id: Only yield tasks with an ID greater than this one.
+            include_archived: Whether to include archived tasks.
+
+        Returns:
+            An iterator of task objects.
+        """
+        yield from heapq.merge(
+            *(shard.iter_tasks(batch_size, after_id, include_archived) for shard in self.shards),
+            key=lambda task: task.id,
+        )
+
+    def range_digest(self, start_id: int = None, end_id: int = None) -> RangeDigest:
+        """
+        Summarize the tasks with IDs in `[start_id, end_id)` from the sync digests stored in every shard.
+
+        The summary is the same as the one of an unsharded repository holding the same tasks.
+
+        Args:
+            start_id: The first ID of the range; unbounded if None.
+            end_id: The ID past the end of the range; unbounded if None.
+
+        Returns:
+            The summary of the range.
+        """
+        results = self._fan_out(lambda shard: shard.sync_digests(start_id, end_id))
+        return summarize_id_range(heapq.merge(*results))
+
+    def archive_completed_tasks(self, older_than: datetime = None) -> int:
+        return sum(self._fan_out(lambda shard: shard.archive_completed_tasks(older_than)))
+
+    def find_duplicate(self, task: Task) -> Optional[Task]:
+        duplicates = [duplicate for duplicate in self._fan_out(lambda shard: shard.find_duplicate(task)) if duplicate]
+        return min(duplicates, key=lambda duplicate: duplicate.id, default=None)
+
+    def deduplicate_tasks(self) -> int:
+        """
+        Delete the duplicate tasks of the current list, keeping the one with the lowest ID.
+
+        Each shard drops its own duplicates first; the tasks left duplicating a task
+        with a lower ID in another shard are then deleted by content hash.
+
+        Returns:
+            The number of deleted tasks.
+        """
+        deleted = sum(self._fan_out(lambda shard: shard.deduplicate_tasks()))
+        first_ids = self._fan_out(lambda shard: shard.first_ids_by_content_hash())
+        lowest_ids = {}
+        for ids in first_ids:
+            for task_hash, task_id in ids.items():
+                lowest_ids[task_hash] = min(lowest_ids.get(task_hash, task_id), task_id)
+        deleted += sum(self._fan_out(
+            lambda shard_ids: shard_ids[0].delete_content_hashes([
+                task_hash for task_hash, task_id in shard_ids[1].items() if lowest_ids[task_hash] != task_id
+            ]),
+            zip(self.shards, first_ids),
+        ))
+        return deleted
+
+    def recompress_descriptions(self) -> int:
+        return sum(self._fan_out(lambda shard: shard.recompress_descriptions()))
+
+    def list_recurrences(self) -> List[RecurrenceRule]:
+        return self.shards[0].list_recurrences()
+
+    def read_recurrence(self, recurrence_id: int) -> RecurrenceRule:
+        return self.shards[0].read_recurrence(recurrence_id)
+
+    def iter_occurrences(self, start: date, end: date) -> Iterator[Occurrence]:
+        return self.shards[0].iter_occurrences(start, end)
+
+    def save_recurrence(self, rule: RecurrenceRule) -> RecurrenceRule:
+        return self.shards[0].save_recurrence(rule)
+
+    def delete_recurrence(self, recurrence_id: int):
+        self.shards[0].delete_recurrence(recurrence_id)
+
+    def backup(self, directory: str) -> List[str]:
+        """
+        Copy every shard into a directory with the SQLite online backup API, in parallel.
+
+        Each shard is copied in a consistent state, but shards are not copied at
+        the same instant.
+
+        Args:
+            directory: The existing, empty directory to write the copies to.
+
+        Returns:
+            The names of the written files.
+        """
+        return list(chain.from_iterable(self._fan_out(lambda shard: shard.backup(directory))))
+
+    def task_lists(self) -> List[str]:
+        return sorted(set().union(*self._fan_out(lambda shard: shard.task_lists())))
+
+    def use_task_list(self, name: str):
+        validate_task_list_name(name)
+        self._fan_out(lambda shard: shard.use_task_list(name))
+        self.task_list = name
@@ -1,10 +1,70 @@
 """
 SQLite task repository implementation.
 """
+import heapq
+import os
 import sqlite3
-from typing import Dict, Any, List
-from daily_tasks.models import Task, Settings, Preferences, TaskFilter
-from daily_tasks.repository import TaskRepository
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Any, List, Iterator, Optional, Set, Tuple
+from daily_tasks.locking import ReadWriteLock
+from daily_tasks.compression import ZLIB_ENCODING, compress_description, decompress_description
+from daily_tasks.models import (
+    Occurrence, RangeDigest, RecurrenceRule, Task, TaskStats, TaskSummary, Settings, Preferences, TaskFilter, TaskChange, DEFAULT_TASK_LIST, DESCRIPTION_PREVIEW_LENGTH,
+    content_hash, description_preview,
+)
+from daily_tasks.recurrence import merge_occurrences
+from daily_tasks.repository import (
+    TaskRepository, VersionConflictError, DUE_DATE_FILTERS, as_utc, due_date_window, summarize_id_range,
+    validate_task_changes, validate_task_list_name,
+)
+
+# description holds zlib-compressed bytes instead of text when description_encoding is set.
+TASK_COLUMNS = 'id, title, description, completed, version, due_date, completed_at, description_encoding'
+SUMMARY_COLUMNS = 'id, title, completed, version, due_date, description_preview'
+# Every stored column, for copying rows between the tasks and tasks_archive tables.
+STORED_COLUMNS = f'{TASK_COLUMNS}, description_preview, list_id, content_hash, sync_digest'
+# Past every ID SQLite can allocate, as the end of unbounded ID ranges.
+MAX_TASK_ID = 2 ** 63 - 1
+# Pause after each backup step, leaving writers a window to take the database lock.
+BACKUP_STEP_PAUSE = 0.005
+# Writes by other connections restart a backup; after this many restarts the rest is copied in one step.
+MAX_BACKUP_RESTARTS = 3
+RECURRENCE_COLUMNS = 'id, title, description, frequency, interval, start_date, end_date'
+
+
+class _BackupRestartedError(Exception):
+    """Raised to stop a stepped backup that keeps being restarted by concurrent writes."""
+
+
+class _TransactionConnection:
+    """
+    The connection of an open transaction, as used by the operations run inside it.
+
+    Commits are left to the transaction, and each operation runs in a savepoint,
+    so an operation that raises is undone without rolling back the transaction.
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._conn, name)
+
+    def commit(self):
+        pass
+
+    def __enter__(self) -> '_TransactionConnection':
+        self._conn.execute('SAVEPOINT operation')
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> bool:
+        if exc_type is not None:
+            self._conn.execute('ROLLBACK TO operation')
+        self._conn.execute('RELEASE operation')
+        return False
 
 
 class SQLiteTaskRepository(TaskRepository):
@@ -12,90 +72,1133 @@ class SQLiteTaskRepository(TaskRepository):
     def __init__(self, dt_settings: Settings, dt_preferences: Preferences):
         super().__init__(dt_settings=dt_settings, dt_preferences=dt_preferences)
         self.db_path = dt_settings.sqlite_settings.db_path
+        # Each thread gets its own connection; reads run concurrently and writes
+        # are serialized, so threads never wait on SQLite's busy timeout.
+        self._local = threading.local()
+        self._rwlock = ReadWriteLock()
         self._initialize_db()
+        # A long-lived connection whose PRAGMA data_version changes whenever any
+        # other connection, in this process or another, commits to the database.
+        self._probe_conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._probe_lock = threading.Lock()
+        self._data_version = self._read_data_version()
+
+    def close(self):
+        """Close the probe connection and the connection of the current thread."""
+        with self._probe_lock:
+            if self._probe_conn is not None:
+                self._probe_conn.close()
+                self._probe_conn = None
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def __del__(self):
+        probe_conn = getattr(self, '_probe_conn', None)
+        if probe_conn is not None:
+            probe_conn.close()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get the connection of the current thread, opening it on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path)
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _reading(self) -> Iterator[sqlite3.Connection]:
+        """Hold the read lock and a transaction on the connection of the current thread."""
+        transaction = getattr(self._local, 'transaction', None)
+        if transaction is not None:
+            yield transaction
+            return
+        with self._rwlock.read(), self._connection() as conn:
+            yield conn
+
+    @contextmanager
+    def _writing(self) -> Iterator[sqlite3.Connection]:
+        """Hold the write lock and a transaction on the connection of the current thread."""
+        transaction = getattr(self._local, 'transaction', None)
+        if transaction is not None:
+            with transaction:
+                yield transaction
+            return
+        with self._rwlock.write(), self._connection() as conn:
+            yield conn
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """
+        Run the operations of the block in one SQLite transaction on the connection of the current thread.
+
+        The write lock and the database's write lock are taken when the block starts
+        and held until it commits, so the operations inside it neither wait for nor
+        commit anything on their own.
+        """
+        if getattr(self._local, 'transaction', None) is not None:
+            yield
+            return
+        with self._rwlock.write():
+            conn = self._connection()
+            conn.execute('BEGIN IMMEDIATE')
+            self._local.transaction = _TransactionConnection(conn)
+            try:
+                yield
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+            finally:
+                self._local.transaction = None
 
     def _initialize_db(self):
         """Initialize the database and create the tasks table if it doesn't exist."""
         with sqlite3.connect(self.db_path) as conn:
             cursor = conn.cursor()
+            # Completed tasks are moved from the hot tasks table to tasks_archive
+            # once they are old enough; both tables share the same columns.
+            for table in ('tasks', 'tasks_archive'):
+                self._create_task_table(cursor, table)
+            # Each task list is a partition of the tables keyed by list_id; every
+            # index leads with it so queries only visit the rows of one list.
+            cursor.execute('DROP INDEX IF EXISTS idx_tasks_due_date')
+            cursor.execute('DROP INDEX IF EXISTS idx_tasks_completed_at')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_tasks_list_id ON tasks (list_id, id)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_tasks_list_completed ON tasks (list_id, completed)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_tasks_list_due_date ON tasks (list_id, due_date)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_tasks_list_completed_at ON tasks (list_id, completed_at)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_tasks_archive_list_id ON tasks_archive (list_id, id)')
+            # Covers list_task_summaries, so list views never read the (possibly
+            # overflowing) description stored in the table rows.
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_tasks_summary ON tasks (list_id, {SUMMARY_COLUMNS})')
+            # Not unique, since existing lists may hold duplicates until deduplicate_tasks runs.
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_tasks_list_content_hash ON tasks (list_id, content_hash)')
+            # Cover range_digest, so comparing repositories for a sync never reads task rows.
+            for table in ('tasks', 'tasks_archive'):
+                cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_sync_digest ON {table} (list_id, id, sync_digest)')
+            cursor.execute('CREATE TABLE IF NOT EXISTS task_lists (list_id TEXT PRIMARY KEY)')
+            cursor.execute('INSERT OR IGNORE INTO task_lists (list_id) VALUES (?)', (DEFAULT_TASK_LIST,))
+            cursor.execute('INSERT OR IGNORE INTO task_lists (list_id) VALUES (?)', (self.task_list,))
+            # Recurring tasks are stored once per series; the days whose occurrence was
+            # materialized or skipped are kept in their own table so a date window
+            # only reads the exceptions inside it. Both are keyed by list, so each
+            # list numbers its rules on its own like the other backends.
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'recurrences'")
+            migrate_recurrences = cursor.fetchone() is not None and self._primary_key(cursor, 'recurrences') == ['id']
+            if migrate_recurrences:
+                cursor.execute('ALTER TABLE recurrences RENAME TO recurrences_unscoped')
+                cursor.execute('ALTER TABLE recurrence_exceptions RENAME TO recurrence_exceptions_unscoped')
             cursor.execute('''
-                CREATE TABLE IF NOT EXISTS tasks (
-                    id INTEGER PRIMARY KEY,
+                CREATE TABLE IF NOT EXISTS recurrences (
+                    id INTEGER NOT NULL,
+                    list_id TEXT NOT NULL,
                     title TEXT NOT NULL,
                     description TEXT NOT NULL,
-                    completed BOOLEAN NOT NULL
+                    frequency TEXT NOT NULL,
+                    interval INTEGER NOT NULL,
+                    start_date TEXT NOT NULL,
+                    end_date TEXT,
+                    PRIMARY KEY (list_id, id)
                 )
             ''')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS recurrence_exceptions (
+                    list_id TEXT NOT NULL,
+                    recurrence_id INTEGER NOT NULL,
+                    exception_date TEXT NOT NULL,
+                    PRIMARY KEY (list_id, recurrence_id, exception_date)
+                ) WITHOUT ROWID
+            ''')
+            if migrate_recurrences:
+                cursor.execute(f'''
+                    INSERT INTO recurrences ({RECURRENCE_COLUMNS}, list_id)
+                    SELECT {RECURRENCE_COLUMNS}, list_id FROM recurrences_unscoped
+                ''')
+                cursor.execute('''
+                    INSERT INTO recurrence_exceptions (list_id, recurrence_id, exception_date)
+                    SELECT rules.list_id, exceptions.recurrence_id, exceptions.exception_date
+                    FROM recurrence_exceptions_unscoped AS exceptions
+                    JOIN recurrences_unscoped AS rules ON rules.id = exceptions.recurrence_id
+                ''')
+                cursor.execute('DROP TABLE recurrences_unscoped')
+                cursor.execute('DROP TABLE recurrence_exceptions_unscoped')
+            cursor.execute(f'''
+                CREATE TABLE IF NOT EXISTS task_changes (
+                    sequence INTEGER PRIMARY KEY AUTOINCREMENT,
+                    task_id INTEGER NOT NULL,
+                    operation TEXT NOT NULL,
+                    version INTEGER,
+                    list_id TEXT NOT NULL DEFAULT '{DEFAULT_TASK_LIST}'
+                )
+            ''')
+            if self._ensure_column(cursor, 'task_changes', 'list_id', f"TEXT NOT NULL DEFAULT '{DEFAULT_TASK_LIST}'"):
+                # Changes logged before lists were recorded belong to the list still holding the task, if any.
+                cursor.execute('''
+                    UPDATE task_changes SET list_id = COALESCE(
+                        (SELECT list_id FROM tasks WHERE id = task_id),
+                        (SELECT list_id FROM tasks_archive WHERE id = task_id),
+                        list_id
+                    )
+                ''')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_task_changes_list_id ON task_changes (list_id, sequence)')
+            # Tasks moving between the hot table and the archive are logged as archived and restored,
+            # not as deleted and inserted, since both rows exist while the task moves.
+            for trigger in (
+                'tasks_log_insert', 'tasks_log_update', 'tasks_log_delete', 'tasks_log_archive', 'tasks_archive_log_delete'
+            ):
+                cursor.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+            cursor.execute('''
+                CREATE TRIGGER tasks_log_insert AFTER INSERT ON tasks
+                BEGIN
+                    INSERT INTO task_changes (task_id, operation, version, list_id)
+                    SELECT NEW.id, CASE WHEN EXISTS (
+                        SELECT 1 FROM tasks_archive WHERE id = NEW.id AND list_id = NEW.list_id
+                    ) THEN 'restore' ELSE 'insert' END, NEW.version, NEW.list_id;
+                END
+            ''')
+            # Updates of the sync digest alone follow an update that was already logged.
+            cursor.execute(f'''
+                CREATE TRIGGER tasks_log_update
+                AFTER UPDATE OF {TASK_COLUMNS}, description_preview, list_id, content_hash ON tasks
+                BEGIN
+                    INSERT INTO task_changes (task_id, operation, version, list_id)
+                    VALUES (NEW.id, 'update', NEW.version, NEW.list_id);
+                END
+            ''')
+            cursor.execute('''
+                CREATE TRIGGER tasks_log_delete AFTER DELETE ON tasks
+                WHEN NOT EXISTS (SELECT 1 FROM tasks_archive WHERE id = OLD.id AND list_id = OLD.list_id)
+                BEGIN
+                    INSERT INTO task_changes (task_id, operation, version, list_id)
+                    VALUES (OLD.id, 'delete', OLD.version, OLD.list_id);
+                END
+            ''')
+            cursor.execute('''
+                CREATE TRIGGER tasks_log_archive AFTER INSERT ON tasks_archive
+                BEGIN
+                    INSERT INTO task_changes (task_id, operation, version, list_id)
+                    VALUES (NEW.id, 'archive', NEW.version, NEW.list_id);
+                END
+            ''')
+            cursor.execute('''
+                CREATE TRIGGER tasks_archive_log_delete AFTER DELETE ON tasks_archive
+                WHEN NOT EXISTS (SELECT 1 FROM tasks WHERE id = OLD.id AND list_id = OLD.list_id)
+                BEGIN
+                    INSERT INTO task_changes (task_id, operation, version, list_id)
+                    VALUES (OLD.id, 'delete', OLD.version, OLD.list_id);
+                END
+            ''')
             conn.commit()
 
+    def _create_task_table(self, cursor: sqlite3.Cursor, table: str):
+        cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS {table} (
+                id INTEGER PRIMARY KEY,
+                title TEXT NOT NULL,
+                description TEXT NOT NULL,
+                completed BOOLEAN NOT NULL,
+                version INTEGER NOT NULL DEFAULT 1,
+                due_date TEXT,
+                completed_at TEXT,
+                list_id TEXT NOT NULL DEFAULT '{DEFAULT_TASK_LIST}',
+                description_preview TEXT,
+                description_encoding TEXT,
+                content_hash TEXT,
+                sync_digest INTEGER
+            )
+        ''')
+        self._ensure_column(cursor, table, 'version', 'INTEGER NOT NULL DEFAULT 1')
+        self._ensure_column(cursor, table, 'due_date', 'TEXT')
+        self._ensure_column(cursor, table, 'completed_at', 'TEXT')
+        self._ensure_column(cursor, table, 'list_id', f"TEXT NOT NULL DEFAULT '{DEFAULT_TASK_LIST}'")
+        self._ensure_column(cursor, table, 'description_encoding', 'TEXT')
+        if self._ensure_column(cursor, table, 'description_preview', 'TEXT'):
+            # Same text as Task.description_display_text; substr counts characters like Python slicing.
+            cursor.execute(
+                f"UPDATE {table} SET description_preview = substr(description, 1, ?) || '...'",
+                (DESCRIPTION_PREVIEW_LENGTH,)
+            )
+        if self._ensure_column(cursor, table, 'content_hash', 'TEXT'):
+            cursor.execute(f'SELECT id, title, description, description_encoding FROM {table}')
+            cursor.executemany(f'UPDATE {table} SET content_hash = ? WHERE id = ?', [
+                (content_hash(title, self._decode_description(stored, encoding)), task_id)
+                for task_id, title, stored, encoding in cursor.fetchall()
+            ])
+        if self._ensure_column(cursor, table, 'sync_digest', 'INTEGER'):
+            cursor.execute(f'SELECT {TASK_COLUMNS} FROM {table}')
+            cursor.executemany(f'UPDATE {table} SET sync_digest = ? WHERE id = ?', [
+                (self._row_to_task(row).sync_digest(), row[0]) for row in cursor.fetchall()
+            ])
+        # Completion times were once stored with the offset they were given; they are compared as UTC text.
+        cursor.execute(
+            f"SELECT {TASK_COLUMNS} FROM {table} WHERE completed_at IS NOT NULL AND completed_at NOT LIKE '%+00:00'"
+        )
+        for row in cursor.fetchall():
+            task = self._row_to_task(row)
+            task.completed_at = as_utc(task.completed_at)
+            cursor.execute(
+                f'UPDATE {table} SET completed_at = ?, sync_digest = ? WHERE id = ?',
+                (self._to_db_value(task.completed_at), task.sync_digest(), task.id)
+            )
+
+    @staticmethod
+    def _primary_key(cursor: sqlite3.Cursor, table: str) -> List[str]:
+        """Get the primary key columns of a table, in key order."""
+        cursor.execute(f'PRAGMA table_info({table})')
+        return [row[1] for row in sorted((row for row in cursor.fetchall() if row[5]), key=lambda row: row[5])]
+
+    @staticmethod
+    def _ensure_column(cursor: sqlite3.Cursor, table: str, column: str, definition: str):
+        """
+        Add a column to a table created by an older version of the schema.
+
+        Returns:
+            True if the column was added.
+        """
+        cursor.execute(f'PRAGMA table_info({table})')
+        if column not in {row[1] for row in cursor.fetchall()}:
+            cursor.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+            return True
+        return False
+
+    @staticmethod
+    def _decode_description(stored: Any, encoding: Optional[str]) -> str:
+        return stored if encoding is None else decompress_description(stored, encoding)
+
+    @classmethod
+    def _row_to_task(cls, row) -> Task:
+        # List views read summaries, so only full reads pay for decompressing descriptions.
+        return Task(
+            id=row[0], title=row[1], description=cls._decode_description(row[2], row[7]), completed=row[3],
+            version=row[4], due_date=row[5], completed_at=row[6]
+        )
+
+    def _task_to_row(self, task: Task) -> tuple:
+        """Get the values of all `STORED_COLUMNS` of a task."""
+        if task.completed_at is not None:
+            task = task.model_copy(update={'completed_at': as_utc(task.completed_at)})
+        description, description_encoding = self._encode_description(task.description)
+        return (
+            task.id, task.title, description, task.completed, task.version,
+            self._to_db_value(task.due_date), self._to_db_value(task.completed_at),
+            description_encoding, task.description_display_text(), self.task_list, task.content_hash(),
+            task.sync_digest()
+        )
+
+    def _encode_description(self, description: str) -> Tuple[Any, Optional[str]]:
+        """Get the stored value and encoding of a description, compressing it if it is large."""
+        compressed = compress_description(description, self.dt_settings.compression_settings)
+        if compressed is None:
+            return description, None
+        return compressed, ZLIB_ENCODING
+
+    @staticmethod
+    def _to_db_value(value: Any) -> Any:
+        """
+        Store dates and times as ISO 8601 text so they sort and compare chronologically.
+
+        Times only compare chronologically as text in the same offset, so callers pass them through `as_utc` first.
+        """
+        if isinstance(value, date):
+            return value.isoformat()
+        return value
+
     def create_task(self, task: Task) -> Task:
-        with sqlite3.connect(self.db_path) as conn:
+        with self._writing() as conn:
+            self._insert_new_task(conn.cursor(), task)
+            conn.commit()
+        return task
+
+    def create_tasks(self, tasks: List[Task], skip_duplicates: bool = False) -> List[Task]:
+        """
+        Create new tasks in order in a single transaction.
+
+        Duplicates are looked up in the content hash index, which also sees the
+        tasks inserted earlier in the batch.
+
+        Args:
+            tasks: The task objects to create.
+            skip_duplicates: Whether to skip tasks that duplicate an existing task
+                or an earlier task of the batch instead of creating them.
+
+        Returns:
+            The created tasks.
+        """
+        created_tasks = []
+        with self._writing() as conn:
+            cursor = conn.cursor()
+            for task in tasks:
+                if skip_duplicates and self._find_duplicate(cursor, task.content_hash()) is not None:
+                    continue
+                self._insert_new_task(cursor, task)
+                created_tasks.append(task)
+            conn.commit()
+        return created_tasks
+
+    def _insert_new_task(self, cursor: sqlite3.Cursor, task: Task):
+        """Insert a task under the next free ID, setting its ID and version."""
+        if task.completed and task.completed_at is None:
+            task.completed_at = datetime.now(timezone.utc)
+        elif task.completed_at is not None:
+            task.completed_at = as_utc(task.completed_at)
+        task.version = 1
+        description, description_encoding = self._encode_description(task.description)
+        new_id_sql, new_id_values = self._new_task_id_sql()
+        cursor.execute(f'''
+            INSERT INTO tasks ({STORED_COLUMNS})
+            VALUES ({new_id_sql}, ?, ?, ?, 1, ?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            *new_id_values, task.title, description, task.completed,
+            self._to_db_value(task.due_date), self._to_db_value(task.completed_at),
+            description_encoding, task.description_display_text(), self.task_list, task.content_hash(),
+            task.sync_digest()
+        ))
+        task.id = cursor.lastrowid
+
+    def _new_task_id_sql(self) -> Tuple[str, tuple]:
+        """
+        Get the SQL expression allocating the ID of a new task, evaluated within the insert.
+
+        IDs are allocated past both tables so a new task never reuses the ID of an archived one.
+
+        Returns:
+            The expression and the values of its placeholders.
+        """
+        return (
+            '(SELECT COALESCE(MAX(id), 0) + 1 FROM ('
+            'SELECT MAX(id) AS id FROM tasks UNION ALL SELECT MAX(id) FROM tasks_archive))'
+        ), ()
+
+    def find_duplicate(self, task: Task) -> Optional[Task]:
+        """
+        Find a task of the current list with the same content as a task with a content hash index lookup.
+
+        Args:
+            task: The task to look for; its ID is ignored.
+
+        Returns:
+            The duplicate with the lowest ID, or None if there is none.
+        """
+        with self._reading() as conn:
+            row = self._find_duplicate(conn.cursor(), task.content_hash())
+        return self._row_to_task(row) if row is not None else None
+
+    def _find_duplicate(self, cursor: sqlite3.Cursor, task_hash: str) -> Optional[tuple]:
+        cursor.execute(
+            f'SELECT {TASK_COLUMNS} FROM tasks WHERE list_id = ? AND content_hash = ? ORDER BY id LIMIT 1',
+            (self.task_list, task_hash)
+        )
+        return cursor.fetchone()
+
+    def deduplicate_tasks(self) -> int:
+        """
+        Delete the duplicate tasks of the current list, keeping the one with the lowest ID.
+
+        Returns:
+            The number of deleted tasks.
+        """
+        with self._writing() as conn:
             cursor = conn.cursor()
             cursor.execute('''
-                INSERT INTO tasks (title, description, completed)
-                VALUES (?, ?, ?)
-            ''', (task.title, task.description, task.completed))
-            task.id = cursor.lastrowid
+                DELETE FROM tasks WHERE list_id = ? AND id NOT IN (
+                    SELECT MIN(id) FROM tasks WHERE list_id = ? GROUP BY content_hash
+                )
+            ''', (self.task_list, self.task_list))
             conn.commit()
-        return task
+            return cursor.rowcount
 
     def read_task(self, task_id: int) -> Task:
-        with sqlite3.connect(self.db_path) as conn:
+        with self._reading() as conn:
             cursor = conn.cursor()
             cursor.execute(
-                'SELECT id, title, description, completed FROM tasks WHERE id = ?',
-                (task_id,)
+                f'SELECT {TASK_COLUMNS} FROM tasks WHERE id = ? AND list_id = ?',
+                (task_id, self.task_list)
             )
             row = cursor.fetchone()
+            if row is None:
+                cursor.execute(
+                    f'SELECT {TASK_COLUMNS} FROM tasks_archive WHERE id = ? AND list_id = ?',
+                    (task_id, self.task_list)
+                )
+                row = cursor.fetchone()
             if row:
-                return Task(id=row[0], title=row[1], description=row[2], completed=row[3])
+                return self._row_to_task(row)
             else:
                 raise ValueError(f"Task with id {task_id} does not exist")
 
-    def update_task(self, task_id: int, data: Dict[str, Any]) -> Task:
-        with sqlite3.connect(self.db_path) as conn:
+    def update_task(self, task_id: int, data: Dict[str, Any], expected_version: int = None) -> Task:
+        # Only editable fields are taken, so the column names below never come from the caller.
+        data = validate_task_changes(data)
+        with self._writing() as conn:
             cursor = conn.cursor()
+            self._restore_archived_task(cursor, task_id)
             columns = []
             values = []
             for key, value in data.items():
+                if key == 'description':
+                    continue
+                if key == 'completed_at' and value is not None:
+                    value = as_utc(value)
                 columns.append(f"{key} = ?")
-                values.append(value)
-            values.append(task_id)
+                values.append(self._to_db_value(value))
+            if 'description' in data:
+                columns.append("description = ?, description_encoding = ?, description_preview = ?")
+                values.extend([
+                    *self._encode_description(data['description']), description_preview(data['description'])
+                ])
+            if 'title' in data or 'description' in data:
+                cursor.execute(
+                    'SELECT title, description, description_encoding FROM tasks WHERE id = ? AND list_id = ?',
+                    (task_id, self.task_list)
+                )
+                row = cursor.fetchone()
+                if row is not None:
+                    title = data.get('title', row[0])
+                    description = data.get('description')
+                    if description is None:
+                        description = self._decode_description(row[1], row[2])
+                    columns.append("content_hash = ?")
+                    values.append(content_hash(title, description))
+            if 'completed' in data and 'completed_at' not in data:
+                columns.append("completed_at = CASE WHEN ? THEN COALESCE(completed_at, ?) ELSE NULL END")
+                values.extend([bool(data['completed']), self._to_db_value(datetime.now(timezone.utc))])
+            columns.append("version = version + 1")
+            values.extend([task_id, self.task_list])
+            condition = 'id = ? AND list_id = ?'
+            if expected_version is not None:
+                condition += ' AND version = ?'
+                values.append(expected_version)
             cursor.execute(f'''
                 UPDATE tasks
                 SET {', '.join(columns)}
-                WHERE id = ?
+                WHERE {condition}
             ''', values)
+            if cursor.rowcount:
+                # Some columns were set by SQL expressions, so the digest is computed from the updated row.
+                cursor.execute(
+                    f'SELECT {TASK_COLUMNS} FROM tasks WHERE id = ? AND list_id = ?', (task_id, self.task_list)
+                )
+                sync_digest = self._row_to_task(cursor.fetchone()).sync_digest()
+                cursor.execute('UPDATE tasks SET sync_digest = ? WHERE id = ?', (sync_digest, task_id))
+            elif expected_version is not None:
+                cursor.execute('SELECT version FROM tasks WHERE id = ? AND list_id = ?', (task_id, self.task_list))
+                row = cursor.fetchone()
+                if row is not None:
+                    raise VersionConflictError(task_id, expected_version, row[0])
             conn.commit()
         return self.read_task(task_id)
 
     def delete_task(self, task_id: int):
-        with sqlite3.connect(self.db_path) as conn:
+        with self._writing() as conn:
             cursor = conn.cursor()
-            cursor.execute('DELETE FROM tasks WHERE id = ?', (task_id,))
+            cursor.execute('DELETE FROM tasks WHERE id = ? AND list_id = ?', (task_id, self.task_list))
+            cursor.execute('DELETE FROM tasks_archive WHERE id = ? AND list_id = ?', (task_id, self.task_list))
             conn.commit()
 
+    def _restore_archived_task(self, cursor: sqlite3.Cursor, task_id: int):
+        """Move a task back from the archive to the hot table, if it was archived."""
+        cursor.execute(
+            f'INSERT INTO tasks ({STORED_COLUMNS}) '
+            f'SELECT {STORED_COLUMNS} FROM tasks_archive WHERE id = ? AND list_id = ?',
+            (task_id, self.task_list)
+        )
+        if cursor.rowcount:
+            cursor.execute('DELETE FROM tasks_archive WHERE id = ? AND list_id = ?', (task_id, self.task_list))
+
+    def archive_completed_tasks(self, older_than: datetime = None) -> int:
+        if older_than is None:
+            older_than = datetime.now(timezone.utc) - timedelta(
+                days=self.dt_settings.archive_settings.archive_after_days
+            )
+        condition = 'list_id = ? AND completed = 1 AND completed_at IS NOT NULL AND completed_at <= ?'
+        values = (self.task_list, self._to_db_value(as_utc(older_than)))
+        with self._writing() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f'INSERT OR REPLACE INTO tasks_archive ({STORED_COLUMNS}) '
+                f'SELECT {STORED_COLUMNS} FROM tasks WHERE {condition}',
+                values
+            )
+            cursor.execute(f'DELETE FROM tasks WHERE {condition}', values)
+            archived = cursor.rowcount
+            conn.commit()
+        return archived
+
     def list_tasks(self) -> List[Task]:
-        with sqlite3.connect(self.db_path) as conn:
+        with self._reading() as conn:
             cursor = conn.cursor()
-            cursor.execute('SELECT id, title, description, completed FROM tasks')
+            cursor.execute(f'SELECT {TASK_COLUMNS} FROM tasks WHERE list_id = ? ORDER BY id', (self.task_list,))
             rows = cursor.fetchall()
-        return [Task(id=row[0], title=row[1], description=row[2], completed=row[3]) for row in rows]
+        return [self._row_to_task(row) for row in rows]
 
     def filter_tasks(self, filter_text: TaskFilter) -> List[Task]:
-        with sqlite3.connect(self.db_path) as conn:
+        with self._reading() as conn:
             cursor = conn.cursor()
             if filter_text == TaskFilter.ALL.value:
                 cursor.execute(
-                    'SELECT id, title, description, completed FROM tasks'
+                    f'SELECT {TASK_COLUMNS} FROM tasks WHERE list_id = ? ORDER BY id',
+                    (self.task_list,)
                 )
             elif filter_text == TaskFilter.COMPLETED.value:
                 cursor.execute(
-                    'SELECT id, title, description, completed FROM tasks WHERE completed = 1'
+                    f'SELECT {TASK_COLUMNS} FROM tasks WHERE list_id = ? AND completed = 1 '
+                    f'UNION ALL SELECT {TASK_COLUMNS} FROM tasks_archive WHERE list_id = ?',
+                    (self.task_list, self.task_list)
                 )
             elif filter_text == TaskFilter.ACTIVE.value:
                 cursor.execute(
-                    'SELECT id, title, description, completed FROM tasks WHERE completed = 0'
+                    f'SELECT {TASK_COLUMNS} FROM tasks WHERE list_id = ? AND completed = 0 ORDER BY id',
+                    (self.task_list,)
+                )
+            elif filter_text in DUE_DATE_FILTERS:
+                start, end = due_date_window(filter_text)
+                return self._tasks_due_between(
+                    cursor, start, end, active_only=filter_text == TaskFilter.OVERDUE.value
+                )
+            rows = cursor.fetchall()
+        return [self._row_to_task(row) for row in rows]
+
+    def list_task_summaries(self, filter_text: str = TaskFilter.ALL.value) -> List[TaskSummary]:
+        """
+        List task summaries from the covering summary index.
+
+        Only the summary columns are selected, so full descriptions are never read.
+
+        Args:
+            filter_text: A `TaskFilter` value; defaults to all tasks.
+
+        Returns:
+            The list of task summaries, in the same order as `filter_tasks`.
+        """
+        conditions = ['list_id = ?']
+        values = [self.task_list]
+        order = 'id'
+        if filter_text == TaskFilter.COMPLETED.value:
+            conditions.append('completed = 1')
+        elif filter_text == TaskFilter.ACTIVE.value:
+            conditions.append('completed = 0')
+        elif filter_text in DUE_DATE_FILTERS:
+            start, end = due_date_window(filter_text)
+            conditions.append('due_date IS NOT NULL')
+            if start is not None:
+                conditions.append('due_date >= ?')
+                values.append(start.isoformat())
+            if end is not None:
+                conditions.append('due_date <= ?')
+                values.append(end.isoformat())
+            if filter_text == TaskFilter.OVERDUE.value:
+                conditions.append('completed = 0')
+            order = 'due_date, id'
+        elif filter_text != TaskFilter.ALL.value:
+            raise ValueError(f"{filter_text} is not a valid filter option")
+        query = f'SELECT {SUMMARY_COLUMNS} FROM tasks WHERE {" AND ".join(conditions)}'
+        if filter_text == TaskFilter.COMPLETED.value:
+            query += f' UNION ALL SELECT {SUMMARY_COLUMNS} FROM tasks_archive WHERE list_id = ?'
+            values.append(self.task_list)
+        else:
+            query += f' ORDER BY {order}'
+        with self._reading() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, values)
+            rows = cursor.fetchall()
+        return [
+            TaskSummary(
+                id=row[0], title=row[1], completed=row[2], version=row[3], due_date=row[4], description_preview=row[5]
+            )
+            for row in rows
+        ]
+
+    def count_tasks(self, filter_text: str = TaskFilter.ALL.value) -> int:
+        """
+        Count the tasks matching a filter with an aggregate query on the list indexes.
+
+        Args:
+            filter_text: A `TaskFilter` value; defaults to all tasks.
+
+        Returns:
+            The number of tasks `filter_tasks` would return.
+        """
+        conditions = ['list_id = ?']
+        values = [self.task_list]
+        if filter_text == TaskFilter.COMPLETED.value:
+            conditions.append('completed = 1')
+        elif filter_text == TaskFilter.ACTIVE.value:
+            conditions.append('completed = 0')
+        elif filter_text in DUE_DATE_FILTERS:
+            start, end = due_date_window(filter_text)
+            conditions.append('due_date IS NOT NULL')
+            if start is not None:
+                conditions.append('due_date >= ?')
+                values.append(start.isoformat())
+            if end is not None:
+                conditions.append('due_date <= ?')
+                values.append(end.isoformat())
+            if filter_text == TaskFilter.OVERDUE.value:
+                conditions.append('completed = 0')
+        elif filter_text != TaskFilter.ALL.value:
+            raise ValueError(f"{filter_text} is not a valid filter option")
+        query = f'SELECT COUNT(*) FROM tasks WHERE {" AND ".join(conditions)}'
+        if filter_text == TaskFilter.COMPLETED.value:
+            query = f'SELECT ({query}) + (SELECT COUNT(*) FROM tasks_archive WHERE list_id = ?)'
+            values.append(self.task_list)
+        with self._reading() as conn:
+            return conn.execute(query, values).fetchone()[0]
+
+    def stats(self) -> TaskStats:
+        """
+        Get the task counts of the current task list with two aggregate queries.
+
+        Returns:
+            The task counts.
+        """
+        with self._reading() as conn:
+            total, completed = conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(completed), 0) FROM tasks WHERE list_id = ?', (self.task_list,)
+            ).fetchone()
+            archived = conn.execute(
+                'SELECT COUNT(*) FROM tasks_archive WHERE list_id = ?', (self.task_list,)
+            ).fetchone()[0]
+        return TaskStats(
+            total=total + archived, active=total - completed, completed=completed + archived, archived=archived
+        )
+
+    def tasks_due_between(self, start: Optional[date], end: Optional[date]) -> List[Task]:
+        with self._reading() as conn:
+            return self._tasks_due_between(conn.cursor(), start, end)
+
+    def _tasks_due_between(
+        self, cursor: sqlite3.Cursor, start: Optional[date], end: Optional[date], active_only: bool = False
+    ) -> List[Task]:
+        """Answer a due date window with a range scan of the due date index."""
+        conditions = ['list_id = ?', 'due_date IS NOT NULL']
+        values = [self.task_list]
+        if start is not None:
+            conditions.append('due_date >= ?')
+            values.append(start.isoformat())
+        if end is not None:
+            conditions.append('due_date <= ?')
+            values.append(end.isoformat())
+        if active_only:
+            conditions.append('completed = 0')
+        cursor.execute(
+            f'SELECT {TASK_COLUMNS} FROM tasks WHERE {" AND ".join(conditions)} ORDER BY due_date, id',
+            values
+        )
+        return [self._row_to_task(row) for row in cursor.fetchall()]
+
+    def task_versions(self, task_ids: List[int] = None) -> Dict[int, int]:
+        with self._reading() as conn:
+            cursor = conn.cursor()
+            if task_ids is None:
+                cursor.execute('SELECT id, version FROM tasks WHERE list_id = ?', (self.task_list,))
+                return dict(cursor.fetchall())
+            versions = {}
+            for start in range(0, len(task_ids), 500):
+                chunk = task_ids[start:start + 500]
+                cursor.execute(
+                    f'SELECT id, version FROM tasks WHERE list_id = ? AND id IN ({", ".join("?" * len(chunk))})',
+                    [self.task_list, *chunk]
                 )
+                versions.update(cursor.fetchall())
+            return versions
+
+    def max_task_id(self) -> int:
+        """Get the highest ID of any task list, archived tasks included."""
+        with self._reading() as conn:
+            return conn.execute(
+                'SELECT COALESCE(MAX(id), 0) FROM ('
+                'SELECT MAX(id) AS id FROM tasks UNION ALL SELECT MAX(id) FROM tasks_archive)'
+            ).fetchone()[0]
+
+    def taken_task_ids(self, task_ids: List[int]) -> Set[int]:
+        """Get which of the given IDs belong to a task of another list, archived tasks included."""
+        with self._reading() as conn:
+            return self._taken_task_ids(conn, task_ids)
+
+    def _taken_task_ids(self, conn: sqlite3.Connection, task_ids: List[int]) -> Set[int]:
+        taken = set()
+        for start in range(0, len(task_ids), 500):
+            chunk = task_ids[start:start + 500]
+            placeholders = ", ".join("?" * len(chunk))
+            taken.update(row[0] for row in conn.execute(
+                f'SELECT id FROM tasks WHERE id IN ({placeholders}) AND list_id != ? '
+                f'UNION SELECT id FROM tasks_archive WHERE id IN ({placeholders}) AND list_id != ?',
+                [*chunk, self.task_list, *chunk, self.task_list]
+            ))
+        return taken
+
+    def insert_tasks(self, tasks: List[Task]):
+        """
+        Insert tasks keeping their IDs, replacing any task of the current list with the same ID.
+
+        Task IDs are shared by every list of the database.
+
+        Raises:
+            ValueError: If an ID belongs to a task of another list.
+        """
+        with self._writing() as conn:
+            taken_ids = self._taken_task_ids(conn, [task.id for task in tasks])
+            if taken_ids:
+                raise ValueError(f"Task IDs {sorted(taken_ids)} belong to another task list")
+            cursor = conn.cursor()
+            cursor.executemany(f'''
+                INSERT OR REPLACE INTO tasks ({STORED_COLUMNS})
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', [
+                self._task_to_row(task)
+                for task in tasks
+            ])
+            # Removed once the hot rows exist, so replaced archived tasks are not logged as deleted.
+            cursor.executemany(
+                'DELETE FROM tasks_archive WHERE id = ? AND list_id = ?',
+                [(task.id, self.task_list) for task in tasks]
+            )
+            conn.commit()
+
+    def iter_tasks(
+        self, batch_size: int = 500, after_id: int = None, include_archived: bool = False
+    ) -> Iterator[Task]:
+        """
+        Stream all tasks in ID order through a single cursor per table.
+
+        Rows are stepped out of SQLite `batch_size` at a time, so memory use does
+        not depend on the number of tasks in the database. Archived tasks are
+        merged in by ID when requested.
+
+        Args:
+            batch_size: The number of rows to fetch from the cursor at a time.
+            after_id: Only yield tasks with an ID greater than this one.
+            include_archived: Whether to include archived tasks.
+
+        Returns:
+            An iterator of task objects.
+        """
+        if not include_archived:
+            yield from self._iter_table('tasks', batch_size, after_id)
+            return
+        yield from heapq.merge(
+            self._iter_table('tasks', batch_size, after_id),
+            self._iter_table('tasks_archive', batch_size, after_id),
+            key=lambda task: task.id,
+        )
+
+    def _iter_table(self, table: str, batch_size: int, after_id: Optional[int]) -> Iterator[Task]:
+        # Inside a transaction its own connection is used, so the uncommitted changes are seen.
+        transaction = getattr(self._local, 'transaction', None)
+        conn = transaction or sqlite3.connect(self.db_path)
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                f'SELECT {TASK_COLUMNS} FROM {table} WHERE list_id = ? AND id > ? ORDER BY id',
+                (self.task_list, 0 if after_id is None else after_id)
+            )
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield self._row_to_task(row)
+        finally:
+            if transaction is None:
+                conn.close()
+
+    def range_digest(self, start_id: int = None, end_id: int = None) -> RangeDigest:
+        """
+        Summarize the tasks with IDs in `[start_id, end_id)` from their stored sync digests.
+
+        Only the covering sync digest indexes are read, never the task rows.
+
+        Args:
+            start_id: The first ID of the range; unbounded if None.
+            end_id: The ID past the end of the range; unbounded if None.
+
+        Returns:
+            The summary of the range.
+        """
+        bounds = (self.task_list, 0 if start_id is None else start_id, MAX_TASK_ID if end_id is None else end_id)
+        with self._reading() as conn:
+            cursors = []
+            for table in ('tasks', 'tasks_archive'):
+                cursor = conn.cursor()
+                cursor.execute(
+                    f'SELECT id, sync_digest FROM {table} WHERE list_id = ? AND id >= ? AND id < ? ORDER BY id',
+                    bounds
+                )
+                cursors.append(cursor)
+            return summarize_id_range(heapq.merge(*cursors))
+
+    def backup(self, directory: str) -> List[str]:
+        """
+        Copy the database into a directory with the SQLite online backup API.
+
+        Pages are copied `backup_settings.pages_per_step` at a time and the lock on
+        the database is released between steps, so writers wait for one step at
+        most. A write by another connection makes SQLite restart the copy; after
+        `MAX_BACKUP_RESTARTS` restarts the remaining pages are copied in a single
+        step, which blocks writers for the duration of that copy.
+
+        Args:
+            directory: The existing, empty directory to write the copy to.
+
+        Returns:
+            The names of the written files.
+        """
+        file_name = os.path.basename(self.db_path)
+        restarts = 0
+        previous_remaining = None
+
+        def pause_between_steps(status: int, remaining: int, total: int):
+            nonlocal restarts, previous_remaining
+            if previous_remaining is not None and remaining > previous_remaining:
+                restarts += 1
+                if restarts > MAX_BACKUP_RESTARTS:
+                    raise _BackupRestartedError()
+            previous_remaining = remaining
+            time.sleep(BACKUP_STEP_PAUSE)
+
+        source = sqlite3.connect(self.db_path)
+        target = sqlite3.connect(os.path.join(directory, file_name))
+        try:
+            try:
+                source.backup(
+                    target, pages=max(self.dt_settings.backup_settings.pages_per_step, 1),
+                    progress=pause_between_steps,
+                )
+            except _BackupRestartedError:
+                source.backup(target)
+        finally:
+            target.close()
+            source.close()
+        return [file_name]
+
+    def recompress_descriptions(self) -> int:
+        """
+        Re-encode the stored descriptions of the current task list in place.
+
+        Rows are read and rewritten in batches; only descriptions whose encoding
+        changes under the current compression settings are written back.
+
+        Returns:
+            The number of rewritten tasks.
+        """
+        rewritten = 0
+        with self._writing() as conn:
+            cursor = conn.cursor()
+            for table in ('tasks', 'tasks_archive'):
+                after_id = 0
+                while True:
+                    cursor.execute(
+                        f'SELECT id, description, description_encoding FROM {table} '
+                        'WHERE list_id = ? AND id > ? ORDER BY id LIMIT 500',
+                        (self.task_list, after_id)
+                    )
+                    rows = cursor.fetchall()
+                    if not rows:
+                        break
+                    updates = []
+                    for task_id, stored, encoding in rows:
+                        description = self._decode_description(stored, encoding)
+                        new_stored, new_encoding = self._encode_description(description)
+                        if new_encoding != encoding:
+                            updates.append((new_stored, new_encoding, task_id))
+                    cursor.executemany(
+                        f'UPDATE {table} SET description = ?, description_encoding = ? WHERE id = ?',
+                        updates
+                    )
+                    conn.commit()
+                    rewritten += len(updates)
+                    after_id = rows[-1][0]
+        return rewritten
+
+    def list_recurrences(self) -> List[RecurrenceRule]:
+        with self._reading() as conn:
+            return self._read_recurrences(conn.cursor())
+
+    def read_recurrence(self, recurrence_id: int) -> RecurrenceRule:
+        with self._reading() as conn:
+            rules = self._read_recurrences(conn.cursor(), recurrence_id=recurrence_id)
+        if not rules:
+            raise ValueError(f"Recurrence with ID {recurrence_id} not found")
+        return rules[0]
+
+    def iter_occurrences(self, start: date, end: date) -> Iterator[Occurrence]:
+        """
+        Generate the occurrences of all recurrence rules within a date window.
+
+        Only the exception dates inside the window are read, so the cost does not
+        grow with the number of occurrences completed in the past.
+
+        Args:
+            start: The first day of the window.
+            end: The last day of the window.
+
+        Returns:
+            An iterator of occurrences, ordered by day and rule ID.
+        """
+        with self._reading() as conn:
+            rules = self._read_recurrences(conn.cursor(), exceptions_between=(start, end))
+        return merge_occurrences(rules, start, end)
+
+    def _read_recurrences(
+        self, cursor: sqlite3.Cursor, recurrence_id: int = None, exceptions_between: Tuple[date, date] = None
+    ) -> List[RecurrenceRule]:
+        """Read the recurrence rules of the current list, with their exception dates or only those in a window."""
+        condition, exception_condition = 'list_id = ?', 'list_id = ?'
+        values = [self.task_list]
+        if recurrence_id is not None:
+            condition += ' AND id = ?'
+            exception_condition += ' AND recurrence_id = ?'
+            values.append(recurrence_id)
+        cursor.execute(f'SELECT {RECURRENCE_COLUMNS} FROM recurrences WHERE {condition} ORDER BY id', values)
+        rules = {
+            row[0]: RecurrenceRule(
+                id=row[0], title=row[1], description=row[2], frequency=row[3], interval=row[4],
+                start_date=row[5], end_date=row[6], exception_dates=[]
+            )
+            for row in cursor.fetchall()
+        }
+        if exceptions_between is not None:
+            exception_condition += ' AND exception_date BETWEEN ? AND ?'
+            values.extend(day.isoformat() for day in exceptions_between)
+        cursor.execute(
+            f'SELECT recurrence_id, exception_date FROM recurrence_exceptions WHERE {exception_condition} '
+            'ORDER BY recurrence_id, exception_date',
+            values
+        )
+        for rule_id, exception_date in cursor.fetchall():
+            rules[rule_id].exception_dates.append(date.fromisoformat(exception_date))
+        return list(rules.values())
+
+    def save_recurrence(self, rule: RecurrenceRule) -> RecurrenceRule:
+        with self._writing() as conn:
+            cursor = conn.cursor()
+            # A new rule gets the next ID of the current list, allocated within the insert.
+            cursor.execute(f'''
+                INSERT OR REPLACE INTO recurrences ({RECURRENCE_COLUMNS}, list_id)
+                VALUES (COALESCE(?, (SELECT COALESCE(MAX(id), 0) + 1 FROM recurrences WHERE list_id = ?)),
+                        ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                rule.id, self.task_list, rule.title, rule.description, rule.frequency, rule.interval,
+                self._to_db_value(rule.start_date), self._to_db_value(rule.end_date), self.task_list
+            ))
+            cursor.execute('SELECT id FROM recurrences WHERE rowid = ?', (cursor.lastrowid,))
+            rule.id = cursor.fetchone()[0]
+            cursor.execute(
+                'DELETE FROM recurrence_exceptions WHERE list_id = ? AND recurrence_id = ?', (self.task_list, rule.id)
+            )
+            cursor.executemany(
+                'INSERT INTO recurrence_exceptions (list_id, recurrence_id, exception_date) VALUES (?, ?, ?)',
+                [(self.task_list, rule.id, day.isoformat()) for day in rule.exception_dates]
+            )
+            conn.commit()
+        return rule
+
+    def delete_recurrence(self, recurrence_id: int):
+        with self._writing() as conn:
+            cursor = conn.cursor()
+            cursor.execute('DELETE FROM recurrences WHERE id = ? AND list_id = ?', (recurrence_id, self.task_list))
+            if cursor.rowcount == 0:
+                raise ValueError(f"Recurrence with ID {recurrence_id} not found")
+            cursor.execute(
+                'DELETE FROM recurrence_exceptions WHERE list_id = ? AND recurrence_id = ?',
+                (self.task_list, recurrence_id)
+            )
+            conn.commit()
+
+    def task_lists(self) -> List[str]:
+        with self._reading() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT list_id FROM task_lists ORDER BY list_id')
+            return [row[0] for row in cursor.fetchall()]
+
+    def use_task_list(self, name: str):
+        validate_task_list_name(name)
+        with self._writing() as conn:
+            conn.execute('INSERT OR IGNORE INTO task_lists (list_id) VALUES (?)', (name,))
+            conn.commit()
+        self.task_list = name
+
+    def changes_since(self, sequence: int = 0, limit: int = 1000) -> List[TaskChange]:
+        """
+        Get the changes made to the current list after a given sequence number, oldest first.
+
+        Args:
+            sequence: The sequence number of the last change already seen.
+            limit: The maximum number of changes to return.
+
+        Returns:
+            A list of changes.
+        """
+        with self._reading() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT sequence, task_id, operation, version FROM task_changes
+                WHERE list_id = ? AND sequence > ?
+                ORDER BY sequence
+                LIMIT ?
+            ''', (self.task_list, sequence, limit))
             rows = cursor.fetchall()
-        return [Task(id=row[0], title=row[1], description=row[2], completed=row[3]) for row in rows]
+        return [TaskChange(sequence=row[0], task_id=row[1], operation=row[2], version=row[3]) for row in rows]
+
+    def change_token(self) -> Tuple[str, int]:
+        """
+        Get the list and sequence number of its most recent change, read from the index of the change feed.
+        """
+        with self._reading() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT MAX(sequence) FROM task_changes WHERE list_id = ?', (self.task_list,))
+            row = cursor.fetchone()
+        return self.task_list, row[0] or 0
+
+    def last_change_sequence(self) -> int:
+        """
+        Get the sequence number of the most recent change.
+
+        Returns:
+            The sequence number, or 0 if nothing was ever changed.
+        """
+        with self._reading() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT MAX(sequence) FROM task_changes')
+            row = cursor.fetchone()
+        return row[0] or 0
+
+    def prune_changes(self, sequence: int) -> int:
+        """
+        Delete changes up to and including a sequence number.
+
+        Args:
+            sequence: The sequence number every consumer has already seen.
+
+        Returns:
+            The number of deleted changes.
+        """
+        with self._writing() as conn:
+            cursor = conn.cursor()
+            cursor.execute('DELETE FROM task_changes WHERE sequence <= ?', (sequence,))
+            conn.commit()
+            return cursor.rowcount
+
+    def has_changed(self) -> bool:
+        """
+        Cheaply check whether the database was modified since the last check.
+
+        Uses `PRAGMA data_version`, which does not read any table, so it can be
+        polled frequently before calling `changes_since`.
+
+        Returns:
+            True if any connection committed a change since the previous call.
+        """
+        with self._probe_lock:
+            data_version = self._read_data_version()
+            changed = data_version != self._data_version
+            self._data_version = data_version
+        return changed
+
+    def _read_data_version(self) -> int:
+        if self._probe_conn is None:
+            # Reopened after close; versions of different connections differ, so the next check reports a change.
+            self._probe_conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        return self._probe_conn.execute('PRAGMA data_version').fetchone()[0]
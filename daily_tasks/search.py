@@ -0,0 +1,193 @@
+"""
+This module provides fuzzy task search backed by an incrementally maintained trigram index.
+"""
+import heapq
+import math
+import re
+import threading
+from collections import Counter
+from itertools import chain
+from typing import Dict, Iterable, List, Set, Tuple
+
+from daily_tasks.models import Task
+
+# Only the start of long descriptions is indexed, which keeps the index small
+# while still matching the part of a description users remember.
+DESCRIPTION_INDEX_LENGTH = 1000
+DEFAULT_MIN_SIMILARITY = 0.3
+# Shares of the query trigrams tried, strictest first, before falling back to the minimum similarity.
+SEARCH_STAGES = (0.8, 0.65, 0.5)
+# Matches with less than this share of the trigrams of the best match are noise rather than typos.
+RELATIVE_MIN_SIMILARITY = 0.5
+_WORD_PATTERN = re.compile(r'\w+')
+
+
+def trigrams(text: str, partial: bool = False) -> Set[str]:
+    """
+    Get the trigrams of a text.
+
+    The text is lowercased and split into words, ignoring punctuation; each word
+    is padded with two leading spaces and one trailing space, so short words and
+    word starts still produce trigrams and weigh more than word middles.
+
+    Args:
+        text: The text to split.
+        partial: Whether the last word may still be incomplete, as while typing;
+            it then gets no trailing space, so it matches any word it starts.
+
+    Returns:
+        The set of trigrams.
+    """
+    result = set()
+    words = _WORD_PATTERN.findall(text.casefold())
+    for position, word in enumerate(words):
+        padded = f'  {word}' if partial and position == len(words) - 1 else f'  {word} '
+        result.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return result
+
+
+def task_trigrams(task: Task) -> Set[str]:
+    """
+    Get the trigrams indexed for a task.
+
+    Args:
+        task: The task to index.
+
+    Returns:
+        The trigrams of the title and of the start of the description.
+    """
+    return trigrams(task.title) | trigrams(task.description[:DESCRIPTION_INDEX_LENGTH])
+
+
+class TrigramIndex:
+    """
+    Inverted index from trigrams to task IDs for typo-tolerant search.
+
+    A task matches a query when it contains at least `min_similarity` of the
+    trigrams of the query, so a mistyped letter only costs the few trigrams it
+    touches, and at least half as many as the best matching task. The index is updated one task at a time and is safe to query from
+    another thread while it is being updated.
+    """
+
+    def __init__(self, tasks: Iterable[Task] = ()):
+        """
+        Initialize the index.
+
+        Args:
+            tasks: The tasks to index.
+        """
+        self._lock = threading.Lock()
+        self._postings: Dict[str, Set[int]] = {}
+        self._task_trigrams: Dict[int, Set[str]] = {}
+        for task in tasks:
+            self.add(task)
+
+    def __len__(self) -> int:
+        return len(self._task_trigrams)
+
+    def add(self, task: Task):
+        """
+        Index a task, replacing its previous entry.
+
+        Args:
+            task: The task to index.
+        """
+        new_trigrams = task_trigrams(task)
+        with self._lock:
+            old_trigrams = self._task_trigrams.get(task.id, set())
+            for trigram in old_trigrams - new_trigrams:
+                self._discard_posting(trigram, task.id)
+            for trigram in new_trigrams - old_trigrams if old_trigrams else new_trigrams:
+                posting = self._postings.get(trigram)
+                if posting is None:
+                    self._postings[trigram] = {task.id}
+                else:
+                    posting.add(task.id)
+            self._task_trigrams[task.id] = new_trigrams
+
+    def remove(self, task_id: int):
+        """
+        Remove a task from the index, if it is indexed.
+
+        Args:
+            task_id: The ID of the task to remove.
+        """
+        with self._lock:
+            for trigram in self._task_trigrams.pop(task_id, set()):
+                self._discard_posting(trigram, task_id)
+
+    def _discard_posting(self, trigram: str, task_id: int):
+        posting = self._postings[trigram]
+        posting.discard(task_id)
+        if not posting:
+            del self._postings[trigram]
+
+    def search(
+        self, query: str, limit: int = 50, min_similarity: float = DEFAULT_MIN_SIMILARITY
+    ) -> List[Tuple[int, float]]:
+        """
+        Find the tasks most similar to a query typed so far.
+
+        Args:
+            query: The text to search for.
+            limit: The maximum number of results.
+            min_similarity: The minimum share of the query trigrams a task must contain.
+
+        Returns:
+            Pairs of task ID and similarity, best first; ties are ordered by task ID.
+        """
+        # A query ending in a word is taken to be typed further, so its last word matches as a prefix.
+        query_trigrams = trigrams(query, partial=bool(_WORD_PATTERN.search(query[-1:])))
+        if not query_trigrams:
+            return []
+        size = len(query_trigrams)
+        floor = max(1, math.ceil(min_similarity * size))
+        with self._lock:
+            postings = sorted((self._postings.get(trigram, set()) for trigram in query_trigrams), key=len)
+            # Tasks containing every trigram of the query are found with C-level set
+            # intersections; typing a query usually finds enough of them to stop here.
+            exact_ids = set(postings[0]).intersection(*postings[1:])
+            if len(exact_ids) >= limit or floor == size:
+                return [(task_id, 1.0) for task_id in heapq.nsmallest(limit, exact_ids)]
+            if exact_ids:
+                floor = max(floor, math.ceil(RELATIVE_MIN_SIMILARITY * size))
+            # Stricter thresholds are tried first since they only need the few rarest
+            # postings; once `limit` tasks pass one, no task below it can rank among them.
+            matches = []
+            previous = size
+            for share in SEARCH_STAGES + (0,):
+                required = max(floor, math.ceil(share * size))
+                if required >= previous:
+                    continue
+                counts = self._count_matches(postings, required)
+                matches = [(task_id, count) for task_id, count in counts.items() if count >= required]
+                if len(matches) >= limit or required == floor:
+                    break
+                if matches:
+                    best = max(count for _, count in matches)
+                    floor = max(floor, math.ceil(RELATIVE_MIN_SIMILARITY * best))
+                previous = required
+        best_matches = heapq.nsmallest(limit, matches, key=lambda match: (-match[1], match[0]))
+        return [(task_id, count / size) for task_id, count in best_matches]
+
+    @staticmethod
+    def _count_matches(postings: List[Set[int]], required: int) -> Counter:
+        """
+        Count the query trigrams contained by the tasks that may contain `required` of them.
+
+        A task containing `required` trigrams contains at least one of the
+        len - required + 1 rarest ones, so only those postings seed candidates.
+
+        Args:
+            postings: The postings of the query trigrams, smallest first.
+            required: The number of query trigrams a task must contain to match.
+
+        Returns:
+            The number of contained trigrams by task ID; tasks containing fewer
+            than `required` may be missing.
+        """
+        seed_count = len(postings) - required + 1
+        counts = Counter(chain.from_iterable(postings[:seed_count]))
+        for posting in postings[seed_count:]:
+            counts.update(counts.keys() & posting)
+        return counts
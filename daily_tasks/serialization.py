@@ -0,0 +1,245 @@
+"""
+This module provides a compact, self-describing binary encoding for tasks.
+
+A stream starts with a header listing the encoded field names, followed by
+length-prefixed records whose values are tagged by type. Readers map values
+back to fields by name, so streams written before a field was added to `Task`
+can still be decoded.
+"""
+import struct
+from datetime import date, datetime
+from typing import Any, BinaryIO, Dict, Iterator, List, Tuple
+
+from daily_tasks.models import Task
+
+MAGIC = b"DTSK"
+FORMAT_VERSION = 1
+
+_HEADER = struct.Struct("<BH")
+_NAME_LENGTH = struct.Struct("<H")
+_RECORD_LENGTH = struct.Struct("<I")
+_INT = struct.Struct("<q")
+_DATE = struct.Struct("<i")
+
+# Tags are stored in streams and snapshots, so they keep their values when others are removed.
+_TAG_NONE = 0
+_TAG_FALSE = 1
+_TAG_TRUE = 2
+_TAG_INT = 3
+_TAG_STR = 4
+_TAG_DATE = 6
+_TAG_DATETIME = 7
+
+
+def task_fields() -> List[str]:
+    """
+    Get the names of the fields encoded for a task.
+
+    Returns:
+        The field names, in encoding order.
+    """
+    return list(Task.model_fields)
+
+
+def encode_header(fields: List[str]) -> bytes:
+    """
+    Encode the stream header for the given fields.
+
+    Args:
+        fields: The names of the fields each record will contain.
+
+    Returns:
+        The encoded header.
+    """
+    parts = [MAGIC, _HEADER.pack(FORMAT_VERSION, len(fields))]
+    for name in fields:
+        encoded = name.encode("utf-8")
+        parts.append(_NAME_LENGTH.pack(len(encoded)))
+        parts.append(encoded)
+    return b"".join(parts)
+
+
+def decode_header(buffer, offset: int = 0) -> Tuple[List[str], int]:
+    """
+    Decode a stream header.
+
+    Args:
+        buffer: A bytes-like object holding the header.
+        offset: The position of the header within the buffer.
+
+    Returns:
+        A tuple with the field names and the offset of the first record.
+
+    Raises:
+        ValueError: If the buffer does not start with a valid header.
+    """
+    if bytes(buffer[offset:offset + len(MAGIC)]) != MAGIC:
+        raise ValueError("Not a binary task stream")
+    offset += len(MAGIC)
+    version, field_count = _HEADER.unpack_from(buffer, offset)
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported binary task format version: {version}")
+    offset += _HEADER.size
+    fields = []
+    for _ in range(field_count):
+        (length,) = _NAME_LENGTH.unpack_from(buffer, offset)
+        offset += _NAME_LENGTH.size
+        fields.append(bytes(buffer[offset:offset + length]).decode("utf-8"))
+        offset += length
+    return fields, offset
+
+
+def _encode_value(value: Any) -> bytes:
+    if value is None:
+        return bytes((_TAG_NONE,))
+    if value is True:
+        return bytes((_TAG_TRUE,))
+    if value is False:
+        return bytes((_TAG_FALSE,))
+    if isinstance(value, int):
+        return bytes((_TAG_INT,)) + _INT.pack(value)
+    if isinstance(value, str):
+        encoded = value.encode("utf-8")
+        return bytes((_TAG_STR,)) + _RECORD_LENGTH.pack(len(encoded)) + encoded
+    if isinstance(value, datetime):
+        encoded = value.isoformat().encode("utf-8")
+        return bytes((_TAG_DATETIME,)) + _RECORD_LENGTH.pack(len(encoded)) + encoded
+    if isinstance(value, date):
+        return bytes((_TAG_DATE,)) + _DATE.pack(value.toordinal())
+    raise ValueError(f"Cannot encode value of type {type(value).__name__}")
+
+
+def encode_record(values: Dict[str, Any], fields: List[str]) -> bytes:
+    """
+    Encode a single record.
+
+    Args:
+        values: The field values of the record.
+        fields: The names of the fields to encode, in header order.
+
+    Returns:
+        The length-prefixed encoded record.
+    """
+    payload = b"".join(_encode_value(values.get(name)) for name in fields)
+    return _RECORD_LENGTH.pack(len(payload)) + payload
+
+
+def decode_payload(payload, fields: List[str]) -> Dict[str, Any]:
+    """
+    Decode the payload of a single record.
+
+    Args:
+        payload: A bytes-like object holding the record without its length prefix.
+        fields: The field names from the stream header.
+
+    Returns:
+        A dictionary mapping field names to values.
+    """
+    values = {}
+    offset = 0
+    for name in fields:
+        tag = payload[offset]
+        offset += 1
+        if tag == _TAG_NONE:
+            value = None
+        elif tag == _TAG_FALSE:
+            value = False
+        elif tag == _TAG_TRUE:
+            value = True
+        elif tag == _TAG_INT:
+            (value,) = _INT.unpack_from(payload, offset)
+            offset += _INT.size
+        elif tag == _TAG_DATE:
+            (ordinal,) = _DATE.unpack_from(payload, offset)
+            value = date.fromordinal(ordinal)
+            offset += _DATE.size
+        elif tag in (_TAG_STR, _TAG_DATETIME):
+            (length,) = _RECORD_LENGTH.unpack_from(payload, offset)
+            offset += _RECORD_LENGTH.size
+            value = bytes(payload[offset:offset + length]).decode("utf-8")
+            offset += length
+            if tag == _TAG_DATETIME:
+                value = datetime.fromisoformat(value)
+        else:
+            raise ValueError(f"Unknown value tag: {tag}")
+        values[name] = value
+    return values
+
+
+def iter_records(buffer, offset: int, fields: List[str]) -> Iterator[Dict[str, Any]]:
+    """
+    Iterate over the records of an in-memory or memory-mapped buffer.
+
+    Args:
+        buffer: A bytes-like object holding the records.
+        offset: The offset of the first record.
+        fields: The field names from the stream header.
+
+    Yields:
+        A dictionary of field values for each record.
+
+    Raises:
+        ValueError: If the last record is cut short.
+    """
+    view = memoryview(buffer)
+    try:
+        end = len(view)
+        while offset < end:
+            (length,) = _RECORD_LENGTH.unpack_from(view, offset)
+            offset += _RECORD_LENGTH.size
+            if offset + length > end:
+                raise ValueError("Truncated binary task record")
+            # Released even if decoding fails, so the buffer, such as a memory map, can be closed.
+            with view[offset:offset + length] as payload:
+                values = decode_payload(payload, fields)
+            yield values
+            offset += length
+    finally:
+        view.release()
+
+
+class BinaryTaskWriter:
+    """Writes tasks to a binary stream one record at a time."""
+
+    def __init__(self, fh: BinaryIO):
+        self.fh = fh
+        self.fields = task_fields()
+        self.fh.write(encode_header(self.fields))
+
+    def write(self, task: Task):
+        """
+        Write a single task.
+
+        Args:
+            task: The task to write.
+        """
+        self.fh.write(encode_record(task.model_dump(), self.fields))
+
+
+def read_binary_tasks(fh: BinaryIO) -> Iterator[Task]:
+    """
+    Read tasks from a binary stream one record at a time.
+
+    Args:
+        fh: A binary file object positioned at the start of the stream.
+
+    Yields:
+        The decoded tasks.
+    """
+    prefix = fh.read(len(MAGIC) + _HEADER.size)
+    if len(prefix) < len(MAGIC) + _HEADER.size or prefix[:len(MAGIC)] != MAGIC:
+        raise ValueError("Not a binary task stream")
+    _, field_count = _HEADER.unpack_from(prefix, len(MAGIC))
+    header = bytearray(prefix)
+    for _ in range(field_count):
+        length_bytes = fh.read(_NAME_LENGTH.size)
+        header += length_bytes + fh.read(_NAME_LENGTH.unpack(length_bytes)[0])
+    fields, _ = decode_header(header)
+
+    while True:
+        length_bytes = fh.read(_RECORD_LENGTH.size)
+        if not length_bytes:
+            return
+        (length,) = _RECORD_LENGTH.unpack(length_bytes)
+        values = decode_payload(fh.read(length), fields)
+        yield Task(**{name: value for name, value in values.items() if name in Task.model_fields})
@@ -0,0 +1,340 @@
+"""
+This module provides two-way sync of tasks between task repositories.
+
+Repositories are compared by hash summaries of ID ranges, Merkle style: ranges
+whose summaries match are skipped, and the others are split until they are small
+enough to compare task by task. Summaries hash the per-task sync digests that the
+backends store or cache until a task is written, so no task is serialized to
+summarize a range, and only the tasks of ranges that differ are read. The sync
+state only looks up and records those tasks. What remains proportional to the
+number of tasks is hashing one 16-byte entry per task into the root summary; the
+first summary made by a process computes every digest once, and the first sync
+recording a state reads every task once.
+"""
+import sqlite3
+from itertools import takewhile
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from daily_tasks.models import RangeDigest, SyncConflictPolicy, Task
+from daily_tasks.repository import TaskRepository
+
+# Ranges holding at most this many tasks on both sides are compared task by task.
+DEFAULT_LEAF_SIZE = 64
+# The number of sub-ranges a differing range is split into.
+DEFAULT_FANOUT = 16
+
+
+class SyncResult(BaseModel):
+    """
+    Result of a sync.
+
+    Attributes:
+        pulled (int): The number of tasks written to the local repository.
+        pushed (int): The number of tasks written to the remote repository.
+        deleted (int): The number of tasks deleted from either repository.
+        conflicts (int): The number of tasks edited differently in both repositories.
+        compared_ranges (int): The number of ID ranges whose summaries were compared.
+    """
+    pulled: int = 0
+    pushed: int = 0
+    deleted: int = 0
+    conflicts: int = 0
+    compared_ranges: int = 0
+
+
+def sync_repositories(
+    local: TaskRepository,
+    remote: TaskRepository,
+    conflict_policy: str = SyncConflictPolicy.KEEP_BOTH.value,
+    state_path: Optional[str] = None,
+    leaf_size: int = DEFAULT_LEAF_SIZE,
+    fanout: int = DEFAULT_FANOUT,
+) -> SyncResult:
+    """
+    Make the current task lists of two repositories hold the same tasks.
+
+    Tasks are matched by ID. `state_path` keeps the sync digest every task had
+    after the previous sync, which tells which side changed a differing task: a
+    task changed on one side only is copied to the other one, or deleted from it.
+    Tasks changed on both sides are conflicts, resolved by `conflict_policy`:
+    `KEEP_BOTH` keeps the local copy under its ID and the remote one under a new
+    ID, or the edited copy of a task deleted on the other side, while `LOCAL` and
+    `REMOTE` keep the state of that side. Two tasks created under the same ID are
+    always both kept. New IDs are allocated past every task list of both
+    repositories, and a task copied under an ID another list of the target holds
+    is moved to a new ID on both sides.
+
+    Without a state, missing tasks are copied, the copy with the higher version
+    wins, and copies at the same version are conflicts.
+
+    Args:
+        local: The repository to sync.
+        remote: The repository to sync with.
+        conflict_policy: A `SyncConflictPolicy` value.
+        state_path: The path of the sync state database of this pair of repositories.
+        leaf_size: Ranges with at most this many tasks on both sides are compared task by task.
+        fanout: The number of sub-ranges a differing range is split into.
+
+    Returns:
+        The result of the sync.
+
+    Raises:
+        ValueError: If the conflict policy is unknown.
+    """
+    if conflict_policy not in {policy.value for policy in SyncConflictPolicy}:
+        raise ValueError(f"{conflict_policy} is not a valid conflict policy")
+    state = _open_state(state_path)
+    try:
+        return _sync(local, remote, conflict_policy, state, max(leaf_size, 1), max(fanout, 2))
+    finally:
+        if state is not None:
+            state.close()
+
+
+def _sync(
+    local: TaskRepository,
+    remote: TaskRepository,
+    conflict_policy: str,
+    state: Optional[sqlite3.Connection],
+    leaf_size: int,
+    fanout: int,
+) -> SyncResult:
+    local_root, remote_root = local.range_digest(), remote.range_digest()
+    max_id = max(local_root.max_id or 0, remote_root.max_id or 0)
+    differences, compared_ranges = _find_differences(
+        local, remote, local_root, remote_root, max_id, leaf_size, fanout
+    )
+    synced_digests = None
+    if state is not None:
+        synced_digests = _read_synced_digests(state, local.task_list, [task_id for task_id, _, _ in differences])
+
+    # New IDs are taken past every list of both repositories, since some backends share IDs between lists.
+    last_id = max(max_id, local.max_task_id(), remote.max_task_id())
+    result = SyncResult(compared_ranges=compared_ranges)
+    pulled: List[Task] = []
+    pushed: List[Task] = []
+    local_deletes: List[int] = []
+    remote_deletes: List[int] = []
+    for task_id, local_task, remote_task in differences:
+        if synced_digests is None:
+            kept, conflict = _resolve_without_state(local_task, remote_task, conflict_policy)
+        else:
+            kept, conflict = _resolve(local_task, remote_task, synced_digests.get(task_id), conflict_policy)
+        result.conflicts += conflict
+        if kept == SyncConflictPolicy.KEEP_BOTH.value:
+            last_id += 1
+            moved_task = remote_task.model_copy(update={'id': last_id})
+            pushed.extend([local_task, moved_task])
+            pulled.append(moved_task)
+        elif kept == SyncConflictPolicy.LOCAL.value:
+            if local_task is None:
+                remote_deletes.append(task_id)
+            else:
+                pushed.append(local_task)
+        elif remote_task is None:
+            local_deletes.append(task_id)
+        else:
+            pulled.append(remote_task)
+    last_id = _move_taken_tasks(local, pulled, pushed, remote_deletes, last_id)
+    _move_taken_tasks(remote, pushed, pulled, local_deletes, last_id)
+
+    if pulled:
+        local.insert_tasks(pulled)
+    for task_id in local_deletes:
+        local.delete_task(task_id)
+    if pushed:
+        remote.insert_tasks(pushed)
+    for task_id in remote_deletes:
+        remote.delete_task(task_id)
+    result.pulled, result.pushed = len(pulled), len(pushed)
+    result.deleted = len(local_deletes) + len(remote_deletes)
+
+    if state is not None:
+        if synced_digests is None:
+            # First sync of the list: record every task, since both sides now hold the same ones.
+            _write_synced_digests(state, local.task_list, local.iter_tasks(include_archived=True), [])
+        else:
+            _write_synced_digests(state, local.task_list, pulled + pushed, local_deletes + remote_deletes)
+    return result
+
+
+def _move_taken_tasks(
+    target: TaskRepository, written: List[Task], copied: List[Task], source_deletes: List[int], last_id: int
+) -> int:
+    """
+    Move the tasks to write to `target` under an ID another of its task lists holds to new IDs.
+
+    A moved task is deleted under its old ID from the repository it comes from, and
+    copied back there under its new one, so both repositories still hold the same tasks.
+
+    Args:
+        target: The repository the tasks are written to.
+        written: The tasks to write to `target`; moved tasks are replaced in place.
+        copied: The tasks to write to the other repository.
+        source_deletes: The IDs to delete from the other repository.
+        last_id: The highest ID in use in both repositories.
+
+    Returns:
+        The highest ID in use after the moves.
+    """
+    taken_ids = target.taken_task_ids([task.id for task in written])
+    for index, task in enumerate(written):
+        if task.id in taken_ids:
+            last_id += 1
+            source_deletes.append(task.id)
+            written[index] = task.model_copy(update={'id': last_id})
+            copied.append(written[index])
+    return last_id
+
+
+def _resolve(
+    local_task: Optional[Task], remote_task: Optional[Task], synced_digest: Optional[int], conflict_policy: str
+) -> Tuple[str, bool]:
+    """
+    Decide which copy of a differing task to keep from its sync digest after the previous sync.
+
+    Returns:
+        The `SyncConflictPolicy` value naming the side to keep, and whether the task is a conflict.
+    """
+    if _sync_digest(local_task) == synced_digest:
+        return SyncConflictPolicy.REMOTE.value, False
+    if _sync_digest(remote_task) == synced_digest:
+        return SyncConflictPolicy.LOCAL.value, False
+    if synced_digest is None:
+        # Created on both sides since the previous sync, so these are two different tasks.
+        return SyncConflictPolicy.KEEP_BOTH.value, False
+    if conflict_policy == SyncConflictPolicy.KEEP_BOTH.value and (local_task is None or remote_task is None):
+        # Edited on one side and deleted on the other; the edit is kept.
+        return SyncConflictPolicy.LOCAL.value if remote_task is None else SyncConflictPolicy.REMOTE.value, True
+    return conflict_policy, True
+
+
+def _resolve_without_state(
+    local_task: Optional[Task], remote_task: Optional[Task], conflict_policy: str
+) -> Tuple[str, bool]:
+    """
+    Decide which copy of a differing task to keep when the repositories were never synced.
+
+    Returns:
+        The `SyncConflictPolicy` value naming the side to keep, and whether the task is a conflict.
+    """
+    if remote_task is None:
+        return SyncConflictPolicy.LOCAL.value, False
+    if local_task is None:
+        return SyncConflictPolicy.REMOTE.value, False
+    if local_task.version != remote_task.version:
+        # Versions only grow with edits, so the higher one was edited more recently.
+        newer = SyncConflictPolicy.LOCAL if local_task.version > remote_task.version else SyncConflictPolicy.REMOTE
+        return newer.value, False
+    return conflict_policy, True
+
+
+def _sync_digest(task: Optional[Task]) -> Optional[int]:
+    return None if task is None else task.sync_digest()
+
+
+def _find_differences(
+    local: TaskRepository,
+    remote: TaskRepository,
+    local_root: RangeDigest,
+    remote_root: RangeDigest,
+    max_id: int,
+    leaf_size: int,
+    fanout: int,
+) -> Tuple[List[Tuple[int, Optional[Task], Optional[Task]]], int]:
+    """
+    Find the tasks that differ between two repositories by descending into the ID ranges whose summaries differ.
+
+    Returns:
+        The ID, local copy and remote copy of every differing task, in ID order, and the number of compared ranges.
+    """
+    differences = []
+    compared_ranges = 1
+    pending = [(1, max_id + 1, local_root, remote_root)]
+    while pending:
+        start_id, end_id, local_digest, remote_digest = pending.pop()
+        if local_digest == remote_digest:
+            continue
+        if max(local_digest.count, remote_digest.count) <= leaf_size or end_id - start_id <= fanout:
+            differences.extend(_compare_tasks(local, remote, start_id, end_id))
+            continue
+        step = -(-(end_id - start_id) // fanout)
+        for child_start in range(start_id, end_id, step):
+            child_end = min(child_start + step, end_id)
+            pending.append((
+                child_start, child_end,
+                local.range_digest(child_start, child_end), remote.range_digest(child_start, child_end),
+            ))
+            compared_ranges += 1
+    differences.sort(key=lambda difference: difference[0])
+    return differences, compared_ranges
+
+
+def _compare_tasks(
+    local: TaskRepository, remote: TaskRepository, start_id: int, end_id: int
+) -> List[Tuple[int, Optional[Task], Optional[Task]]]:
+    local_tasks = {task.id: task for task in _tasks_between(local, start_id, end_id)}
+    remote_tasks = {task.id: task for task in _tasks_between(remote, start_id, end_id)}
+    differences = []
+    for task_id in sorted(local_tasks.keys() | remote_tasks.keys()):
+        local_task, remote_task = local_tasks.get(task_id), remote_tasks.get(task_id)
+        if local_task is None or remote_task is None or local_task.sync_digest() != remote_task.sync_digest():
+            differences.append((task_id, local_task, remote_task))
+    return differences
+
+
+def _tasks_between(repository: TaskRepository, start_id: int, end_id: int) -> Iterator[Task]:
+    tasks = repository.iter_tasks(batch_size=DEFAULT_LEAF_SIZE, after_id=start_id - 1, include_archived=True)
+    return takewhile(lambda task: task.id < end_id, tasks)
+
+
+def _open_state(state_path: Optional[str]) -> Optional[sqlite3.Connection]:
+    if state_path is None:
+        return None
+    conn = sqlite3.connect(state_path)
+    conn.execute('CREATE TABLE IF NOT EXISTS synced_lists (list_id TEXT PRIMARY KEY)')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS synced_tasks (
+            list_id TEXT NOT NULL,
+            task_id INTEGER NOT NULL,
+            sync_digest INTEGER NOT NULL,
+            PRIMARY KEY (list_id, task_id)
+        ) WITHOUT ROWID
+    ''')
+    conn.commit()
+    return conn
+
+
+def _read_synced_digests(conn: sqlite3.Connection, task_list: str, task_ids: List[int]) -> Optional[Dict[int, int]]:
+    """
+    Get the sync digests of tasks after the previous sync.
+
+    Returns:
+        The digests by task ID, without the tasks that did not exist then, or None if the list was never synced.
+    """
+    if conn.execute('SELECT 1 FROM synced_lists WHERE list_id = ?', (task_list,)).fetchone() is None:
+        return None
+    digests = {}
+    for start in range(0, len(task_ids), 500):
+        chunk = task_ids[start:start + 500]
+        digests.update(conn.execute(
+            'SELECT task_id, sync_digest FROM synced_tasks '
+            f'WHERE list_id = ? AND task_id IN ({", ".join("?" * len(chunk))})',
+            [task_list, *chunk]
+        ))
+    return digests
+
+
+def _write_synced_digests(conn: sqlite3.Connection, task_list: str, tasks: Iterable[Task], deleted_ids: List[int]):
+    with conn:
+        conn.execute('INSERT OR IGNORE INTO synced_lists (list_id) VALUES (?)', (task_list,))
+        conn.executemany(
+            'INSERT OR REPLACE INTO synced_tasks (list_id, task_id, sync_digest) VALUES (?, ?, ?)',
+            ((task_list, task.id, task.sync_digest()) for task in tasks)
+        )
+        conn.executemany(
+            'DELETE FROM synced_tasks WHERE list_id = ? AND task_id = ?',
+            [(task_list, task_id) for task_id in deleted_ids]
+        )
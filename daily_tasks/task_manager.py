@@ -2,9 +2,16 @@
 This module contains the TaskManager class, which is responsible for orchestrating both
 gui and repository classes to provide a complete task management system.
 """
-from typing import List, Dict, Any
-from daily_tasks.models import Task, Settings, Preferences
+import threading
+from contextlib import contextmanager
+from datetime import date
+from typing import Hashable, Iterator, List, Dict, Any, Optional, Union
+from daily_tasks.models import (
+    Task, TaskFilter, TaskStats, TaskSummary, Settings, Preferences, Occurrence, RecurrenceRule,
+)
+from daily_tasks.backup import BackupScheduler
 from daily_tasks.repository import TaskRepository
+from daily_tasks.search import TrigramIndex
 from daily_tasks.ui import UI
 
 
@@ -44,13 +51,82 @@ class TaskManager:
             raise ValueError("repository_class must be provided")
         self.repository_class = repository_class
         self.repository: TaskRepository = self.repository_class(dt_settings=settings, dt_preferences=preferences)
+        if settings.archive_settings.enabled:
+            self.repository.archive_completed_tasks()
+        # Built by the first search, kept up to date by the handlers below and
+        # refreshed before each search with the changes made by other processes.
+        self.search_index: Optional[TrigramIndex] = None
+        self._indexed_versions: Dict[int, int] = {}
+        self._indexed_change_token: Optional[Hashable] = None
+        self._search_index_lock = threading.Lock()
 
         self.gui: UI = self.ui_class(
             dt_settings=settings,
             dt_preferences=preferences,
-            init_tasks=self.repository.list_tasks(),
+            init_tasks=self._list_tasks(),
         )
 
+    def _list_tasks(self, filter_text: str = TaskFilter.ALL.value) -> List[Union[Task, TaskSummary]]:
+        """
+        List tasks for the UI, as summaries if the UI only renders description previews.
+        """
+        if self.ui_class.uses_task_summaries:
+            return self.repository.list_task_summaries(filter_text)
+        if filter_text == TaskFilter.ALL.value:
+            return self.repository.list_tasks()
+        return self.repository.filter_tasks(filter_text)
+
+    def _get_search_index(self) -> TrigramIndex:
+        """
+        Get the search index of the current task list, building it on first use.
+
+        Later calls first poll the change token of the repository, which reads no
+        tasks. Only when it moved are the task versions of the repository compared
+        with the indexed ones, and the tasks created, edited or deleted since
+        re-indexed, so changes made by other processes show up in the results.
+        """
+        with self._search_index_lock:
+            # Read before the tasks, so a change made while they are read is seen by the next search.
+            change_token = self.repository.change_token()
+            if self.search_index is None:
+                tasks = list(self.repository.iter_tasks())
+                self.search_index = TrigramIndex(tasks)
+                self._indexed_versions = {task.id: task.version for task in tasks}
+                self._indexed_change_token = change_token
+                return self.search_index
+            if change_token is not None and change_token == self._indexed_change_token:
+                return self.search_index
+            self._indexed_change_token = change_token
+            versions = self.repository.task_versions()
+            for task_id in self._indexed_versions.keys() - versions.keys():
+                self.search_index.remove(task_id)
+                del self._indexed_versions[task_id]
+            for task_id, version in versions.items():
+                if self._indexed_versions.get(task_id) == version:
+                    continue
+                try:
+                    task = self.repository.read_task(task_id)
+                except ValueError:
+                    # Deleted since the versions were read; the next refresh drops it.
+                    continue
+                self.search_index.add(task)
+                self._indexed_versions[task_id] = task.version
+            return self.search_index
+
+    def _update_search_index(self, task: Task = None, removed_task_id: int = None):
+        """
+        Apply a change to the search index, if it was built.
+        """
+        with self._search_index_lock:
+            if self.search_index is None:
+                return
+            if task is not None:
+                self.search_index.add(task)
+                self._indexed_versions[task.id] = task.version
+            if removed_task_id is not None:
+                self.search_index.remove(removed_task_id)
+                self._indexed_versions.pop(removed_task_id, None)
+
     def run(self):
         """
         Run the task manager application.
@@ -64,7 +140,51 @@ class TaskManager:
             self.handle_delete_task,
             self.handle_complete_task,
         )
-        self.gui.launch()
+        self.gui.register_task_list_callbacks(
+            self.handle_list_task_lists,
+            self.handle_switch_task_list,
+        )
+        self.gui.register_stats_callback(self.handle_get_stats)
+        self.gui.register_search_callback(self.handle_search_tasks)
+        self.gui.register_transaction_callback(self.transaction)
+        self.gui.register_recurrence_callbacks(
+            self.handle_create_recurrence,
+            self.handle_list_occurrences,
+            self.handle_complete_occurrence,
+            self.handle_edit_occurrence,
+        )
+        backup_settings = self.settings.backup_settings
+        scheduler = None
+        if backup_settings.enabled and backup_settings.directory:
+            scheduler = BackupScheduler(
+                self.repository, backup_settings.directory, backup_settings.interval_hours, backup_settings.keep
+            )
+            scheduler.start()
+        try:
+            self.gui.launch()
+        finally:
+            if scheduler is not None:
+                scheduler.stop()
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """
+        Group the handler calls made inside a `with` block into a single unit of work.
+
+        The changes of the block are committed at once when it exits, turning many
+        commits or file writes into one. If the block raises, all of them are
+        rolled back and the search index is rebuilt by the next search.
+
+        Raises:
+            ValueError: If the repository does not support transactions.
+        """
+        try:
+            with self.repository.transaction():
+                yield
+        except BaseException:
+            with self._search_index_lock:
+                self.search_index = None
+            raise
 
     def handle_view_task_by_id(self, task_id: int) -> Task:
         """
@@ -82,7 +202,7 @@ class TaskManager:
         Args:
             filter_text: The text to filter tasks by.
         """
-        return self.repository.filter_tasks(filter_text)
+        return self._list_tasks(filter_text)
 
     def handle_create_task(self, task: Task) -> List[Task]:
         """
@@ -91,19 +211,20 @@ class TaskManager:
         Args:
             task: The task to create.
         """
-        self.repository.create_task(task)
-        return self.repository.list_tasks()
+        self._update_search_index(self.repository.create_task(task))
+        return self._list_tasks()
 
-    def handle_edit_task(self, task_id: int, data: Dict[str, Any]) -> List[Task]:
+    def handle_edit_task(self, task_id: int, data: Dict[str, Any], expected_version: int = None) -> List[Task]:
         """
         Handle the edit task event.
 
         Args:
             task_id: The ID of the task to edit.
             task: The updated task.
+            expected_version: If provided, only edit the task if it is still at this version.
         """
-        self.repository.update_task(task_id, data)
-        return self.repository.list_tasks()
+        self._update_search_index(self.repository.update_task(task_id, data, expected_version=expected_version))
+        return self._list_tasks()
 
     def handle_delete_task(self, task_id: int) -> List[Task]:
         """
@@ -113,7 +234,8 @@ class TaskManager:
             task_id: The ID of the task to delete.
         """
         self.repository.delete_task(task_id)
-        return self.repository.list_tasks()
+        self._update_search_index(removed_task_id=task_id)
+        return self._list_tasks()
 
     def handle_complete_task(self, task_id: int) -> List[Task]:
         """
@@ -122,5 +244,101 @@ class TaskManager:
         Args:
             task_id: The ID of the task to complete.
         """
-        self.repository.update_task(task_id, {'completed': True})
-        return self.repository.list_tasks()
+        self._update_search_index(self.repository.update_task(task_id, {'completed': True}))
+        return self._list_tasks()
+
+    def handle_list_task_lists(self) -> List[str]:
+        """
+        Handle the list task lists event.
+        """
+        return self.repository.task_lists()
+
+    def handle_switch_task_list(self, name: str) -> List[Task]:
+        """
+        Handle the switch task list event.
+
+        Args:
+            name: The name of the task list to switch to.
+        """
+        self.repository.use_task_list(name)
+        with self._search_index_lock:
+            self.search_index = None
+        if self.settings.archive_settings.enabled:
+            self.repository.archive_completed_tasks()
+        return self._list_tasks()
+
+    def handle_get_stats(self) -> TaskStats:
+        """
+        Handle the get stats event.
+        """
+        return self.repository.stats()
+
+    def handle_create_recurrence(self, rule: RecurrenceRule) -> RecurrenceRule:
+        """
+        Handle the create recurring task event.
+
+        Args:
+            rule: The recurrence rule to create.
+        """
+        return self.repository.create_recurrence(rule)
+
+    def handle_list_occurrences(self, start: date, end: date) -> List[Occurrence]:
+        """
+        Handle the list occurrences event.
+
+        Args:
+            start: The first day of the window.
+            end: The last day of the window.
+        """
+        return list(self.repository.iter_occurrences(start, end))
+
+    def handle_complete_occurrence(self, recurrence_id: int, occurrence_date: date) -> List[Task]:
+        """
+        Handle the complete occurrence event, materializing the occurrence as a completed task.
+
+        Args:
+            recurrence_id: The ID of the recurrence rule.
+            occurrence_date: The day of the occurrence.
+        """
+        self._update_search_index(
+            self.repository.materialize_occurrence(recurrence_id, occurrence_date, {'completed': True})
+        )
+        return self._list_tasks()
+
+    def handle_edit_occurrence(
+        self, recurrence_id: int, occurrence_date: date, data: Dict[str, Any]
+    ) -> List[Task]:
+        """
+        Handle the edit occurrence event, materializing the occurrence as an edited task.
+
+        Args:
+            recurrence_id: The ID of the recurrence rule.
+            occurrence_date: The day of the occurrence.
+            data: The fields to set on the task.
+        """
+        self._update_search_index(self.repository.materialize_occurrence(recurrence_id, occurrence_date, data))
+        return self._list_tasks()
+
+    def handle_search_tasks(self, query: str) -> List[Union[Task, TaskSummary]]:
+        """
+        Handle the search tasks event with a fuzzy match on titles and descriptions.
+
+        The first search builds the search index of the current task list, and
+        later ones refresh it with the tasks changed since, so it is meant to be
+        called off the UI thread.
+
+        Args:
+            query: The text to search for.
+
+        Returns:
+            The best matching tasks, best first.
+        """
+        tasks = []
+        for task_id, _ in self._get_search_index().search(query):
+            try:
+                task = self.repository.read_task(task_id)
+            except ValueError:
+                # Deleted by another process since the index was refreshed.
+                continue
+            tasks.append(task.summary() if self.ui_class.uses_task_summaries else task)
+        return tasks
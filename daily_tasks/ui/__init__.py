@@ -2,9 +2,10 @@
 This module defines an abstract base class for a UI manager.
 """
 from abc import ABC, abstractmethod
-from typing import Callable, List, Dict, Any
+from datetime import date
+from typing import Callable, ContextManager, List, Dict, Any
 
-from daily_tasks.models import Settings, Preferences, Task, TaskFilter
+from daily_tasks.models import Settings, Preferences, Task, TaskFilter, TaskStats, Occurrence, RecurrenceRule
 
 
 class UI(ABC):
@@ -12,6 +13,8 @@ class UI(ABC):
     Abstract base class for a Task Manager UI.
     """
     description_limit = 50
+    # Whether task lists passed to the UI may be `TaskSummary` projections instead of full tasks.
+    uses_task_summaries = False
 
     def __init__(
             self,
@@ -34,6 +37,15 @@ class UI(ABC):
 
         self.dt_settings = dt_settings
         self.dt_preferences = dt_preferences
+        self.on_list_task_lists_callback = None
+        self.on_switch_task_list_callback = None
+        self.on_get_stats_callback = None
+        self.on_create_recurrence_callback = None
+        self.on_list_occurrences_callback = None
+        self.on_complete_occurrence_callback = None
+        self.on_edit_occurrence_callback = None
+        self.on_search_tasks_callback = None
+        self.on_transaction_callback = None
 
     @abstractmethod
     def register_callbacks(
@@ -65,6 +77,72 @@ class UI(ABC):
             NotImplementedError: If the method is not implemented.
         """
 
+    def register_task_list_callbacks(
+        self,
+        on_list_task_lists_callback: Callable[[], List[str]],
+        on_switch_task_list_callback: Callable[[str], List[Task]],
+    ):
+        """
+        Register the callbacks for switching between task lists.
+
+        UIs without a list switcher keep working on the task list the application started with.
+
+        Args:
+            on_list_task_lists_callback: The callback to get the names of all task lists.
+            on_switch_task_list_callback: The callback to switch to a task list, returning its tasks.
+        """
+        self.on_list_task_lists_callback = on_list_task_lists_callback
+        self.on_switch_task_list_callback = on_switch_task_list_callback
+
+    def register_stats_callback(self, on_get_stats_callback: Callable[[], TaskStats]):
+        """
+        Register the callback to get the task counts of the current task list.
+
+        Args:
+            on_get_stats_callback: The callback to get the task counts.
+        """
+        self.on_get_stats_callback = on_get_stats_callback
+
+    def register_recurrence_callbacks(
+        self,
+        on_create_recurrence_callback: Callable[[RecurrenceRule], RecurrenceRule],
+        on_list_occurrences_callback: Callable[[date, date], List[Occurrence]],
+        on_complete_occurrence_callback: Callable[[int, date], List[Task]],
+        on_edit_occurrence_callback: Callable[[int, date, Dict[str, Any]], List[Task]],
+    ):
+        """
+        Register the callbacks for recurring tasks.
+
+        Args:
+            on_create_recurrence_callback: The callback to create a recurring task.
+            on_list_occurrences_callback: The callback to list the occurrences within a date window.
+            on_complete_occurrence_callback: The callback to complete an occurrence, returning the tasks.
+            on_edit_occurrence_callback: The callback to edit an occurrence, returning the tasks.
+        """
+        self.on_create_recurrence_callback = on_create_recurrence_callback
+        self.on_list_occurrences_callback = on_list_occurrences_callback
+        self.on_complete_occurrence_callback = on_complete_occurrence_callback
+        self.on_edit_occurrence_callback = on_edit_occurrence_callback
+
+    def register_search_callback(self, on_search_tasks_callback: Callable[[str], List[Task]]):
+        """
+        Register the callback to search tasks by title and description.
+
+        Args:
+            on_search_tasks_callback: The callback to search tasks, returning the best matches first.
+        """
+        self.on_search_tasks_callback = on_search_tasks_callback
+
+    def register_transaction_callback(self, on_transaction_callback: Callable[[], ContextManager[None]]):
+        """
+        Register the callback to group several callback calls into a single unit of work.
+
+        Args:
+            on_transaction_callback: The callback returning a context manager; the calls made
+                inside it on the same thread are committed together or not at all.
+        """
+        self.on_transaction_callback = on_transaction_callback
+
     @abstractmethod
     def launch(self):
         """
@@ -3,10 +3,11 @@ Command line interface for the Daily Tasks application.
 """
 import json
 
+from datetime import date, timedelta
 from enum import Enum
 from typing import Callable, List, Dict, Any
 
-from daily_tasks.models import Task, TaskFilter
+from daily_tasks.models import Task, TaskFilter, RecurrenceFrequency, RecurrenceRule, UPCOMING_DAYS
 from daily_tasks.ui import UI
 
 
@@ -47,6 +48,13 @@ class Command(Enum):
     COMPLETE = "complete"
     LIST = "list"
     FILTER = "filter"
+    SEARCH = "search"
+    LISTS = "lists"
+    SWITCH = "switch"
+    RECUR = "recur"
+    AGENDA = "agenda"
+    COMPLETE_OCCURRENCE = "complete-occurrence"
+    EDIT_OCCURRENCE = "edit-occurrence"
     EXIT = "exit"
 
 
@@ -63,6 +71,7 @@ class CommandLineUI(UI):
         self.on_complete_task_callback = None
         self.on_filter_tasks_callback = None
         self.on_get_task_by_id_callback = None
+        self.task_list = self.dt_settings.task_list
 
         self.tasks: List[Task] = kwargs["init_tasks"]
 
@@ -96,6 +105,8 @@ class CommandLineUI(UI):
             bool: False to indicate that the program should continue running.
         """
         print('\n')
+        if self.on_get_stats_callback is not None:
+            print(f"Tasks in {self.task_list}: {self.on_get_stats_callback().display_text()}")
         self.print_help()
         command = input("Enter a command: ")
         print('\n')
@@ -107,6 +118,13 @@ class CommandLineUI(UI):
             Command.COMPLETE.value: self.complete_task,
             Command.LIST.value: self.list_tasks,
             Command.FILTER.value: self.filter_tasks,
+            Command.SEARCH.value: self.search_tasks,
+            Command.LISTS.value: self.list_task_lists,
+            Command.SWITCH.value: self.switch_task_list,
+            Command.RECUR.value: self.create_recurrence,
+            Command.AGENDA.value: self.list_occurrences,
+            Command.COMPLETE_OCCURRENCE.value: self.complete_occurrence,
+            Command.EDIT_OCCURRENCE.value: self.edit_occurrence,
             Command.EXIT.value: self.exit,
         }
 
@@ -135,6 +153,13 @@ class CommandLineUI(UI):
         print(f"{Command.COMPLETE.value} - Mark a task as Completed")
         print(f"{Command.LIST.value} - List all tasks")
         print(f"{Command.FILTER.value} - List tasks via filter")
+        print(f"{Command.SEARCH.value} - Search tasks by title and description")
+        print(f"{Command.LISTS.value} - List all task lists")
+        print(f"{Command.SWITCH.value} - Switch to another task list (current: {self.task_list})")
+        print(f"{Command.RECUR.value} - Create a recurring task")
+        print(f"{Command.AGENDA.value} - List recurring tasks due in the next {UPCOMING_DAYS} days")
+        print(f"{Command.COMPLETE_OCCURRENCE.value} - Mark one occurrence of a recurring task as Completed")
+        print(f"{Command.EDIT_OCCURRENCE.value} - Edit one occurrence of a recurring task")
         print(f"{Command.EXIT.value} - Exit the program")
 
     def print_task(self, task: Task):
@@ -147,7 +172,7 @@ class CommandLineUI(UI):
         Returns:
             None
         """
-        print(json.dumps(task.__dict__, indent=4))
+        print(json.dumps(task.model_dump(mode="json"), indent=4))
 
     def _list_tasks(self):
         for task in self.tasks:
@@ -170,7 +195,8 @@ class CommandLineUI(UI):
         print("Creating a new task")
         title = input("Enter the title: ")
         description = input("Enter the description: ")
-        task = Task(title=title, description=description)
+        due_date = input("Enter the due date (YYYY-MM-DD, leave blank for none): ")
+        task = Task(title=title, description=description, due_date=due_date or None)
         self.tasks = self.on_create_task_callback(task)
         print("Task created")
 
@@ -187,12 +213,15 @@ class CommandLineUI(UI):
         original_task = self.on_get_task_by_id_callback(task_id)
         title = input("Enter the new title (leave blank to keep original):")
         description = input("Enter the new description (leave blank to keep original):")
+        due_date = input("Enter the new due date (YYYY-MM-DD, 'none' to clear, leave blank to keep original):")
         new_title = original_task.title if title == "" else title
         new_description = original_task.description if description == "" else description
-        self.tasks = self.on_edit_task_callback(
-            task_id,
-            {"title": new_title, "description": new_description}
-        )
+        data = {"title": new_title, "description": new_description}
+        if due_date.lower() == "none":
+            data["due_date"] = None
+        elif due_date != "":
+            data["due_date"] = date.fromisoformat(due_date)
+        self.tasks = self.on_edit_task_callback(task_id, data)
         print("Task updated")
 
     @command_handler_decorator
@@ -247,3 +276,104 @@ class CommandLineUI(UI):
             print("Tasks filtered")
         else:
             print("No tasks found")
+
+    @command_handler_decorator
+    def search_tasks(self):
+        """
+        Print the tasks best matching a search text, tolerating typos.
+        """
+        print("Searching tasks")
+        query = input("Enter the search text: ")
+        tasks = self.on_search_tasks_callback(query)
+        if len(tasks) > 0:
+            for task in tasks:
+                self.print_task(task)
+            print("Tasks found")
+        else:
+            print("No tasks found")
+
+    @command_handler_decorator
+    def list_task_lists(self):
+        """
+        Print the names of all task lists, marking the current one.
+        """
+        print("Listing all task lists")
+        for name in self.on_list_task_lists_callback():
+            print(f"* {name}" if name == self.task_list else f"  {name}")
+
+    @command_handler_decorator
+    def switch_task_list(self):
+        """
+        Switch to another task list, creating it if it does not exist yet.
+        """
+        print("Switching task list")
+        name = input("Enter the task list name: ")
+        self.tasks = self.on_switch_task_list_callback(name)
+        self.task_list = name
+        print(f"Switched to task list {name}")
+
+    @command_handler_decorator
+    def create_recurrence(self):
+        """
+        Create a recurring task by prompting the user for its title, description and schedule.
+        """
+        print("Creating a recurring task")
+        title = input("Enter the title: ")
+        description = input("Enter the description: ")
+        frequencies = [f.value for f in RecurrenceFrequency]
+        frequency = input(f"Enter the frequency ({frequencies}): ")
+        interval = input("Enter the number of days or weeks between occurrences (leave blank for 1): ")
+        start_date = input("Enter the start date (YYYY-MM-DD, leave blank for today): ")
+        rule = RecurrenceRule(
+            title=title,
+            description=description,
+            frequency=frequency,
+            interval=int(interval or 1),
+            start_date=start_date or date.today(),
+        )
+        rule = self.on_create_recurrence_callback(rule)
+        print(f"Recurring task {rule.id} created")
+
+    @command_handler_decorator
+    def list_occurrences(self):
+        """
+        Print the occurrences of recurring tasks from today to the end of the upcoming window.
+        """
+        print("Listing recurring tasks")
+        today = date.today()
+        occurrences = self.on_list_occurrences_callback(today, today + timedelta(days=UPCOMING_DAYS))
+        for occurrence in occurrences:
+            print(f"{occurrence.occurrence_date} [{occurrence.recurrence_id}] {occurrence.title}")
+        if not occurrences:
+            print("No recurring tasks found")
+
+    @command_handler_decorator
+    def complete_occurrence(self):
+        """
+        Complete one occurrence of a recurring task, turning it into a completed task.
+        """
+        print("Completing an occurrence")
+        recurrence_id = int(input("Enter the recurring task ID: "))
+        occurrence_date = input("Enter the date of the occurrence (YYYY-MM-DD, leave blank for today): ")
+        occurrence_date = date.fromisoformat(occurrence_date) if occurrence_date else date.today()
+        self.tasks = self.on_complete_occurrence_callback(recurrence_id, occurrence_date)
+        print("Occurrence completed")
+
+    @command_handler_decorator
+    def edit_occurrence(self):
+        """
+        Edit one occurrence of a recurring task, turning it into a task with the new details.
+        """
+        print("Editing an occurrence")
+        recurrence_id = int(input("Enter the recurring task ID: "))
+        occurrence_date = input("Enter the date of the occurrence (YYYY-MM-DD, leave blank for today): ")
+        occurrence_date = date.fromisoformat(occurrence_date) if occurrence_date else date.today()
+        title = input("Enter the new title (leave blank to keep original):")
+        description = input("Enter the new description (leave blank to keep original):")
+        data = {}
+        if title != "":
+            data["title"] = title
+        if description != "":
+            data["description"] = description
+        self.tasks = self.on_edit_occurrence_callback(recurrence_id, occurrence_date, data)
+        print("Occurrence updated")
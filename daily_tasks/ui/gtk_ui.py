@@ -1,13 +1,17 @@
 import gi
 gi.require_version('Gtk', '3.0')
-from gi.repository import Gtk
+from gi.repository import GLib, Gtk
 
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
 from typing import Callable, List, Dict, Any
 from daily_tasks.ui import UI
-from daily_tasks.models import Task, TaskFilter, Settings, Preferences
+from daily_tasks.models import Task, TaskStats, TaskSummary, TaskFilter, Settings, Preferences
 
 
 class GTKTaskOverview(UI):
+    uses_task_summaries = True
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.window = Gtk.Window(title="Task Manager")
@@ -28,20 +32,29 @@ class GTKTaskOverview(UI):
         self.window.add(self.grid)
 
         # Task List
-        self.tasks: List[Task] = []
-        self.task_list_store = Gtk.ListStore(str, str, str)
+        self.tasks: List[TaskSummary] = []
+        self.task_list_store = Gtk.ListStore(str, str, str, str)
         self.__update_task_list_store(kwargs["init_tasks"])
 
         self.task_treeview = Gtk.TreeView(model=self.task_list_store)
         self.task_treeview.set_vexpand(True)
 
-        for i, column_title in enumerate(["Title", "Description", "Completed"]):
+        for i, column_title in enumerate(["Title", "Description", "Due", "Completed"]):
             renderer = Gtk.CellRendererText()
             column = Gtk.TreeViewColumn(column_title, renderer, text=i)
             self.task_treeview.append_column(column)
 
         self.grid.attach(self.task_treeview, 0, 0, 6, 1)
 
+        # Search
+        # GtkSearchEntry emits search-changed once typing pauses, which debounces the queries.
+        self.search_entry = Gtk.SearchEntry()
+        self.search_entry.set_placeholder_text("Search tasks")
+        self.grid.attach_next_to(self.search_entry, self.task_treeview, Gtk.PositionType.TOP, 6, 1)
+        # Searches run on one worker thread; results of superseded queries are dropped.
+        self.search_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="task-search")
+        self.search_generation = 0
+
         # Filter Buttons
         self.list_active_button = Gtk.Button(label="List Active")
         self.grid.attach(self.list_active_button, 0, 1, 2, 1)
@@ -52,6 +65,15 @@ class GTKTaskOverview(UI):
         self.list_all_button = Gtk.Button(label="List All")
         self.grid.attach(self.list_all_button, 4, 1, 2, 1)
 
+        self.list_today_button = Gtk.Button(label="Due Today")
+        self.grid.attach(self.list_today_button, 0, 3, 2, 1)
+
+        self.list_overdue_button = Gtk.Button(label="Overdue")
+        self.grid.attach(self.list_overdue_button, 2, 3, 2, 1)
+
+        self.list_upcoming_button = Gtk.Button(label="Upcoming")
+        self.grid.attach(self.list_upcoming_button, 4, 3, 2, 1)
+
         # CRUD Buttons
         self.create_button = Gtk.Button(label="Create Task")
         self.grid.attach(self.create_button, 0, 2, 1, 1)
@@ -68,12 +90,37 @@ class GTKTaskOverview(UI):
         self.view_button = Gtk.Button(label="View Task")
         self.grid.attach(self.view_button, 4, 2, 1, 1)
 
+        # Task List Switcher
+        self.task_list_label = Gtk.Label(label="Task List")
+        self.grid.attach(self.task_list_label, 0, 4, 1, 1)
+
+        self.task_list_combo = Gtk.ComboBoxText.new_with_entry()
+        self.task_list_combo.get_child().set_text(self.dt_settings.task_list)
+        self.grid.attach(self.task_list_combo, 1, 4, 4, 1)
+
+        self.switch_list_button = Gtk.Button(label="Switch List")
+        self.grid.attach(self.switch_list_button, 5, 4, 1, 1)
+
+        # Task Counts
+        self.stats_label = Gtk.Label(label="")
+        self.grid.attach(self.stats_label, 0, 5, 6, 1)
+
+    def __update_stats_label(self):
+        if self.on_get_stats_callback is not None:
+            self.stats_label.set_text(self.on_get_stats_callback().display_text())
+
     def __update_task_list_store(self, tasks: List[Task] = None):
+        self.__update_stats_label()
         self.task_list_store.clear()
         self.tasks.clear()
         for task in tasks:
             self.tasks.append(task)
-            self.task_list_store.append([task.title, task.description_display_text(), str(task.completed)])
+            self.task_list_store.append([
+                task.title,
+                task.description_display_text(),
+                task.due_date.isoformat() if task.due_date else "",
+                str(task.completed),
+            ])
 
     def register_callbacks(
         self,
@@ -94,12 +141,82 @@ class GTKTaskOverview(UI):
         self.list_active_button.connect("clicked", self.on_list_active)
         self.list_completed_button.connect("clicked", self.on_list_completed)
         self.list_all_button.connect("clicked", self.on_list_all)
+        self.list_today_button.connect("clicked", self.on_list_today)
+        self.list_overdue_button.connect("clicked", self.on_list_overdue)
+        self.list_upcoming_button.connect("clicked", self.on_list_upcoming)
         self.create_button.connect("clicked", self.on_create_task)
         self.edit_button.connect("clicked", self.on_edit_task)
         self.delete_button.connect("clicked", self.on_delete_task)
         self.complete_button.connect("clicked", self.on_complete_task)
         self.view_button.connect("clicked", self.on_view_task)
 
+    def register_search_callback(self, on_search_tasks_callback: Callable[[str], List[Task]]):
+        super().register_search_callback(on_search_tasks_callback)
+        self.search_entry.connect("search-changed", self.on_search_changed)
+
+    def on_search_changed(self, widget):
+        self.search_generation += 1
+        query = self.search_entry.get_text().strip()
+        if not query:
+            self.__update_task_list_store(self.on_filter_tasks_callback(TaskFilter.ALL.value))
+            return
+        self.search_executor.submit(self.__search, self.search_generation, query)
+
+    def __search(self, generation: int, query: str):
+        try:
+            tasks = self.on_search_tasks_callback(query)
+        except Exception as e:
+            print(f"Search failed: {e}")
+            return
+        GLib.idle_add(self.__show_search_results, generation, tasks)
+
+    def __show_search_results(self, generation: int, tasks: List[Task]):
+        if generation == self.search_generation:
+            self.__update_task_list_store(tasks)
+        return False
+
+    def register_stats_callback(self, on_get_stats_callback: Callable[[], TaskStats]):
+        super().register_stats_callback(on_get_stats_callback)
+        self.__update_stats_label()
+
+    def register_task_list_callbacks(
+        self,
+        on_list_task_lists_callback: Callable[[], List[str]],
+        on_switch_task_list_callback: Callable[[str], List[Task]],
+    ):
+        super().register_task_list_callbacks(on_list_task_lists_callback, on_switch_task_list_callback)
+        self.__update_task_list_combo()
+        self.task_list_combo.connect("changed", self.on_task_list_selected)
+        self.switch_list_button.connect("clicked", self.on_switch_task_list)
+
+    def __update_task_list_combo(self):
+        self.task_list_combo.remove_all()
+        for name in self.on_list_task_lists_callback():
+            self.task_list_combo.append_text(name)
+
+    def on_task_list_selected(self, widget):
+        # Picking a list from the drop-down switches at once; typed names wait for the button.
+        if self.task_list_combo.get_active() != -1:
+            self.on_switch_task_list(widget)
+
+    def on_switch_task_list(self, widget):
+        name = self.task_list_combo.get_child().get_text().strip()
+        try:
+            tasks = self.on_switch_task_list_callback(name)
+        except ValueError as e:
+            dialog = Gtk.MessageDialog(
+                transient_for=self.window,
+                message_type=Gtk.MessageType.ERROR,
+                buttons=Gtk.ButtonsType.OK,
+                text=str(e),
+            )
+            dialog.run()
+            dialog.destroy()
+            return
+        self.__update_task_list_store(tasks)
+        if self.task_list_combo.get_active() == -1:
+            self.__update_task_list_combo()
+
     def on_create_task(self, widget):
         dialog = TaskDialog(self.window, title="Create Task")
         response = dialog.run()
@@ -117,8 +234,9 @@ class GTKTaskOverview(UI):
 
         if treeiter is not None:
             task_index = model.get_path(treeiter)[0]
-            task = self.tasks[task_index]
-            task_id = task.id
+            task_id = self.tasks[task_index].id
+            # The list only holds summaries; load the full description for editing.
+            task = self.on_get_task_by_id_callback(task_id)
 
             dialog = TaskDialog(self.window, title="Edit Task", task=task, dt_settings=self.dt_settings, dt_preferences=self.dt_preferences)
             response = dialog.run()
@@ -160,7 +278,7 @@ class GTKTaskOverview(UI):
 
         if treeiter is not None:
             task_index = model.get_path(treeiter)[0]
-            task = self.tasks[task_index]
+            task = self.on_get_task_by_id_callback(self.tasks[task_index].id)
 
             dialog = ViewTaskDialog(self.window, task, dt_settings=self.dt_settings, dt_preferences=self.dt_preferences)
             dialog.run()
@@ -178,10 +296,26 @@ class GTKTaskOverview(UI):
         tasks = self.on_filter_tasks_callback(TaskFilter.ALL.value)
         self.__update_task_list_store(tasks)
 
+    def on_list_today(self, widget):
+        tasks = self.on_filter_tasks_callback(TaskFilter.TODAY.value)
+        self.__update_task_list_store(tasks)
+
+    def on_list_overdue(self, widget):
+        tasks = self.on_filter_tasks_callback(TaskFilter.OVERDUE.value)
+        self.__update_task_list_store(tasks)
+
+    def on_list_upcoming(self, widget):
+        tasks = self.on_filter_tasks_callback(TaskFilter.UPCOMING.value)
+        self.__update_task_list_store(tasks)
+
     def launch(self):
         self.window.connect("destroy", Gtk.main_quit)
         self.window.show_all()
+        if self.on_search_tasks_callback is not None:
+            # Build the search index in the background before the first keystroke.
+            self.search_executor.submit(self.on_search_tasks_callback, "")
         Gtk.main()
+        self.search_executor.shutdown(wait=False)
 
 
 class TaskDialog(Gtk.Dialog):
@@ -205,10 +339,14 @@ class TaskDialog(Gtk.Dialog):
 
         self.title_entry = Gtk.Entry()
         self.description_entry = Gtk.Entry()
+        self.due_date_entry = Gtk.Entry()
+        self.due_date_entry.set_placeholder_text("YYYY-MM-DD")
 
         if task:
             self.title_entry.set_text(task.title)
             self.description_entry.set_text(task.description)
+            if task.due_date:
+                self.due_date_entry.set_text(task.due_date.isoformat())
 
         self.grid.attach(Gtk.Label(label="Title"), 0, 0, 1, 1)
         self.grid.attach(self.title_entry, 1, 0, 1, 1)
@@ -216,12 +354,37 @@ class TaskDialog(Gtk.Dialog):
         self.grid.attach(Gtk.Label(label="Description"), 0, 1, 1, 1)
         self.grid.attach(self.description_entry, 1, 1, 1, 1)
 
+        self.grid.attach(Gtk.Label(label="Due Date"), 0, 2, 1, 1)
+        self.grid.attach(self.due_date_entry, 1, 2, 1, 1)
+
         self.show_all()
 
+    def run(self) -> Gtk.ResponseType:
+        # Keep the dialog open until the due date parses, so a typo does not lose the entered task.
+        while True:
+            response = super().run()
+            if response != Gtk.ResponseType.OK:
+                return response
+            try:
+                self.get_task_data()
+                return response
+            except ValueError:
+                error_dialog = Gtk.MessageDialog(
+                    transient_for=self,
+                    message_type=Gtk.MessageType.ERROR,
+                    buttons=Gtk.ButtonsType.OK,
+                    text=f"Invalid due date: {self.due_date_entry.get_text().strip()}; expected YYYY-MM-DD",
+                )
+                error_dialog.run()
+                error_dialog.destroy()
+                self.due_date_entry.grab_focus()
+
     def get_task_data(self) -> Dict[str, Any]:
+        due_date = self.due_date_entry.get_text().strip()
         return {
             "title": self.title_entry.get_text(),
-            "description": self.description_entry.get_text()
+            "description": self.description_entry.get_text(),
+            "due_date": date.fromisoformat(due_date) if due_date else None,
         }
 
 
@@ -250,7 +413,8 @@ class ViewTaskDialog(Gtk.Dialog):
 
         self.add_label_to_grid("Title", task.title, 0)
         self.add_label_to_grid("Description", task.description, 1)
-        self.add_label_to_grid("Completed", str(task.completed), 2)
+        self.add_label_to_grid("Due Date", task.due_date.isoformat() if task.due_date else "", 2)
+        self.add_label_to_grid("Completed", str(task.completed), 3)
 
         self.show_all()
 
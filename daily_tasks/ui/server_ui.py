@@ -0,0 +1,390 @@
+"""
+HTTP/JSON API server for the Daily Tasks application.
+
+Exposes the task manager callbacks over a small asyncio HTTP/1.1 server so that
+several local clients can share a single task store.
+
+Endpoints:
+    GET    /tasks?filter=all&offset=0&limit=50  List tasks, paginated.
+    POST   /tasks                                Create a task.
+    GET    /tasks/<id>                           View a task.
+    PATCH  /tasks/<id>                           Edit a task; honours If-Match: <version>.
+    DELETE /tasks/<id>                           Delete a task.
+    POST   /tasks/<id>/complete                  Complete a task.
+    POST   /batch                                Run several operations in one request; with
+                                                 "atomic": true, all of them or none.
+"""
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from typing import Callable, List, Dict, Any, Tuple
+from urllib.parse import urlsplit, parse_qs
+
+from daily_tasks.models import Task, TaskFilter
+from daily_tasks.repository import VersionConflictError, validate_task_changes
+from daily_tasks.ui import UI
+
+
+class HTTPError(Exception):
+    """
+    Error raised while handling a request, carrying the status to respond with.
+    """
+    def __init__(self, status: HTTPStatus, message: str = None):
+        super().__init__(message or status.phrase)
+        self.status = status
+
+
+class ServerUI(UI):
+    """
+    HTTP/JSON API server for the Daily Tasks application.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.server_preferences = self.dt_preferences.server_ui
+
+        self.on_get_task_by_id_callback = None
+        self.on_filter_tasks_callback = None
+        self.on_create_task_callback = None
+        self.on_edit_task_callback = None
+        self.on_delete_task_callback = None
+        self.on_complete_task_callback = None
+
+        self.port: int = None
+        self.ready = threading.Event()
+        self._loop: asyncio.AbstractEventLoop = None
+        self._stopped: asyncio.Event = None
+        self._semaphore: asyncio.Semaphore = None
+        # Repositories are thread-safe, so callbacks run off the event loop on
+        # as many threads as requests may be handled concurrently.
+        self._executor = ThreadPoolExecutor(max_workers=self.server_preferences.max_concurrent_requests)
+
+    def register_callbacks(
+        self,
+        on_get_task_by_id_callback: Callable[[int], Task],
+        on_filter_tasks_callback: Callable[[str], List[Task]],
+        on_create_task_callback: Callable[[Task], List[Task]],
+        on_edit_task_callback: Callable[[int, Dict[str, Any]], List[Task]],
+        on_delete_task_callback: Callable[[int], List[Task]],
+        on_complete_task_callback: Callable[[int], List[Task]],
+    ):
+        self.on_get_task_by_id_callback = on_get_task_by_id_callback
+        self.on_filter_tasks_callback = on_filter_tasks_callback
+        self.on_create_task_callback = on_create_task_callback
+        self.on_edit_task_callback = on_edit_task_callback
+        self.on_delete_task_callback = on_delete_task_callback
+        self.on_complete_task_callback = on_complete_task_callback
+
+    def launch(self):
+        try:
+            asyncio.run(self.serve())
+        except KeyboardInterrupt:
+            print("Server stopped")
+
+    def stop(self):
+        """
+        Stop the server from any thread.
+        """
+        if self._loop is not None and self._stopped is not None:
+            self._loop.call_soon_threadsafe(self._stopped.set)
+
+    async def serve(self):
+        """
+        Serve requests until `stop` is called.
+        """
+        self._loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        self._semaphore = asyncio.Semaphore(self.server_preferences.max_concurrent_requests)
+
+        server = await asyncio.start_server(
+            self._handle_connection,
+            self.server_preferences.host,
+            self.server_preferences.port,
+        )
+        self.port = server.sockets[0].getsockname()[1]
+        print(f"Serving Daily Tasks API on http://{self.server_preferences.host}:{self.port}")
+        self.ready.set()
+        try:
+            async with server:
+                await self._stopped.wait()
+        finally:
+            self._executor.shutdown(wait=False)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(
+                        self._read_request(reader),
+                        timeout=self.server_preferences.keep_alive_timeout,
+                    )
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    break
+                if request is None:
+                    break
+
+                method, target, headers, body, keep_alive = request
+                try:
+                    async with self._semaphore:
+                        status, payload = await self._dispatch(method, target, headers, body)
+                except HTTPError as e:
+                    status, payload = e.status, {"error": str(e)}
+                except Exception as e:
+                    status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)}
+
+                self._write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except HTTPError as e:
+            self._write_response(writer, e.status, {"error": str(e)}, False)
+            try:
+                await writer.drain()
+            except ConnectionError:
+                pass
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader):
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        try:
+            method, target, version = request_line.decode("latin-1").split()
+        except ValueError as e:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Malformed request line") from e
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get("content-length", 0))
+        except ValueError as e:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Invalid Content-Length") from e
+        if length > self.server_preferences.max_body_size:
+            raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+        body = await reader.readexactly(length) if length else b""
+
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+        return method.upper(), target, headers, body, keep_alive
+
+    def _write_response(self, writer: asyncio.StreamWriter, status: HTTPStatus, payload: Any, keep_alive: bool):
+        body = json.dumps(payload).encode("utf-8")
+        head = [
+            f"HTTP/1.1 {status.value} {status.phrase}",
+            "Content-Type: application/json",
+            f"Content-Length: {len(body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+
+    async def _call(self, callback: Callable, *args):
+        return await self._loop.run_in_executor(self._executor, callback, *args)
+
+    async def _dispatch(
+        self, method: str, target: str, headers: Dict[str, str], body: bytes
+    ) -> Tuple[HTTPStatus, Any]:
+        url = urlsplit(target)
+        query = parse_qs(url.query)
+        parts = [part for part in url.path.split("/") if part]
+
+        if parts == ["tasks"]:
+            if method == "GET":
+                filter_text = query.get("filter", [TaskFilter.ALL.value])[0]
+                tasks = await self._run(self.on_filter_tasks_callback, filter_text)
+                return HTTPStatus.OK, self._page(tasks, query)
+            if method == "POST":
+                task = self._parse_task(self._parse_json(body))
+                tasks = await self._run(self.on_create_task_callback, task)
+                return HTTPStatus.CREATED, self._page(tasks, query)
+            raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED)
+
+        if parts == ["batch"]:
+            if method != "POST":
+                raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED)
+            return HTTPStatus.OK, await self._batch(self._parse_json(body), query)
+
+        if len(parts) in (2, 3) and parts[0] == "tasks":
+            task_id = self._parse_id(parts[1])
+            if len(parts) == 3:
+                if parts[2] != "complete":
+                    raise HTTPError(HTTPStatus.NOT_FOUND)
+                if method != "POST":
+                    raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED)
+                tasks = await self._run(self.on_complete_task_callback, task_id, not_found=True)
+                return HTTPStatus.OK, self._page(tasks, query)
+            if method == "GET":
+                task = await self._run(self.on_get_task_by_id_callback, task_id, not_found=True)
+                return HTTPStatus.OK, task.model_dump(mode="json")
+            if method == "PATCH":
+                data = self._parse_changes(self._parse_json(body))
+                expected_version = headers.get("if-match")
+                if expected_version is not None:
+                    expected_version = self._parse_id(expected_version.strip('"'))
+                tasks = await self._run(self.on_edit_task_callback, task_id, data, expected_version, not_found=True)
+                return HTTPStatus.OK, self._page(tasks, query)
+            if method == "DELETE":
+                tasks = await self._run(self.on_delete_task_callback, task_id, not_found=True)
+                return HTTPStatus.OK, self._page(tasks, query)
+            raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED)
+
+        raise HTTPError(HTTPStatus.NOT_FOUND)
+
+    async def _run(self, callback: Callable, *args, not_found: bool = False):
+        try:
+            return await self._call(callback, *args)
+        except VersionConflictError as e:
+            raise HTTPError(HTTPStatus.CONFLICT, str(e)) from e
+        except ValueError as e:
+            raise HTTPError(HTTPStatus.NOT_FOUND if not_found else HTTPStatus.BAD_REQUEST, str(e)) from e
+
+    async def _batch(self, data: Any, query: Dict[str, List[str]]) -> Dict[str, Any]:
+        operations = data.get("operations") if isinstance(data, dict) else None
+        if not isinstance(operations, list):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Expected an 'operations' list")
+        if len(operations) > self.server_preferences.max_batch_size:
+            raise HTTPError(
+                HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                f"At most {self.server_preferences.max_batch_size} operations are allowed per batch",
+            )
+
+        if data.get("atomic"):
+            if self.on_transaction_callback is None:
+                raise HTTPError(HTTPStatus.BAD_REQUEST, "Atomic batches are not supported")
+            results, tasks = await self._call(self._run_atomic_batch, operations)
+            response = {"results": results}
+            if tasks is not None:
+                response.update(self._page(tasks, query))
+            return response
+
+        results = []
+        tasks = None
+        for operation in operations:
+            try:
+                result, operation_tasks = await self._call(self._run_operation, operation)
+                if operation_tasks is not None:
+                    tasks = operation_tasks
+                results.append({"status": HTTPStatus.OK.value, **result})
+            except HTTPError as e:
+                results.append({"status": e.status.value, "error": str(e)})
+            except VersionConflictError as e:
+                results.append({"status": HTTPStatus.CONFLICT.value, "error": str(e)})
+            except ValueError as e:
+                results.append({"status": HTTPStatus.BAD_REQUEST.value, "error": str(e)})
+
+        response = {"results": results}
+        if tasks is not None:
+            response.update(self._page(tasks, query))
+        return response
+
+    def _run_atomic_batch(self, operations: List[Any]) -> Tuple[List[Dict[str, Any]], List[Task]]:
+        """
+        Run the operations of a batch in a single transaction on one thread.
+
+        Raises:
+            HTTPError: With the status of the first failing operation; none of the operations are applied.
+        """
+        results = []
+        tasks = None
+        with self.on_transaction_callback():
+            for index, operation in enumerate(operations):
+                try:
+                    result, operation_tasks = self._run_operation(operation)
+                except HTTPError as e:
+                    raise HTTPError(e.status, f"Operation {index} failed: {e}") from e
+                except VersionConflictError as e:
+                    raise HTTPError(HTTPStatus.CONFLICT, f"Operation {index} failed: {e}") from e
+                except ValueError as e:
+                    raise HTTPError(HTTPStatus.BAD_REQUEST, f"Operation {index} failed: {e}") from e
+                if operation_tasks is not None:
+                    tasks = operation_tasks
+                results.append({"status": HTTPStatus.OK.value, **result})
+        return results, tasks
+
+    def _run_operation(self, operation: Any) -> Tuple[Dict[str, Any], List[Task]]:
+        if not isinstance(operation, dict):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Expected an operation object")
+        op = operation.get("op")
+        if op == "create":
+            return {}, self.on_create_task_callback(self._parse_task(operation.get("task")))
+        task_id = self._parse_id(operation.get("id"))
+        if op == "get":
+            return {"task": self.on_get_task_by_id_callback(task_id).model_dump(mode="json")}, None
+        if op == "edit":
+            data = self._parse_changes(operation.get("data") or {})
+            expected_version = operation.get("version")
+            if expected_version is not None:
+                expected_version = self._parse_id(expected_version)
+            return {}, self.on_edit_task_callback(task_id, data, expected_version)
+        if op == "delete":
+            return {}, self.on_delete_task_callback(task_id)
+        if op == "complete":
+            return {}, self.on_complete_task_callback(task_id)
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f"Unknown operation: {op}")
+
+    def _page(self, tasks: List[Task], query: Dict[str, List[str]]) -> Dict[str, Any]:
+        offset = self._parse_int(query, "offset", 0)
+        limit = min(
+            max(self._parse_int(query, "limit", self.server_preferences.default_page_size), 1),
+            self.server_preferences.max_page_size,
+        )
+        page = tasks[offset:offset + limit]
+        next_offset = offset + limit if offset + limit < len(tasks) else None
+        return {
+            "tasks": [task.model_dump(mode="json") for task in page],
+            "offset": offset,
+            "limit": limit,
+            "total": len(tasks),
+            "next_offset": next_offset,
+        }
+
+    @staticmethod
+    def _parse_int(query: Dict[str, List[str]], key: str, default: int) -> int:
+        try:
+            value = int(query.get(key, [default])[0])
+        except ValueError as e:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"'{key}' must be an integer") from e
+        if value < 0:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"'{key}' must not be negative")
+        return value
+
+    @staticmethod
+    def _parse_id(value: Any) -> int:
+        try:
+            return int(value)
+        except (TypeError, ValueError) as e:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"Invalid task ID: {value}") from e
+
+    @staticmethod
+    def _parse_json(body: bytes) -> Any:
+        try:
+            return json.loads(body or b"null")
+        except ValueError as e:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Invalid JSON body") from e
+
+    @staticmethod
+    def _parse_task(data: Any) -> Task:
+        if not isinstance(data, dict):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Expected a task object")
+        try:
+            return Task(**data)
+        except ValueError as e:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, str(e)) from e
+
+    @staticmethod
+    def _parse_changes(data: Any) -> Dict[str, Any]:
+        if not isinstance(data, dict):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Expected a JSON object")
+        try:
+            return validate_task_changes(data)
+        except ValueError as e:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, str(e)) from e
@@ -0,0 +1,140 @@
+import os
+import tempfile
+import threading
+import unittest
+
+from tests import test_preferences
+from daily_tasks.backup import BackupScheduler, create_backup, list_backups, prune_backups, verify_backup
+from daily_tasks.models import (
+    BackupSettings, JSONSettings, MemorySettings, NDJSONSettings, RecurrenceRule, Settings, SQLiteSettings, Task,
+)
+from daily_tasks.repository import TaskRepository
+from daily_tasks.repository.json_task_repository import JSONTaskRepository
+from daily_tasks.repository.memory_task_repository import MemoryTaskRepository
+from daily_tasks.repository.ndjson_task_repository import NDJSONTaskRepository
+from daily_tasks.repository.sqlite_task_repository import SQLiteTaskRepository
+
+
+class TestBackup(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.backup_dir = os.path.join(self.temp_dir.name, "backups")
+        self.settings = Settings(
+            json_settings=JSONSettings(tasks_path=os.path.join(self.temp_dir.name, "tasks.json")),
+            sqlite_settings=SQLiteSettings(db_path=os.path.join(self.temp_dir.name, "tasks.db")),
+            backup_settings=BackupSettings(pages_per_step=1),
+        )
+
+    def _restore(self, repository_class, settings):
+        repository = repository_class(dt_settings=settings, dt_preferences=test_preferences)
+        self.addCleanup(getattr(repository, "close", lambda: None))
+        return repository
+
+    def test_json_backup_covers_every_task_list(self):
+        repository = JSONTaskRepository(dt_settings=self.settings, dt_preferences=test_preferences)
+        repository.create_task(Task(title="Default", description=""))
+        repository.use_task_list("work")
+        repository.create_task(Task(title="Work", description=""))
+        repository.save_recurrence(RecurrenceRule(title="Stand-up", description="", start_date="2024-01-01"))
+
+        path = create_backup(repository, self.backup_dir)
+
+        self.assertEqual(list_backups(self.backup_dir), [path])
+        restored = self._restore(JSONTaskRepository, self.settings.model_copy(update={
+            "json_settings": JSONSettings(tasks_path=os.path.join(path, "tasks.json"))
+        }))
+        self.assertEqual([task.title for task in restored.list_tasks()], ["Default"])
+        restored.use_task_list("work")
+        self.assertEqual([task.title for task in restored.list_tasks()], ["Work"])
+        self.assertEqual([rule.title for rule in restored.list_recurrences()], ["Stand-up"])
+
+    def test_sqlite_backup_while_writing(self):
+        repository = SQLiteTaskRepository(dt_settings=self.settings, dt_preferences=test_preferences)
+        repository.create_tasks([Task(title=f"Task {i}", description="x" * 500) for i in range(500)])
+        stop = threading.Event()
+
+        def write():
+            writer = SQLiteTaskRepository(dt_settings=self.settings, dt_preferences=test_preferences)
+            while not stop.is_set():
+                writer.create_task(Task(title="Written during the backup", description=""))
+
+        writer_thread = threading.Thread(target=write)
+        writer_thread.start()
+        try:
+            path = create_backup(repository, self.backup_dir)
+        finally:
+            stop.set()
+            writer_thread.join()
+
+        restored = self._restore(SQLiteTaskRepository, self.settings.model_copy(update={
+            "sqlite_settings": SQLiteSettings(db_path=os.path.join(path, "tasks.db"))
+        }))
+        titles = [task.title for task in restored.iter_tasks()]
+        self.assertEqual(titles[:500], [f"Task {i}" for i in range(500)])
+        self.assertEqual(set(titles[500:]) - {"Written during the backup"}, set())
+
+    def test_memory_backup_loads_as_snapshot(self):
+        repository = MemoryTaskRepository(dt_settings=self.settings, dt_preferences=test_preferences)
+        repository.create_task(Task(title="In memory", description=""))
+        path = create_backup(repository, self.backup_dir)
+        restored = self._restore(MemoryTaskRepository, self.settings.model_copy(update={
+            "memory_settings": MemorySettings(snapshot_path=os.path.join(path, "tasks.snapshot"))
+        }))
+        self.assertEqual([task.title for task in restored.list_tasks()], ["In memory"])
+
+    def test_ndjson_backup_rebuilds_index(self):
+        settings = self.settings.model_copy(update={
+            "ndjson_settings": NDJSONSettings(tasks_path=os.path.join(self.temp_dir.name, "tasks.ndjson"))
+        })
+        repository = self._restore(NDJSONTaskRepository, settings)
+        repository.create_task(Task(title="Appended", description=""))
+        path = create_backup(repository, self.backup_dir)
+        restored = self._restore(NDJSONTaskRepository, settings.model_copy(update={
+            "ndjson_settings": NDJSONSettings(tasks_path=os.path.join(path, "tasks.ndjson"))
+        }))
+        self.assertEqual([task.title for task in restored.list_tasks()], ["Appended"])
+
+    def test_verify_detects_corruption(self):
+        repository = SQLiteTaskRepository(dt_settings=self.settings, dt_preferences=test_preferences)
+        repository.create_task(Task(title="Task", description=""))
+        path = create_backup(repository, self.backup_dir)
+        self.assertEqual(list(verify_backup(path)), ["tasks.db"])
+
+        with open(os.path.join(path, "tasks.db"), "r+b") as fh:
+            fh.seek(100)
+            fh.write(b"\xff" * 16)
+        with self.assertRaises(ValueError):
+            verify_backup(path)
+        os.remove(os.path.join(path, "tasks.db"))
+        with self.assertRaises(ValueError):
+            verify_backup(path)
+        with self.assertRaises(ValueError):
+            verify_backup(self.temp_dir.name)
+
+    def test_retention(self):
+        repository = SQLiteTaskRepository(dt_settings=self.settings, dt_preferences=test_preferences)
+        paths = [create_backup(repository, self.backup_dir, keep=2) for _ in range(4)]
+        self.assertEqual(list_backups(self.backup_dir), paths[2:])
+        self.assertEqual(prune_backups(self.backup_dir, 1), 1)
+        self.assertEqual(list_backups(self.backup_dir), paths[3:])
+
+    def test_unsupported_repository(self):
+        class NoBackupRepository(MemoryTaskRepository):
+            backup = TaskRepository.backup
+
+        repository = NoBackupRepository(dt_settings=self.settings, dt_preferences=test_preferences)
+        with self.assertRaises(ValueError):
+            create_backup(repository, self.backup_dir)
+        self.assertEqual(os.listdir(self.backup_dir), [])
+
+    def test_scheduler_takes_first_backup_when_none_is_recent(self):
+        repository = SQLiteTaskRepository(dt_settings=self.settings, dt_preferences=test_preferences)
+        scheduler = BackupScheduler(repository, self.backup_dir, interval_hours=24, keep=3)
+        self.assertEqual(scheduler._first_delay(), 0)
+        create_backup(repository, self.backup_dir)
+        self.assertGreater(scheduler._first_delay(), 23 * 3600)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,28 @@
+import unittest
+
+from daily_tasks.compression import compress_description, decompress_description
+from daily_tasks.models import CompressionSettings
+
+
+class TestCompression(unittest.TestCase):
+    def test_round_trip(self):
+        description = "Log line with ünïcode\n" * 500
+        compressed = compress_description(description, CompressionSettings(min_description_size=100))
+        self.assertIsNotNone(compressed)
+        self.assertLess(len(compressed), len(description))
+        self.assertEqual(decompress_description(compressed), description)
+
+    def test_small_descriptions_are_not_compressed(self):
+        self.assertIsNone(compress_description("Short", CompressionSettings(min_description_size=100)))
+
+    def test_disabled(self):
+        description = "x" * 10000
+        self.assertIsNone(compress_description(description, CompressionSettings(enabled=False)))
+
+    def test_unknown_encoding(self):
+        with self.assertRaises(ValueError):
+            decompress_description(b"", "lz4")
+
+
+if __name__ == "__main__":
+    unittest.main()
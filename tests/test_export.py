@@ -0,0 +1,76 @@
+import csv
+import gzip
+import json
+import os
+import tempfile
+import unittest
+
+from tests import test_preferences
+from daily_tasks.export import ExportFormat, export_tasks, task_list_export_path
+from daily_tasks.models import Settings, JSONSettings, SQLiteSettings, Task
+from daily_tasks.repository.json_task_repository import JSONTaskRepository
+from daily_tasks.repository.sqlite_task_repository import SQLiteTaskRepository
+from daily_tasks.serialization import read_binary_tasks
+
+
+class TestExportTasks(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.settings = Settings(
+            json_settings=JSONSettings(tasks_path=os.path.join(self.temp_dir.name, "tasks.json")),
+            sqlite_settings=SQLiteSettings(db_path=os.path.join(self.temp_dir.name, "tasks.db"))
+        )
+        self.repositories = [
+            JSONTaskRepository(dt_settings=self.settings, dt_preferences=test_preferences),
+            SQLiteTaskRepository(dt_settings=self.settings, dt_preferences=test_preferences),
+        ]
+        for repository in self.repositories:
+            repository.create_task(Task(title="Task 1", description="First, \"quoted\" task"))
+            repository.create_task(Task(title="Task 2", description="Second task", completed=True))
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_export_ndjson(self):
+        for repository in self.repositories:
+            output_path = os.path.join(self.temp_dir.name, "tasks.ndjson")
+            count = export_tasks(repository, output_path, ExportFormat.NDJSON)
+            with open(output_path, "r", encoding="utf-8") as fh:
+                records = [json.loads(line) for line in fh]
+            self.assertEqual(count, 2)
+            self.assertEqual([record["title"] for record in records], ["Task 1", "Task 2"])
+            self.assertTrue(records[1]["completed"])
+
+    def test_export_csv_gzip(self):
+        for repository in self.repositories:
+            output_path = os.path.join(self.temp_dir.name, "tasks.csv.gz")
+            export_tasks(repository, output_path, "csv", compress=True)
+            with gzip.open(output_path, "rt", encoding="utf-8", newline="") as fh:
+                rows = list(csv.DictReader(fh))
+            self.assertEqual(len(rows), 2)
+            self.assertEqual(rows[0]["description"], "First, \"quoted\" task")
+
+    def test_export_binary(self):
+        for repository in self.repositories:
+            output_path = os.path.join(self.temp_dir.name, "tasks.bin")
+            export_tasks(repository, output_path, ExportFormat.BINARY)
+            with open(output_path, "rb") as fh:
+                tasks = list(read_binary_tasks(fh))
+            self.assertEqual(tasks, repository.list_tasks())
+
+    def test_export_empty_repository(self):
+        repository = self.repositories[1]
+        for task in repository.list_tasks():
+            repository.delete_task(task.id)
+        output_path = os.path.join(self.temp_dir.name, "empty.ndjson")
+        self.assertEqual(export_tasks(repository, output_path), 0)
+        self.assertEqual(os.path.getsize(output_path), 0)
+
+    def test_task_list_export_path(self):
+        self.assertEqual(task_list_export_path("out/tasks.ndjson", "default"), "out/tasks.ndjson")
+        self.assertEqual(task_list_export_path("out/tasks.ndjson", "work"), "out/tasks.work.ndjson")
+        self.assertEqual(task_list_export_path("out/tasks.csv.gz", "work"), "out/tasks.work.csv.gz")
+
+
+if __name__ == "__main__":
+    unittest.main()
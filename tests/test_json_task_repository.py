@@ -1,17 +1,38 @@
+import json
+import multiprocessing
 import os
+import threading
 import unittest
+from unittest.mock import patch
+from datetime import date, datetime, timedelta, timezone
 
 from tests import test_settings, test_preferences
-from daily_tasks.models import Task, TaskFilter
+from daily_tasks.models import CompressionSettings, RecurrenceRule, Task, TaskFilter
+from daily_tasks.repository import VersionConflictError
 from daily_tasks.repository.json_task_repository import JSONTaskRepository
 
 
+def _create_tasks_in_process(count):
+    repository = JSONTaskRepository(dt_settings=test_settings, dt_preferences=test_preferences)
+    for i in range(count):
+        repository.create_task(Task(title=f"Task {i}", description=f"Created by process {os.getpid()}"))
+
+
 class TestJSONTaskRepository(unittest.TestCase):
     def setUp(self):
         self.repository = JSONTaskRepository(dt_settings=test_settings, dt_preferences=test_preferences)
 
     def tearDown(self):
-        os.remove(self.repository.tasks_path)
+        for name in self.repository.task_lists():
+            self.repository.use_task_list(name)
+            os.remove(self.repository.tasks_path)
+            paths = (
+                self.repository.lock_path, self.repository.snapshot_path, self.repository.archive_path,
+                self.repository.recurrences_path,
+            )
+            for path in paths:
+                if os.path.exists(path):
+                    os.remove(path)
 
     def test_create_task(self):
         task = Task(title="Test Task", description="This is a test task")
@@ -66,5 +87,429 @@ class TestJSONTaskRepository(unittest.TestCase):
         self.assertEqual(all_tasks[0].title, "Task 1")
         self.assertEqual(all_tasks[1].title, "Task 2")
 
+    def test_concurrent_instances_do_not_lose_writes(self):
+        other_repository = JSONTaskRepository(dt_settings=test_settings, dt_preferences=test_preferences)
+        self.repository.create_task(Task(title="Task 1", description="From first instance"))
+        other_repository.create_task(Task(title="Task 2", description="From second instance"))
+        self.repository.update_task(2, {"completed": True})
+
+        self.assertEqual([task.title for task in self.repository.list_tasks()], ["Task 1", "Task 2"])
+        self.assertTrue(other_repository.read_task(2).completed)
+
+    def test_concurrent_processes_do_not_lose_writes(self):
+        processes = [multiprocessing.Process(target=_create_tasks_in_process, args=(10,)) for _ in range(4)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        self.assertEqual(len(self.repository.list_tasks()), 40)
+
+    def test_reloads_only_when_file_changed(self):
+        self.repository.create_task(Task(title="Task 1", description="This is task 1"))
+        with patch.object(self.repository, "load_tasks", wraps=self.repository.load_tasks) as load_tasks:
+            self.repository.list_tasks()
+            self.repository.read_task(1)
+            self.assertEqual(load_tasks.call_count, 0)
+
+            other_repository = JSONTaskRepository(dt_settings=test_settings, dt_preferences=test_preferences)
+            other_repository.update_task(1, {"title": "Changed elsewhere"})
+            self.assertEqual(self.repository.read_task(1).title, "Changed elsewhere")
+            self.assertEqual(load_tasks.call_count, 1)
+
+    def test_save_leaves_no_temporary_files(self):
+        self.repository.create_task(Task(title="Task 1", description="This is task 1"))
+        directory = os.path.dirname(self.repository.tasks_path)
+        prefix = f".{os.path.basename(self.repository.tasks_path)}."
+        self.assertEqual([name for name in os.listdir(directory) if name.startswith(prefix)], [])
+
+    def test_update_task_increments_version(self):
+        created_task = self.repository.create_task(Task(title="Test Task", description="This is a test task"))
+        self.assertEqual(created_task.version, 1)
+        updated_task = self.repository.update_task(created_task.id, {"title": "Updated Task"})
+        self.assertEqual(updated_task.version, 2)
+        self.assertEqual(self.repository.read_task(created_task.id).version, 2)
+
+    def test_update_task_with_expected_version(self):
+        created_task = self.repository.create_task(Task(title="Test Task", description="This is a test task"))
+        self.repository.update_task(created_task.id, {"title": "First edit"}, expected_version=1)
+        with self.assertRaises(VersionConflictError):
+            self.repository.update_task(created_task.id, {"title": "Stale edit"}, expected_version=1)
+        self.assertEqual(self.repository.read_task(created_task.id).title, "First edit")
+
+    def test_task_versions(self):
+        task1 = self.repository.create_task(Task(title="Task 1", description="This is task 1"))
+        task2 = self.repository.create_task(Task(title="Task 2", description="This is task 2"))
+        self.repository.update_task(task2.id, {"completed": True})
+        self.assertEqual(self.repository.task_versions(), {task1.id: 1, task2.id: 2})
+        self.assertEqual(self.repository.task_versions([task2.id, 999]), {task2.id: 2})
+
+    def test_change_token(self):
+        task = self.repository.create_task(Task(title="Task", description=""))
+        token = self.repository.change_token()
+        self.repository.read_task(task.id)
+        self.assertEqual(self.repository.change_token(), token)
+        other = JSONTaskRepository(dt_settings=test_settings, dt_preferences=test_preferences)
+        other.update_task(task.id, {"title": "Edited elsewhere"})
+        self.assertNotEqual(self.repository.change_token(), token)
+
+    def test_load_from_snapshot(self):
+        self.repository.create_task(Task(title="Task 1", description="This is task 1"))
+        self.repository.update_task(1, {"completed": True})
+        self.assertTrue(os.path.exists(self.repository.snapshot_path))
+
+        with patch("daily_tasks.repository.json_task_repository.json.loads") as loads:
+            other_repository = JSONTaskRepository(dt_settings=test_settings, dt_preferences=test_preferences)
+            loads.assert_not_called()
+        self.assertEqual(other_repository.list_tasks(), self.repository.list_tasks())
+
+    def test_truncated_snapshot_is_ignored(self):
+        self.repository.create_task(Task(title="Task 1", description="This is task 1"))
+        self.repository.create_task(Task(title="Task 2", description="This is task 2", due_date=date(2024, 1, 1)))
+        with open(self.repository.snapshot_path, "rb") as fh:
+            snapshot = fh.read()
+        for length in range(len(snapshot)):
+            with open(self.repository.snapshot_path, "wb") as fh:
+                fh.write(snapshot[:length])
+            other_repository = JSONTaskRepository(dt_settings=test_settings, dt_preferences=test_preferences)
+            self.assertEqual(other_repository.list_tasks(), self.repository.list_tasks())
+
+    def test_stale_snapshot_is_rebuilt(self):
+        self.repository.create_task(Task(title="Task 1", description="This is task 1"))
+        with open(self.repository.tasks_path, "w", encoding="utf-8") as fh:
+            json.dump([{"id": 1, "title": "Edited by hand", "description": "Outside edit"}], fh)
+
+        other_repository = JSONTaskRepository(dt_settings=test_settings, dt_preferences=test_preferences)
+        self.assertEqual(other_repository.read_task(1).title, "Edited by hand")
+        with patch("daily_tasks.repository.json_task_repository.json.loads") as loads:
+            third_repository = JSONTaskRepository(dt_settings=test_settings, dt_preferences=test_preferences)
+            loads.assert_not_called()
+        self.assertEqual(third_repository.read_task(1).title, "Edited by hand")
+
+    def test_filter_tasks_by_due_date(self):
+        today = date.today()
+        self.repository.create_task(Task(title="Overdue", description="Overdue task", due_date=today - timedelta(days=2)))
+        self.repository.create_task(Task(title="Done", description="Completed task", due_date=today - timedelta(days=1), completed=True))
+        self.repository.create_task(Task(title="Today", description="Due today", due_date=today))
+        self.repository.create_task(Task(title="Upcoming", description="Due soon", due_date=today + timedelta(days=3)))
+        self.repository.create_task(Task(title="Later", description="Due later", due_date=today + timedelta(days=30)))
+        self.repository.create_task(Task(title="Undated", description="No due date"))
+
+        def titles(tasks):
+            return [task.title for task in tasks]
+
+        self.assertEqual(titles(self.repository.filter_tasks(TaskFilter.TODAY.value)), ["Today"])
+        self.assertEqual(titles(self.repository.filter_tasks(TaskFilter.OVERDUE.value)), ["Overdue"])
+        self.assertEqual(titles(self.repository.filter_tasks(TaskFilter.UPCOMING.value)), ["Upcoming"])
+        self.assertEqual(
+            titles(self.repository.tasks_due_between(today - timedelta(days=1), today + timedelta(days=30))),
+            ["Done", "Today", "Upcoming", "Later"]
+        )
+
+    def test_update_due_date(self):
+        today = date.today()
+        created_task = self.repository.create_task(Task(title="Task", description="Task", due_date=today))
+        self.repository.update_task(created_task.id, {"due_date": today + timedelta(days=1)})
+        self.assertEqual(self.repository.filter_tasks(TaskFilter.TODAY.value), [])
+        self.assertEqual(self.repository.read_task(created_task.id).due_date, today + timedelta(days=1))
+        self.assertEqual(len(self.repository.filter_tasks(TaskFilter.UPCOMING.value)), 1)
+
+    def test_archive_completed_tasks(self):
+        active_task = self.repository.create_task(Task(title="Active", description="Active task"))
+        done_task = self.repository.create_task(Task(title="Done", description="Completed task", completed=True))
+        self.assertIsNotNone(done_task.completed_at)
+
+        self.assertEqual(self.repository.archive_completed_tasks(older_than=done_task.completed_at - timedelta(days=1)), 0)
+        self.assertEqual(self.repository.archive_completed_tasks(older_than=datetime.now(timezone.utc)), 1)
+
+        self.assertEqual(self.repository.list_tasks(), [active_task])
+        self.assertEqual(self.repository.read_task(done_task.id), done_task)
+        self.assertEqual(self.repository.filter_tasks(TaskFilter.COMPLETED.value), [done_task])
+        self.assertEqual(list(self.repository.iter_tasks(include_archived=True)), [active_task, done_task])
+        created_task = self.repository.create_task(Task(title="New", description="After archiving"))
+        self.assertEqual(created_task.id, done_task.id + 1)
+
+    def test_archive_with_naive_timestamps(self):
+        done_task = self.repository.create_task(
+            Task(title="Done", description="", completed=True, completed_at=datetime(2024, 1, 1, 12))
+        )
+        aware_task = self.repository.create_task(
+            Task(title="Aware", description="", completed=True, completed_at=datetime(2024, 1, 3, tzinfo=timezone.utc))
+        )
+        self.assertEqual(self.repository.archive_completed_tasks(older_than=datetime(2024, 1, 2)), 1)
+        self.assertEqual(self.repository.list_tasks(), [aware_task])
+        self.assertEqual(self.repository.read_task(done_task.id), done_task)
+
+    def test_update_archived_task_restores_it(self):
+        done_task = self.repository.create_task(Task(title="Done", description="Completed task", completed=True))
+        self.repository.archive_completed_tasks(older_than=datetime.now(timezone.utc))
+        updated_task = self.repository.update_task(done_task.id, {"completed": False})
+        self.assertIsNone(updated_task.completed_at)
+        self.assertEqual(self.repository.list_tasks(), [updated_task])
+        self.assertEqual(list(self.repository.iter_tasks(include_archived=True)), [updated_task])
+
+    def test_delete_archived_task(self):
+        done_task = self.repository.create_task(Task(title="Done", description="Completed task", completed=True))
+        self.repository.archive_completed_tasks(older_than=datetime.now(timezone.utc))
+        self.repository.delete_task(done_task.id)
+        with self.assertRaises(ValueError):
+            self.repository.read_task(done_task.id)
+
+    def test_recurring_tasks(self):
+        today = date.today()
+        rule = self.repository.create_recurrence(
+            RecurrenceRule(title="Stand-up", description="Daily sync", start_date=today - timedelta(days=30))
+        )
+        other_rule = self.repository.create_recurrence(
+            RecurrenceRule(title="Review", description="Weekly", frequency="weekly", start_date=today)
+        )
+        self.assertEqual(self.repository.list_tasks(), [])
+        occurrences = list(self.repository.iter_occurrences(today, today + timedelta(days=6)))
+        self.assertEqual(len(occurrences), 8)
+        self.assertEqual([occurrence.recurrence_id for occurrence in occurrences[:2]], [rule.id, other_rule.id])
+
+        task = self.repository.materialize_occurrence(rule.id, today, {"completed": True})
+        self.assertTrue(task.completed)
+        self.assertEqual((task.title, task.due_date), ("Stand-up", today))
+        self.assertEqual(self.repository.list_tasks(), [task])
+        self.repository.skip_occurrence(rule.id, today + timedelta(days=1))
+        occurrences = self.repository.iter_occurrences(today, today + timedelta(days=2))
+        days = [occurrence.occurrence_date for occurrence in occurrences if occurrence.recurrence_id == rule.id]
+        self.assertEqual(days, [today + timedelta(days=2)])
+        with self.assertRaises(ValueError):
+            self.repository.materialize_occurrence(rule.id, today)
+        self.assertEqual(self.repository.read_recurrence(rule.id).exception_dates, [today, today + timedelta(days=1)])
+
+        self.repository.delete_recurrence(other_rule.id)
+        self.assertEqual([saved_rule.id for saved_rule in self.repository.list_recurrences()], [rule.id])
+        with self.assertRaises(ValueError):
+            self.repository.delete_recurrence(other_rule.id)
+        self.repository.use_task_list("work")
+        self.assertEqual(self.repository.list_recurrences(), [])
+
+    def test_duplicate_detection(self):
+        first_task = self.repository.create_task(Task(title="Buy milk", description="From the shop"))
+        self.repository.create_task(Task(title="Call mom", description="Sunday"))
+        self.assertEqual(self.repository.find_duplicate(Task(title="buy  milk", description="from the shop ")), first_task)
+        self.assertIsNone(self.repository.find_duplicate(Task(title="Buy milk", description="From the market")))
+
+        created_tasks = self.repository.create_tasks([
+            Task(title="Buy milk", description="From the shop"),
+            Task(title="Water plants", description="Balcony"),
+            Task(title="water plants", description="balcony"),
+        ], skip_duplicates=True)
+        self.assertEqual([task.title for task in created_tasks], ["Water plants"])
+        self.assertEqual(len(self.repository.list_tasks()), 3)
+
+        self.repository.create_tasks([
+            Task(title="Buy milk", description="From the shop"),
+            Task(title="Call mom", description="Sunday"),
+        ])
+        self.assertEqual(len(self.repository.list_tasks()), 5)
+
+        renamed_task = self.repository.create_task(Task(title="Renamed", description="Sunday"))
+        self.repository.update_task(renamed_task.id, {"title": "Call Mom"})
+        self.assertEqual(self.repository.deduplicate_tasks(), 3)
+        self.assertEqual(
+            sorted(task.title for task in self.repository.list_tasks()), ["Buy milk", "Call mom", "Water plants"]
+        )
+        self.assertEqual(self.repository.read_task(first_task.id), first_task)
+        self.assertEqual(self.repository.deduplicate_tasks(), 0)
+
+    def test_count_tasks_and_stats(self):
+        today = date.today()
+        self.repository.create_task(Task(title="Active", description="Active task"))
+        self.repository.create_task(Task(title="Overdue", description="Overdue task", due_date=today - timedelta(days=1)))
+        self.repository.create_task(Task(title="Due", description="Due today", due_date=today))
+        done_task = self.repository.create_task(Task(title="Done", description="Completed task", completed=True))
+        self.repository.create_task(Task(title="Old", description="Archived task", completed=True))
+        self.repository.archive_completed_tasks(older_than=datetime.now(timezone.utc))
+        self.repository.update_task(done_task.id, {"title": "Done again"})
+
+        self.assertEqual(self.repository.count_tasks(), 4)
+        self.assertEqual(self.repository.count_tasks(TaskFilter.ACTIVE.value), 3)
+        self.assertEqual(self.repository.count_tasks(TaskFilter.COMPLETED.value), 2)
+        self.assertEqual(self.repository.count_tasks(TaskFilter.OVERDUE.value), 1)
+        self.assertEqual(self.repository.count_tasks(TaskFilter.TODAY.value), 1)
+        for filter_option in TaskFilter:
+            self.assertEqual(
+                self.repository.count_tasks(filter_option.value),
+                len(self.repository.filter_tasks(filter_option.value)),
+            )
+
+        stats = self.repository.stats()
+        self.assertEqual((stats.total, stats.active, stats.completed, stats.archived), (5, 3, 2, 1))
+        self.assertEqual(stats.display_text(), "3 active / 2 done")
+
+        self.repository.use_task_list("work")
+        self.assertEqual(self.repository.stats().total, 0)
+
+    def test_completed_count_does_not_load_archive(self):
+        for i in range(3):
+            self.repository.create_task(Task(title=f"Done {i}", description="", completed=True))
+        self.repository.archive_completed_tasks(older_than=datetime.now(timezone.utc))
+        reopened = JSONTaskRepository(dt_settings=test_settings, dt_preferences=test_preferences)
+        with patch.object(JSONTaskRepository, '_record_to_task', side_effect=AssertionError):
+            self.assertEqual(reopened.count_tasks(TaskFilter.COMPLETED.value), 3)
+            self.assertEqual(reopened.stats().archived, 3)
+        self.repository.delete_task(1)
+        self.assertEqual(reopened.count_tasks(TaskFilter.COMPLETED.value), 2)
+
+    def test_task_lists_are_independent(self):
+        default_task = self.repository.create_task(Task(title="Default", description="Default list task"))
+        self.repository.use_task_list("work")
+        self.assertEqual(self.repository.list_tasks(), [])
+        work_task = self.repository.create_task(Task(title="Work", description="Work list task"))
+        self.assertEqual(self.repository.list_tasks(), [work_task])
+        self.assertEqual(self.repository.task_lists(), ["default", "work"])
+
+        self.repository.use_task_list("default")
+        self.assertEqual(self.repository.list_tasks(), [default_task])
+        if work_task.id != default_task.id:
+            with self.assertRaises(ValueError):
+                self.repository.read_task(work_task.id)
+
+    def test_invalid_task_list_name(self):
+        with self.assertRaises(ValueError):
+            self.repository.use_task_list("../escape")
+
+    def test_list_task_summaries(self):
+        long_description = "x" * 5000
+        active_task = self.repository.create_task(Task(title="Active", description=long_description))
+        done_task = self.repository.create_task(Task(title="Done", description="Short", completed=True))
+
+        summaries = self.repository.list_task_summaries()
+        self.assertEqual([summary.id for summary in summaries], [active_task.id, done_task.id])
+        self.assertEqual(summaries[0].description_preview, active_task.description_display_text())
+        self.assertEqual(summaries[0].description_display_text(), "x" * 50 + "...")
+        self.assertEqual(
+            self.repository.list_task_summaries(TaskFilter.COMPLETED.value), [done_task.summary()]
+        )
+
+        self.repository.update_task(active_task.id, {"description": "Now short"})
+        self.assertEqual(
+            self.repository.list_task_summaries(TaskFilter.ACTIVE.value)[0].description_preview, "Now short..."
+        )
+
+    def test_large_descriptions_are_stored_compressed(self):
+        description = "A long pasted log line\n" * 1000
+        created_task = self.repository.create_task(Task(title="Log", description=description))
+        with open(self.repository.tasks_path, encoding="utf-8") as fh:
+            record = json.load(fh)[0]
+        self.assertNotIn("description", record)
+        self.assertEqual(record["description_preview"], created_task.description_display_text())
+        reopened = JSONTaskRepository(dt_settings=test_settings, dt_preferences=test_preferences)
+        self.assertEqual(reopened.read_task(created_task.id).description, description)
+
+    def test_recompress_descriptions(self):
+        description = "A long pasted log line\n" * 1000
+        self.repository.create_task(Task(title="Log", description=description))
+        self.repository.create_task(Task(title="Short", description="Short"))
+        self.repository.dt_settings = test_settings.model_copy(
+            update={"compression_settings": CompressionSettings(enabled=False)}
+        )
+        self.assertEqual(self.repository.recompress_descriptions(), 1)
+        with open(self.repository.tasks_path, encoding="utf-8") as fh:
+            self.assertEqual(json.load(fh)[0]["description"], description)
+        self.assertEqual(self.repository.recompress_descriptions(), 0)
+
+    def test_save_reencodes_only_changed_tasks(self):
+        self.repository.create_tasks([Task(title=f"Task {i}", description="") for i in range(20)])
+        with patch.object(self.repository, "_task_to_record", wraps=self.repository._task_to_record) as encode:
+            self.repository.update_task(5, {"title": "Edited"})
+            self.repository.delete_task(6)
+        self.assertEqual(encode.call_count, 1)
+        with open(self.repository.tasks_path, encoding="utf-8") as fh:
+            content = fh.read()
+        expected = [self.repository._task_to_record(task) for task in self.repository.list_tasks()]
+        self.assertEqual(content, json.dumps(expected, indent=4))
+        reopened = JSONTaskRepository(dt_settings=test_settings, dt_preferences=test_preferences)
+        self.assertEqual(reopened.read_task(5).title, "Edited")
+        self.assertEqual(len(reopened.list_tasks()), 19)
+
+    def test_compact_output(self):
+        self.repository.create_task(Task(title="Task", description="Compact"))
+        settings = test_settings.model_copy(update={
+            "json_settings": test_settings.json_settings.model_copy(update={"compact": True})
+        })
+        compact = JSONTaskRepository(dt_settings=settings, dt_preferences=test_preferences)
+        compact.create_task(Task(title="Another task", description=""))
+        with open(compact.tasks_path, encoding="utf-8") as fh:
+            content = fh.read()
+        self.assertNotIn("\n", content)
+        self.assertEqual([record["title"] for record in json.loads(content)], ["Task", "Another task"])
+
+    def test_transaction(self):
+        self.repository.create_task(Task(title="Kept", description=""))
+        old_task = Task(
+            title="Old", description="", completed=True, completed_at=datetime.now(timezone.utc) - timedelta(days=30)
+        )
+        with patch.object(self.repository, "_write_atomically", wraps=self.repository._write_atomically) as write:
+            with self.repository.transaction():
+                for i in range(5):
+                    self.repository.create_task(Task(title=f"Task {i}", description=""))
+                self.repository.update_task(1, {"completed": True})
+                self.repository.create_task(old_task)
+                self.assertEqual(self.repository.archive_completed_tasks(), 1)
+                self.assertEqual(self.repository.read_task(old_task.id).title, "Old")
+                self.repository.save_recurrence(
+                    RecurrenceRule(title="Stand-up", description="", start_date=date.today())
+                )
+                self.assertEqual(len(self.repository.list_recurrences()), 1)
+                self.assertEqual(write.call_count, 0)
+                with self.assertRaises(ValueError):
+                    self.repository.use_task_list("work")
+        # Each changed file is written once, in the order it was first changed; the snapshot is a cache.
+        self.assertEqual(
+            [call.args[0] for call in write.call_args_list if call.args[0] != self.repository.snapshot_path],
+            [self.repository.tasks_path, self.repository.archive_path],
+        )
+
+        repository = JSONTaskRepository(dt_settings=test_settings, dt_preferences=test_preferences)
+        self.assertEqual(len(repository.list_tasks()), 6)
+        self.assertTrue(repository.read_task(1).completed)
+        self.assertEqual(repository.read_task(old_task.id).title, "Old")
+        self.assertEqual(len(repository.list_recurrences()), 1)
+
+        with self.assertRaises(RuntimeError):
+            with self.repository.transaction():
+                self.repository.delete_task(1)
+                self.repository.delete_task(old_task.id)
+                self.repository.delete_recurrence(1)
+                raise RuntimeError()
+        self.assertEqual(len(self.repository.list_tasks()), 6)
+        self.assertEqual(self.repository.read_task(old_task.id).title, "Old")
+        self.assertEqual(len(self.repository.list_recurrences()), 1)
+
+    def test_concurrent_threads(self):
+        threads_count, tasks_per_thread, updates_per_task = 8, 10, 3
+        errors = []
+
+        def work(thread_index):
+            try:
+                for i in range(tasks_per_thread):
+                    task = self.repository.create_task(Task(title=f"Thread {thread_index}", description=f"Task {i}"))
+                    for _ in range(updates_per_task):
+                        current = self.repository.read_task(task.id)
+                        self.repository.update_task(task.id, {"description": current.description + "+"})
+                    self.repository.list_tasks()
+                    self.repository.filter_tasks(TaskFilter.ACTIVE.value)
+            except Exception as e:  # pragma: no cover - reported below
+                errors.append(e)
+
+        threads = [threading.Thread(target=work, args=(i,)) for i in range(threads_count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        tasks = self.repository.list_tasks()
+        self.assertEqual(len(tasks), threads_count * tasks_per_thread)
+        self.assertEqual(len({task.id for task in tasks}), len(tasks))
+        for task in tasks:
+            self.assertEqual(task.version, updates_per_task + 1)
+            self.assertTrue(task.description.endswith("+" * updates_per_task))
+
+
 if __name__ == "__main__":
     unittest.main()
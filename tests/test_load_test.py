@@ -0,0 +1,55 @@
+import os
+import tempfile
+import unittest
+
+from tests import test_preferences
+from daily_tasks.load_test import LoadTestMode, format_report, parse_mix, percentile, run_load_test
+from daily_tasks.models import Settings, JSONSettings, SQLiteSettings
+
+
+class TestLoadTest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.settings = Settings(
+            json_settings=JSONSettings(tasks_path=os.path.join(self.temp_dir.name, "tasks.json")),
+            sqlite_settings=SQLiteSettings(db_path=os.path.join(self.temp_dir.name, "tasks.db"))
+        )
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_parse_mix(self):
+        self.assertEqual(parse_mix("create=1,filter=2.5,view"), {"create": 1.0, "filter": 2.5, "view": 1.0})
+        with self.assertRaises(ValueError):
+            parse_mix("explode=1")
+        with self.assertRaises(ValueError):
+            parse_mix("create=0")
+
+    def test_percentile(self):
+        values = [float(i) for i in range(1, 101)]
+        self.assertEqual(percentile(values, 0.50), 50.0)
+        self.assertEqual(percentile(values, 0.99), 99.0)
+        self.assertEqual(percentile([], 0.95), 0.0)
+
+    def test_thread_mode(self):
+        report = run_load_test(
+            self.settings, test_preferences, "sqlite",
+            clients=3, duration=0.3, mode=LoadTestMode.THREAD, interval=0.1, initial_tasks=2,
+        )
+        self.assertGreater(report.total.operations, 0)
+        self.assertEqual(report.total.errors, 0)
+        self.assertEqual(sum(stats.operations for stats in report.intervals), report.total.operations)
+        self.assertGreaterEqual(report.total.p99_ms, report.total.p50_ms)
+        self.assertIn("total", format_report(report))
+
+    def test_inprocess_mode(self):
+        report = run_load_test(
+            self.settings, test_preferences, "memory",
+            clients=2, duration=0.1, mode=LoadTestMode.INPROCESS, mix={"create": 1, "delete": 1},
+        )
+        self.assertEqual(set(report.per_operation), {"create", "delete"})
+        self.assertEqual(report.errors, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import threading
+import time
+import unittest
+
+from daily_tasks.locking import ReadWriteLock
+
+
+class TestReadWriteLock(unittest.TestCase):
+    def setUp(self):
+        self.lock = ReadWriteLock()
+
+    def test_readers_share_the_lock(self):
+        both_reading = threading.Barrier(2, timeout=5)
+
+        def read():
+            with self.lock.read():
+                both_reading.wait()
+
+        threads = [threading.Thread(target=read) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertFalse(both_reading.broken)
+
+    def test_writer_excludes_readers(self):
+        events = []
+        with self.lock.write():
+            reader = threading.Thread(target=lambda: self._record(events, "read"))
+            reader.start()
+            time.sleep(0.05)
+            events.append("write done")
+        reader.join()
+        self.assertEqual(events, ["write done", "read"])
+
+    def test_waiting_writer_blocks_new_readers(self):
+        events = []
+        self.lock.acquire_read()
+        writer = threading.Thread(target=lambda: self._record(events, "write", write=True))
+        writer.start()
+        while not self.lock._waiting_writers:
+            time.sleep(0.001)
+        reader = threading.Thread(target=lambda: self._record(events, "read"))
+        reader.start()
+        time.sleep(0.05)
+        self.lock.release_read()
+        writer.join()
+        reader.join()
+        self.assertEqual(events, ["write", "read"])
+
+    def test_reentrancy(self):
+        with self.lock.write():
+            with self.lock.write():
+                with self.lock.read():
+                    pass
+        with self.lock.read():
+            with self.lock.read():
+                with self.assertRaises(RuntimeError):
+                    self.lock.acquire_write()
+
+    def _record(self, events, name, write=False):
+        with self.lock.write() if write else self.lock.read():
+            events.append(name)
+
+
+if __name__ == "__main__":
+    unittest.main()
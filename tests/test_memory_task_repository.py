@@ -0,0 +1,284 @@
+import os
+import tempfile
+import threading
+import unittest
+from datetime import date, timedelta
+
+from tests import test_settings, test_preferences
+from daily_tasks.models import MemorySettings, RecurrenceRule, Task, TaskFilter
+from daily_tasks.repository import VersionConflictError
+from daily_tasks.repository.memory_task_repository import MemoryTaskRepository
+
+
+class TestMemoryTaskRepository(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.snapshot_path = os.path.join(self.temp_dir.name, "tasks.memory")
+        self.repository = MemoryTaskRepository(dt_settings=test_settings, dt_preferences=test_preferences)
+
+    def tearDown(self):
+        self.repository.close()
+
+    def _persistent_repository(self, **memory_settings):
+        settings = test_settings.model_copy(update={
+            "memory_settings": MemorySettings(snapshot_path=self.snapshot_path, **memory_settings)
+        })
+        repository = MemoryTaskRepository(dt_settings=settings, dt_preferences=test_preferences)
+        self.addCleanup(repository.close)
+        return repository
+
+    @staticmethod
+    def _simulate_crash(repository):
+        # Stop the repository without the final snapshot close() would write.
+        repository._stop.set()
+        repository._snapshot_thread.join()
+        repository._snapshot_thread = None
+        repository._log.close()
+        repository._log = None
+
+    def test_change_token(self):
+        task = self.repository.create_task(Task(title="Task", description=""))
+        token = self.repository.change_token()
+        self.repository.read_task(task.id)
+        self.assertEqual(self.repository.change_token(), token)
+        self.repository.update_task(task.id, {"title": "Edited"})
+        self.assertNotEqual(self.repository.change_token(), token)
+        token = self.repository.change_token()
+        with self.assertRaises(RuntimeError):
+            with self.repository.transaction():
+                self.repository.delete_task(task.id)
+                raise RuntimeError()
+        self.assertNotEqual(self.repository.change_token(), token)
+
+    def test_crud(self):
+        created_task = self.repository.create_task(Task(title="Test Task", description="This is a test task"))
+        self.assertEqual(created_task.id, 1)
+        self.assertEqual(self.repository.read_task(1), created_task)
+
+        updated_task = self.repository.update_task(1, {"title": "Updated Task"})
+        self.assertEqual(updated_task.title, "Updated Task")
+        self.assertEqual(updated_task.version, 2)
+        with self.assertRaises(VersionConflictError):
+            self.repository.update_task(1, {"title": "Stale"}, expected_version=1)
+
+        self.repository.delete_task(1)
+        with self.assertRaises(ValueError):
+            self.repository.read_task(1)
+
+    def test_filter_tasks(self):
+        today = date.today()
+        self.repository.create_task(Task(title="Active", description="Active task", due_date=today))
+        self.repository.create_task(Task(title="Done", description="Completed task", completed=True))
+        self.repository.create_task(Task(title="Overdue", description="Overdue task", due_date=today - timedelta(days=1)))
+
+        def titles(tasks):
+            return [task.title for task in tasks]
+
+        self.assertEqual(titles(self.repository.filter_tasks(TaskFilter.ACTIVE.value)), ["Active", "Overdue"])
+        self.assertEqual(titles(self.repository.filter_tasks(TaskFilter.COMPLETED.value)), ["Done"])
+        self.assertEqual(titles(self.repository.filter_tasks(TaskFilter.TODAY.value)), ["Active"])
+        self.assertEqual(titles(self.repository.filter_tasks(TaskFilter.OVERDUE.value)), ["Overdue"])
+        with self.assertRaises(ValueError):
+            self.repository.filter_tasks("invalid")
+
+    def test_recurring_tasks(self):
+        today = date.today()
+        rule = self.repository.create_recurrence(
+            RecurrenceRule(title="Stand-up", description="Daily sync", start_date=today - timedelta(days=30))
+        )
+        other_rule = self.repository.create_recurrence(
+            RecurrenceRule(title="Review", description="Weekly", frequency="weekly", start_date=today)
+        )
+        self.assertEqual(self.repository.list_tasks(), [])
+        occurrences = list(self.repository.iter_occurrences(today, today + timedelta(days=6)))
+        self.assertEqual(len(occurrences), 8)
+        self.assertEqual([occurrence.recurrence_id for occurrence in occurrences[:2]], [rule.id, other_rule.id])
+
+        task = self.repository.materialize_occurrence(rule.id, today, {"completed": True})
+        self.assertTrue(task.completed)
+        self.assertEqual((task.title, task.due_date), ("Stand-up", today))
+        self.assertEqual(self.repository.list_tasks(), [task])
+        self.repository.skip_occurrence(rule.id, today + timedelta(days=1))
+        occurrences = self.repository.iter_occurrences(today, today + timedelta(days=2))
+        days = [occurrence.occurrence_date for occurrence in occurrences if occurrence.recurrence_id == rule.id]
+        self.assertEqual(days, [today + timedelta(days=2)])
+        with self.assertRaises(ValueError):
+            self.repository.materialize_occurrence(rule.id, today)
+        self.assertEqual(self.repository.read_recurrence(rule.id).exception_dates, [today, today + timedelta(days=1)])
+
+        self.repository.delete_recurrence(other_rule.id)
+        self.assertEqual([saved_rule.id for saved_rule in self.repository.list_recurrences()], [rule.id])
+        with self.assertRaises(ValueError):
+            self.repository.delete_recurrence(other_rule.id)
+        self.repository.use_task_list("work")
+        self.assertEqual(self.repository.list_recurrences(), [])
+
+    def test_duplicate_detection(self):
+        first_task = self.repository.create_task(Task(title="Buy milk", description="From the shop"))
+        self.repository.create_task(Task(title="Call mom", description="Sunday"))
+        self.assertEqual(self.repository.find_duplicate(Task(title="buy  milk", description="from the shop ")), first_task)
+        self.assertIsNone(self.repository.find_duplicate(Task(title="Buy milk", description="From the market")))
+
+        created_tasks = self.repository.create_tasks([
+            Task(title="Buy milk", description="From the shop"),
+            Task(title="Water plants", description="Balcony"),
+            Task(title="water plants", description="balcony"),
+        ], skip_duplicates=True)
+        self.assertEqual([task.title for task in created_tasks], ["Water plants"])
+        self.assertEqual(len(self.repository.list_tasks()), 3)
+
+        self.repository.create_tasks([
+            Task(title="Buy milk", description="From the shop"),
+            Task(title="Call mom", description="Sunday"),
+        ])
+        self.assertEqual(len(self.repository.list_tasks()), 5)
+
+        renamed_task = self.repository.create_task(Task(title="Renamed", description="Sunday"))
+        self.repository.update_task(renamed_task.id, {"title": "Call Mom"})
+        self.assertEqual(self.repository.deduplicate_tasks(), 3)
+        self.assertEqual(
+            sorted(task.title for task in self.repository.list_tasks()), ["Buy milk", "Call mom", "Water plants"]
+        )
+        self.assertEqual(self.repository.read_task(first_task.id), first_task)
+        self.assertEqual(self.repository.deduplicate_tasks(), 0)
+
+    def test_count_tasks_and_stats(self):
+        self.repository.create_task(Task(title="Active", description="Active task"))
+        done_task = self.repository.create_task(Task(title="Done", description="Completed task", completed=True))
+        self.repository.update_task(done_task.id, {"completed": False})
+        self.repository.update_task(done_task.id, {"completed": True})
+        self.assertEqual(self.repository.count_tasks(), 2)
+        self.assertEqual(self.repository.count_tasks(TaskFilter.ACTIVE.value), 1)
+        self.assertEqual(self.repository.count_tasks(TaskFilter.COMPLETED.value), 1)
+        self.repository.delete_task(done_task.id)
+        self.assertEqual(self.repository.stats().display_text(), "1 active / 0 done")
+
+    def test_task_lists(self):
+        self.repository.create_task(Task(title="Default", description="Default list task"))
+        self.repository.use_task_list("work")
+        self.assertEqual(self.repository.list_tasks(), [])
+        self.assertEqual(self.repository.task_lists(), ["default", "work"])
+
+    def test_restart_replays_append_log(self):
+        repository = self._persistent_repository(snapshot_interval=3600)
+        created_task = repository.create_task(Task(title="Logged", description="Only in the log"))
+        repository.update_task(created_task.id, {"completed": True})
+        repository.create_task(Task(title="Deleted", description="Deleted again"))
+        repository.delete_task(2)
+        self.assertFalse(os.path.exists(self.snapshot_path))
+        self._simulate_crash(repository)
+
+        reopened = self._persistent_repository(snapshot_interval=3600)
+        self.assertEqual(reopened.list_tasks(), repository.list_tasks())
+        self.assertEqual(reopened.create_task(Task(title="New", description="After restart")).id, 3)
+
+    def test_restart_loads_snapshot(self):
+        repository = self._persistent_repository(snapshot_interval=3600, append_log=False)
+        repository.create_task(Task(title="Snapshotted", description="In the snapshot", due_date=date.today()))
+        repository.use_task_list("work")
+        repository.create_task(Task(title="Work", description="Work list task"))
+        repository.close()
+        self.assertTrue(os.path.exists(self.snapshot_path))
+
+        reopened = self._persistent_repository(snapshot_interval=3600, append_log=False)
+        self.assertEqual([task.title for task in reopened.filter_tasks(TaskFilter.TODAY.value)], ["Snapshotted"])
+        reopened.use_task_list("work")
+        self.assertEqual([task.title for task in reopened.list_tasks()], ["Work"])
+
+    def test_restart_loads_recurrences(self):
+        repository = self._persistent_repository()
+        repository.use_task_list("work")
+        rule = repository.create_recurrence(RecurrenceRule(title="Stand-up", description="", start_date=date.today()))
+        repository.materialize_occurrence(rule.id, date.today())
+        repository.close()
+
+        reopened = self._persistent_repository()
+        self.assertEqual(reopened.task_lists(), ["default", "work"])
+        reopened.use_task_list("work")
+        self.assertEqual(reopened.list_recurrences(), [rule])
+        self.assertEqual(len(reopened.list_tasks()), 1)
+
+    def test_snapshot_with_rotated_log_left_behind(self):
+        repository = self._persistent_repository(snapshot_interval=3600)
+        repository.create_task(Task(title="First", description="Before the snapshot"))
+        repository.snapshot()
+        repository.create_task(Task(title="Second", description="After the snapshot"))
+        # Simulate a crash between rotating the log and writing the next snapshot.
+        repository._log.close()
+        os.replace(repository.log_path, repository.rotated_log_path)
+        repository._log = open(repository.log_path, "a", encoding="utf-8")
+        repository.create_task(Task(title="Third", description="After the crash"))
+        self._simulate_crash(repository)
+
+        reopened = self._persistent_repository(snapshot_interval=3600)
+        self.assertEqual([task.title for task in reopened.list_tasks()], ["First", "Second", "Third"])
+
+    def test_background_snapshot(self):
+        repository = self._persistent_repository(snapshot_interval=0.01, append_log=False)
+        repository.create_task(Task(title="Background", description="Written by the snapshot thread"))
+        for _ in range(200):
+            if os.path.exists(self.snapshot_path):
+                break
+            repository._stop.wait(0.01)
+        self.assertTrue(os.path.exists(self.snapshot_path))
+
+    def test_transaction(self):
+        repository = self._persistent_repository()
+        repository.create_tasks([Task(title=f"Task {i}", description="") for i in range(3)])
+        with repository.transaction():
+            repository.update_task(1, {"completed": True})
+            repository.delete_task(2)
+            repository.create_task(Task(title="Created", description=""))
+        with self.assertRaises(RuntimeError):
+            with repository.transaction():
+                repository.update_task(1, {"completed": False})
+                repository.delete_task(3)
+                repository.create_task(Task(title="Rolled back", description=""))
+                repository.save_recurrence(RecurrenceRule(title="Stand-up", description="", start_date=date.today()))
+                raise RuntimeError()
+        expected = repository.list_tasks()
+        self.assertEqual([(task.id, task.completed) for task in expected], [(1, True), (3, False), (4, False)])
+        self.assertEqual(repository.count_tasks(TaskFilter.COMPLETED.value), 1)
+        self.assertEqual(repository.list_recurrences(), [])
+        self.assertEqual(repository.create_task(Task(title="Next", description="")).id, 5)
+
+        # The transaction was logged as a single line, replayed as a whole.
+        with open(f"{self.snapshot_path}.log", encoding="utf-8") as fh:
+            self.assertEqual(len(fh.readlines()), 5)
+        self._simulate_crash(repository)
+        self.assertEqual(self._persistent_repository().list_tasks(), expected + [repository.read_task(5)])
+
+    def test_concurrent_threads(self):
+        threads_count, tasks_per_thread, updates_per_task = 8, 10, 3
+        errors = []
+
+        def work(thread_index):
+            try:
+                for i in range(tasks_per_thread):
+                    task = self.repository.create_task(Task(title=f"Thread {thread_index}", description=f"Task {i}"))
+                    for _ in range(updates_per_task):
+                        current = self.repository.read_task(task.id)
+                        self.repository.update_task(task.id, {"description": current.description + "+"})
+                    self.repository.list_tasks()
+                    self.repository.filter_tasks(TaskFilter.ACTIVE.value)
+            except Exception as e:  # pragma: no cover - reported below
+                errors.append(e)
+
+        threads = [threading.Thread(target=work, args=(i,)) for i in range(threads_count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        tasks = self.repository.list_tasks()
+        self.assertEqual(len(tasks), threads_count * tasks_per_thread)
+        self.assertEqual(len({task.id for task in tasks}), len(tasks))
+        for task in tasks:
+            self.assertEqual(task.version, updates_per_task + 1)
+            self.assertTrue(task.description.endswith("+" * updates_per_task))
+
+
+if __name__ == "__main__":
+    unittest.main()
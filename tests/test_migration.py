@@ -0,0 +1,125 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from tests import test_preferences
+from daily_tasks.migration import migrate_tasks, repository_checksum
+from daily_tasks.models import Settings, JSONSettings, SQLiteSettings, Task
+from daily_tasks.repository.json_task_repository import JSONTaskRepository
+from daily_tasks.repository.sqlite_task_repository import SQLiteTaskRepository
+
+
+class TestMigrateTasks(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.settings = Settings(
+            json_settings=JSONSettings(tasks_path=os.path.join(self.temp_dir.name, "tasks.json")),
+            sqlite_settings=SQLiteSettings(db_path=os.path.join(self.temp_dir.name, "tasks.db"))
+        )
+        self.json_repository = JSONTaskRepository(dt_settings=self.settings, dt_preferences=test_preferences)
+        self.sqlite_repository = SQLiteTaskRepository(dt_settings=self.settings, dt_preferences=test_preferences)
+        self.checkpoint_path = os.path.join(self.temp_dir.name, "migration.checkpoint")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _create_tasks(self, repository, count):
+        for i in range(count):
+            repository.create_task(Task(title=f"Task {i}", description=f"Task number {i}", completed=i % 3 == 0))
+
+    def test_migrate_json_to_sqlite_preserves_ids(self):
+        self._create_tasks(self.json_repository, 10)
+        self.json_repository.delete_task(4)
+
+        result = migrate_tasks(self.json_repository, self.sqlite_repository, batch_size=3)
+
+        self.assertEqual(result.copied, 9)
+        self.assertEqual(result.count, 9)
+        self.assertEqual(self.sqlite_repository.list_tasks(), list(self.json_repository.iter_tasks()))
+        with self.assertRaises(ValueError):
+            self.sqlite_repository.read_task(4)
+
+    def test_migrate_sqlite_to_json(self):
+        self._create_tasks(self.sqlite_repository, 5)
+        result = migrate_tasks(self.sqlite_repository, self.json_repository, batch_size=2)
+        self.assertEqual(result.count, 5)
+        self.assertEqual(repository_checksum(self.json_repository), repository_checksum(self.sqlite_repository))
+        created_task = self.json_repository.create_task(Task(title="New", description="After migration"))
+        self.assertEqual(created_task.id, 6)
+
+    def test_migration_resumes_from_checkpoint(self):
+        self._create_tasks(self.json_repository, 7)
+        original_insert_tasks = self.sqlite_repository.insert_tasks
+        calls = []
+
+        def failing_insert_tasks(tasks):
+            calls.append(tasks)
+            if len(calls) == 2:
+                raise RuntimeError("interrupted")
+            original_insert_tasks(tasks)
+
+        with patch.object(self.sqlite_repository, "insert_tasks", side_effect=failing_insert_tasks):
+            with self.assertRaises(RuntimeError):
+                migrate_tasks(self.json_repository, self.sqlite_repository, 3, self.checkpoint_path)
+        self.assertTrue(os.path.exists(self.checkpoint_path))
+
+        result = migrate_tasks(self.json_repository, self.sqlite_repository, 3, self.checkpoint_path)
+        self.assertEqual(result.copied, 4)
+        self.assertEqual(result.count, 7)
+        self.assertFalse(os.path.exists(self.checkpoint_path))
+
+    def test_checkpoint_is_kept_per_task_list(self):
+        self.sqlite_repository.use_task_list("work")
+        self._create_tasks(self.sqlite_repository, 3)
+        self.sqlite_repository.use_task_list("default")
+        self._create_tasks(self.sqlite_repository, 4)
+        original_insert_tasks = self.json_repository.insert_tasks
+        calls = []
+
+        def failing_insert_tasks(tasks):
+            calls.append(tasks)
+            if len(calls) == 2:
+                raise RuntimeError("interrupted")
+            original_insert_tasks(tasks)
+
+        with patch.object(self.json_repository, "insert_tasks", side_effect=failing_insert_tasks):
+            with self.assertRaises(RuntimeError):
+                migrate_tasks(self.sqlite_repository, self.json_repository, 2, self.checkpoint_path)
+
+        # The "default" checkpoint is past every ID of "work", which must still be copied in full.
+        self.sqlite_repository.use_task_list("work")
+        self.json_repository.use_task_list("work")
+        result = migrate_tasks(self.sqlite_repository, self.json_repository, 2, self.checkpoint_path)
+        self.assertEqual(result.copied, 3)
+        self.assertTrue(os.path.exists(self.checkpoint_path))
+
+        self.sqlite_repository.use_task_list("default")
+        self.json_repository.use_task_list("default")
+        result = migrate_tasks(self.sqlite_repository, self.json_repository, 2, self.checkpoint_path)
+        self.assertEqual(result.copied, 2)
+        self.assertEqual(result.count, 4)
+        self.assertFalse(os.path.exists(self.checkpoint_path))
+
+    def test_checkpoint_is_kept_per_repository_pair(self):
+        self._create_tasks(self.json_repository, 4)
+        migrate_tasks(self.json_repository, self.sqlite_repository, 2)
+        with open(self.checkpoint_path, "w", encoding="utf-8") as fh:
+            json.dump({"SQLiteTaskRepository->JSONTaskRepository": {"default": 3}}, fh)
+
+        result = migrate_tasks(self.json_repository, self.sqlite_repository, 2, self.checkpoint_path)
+
+        self.assertEqual(result.copied, 4)
+        with open(self.checkpoint_path, "r", encoding="utf-8") as fh:
+            self.assertEqual(json.load(fh), {"SQLiteTaskRepository->JSONTaskRepository": {"default": 3}})
+
+    def test_migration_detects_mismatch(self):
+        self._create_tasks(self.json_repository, 2)
+        self.sqlite_repository.insert_tasks([Task(id=99, title="Extra", description="Not in source")])
+        with self.assertRaises(ValueError):
+            migrate_tasks(self.json_repository, self.sqlite_repository)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -8,6 +8,15 @@ class TestTask(unittest.TestCase):
         expected_display_text = "This is a test task description..."
         self.assertEqual(task.description_display_text(), expected_display_text)
 
+    def test_content_hash_ignores_case_and_whitespace(self):
+        task = Task(title="Buy milk", description="From the  corner shop")
+        copy = Task(id=7, title=" buy MILK ", description="from the corner\nshop", completed=True)
+        self.assertEqual(task.content_hash(), copy.content_hash())
+        self.assertNotEqual(task.content_hash(), Task(title="Buy milk", description="").content_hash())
+        self.assertNotEqual(
+            Task(title="a b", description="c").content_hash(), Task(title="a", description="b c").content_hash()
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
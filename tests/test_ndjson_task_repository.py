@@ -0,0 +1,245 @@
+import os
+import tempfile
+import threading
+import unittest
+from datetime import date, timedelta
+from unittest.mock import patch
+
+from tests import test_settings, test_preferences
+from daily_tasks.models import NDJSONSettings, RecurrenceRule, Task, TaskFilter
+from daily_tasks.repository import VersionConflictError
+from daily_tasks.repository import ndjson_task_repository
+from daily_tasks.repository.ndjson_task_repository import MIN_COMPACTION_BYTES, NDJSONTaskRepository
+
+
+class TestNDJSONTaskRepository(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.tasks_path = os.path.join(self.temp_dir.name, "tasks.ndjson")
+        self.repository = self._open()
+
+    def _open(self, **ndjson_settings):
+        settings = test_settings.model_copy(update={
+            "ndjson_settings": NDJSONSettings(tasks_path=self.tasks_path, **ndjson_settings)
+        })
+        repository = NDJSONTaskRepository(dt_settings=settings, dt_preferences=test_preferences)
+        self.addCleanup(repository.close)
+        return repository
+
+    def _reopen(self):
+        self.repository.close()
+        self.repository = self._open()
+        return self.repository
+
+    def test_change_token(self):
+        task = self.repository.create_task(Task(title="Task", description=""))
+        token = self.repository.change_token()
+        self.repository.read_task(task.id)
+        self.assertEqual(self.repository.change_token(), token)
+        self.repository.update_task(task.id, {"title": "Edited"})
+        self.assertNotEqual(self.repository.change_token(), token)
+        token = self.repository.change_token()
+        with self.assertRaises(RuntimeError):
+            with self.repository.transaction():
+                self.repository.delete_task(task.id)
+                raise RuntimeError()
+        self.assertNotEqual(self.repository.change_token(), token)
+
+    def test_crud(self):
+        created_task = self.repository.create_task(Task(title="Test Task", description="This is a test task"))
+        self.assertEqual(created_task.id, 1)
+        self.assertEqual(self.repository.read_task(1), created_task)
+
+        updated_task = self.repository.update_task(1, {"title": "Updated Task"})
+        self.assertEqual((updated_task.title, updated_task.version), ("Updated Task", 2))
+        with self.assertRaises(VersionConflictError):
+            self.repository.update_task(1, {"title": "Stale"}, expected_version=1)
+        self.assertEqual(self._reopen().read_task(1), updated_task)
+
+        self.repository.delete_task(1)
+        with self.assertRaises(ValueError):
+            self.repository.read_task(1)
+        with self.assertRaises(ValueError):
+            self._reopen().delete_task(1)
+
+    def test_writes_append_and_reads_decode_one_record(self):
+        self.repository.create_tasks([Task(title=f"Task {i}", description="") for i in range(10)])
+        size = os.path.getsize(self.tasks_path)
+        self.repository.update_task(3, {"completed": True})
+        self.repository.delete_task(4)
+        with open(self.tasks_path, "rb") as fh:
+            lines = fh.read().splitlines()
+        self.assertEqual(len(lines), 12)
+        self.assertEqual(lines[-1], b'{"id":4,"deleted":true}')
+        self.assertGreater(os.path.getsize(self.tasks_path), size)
+
+        with patch.object(ndjson_task_repository.json, "loads", wraps=ndjson_task_repository.json.loads) as loads:
+            self.assertTrue(self.repository.read_task(3).completed)
+            self.assertEqual(self.repository.count_tasks(TaskFilter.COMPLETED.value), 1)
+            self.assertEqual(self.repository.task_versions([3, 4]), {3: 2})
+        self.assertEqual(loads.call_count, 1)
+
+    def test_filter_and_count_tasks(self):
+        today = date.today()
+        self.repository.create_task(Task(title="Active", description="", due_date=today))
+        self.repository.create_task(Task(title="Done", description="", completed=True))
+        self.repository.create_task(Task(title="Overdue", description="", due_date=today - timedelta(days=1)))
+
+        for filter_text, expected_titles in [
+            (TaskFilter.ALL.value, ["Active", "Done", "Overdue"]),
+            (TaskFilter.ACTIVE.value, ["Active", "Overdue"]),
+            (TaskFilter.COMPLETED.value, ["Done"]),
+            (TaskFilter.TODAY.value, ["Active"]),
+            (TaskFilter.OVERDUE.value, ["Overdue"]),
+        ]:
+            self.assertEqual([task.title for task in self.repository.filter_tasks(filter_text)], expected_titles)
+            self.assertEqual(self.repository.count_tasks(filter_text), len(expected_titles))
+        self.assertEqual(
+            [task.title for task in self.repository.tasks_due_between(None, None)], ["Overdue", "Active"]
+        )
+        with self.assertRaises(ValueError):
+            self.repository.filter_tasks("invalid")
+
+    def test_index_is_persisted_and_replayed(self):
+        self.repository.create_tasks([Task(title=f"Task {i}", description="") for i in range(5)])
+        self._reopen()
+        self.assertTrue(os.path.exists(f"{self.tasks_path}.idx"))
+        # Written after the index, as if the process had crashed before closing.
+        self.repository.update_task(2, {"title": "After the index"})
+        self.repository.delete_task(5)
+        self.repository._stop.set()
+        self.repository._compaction_thread.join()
+        self.repository._compaction_thread = None
+        self.repository._fh.close()
+
+        repository = self._open()
+        self.assertEqual(repository.read_task(2).title, "After the index")
+        self.assertEqual(len(repository.list_tasks()), 4)
+
+    def test_torn_record_is_truncated(self):
+        self.repository.create_task(Task(title="Kept", description=""))
+        self.repository.close()
+        with open(self.tasks_path, "ab") as fh:
+            fh.write(b'{"id":2,"title":"Tor')
+        os.remove(f"{self.tasks_path}.idx")
+        self.repository = self._open()
+        self.assertEqual([task.title for task in self.repository.list_tasks()], ["Kept"])
+        self.repository.create_task(Task(title="Next", description=""))
+        self.assertEqual([task.title for task in self._reopen().list_tasks()], ["Kept", "Next"])
+
+    def test_compaction(self):
+        self.repository.create_tasks([Task(title=f"Task {i}", description="x" * 100) for i in range(100)])
+        for task_id in range(1, 51):
+            self.repository.update_task(task_id, {"completed": True})
+        for task_id in range(51, 76):
+            self.repository.delete_task(task_id)
+        expected = self.repository.list_tasks()
+
+        self.assertGreater(self.repository.compact(), 0)
+        with open(self.tasks_path, "rb") as fh:
+            self.assertEqual(len(fh.read().splitlines()), 75)
+        self.assertEqual(self.repository.list_tasks(), expected)
+        self.repository.create_task(Task(title="After compaction", description=""))
+        self.assertEqual(self._reopen().list_tasks(), expected + [self.repository.read_task(101)])
+
+    def test_compaction_concurrent_with_writes(self):
+        self.repository.create_tasks([Task(title=f"Task {i}", description="x" * 1000) for i in range(200)])
+        for task_id in range(1, 201):
+            self.repository.update_task(task_id, {"title": f"Edited {task_id}"})
+        stop = threading.Event()
+
+        def write():
+            task_id = 1
+            while not stop.is_set():
+                self.repository.update_task(task_id, {"completed": True})
+                self.repository.create_task(Task(title="Written during compaction", description=""))
+                task_id = task_id % 200 + 1
+
+        writer = threading.Thread(target=write)
+        writer.start()
+        try:
+            for _ in range(3):
+                self.repository.compact()
+        finally:
+            stop.set()
+            writer.join()
+        expected = self.repository.list_tasks()
+        self.assertEqual(self._reopen().list_tasks(), expected)
+        self.repository.compact()
+        self.assertEqual(self._reopen().list_tasks(), expected)
+
+    def test_background_compaction(self):
+        repository = self._open(compaction_interval=0.01, compaction_ratio=0.1)
+        repository.use_task_list("work")
+        repository.create_task(Task(title="Task", description="x" * 1000))
+        for _ in range(100):
+            repository.update_task(1, {"description": "y" * 1000})
+        for _ in range(100):
+            if not repository._needs_compaction():
+                break
+            threading.Event().wait(0.01)
+        self.assertFalse(repository._needs_compaction())
+        # Without compaction the file would hold every version; updates made after a compaction
+        # may stay uncompacted as long as they are below the minimum.
+        self.assertLess(os.path.getsize(repository.tasks_path), MIN_COMPACTION_BYTES + 2000)
+
+    def test_task_lists_and_recurrences(self):
+        self.repository.create_task(Task(title="Default", description=""))
+        self.repository.save_recurrence(RecurrenceRule(title="Stand-up", description="", start_date=date.today()))
+        self.repository.use_task_list("work")
+        self.assertEqual(self.repository.list_tasks(), [])
+        self.assertEqual(self.repository.list_recurrences(), [])
+        self.repository.create_task(Task(title="Work", description=""))
+        self.assertEqual(self.repository.task_lists(), ["default", "work"])
+        self.repository.use_task_list("default")
+        self.assertEqual([task.title for task in self.repository.list_tasks()], ["Default"])
+        self.assertEqual([rule.title for rule in self.repository.list_recurrences()], ["Stand-up"])
+        with self.assertRaises(ValueError):
+            self.repository.delete_recurrence(42)
+
+    def test_transaction(self):
+        self.repository.create_tasks([Task(title=f"Task {i}", description="") for i in range(3)])
+        with self.repository.transaction():
+            self.repository.update_task(1, {"completed": True})
+            self.repository.delete_task(2)
+            self.repository.save_recurrence(RecurrenceRule(title="Stand-up", description="", start_date=date.today()))
+            self.assertEqual(len(self.repository.list_recurrences()), 1)
+            self.assertFalse(os.path.exists(self.repository.recurrences_path))
+        with open(self.tasks_path, "rb") as fh:
+            lines = fh.read().splitlines()
+        self.assertEqual((lines[3], lines[-1]), (b'{"transaction":"begin"}', b'{"transaction":"commit"}'))
+
+        size = os.path.getsize(self.tasks_path)
+        with self.assertRaises(RuntimeError):
+            with self.repository.transaction():
+                self.repository.delete_task(1)
+                self.repository.create_task(Task(title="Rolled back", description=""))
+                raise RuntimeError()
+        self.assertEqual(os.path.getsize(self.tasks_path), size)
+        self.assertEqual([task.id for task in self.repository.list_tasks()], [1, 3])
+        self.assertEqual(self.repository.create_task(Task(title="Next", description="")).id, 4)
+        self.assertEqual(len(self._reopen().list_tasks()), 3)
+
+    def test_uncommitted_transaction_is_dropped_on_open(self):
+        self.repository.create_task(Task(title="Kept", description=""))
+        size = os.path.getsize(self.tasks_path)
+        with open(self.tasks_path, "ab") as fh:
+            fh.write(b'{"transaction":"begin"}\n{"id":2,"title":"Uncommitted","description":"","version":1}\n')
+        self.repository.close()
+        os.remove(f"{self.tasks_path}.idx")
+        self.repository = self._open()
+        self.assertEqual([task.title for task in self.repository.list_tasks()], ["Kept"])
+        self.assertEqual(os.path.getsize(self.tasks_path), size)
+
+    def test_insert_tasks_and_iter_tasks(self):
+        self.repository.insert_tasks([Task(id=7, title="Seven", description=""), Task(id=3, title="Three", description="")])
+        self.assertEqual([task.id for task in self.repository.iter_tasks(batch_size=1)], [3, 7])
+        self.assertEqual([task.id for task in self.repository.iter_tasks(after_id=3)], [7])
+        self.assertEqual(self.repository.create_task(Task(title="Eight", description="")).id, 8)
+        with self.assertRaises(ValueError):
+            self.repository.insert_tasks([Task(title="No ID", description="")])
+
+
+if __name__ == "__main__":
+    unittest.main()
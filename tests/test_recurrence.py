@@ -0,0 +1,91 @@
+import os
+import tempfile
+import unittest
+from datetime import date, timedelta
+
+from daily_tasks.models import RecurrenceFrequency, RecurrenceRule
+from daily_tasks.recurrence import (
+    iter_occurrences, merge_occurrences, read_recurrence_rules, validate_recurrence_rule, write_recurrence_rules,
+)
+
+
+def occurrence_dates(rule, start, end):
+    return [occurrence.occurrence_date for occurrence in iter_occurrences(rule, start, end)]
+
+
+class TestRecurrence(unittest.TestCase):
+    def test_daily_interval(self):
+        rule = RecurrenceRule(id=1, title="Water plants", description="", interval=3, start_date=date(2024, 1, 1))
+        self.assertEqual(
+            occurrence_dates(rule, date(2024, 1, 5), date(2024, 1, 12)),
+            [date(2024, 1, 7), date(2024, 1, 10)],
+        )
+        self.assertEqual(occurrence_dates(rule, date(2023, 12, 1), date(2024, 1, 1)), [date(2024, 1, 1)])
+
+    def test_window_far_from_start_date(self):
+        rule = RecurrenceRule(id=1, title="Stand-up", description="", start_date=date(2000, 1, 1))
+        day = date(2099, 6, 15)
+        occurrences = list(iter_occurrences(rule, day, day))
+        self.assertEqual(len(occurrences), 1)
+        self.assertEqual(occurrences[0].to_task().due_date, day)
+        self.assertEqual(len(list(iter_occurrences(rule, day, day + timedelta(days=364)))), 365)
+
+    def test_weekly_and_weekdays(self):
+        # 2024-01-01 is a Monday.
+        weekly = RecurrenceRule(
+            id=1, title="Review", description="", frequency=RecurrenceFrequency.WEEKLY.value, interval=2,
+            start_date=date(2024, 1, 3)
+        )
+        self.assertEqual(
+            occurrence_dates(weekly, date(2024, 1, 1), date(2024, 1, 31)),
+            [date(2024, 1, 3), date(2024, 1, 17), date(2024, 1, 31)],
+        )
+        weekdays = RecurrenceRule(
+            id=2, title="Inbox zero", description="", frequency=RecurrenceFrequency.WEEKDAYS.value,
+            start_date=date(2024, 1, 1)
+        )
+        self.assertEqual(len(occurrence_dates(weekdays, date(2024, 1, 1), date(2024, 1, 14))), 10)
+
+    def test_exception_and_end_dates(self):
+        rule = RecurrenceRule(
+            id=1, title="Stand-up", description="", start_date=date(2024, 1, 1), end_date=date(2024, 1, 5),
+            exception_dates=[date(2024, 1, 2), date(2024, 1, 4)]
+        )
+        self.assertEqual(
+            occurrence_dates(rule, date(2024, 1, 1), date(2024, 2, 1)),
+            [date(2024, 1, 1), date(2024, 1, 3), date(2024, 1, 5)],
+        )
+
+    def test_merge_occurrences(self):
+        rules = [
+            RecurrenceRule(id=2, title="B", description="", start_date=date(2024, 1, 1)),
+            RecurrenceRule(id=1, title="A", description="", start_date=date(2024, 1, 2)),
+        ]
+        merged = merge_occurrences(rules, date(2024, 1, 1), date(2024, 1, 2))
+        self.assertEqual(
+            [(occurrence.occurrence_date.day, occurrence.recurrence_id) for occurrence in merged],
+            [(1, 2), (2, 1), (2, 2)],
+        )
+
+    def test_validate_recurrence_rule(self):
+        with self.assertRaises(ValueError):
+            validate_recurrence_rule(RecurrenceRule(title="A", description="", frequency="hourly", start_date=date.today()))
+        with self.assertRaises(ValueError):
+            validate_recurrence_rule(RecurrenceRule(title="A", description="", interval=0, start_date=date.today()))
+        rule = validate_recurrence_rule(RecurrenceRule(
+            title="A", description="", start_date=date(2024, 1, 1),
+            exception_dates=[date(2024, 1, 3), date(2024, 1, 2), date(2024, 1, 3)]
+        ))
+        self.assertEqual(rule.exception_dates, [date(2024, 1, 2), date(2024, 1, 3)])
+
+    def test_read_and_write_recurrence_rules(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "recurrences.json")
+            self.assertEqual(read_recurrence_rules(path), {})
+            rule = RecurrenceRule(id=4, title="A", description="", start_date=date(2024, 1, 1))
+            write_recurrence_rules(path, [rule])
+            self.assertEqual(read_recurrence_rules(path), {4: rule})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+
+from daily_tasks.models import Task
+from daily_tasks.search import TrigramIndex, trigrams
+
+
+class TestTrigramIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = TrigramIndex([
+            Task(id=1, title="Review pull request", description="Backend changes"),
+            Task(id=2, title="Weekly meeting", description="Prepare the agenda"),
+            Task(id=3, title="Buy groceries", description="Milk, eggs and bread"),
+        ])
+
+    def test_trigrams(self):
+        self.assertEqual(trigrams("Ab"), {"  a", " ab", "ab "})
+        self.assertEqual(trigrams("  "), set())
+
+    def test_exact_and_prefix_matches(self):
+        self.assertEqual(self.index.search("meeting"), [(2, 1.0)])
+        self.assertEqual(self.index.search("MILK")[0], (3, 1.0))
+        self.assertEqual(self.index.search("revi")[0], (1, 1.0))
+
+    def test_typo_tolerance(self):
+        self.assertEqual(self.index.search("reveiw")[0][0], 1)
+        self.assertEqual(self.index.search("grocreies")[0][0], 3)
+        self.assertEqual(self.index.search("xyzzy"), [])
+
+    def test_limit_and_ranking(self):
+        index = TrigramIndex(Task(id=i, title=f"Task {i}", description="Shared words") for i in range(1, 101))
+        results = index.search("shared words", limit=10)
+        self.assertEqual([task_id for task_id, _ in results], list(range(1, 11)))
+        index.add(Task(id=101, title="Shared wording", description=""))
+        self.assertEqual(index.search("shared wording", limit=1), [(101, 1.0)])
+
+    def test_weak_matches_dropped_next_to_strong_ones(self):
+        self.index.add(Task(id=4, title="Mentoring", description=""))
+        self.assertEqual([task_id for task_id, _ in self.index.search("meeting")], [2])
+        self.index.remove(2)
+        self.assertEqual([task_id for task_id, _ in self.index.search("meeting")], [4])
+
+    def test_incremental_updates(self):
+        self.index.add(Task(id=2, title="Weekly retro", description="Prepare the agenda"))
+        self.assertEqual(self.index.search("meeting"), [])
+        self.assertEqual(self.index.search("retro")[0][0], 2)
+        self.index.remove(3)
+        self.index.remove(42)
+        self.assertEqual(self.index.search("groceries"), [])
+        self.assertEqual(len(self.index), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import io
+import unittest
+from datetime import date, datetime, timezone
+
+from daily_tasks.models import Task
+from daily_tasks.serialization import (
+    BinaryTaskWriter,
+    decode_header,
+    encode_header,
+    encode_record,
+    iter_records,
+    read_binary_tasks,
+    task_fields,
+)
+
+
+class TestSerialization(unittest.TestCase):
+    def test_round_trip(self):
+        tasks = [
+            Task(id=1, title="Task 1", description="Ünïcode description"),
+            Task(id=2, title="Task 2", description="", completed=True),
+        ]
+        fh = io.BytesIO()
+        writer = BinaryTaskWriter(fh)
+        for task in tasks:
+            writer.write(task)
+        fh.seek(0)
+        self.assertEqual(list(read_binary_tasks(fh)), tasks)
+
+    def test_every_field_type_round_trips(self):
+        task = Task(
+            id=3, title="Task 3", description="Done", completed=True, version=2,
+            due_date=date(2024, 5, 1), completed_at=datetime(2024, 5, 2, 9, 30, tzinfo=timezone.utc),
+        )
+        fields = task_fields()
+        buffer = encode_header(fields) + encode_record(task.model_dump(), fields)
+        decoded_fields, offset = decode_header(buffer)
+        self.assertEqual([Task(**record) for record in iter_records(buffer, offset, decoded_fields)], [task])
+
+    def test_unsupported_value_type(self):
+        for value in (1.5, b"bytes"):
+            with self.assertRaises(ValueError):
+                encode_record({"value": value}, ["value"])
+
+    def test_iter_records_maps_fields_by_name(self):
+        fields = ["title", "id", "extra"]
+        buffer = encode_header(fields) + encode_record({"id": 7, "title": "Task", "extra": None}, fields)
+        decoded_fields, offset = decode_header(buffer)
+        records = list(iter_records(buffer, offset, decoded_fields))
+        self.assertEqual(records, [{"title": "Task", "id": 7, "extra": None}])
+
+    def test_invalid_header(self):
+        with self.assertRaises(ValueError):
+            decode_header(b"nope")
+        with self.assertRaises(ValueError):
+            list(read_binary_tasks(io.BytesIO(b"")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,164 @@
+import http.client
+import json
+import os
+import tempfile
+import threading
+import unittest
+
+from tests import test_preferences
+from daily_tasks.models import Settings, JSONSettings, SQLiteSettings, Preferences, ServerUIPreferences
+from daily_tasks.repository.json_task_repository import JSONTaskRepository
+from daily_tasks.task_manager import TaskManager
+from daily_tasks.ui.server_ui import ServerUI
+
+
+class TestServerUI(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        settings = Settings(
+            json_settings=JSONSettings(tasks_path=os.path.join(self.temp_dir.name, "tasks.json")),
+            sqlite_settings=SQLiteSettings(db_path=os.path.join(self.temp_dir.name, "tasks.db"))
+        )
+        preferences = Preferences(
+            gtk_ui=test_preferences.gtk_ui,
+            server_ui=ServerUIPreferences(port=0, default_page_size=2, max_batch_size=3)
+        )
+        self.task_manager = TaskManager(settings, preferences, ServerUI, JSONTaskRepository)
+        self.server: ServerUI = self.task_manager.gui
+        self.thread = threading.Thread(target=self.task_manager.run, daemon=True)
+        self.thread.start()
+        self.assertTrue(self.server.ready.wait(5))
+        self.connection = http.client.HTTPConnection("127.0.0.1", self.server.port, timeout=5)
+
+    def tearDown(self):
+        self.connection.close()
+        self.server.stop()
+        self.thread.join(5)
+        self.temp_dir.cleanup()
+
+    def request(self, method, path, body=None, headers=None):
+        payload = None if body is None else json.dumps(body)
+        headers = {"Content-Type": "application/json", **(headers or {})}
+        self.connection.request(method, path, body=payload, headers=headers)
+        response = self.connection.getresponse()
+        return response.status, json.loads(response.read())
+
+    def test_crud_over_keep_alive_connection(self):
+        status, body = self.request("POST", "/tasks", {"title": "Task 1", "description": "First task"})
+        self.assertEqual(status, 201)
+        self.assertEqual(body["total"], 1)
+        task_id = body["tasks"][0]["id"]
+
+        status, body = self.request("PATCH", f"/tasks/{task_id}", {"title": "Updated Task"})
+        self.assertEqual(status, 200)
+
+        status, body = self.request("POST", f"/tasks/{task_id}/complete")
+        self.assertEqual(status, 200)
+
+        status, body = self.request("GET", f"/tasks/{task_id}")
+        self.assertEqual(status, 200)
+        self.assertEqual(body["title"], "Updated Task")
+        self.assertTrue(body["completed"])
+
+        status, body = self.request("DELETE", f"/tasks/{task_id}")
+        self.assertEqual(status, 200)
+        self.assertEqual(body["total"], 0)
+
+        status, body = self.request("GET", f"/tasks/{task_id}")
+        self.assertEqual(status, 404)
+
+    def test_conditional_edit(self):
+        self.request("POST", "/tasks", {"title": "Task 1", "description": "First task"})
+        status, _ = self.request("PATCH", "/tasks/1", {"title": "Edited"}, headers={"If-Match": "1"})
+        self.assertEqual(status, 200)
+        status, body = self.request("PATCH", "/tasks/1", {"title": "Stale edit"}, headers={"If-Match": "1"})
+        self.assertEqual(status, 409)
+        self.assertEqual(self.request("GET", "/tasks/1")[1]["version"], 2)
+
+    def test_pagination(self):
+        for i in range(5):
+            self.request("POST", "/tasks", {"title": f"Task {i}", "description": "Task"})
+
+        status, body = self.request("GET", "/tasks")
+        self.assertEqual(status, 200)
+        self.assertEqual([task["title"] for task in body["tasks"]], ["Task 0", "Task 1"])
+        self.assertEqual(body["next_offset"], 2)
+
+        status, body = self.request("GET", "/tasks?offset=4&limit=10&filter=active")
+        self.assertEqual([task["title"] for task in body["tasks"]], ["Task 4"])
+        self.assertIsNone(body["next_offset"])
+
+        status, body = self.request("GET", "/tasks?filter=unknown")
+        self.assertEqual(status, 400)
+
+    def test_batch(self):
+        status, body = self.request("POST", "/batch", {"operations": [
+            {"op": "create", "task": {"title": "Task 1", "description": "First task"}},
+            {"op": "complete", "id": 1},
+            {"op": "get", "id": 42},
+        ]})
+        self.assertEqual(status, 200)
+        self.assertEqual([result["status"] for result in body["results"]], [200, 200, 400])
+        self.assertTrue(body["tasks"][0]["completed"])
+
+        status, body = self.request("POST", "/batch", {"operations": [{"op": "get", "id": 1}] * 4})
+        self.assertEqual(status, 413)
+
+    def test_atomic_batch(self):
+        self.request("POST", "/tasks", {"title": "Task 1", "description": "First task"})
+        status, body = self.request("POST", "/batch", {"atomic": True, "operations": [
+            {"op": "complete", "id": 1},
+            {"op": "delete", "id": 42},
+        ]})
+        self.assertEqual(status, 400)
+        self.assertIn("Operation 1", body["error"])
+        self.assertFalse(self.request("GET", "/tasks/1")[1]["completed"])
+
+        status, body = self.request("POST", "/batch", {"atomic": True, "operations": [
+            {"op": "create", "task": {"title": "Task 2", "description": "Second task"}},
+            {"op": "complete", "id": 1},
+            {"op": "get", "id": 2},
+        ]})
+        self.assertEqual(status, 200)
+        self.assertEqual([result["status"] for result in body["results"]], [200, 200, 200])
+        self.assertEqual(body["results"][2]["task"]["title"], "Task 2")
+        self.assertTrue(body["tasks"][0]["completed"])
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.request("GET", "/unknown")[0], 404)
+        self.assertEqual(self.request("PUT", "/tasks")[0], 405)
+        self.assertEqual(self.request("POST", "/tasks", {"title": "Missing description"})[0], 400)
+        self.assertEqual(self.request("GET", "/tasks/abc")[0], 400)
+
+    def test_edits_are_validated(self):
+        self.request("POST", "/tasks", {"title": "Task 1", "description": "First task"})
+        for data in ({"list_id": "other"}, {"sync_digest": 0}, {"title = 'x' --": "Injected"}, {"due_date": "soon"}):
+            self.assertEqual(self.request("PATCH", "/tasks/1", data)[0], 400)
+        status, body = self.request("POST", "/batch", {"operations": [
+            {"op": "edit", "id": 1, "data": {"content_hash": "0"}},
+            {"op": "edit", "id": 1, "data": {"completed": "maybe"}},
+            {"op": "edit", "id": 1, "data": {"title": "Edited"}},
+        ]})
+        self.assertEqual([result["status"] for result in body["results"]], [400, 400, 200])
+        status, body = self.request("POST", "/batch", {"atomic": True, "operations": [
+            {"op": "edit", "id": 1, "data": {"completed": True}},
+            {"op": "edit", "id": 1, "data": {"list_id": "other"}},
+        ]})
+        self.assertEqual(status, 400)
+        task = self.request("GET", "/tasks/1")[1]
+        self.assertEqual((task["title"], task["completed"], task["version"]), ("Edited", False, 2))
+
+    def test_batch_edit_versions_are_validated(self):
+        self.request("POST", "/tasks", {"title": "Task 1", "description": "First task"})
+        status, body = self.request("POST", "/batch", {"operations": [
+            {"op": "edit", "id": 1, "data": {"title": "Edited"}, "version": "latest"},
+            {"op": "edit", "id": 1, "data": {"title": "Edited"}, "version": "1"},
+            {"op": "edit", "id": 1, "data": {"title": "Stale"}, "version": 1},
+        ]})
+        self.assertEqual(status, 200)
+        self.assertEqual([result["status"] for result in body["results"]], [400, 200, 409])
+        self.assertEqual(self.request("GET", "/tasks/1")[1]["title"], "Edited")
+
+
+if __name__ == "__main__":
+    unittest.main()
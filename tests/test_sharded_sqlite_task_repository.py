@@ -0,0 +1,198 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+from datetime import date, datetime, timedelta, timezone
+
+from tests import test_preferences
+from daily_tasks.models import JSONSettings, RecurrenceRule, Settings, SQLiteSettings, Task, TaskFilter
+from daily_tasks.repository import VersionConflictError
+from daily_tasks.repository.sharded_sqlite_task_repository import ShardedSQLiteTaskRepository
+from daily_tasks.repository.sqlite_task_repository import SQLiteTaskRepository
+
+
+class TestShardedSQLiteTaskRepository(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.settings = Settings(
+            json_settings=JSONSettings(tasks_path=os.path.join(self.temp_dir.name, "tasks.json")),
+            sqlite_settings=SQLiteSettings(db_path=os.path.join(self.temp_dir.name, "tasks.db"), shard_count=3),
+        )
+        self.repository = self._open()
+
+    def _open(self):
+        repository = ShardedSQLiteTaskRepository(dt_settings=self.settings, dt_preferences=test_preferences)
+        self.addCleanup(repository.close)
+        return repository
+
+    def _shard_ids(self, shard_index):
+        conn = sqlite3.connect(os.path.join(self.temp_dir.name, f"tasks.shard{shard_index}.db"))
+        try:
+            return [row[0] for row in conn.execute("SELECT id FROM tasks ORDER BY id")]
+        finally:
+            conn.close()
+
+    def test_tasks_are_routed_by_id(self):
+        created_tasks = self.repository.create_tasks([Task(title=f"Task {i}", description="") for i in range(7)])
+        self.assertEqual([task.id for task in created_tasks], list(range(1, 8)))
+        self.assertEqual(self.repository.create_task(Task(title="Single", description="")).id, 8)
+        self.assertEqual([self._shard_ids(index) for index in range(3)], [[3, 6], [1, 4, 7], [2, 5, 8]])
+
+        updated_task = self.repository.update_task(5, {"title": "Updated"})
+        self.assertEqual((updated_task.title, updated_task.version), ("Updated", 2))
+        with self.assertRaises(VersionConflictError):
+            self.repository.update_task(5, {"title": "Stale"}, expected_version=1)
+        self.repository.delete_task(4)
+        with self.assertRaises(ValueError):
+            self.repository.read_task(4)
+        self.assertEqual(self._open().create_task(Task(title="Reopened", description="")).id, 9)
+
+    def test_ids_stay_unique_across_instances_and_threads(self):
+        other = self._open()
+        created_ids = []
+        lock = threading.Lock()
+
+        def create(repository):
+            for i in range(20):
+                task = repository.create_task(Task(title=f"Task {i}", description=""))
+                with lock:
+                    created_ids.append(task.id)
+
+        threads = [threading.Thread(target=create, args=(repository,)) for repository in [self.repository, other] * 2]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(set(created_ids)), 80)
+        self.assertEqual(sorted(task.id for task in self.repository.list_tasks()), sorted(created_ids))
+
+    def test_fan_out_matches_unsharded_repository(self):
+        today = date.today()
+        unsharded = SQLiteTaskRepository(
+            dt_settings=self.settings.model_copy(update={
+                "sqlite_settings": SQLiteSettings(db_path=os.path.join(self.temp_dir.name, "single.db"))
+            }),
+            dt_preferences=test_preferences,
+        )
+        tasks = [
+            Task(
+                title=f"Task {i}", description="", completed=i % 4 == 0, due_date=today + timedelta(days=i % 5 - 2),
+                completed_at=datetime(2024, 1, 1, tzinfo=timezone.utc) + timedelta(days=i) if i % 4 == 0 else None,
+            )
+            for i in range(30)
+        ]
+        for repository in (self.repository, unsharded):
+            repository.create_tasks([task.model_copy() for task in tasks])
+            repository.archive_completed_tasks(older_than=datetime(2024, 1, 15, tzinfo=timezone.utc))
+
+        for filter_text in TaskFilter:
+            # The unsharded repository returns completed tasks hot rows first, so only their set is compared.
+            order = (lambda tasks: sorted(tasks, key=lambda task: task.id)) if filter_text == TaskFilter.COMPLETED \
+                else list
+            self.assertEqual(
+                self.repository.filter_tasks(filter_text.value), order(unsharded.filter_tasks(filter_text.value))
+            )
+            self.assertEqual(
+                self.repository.list_task_summaries(filter_text.value),
+                order(unsharded.list_task_summaries(filter_text.value)),
+            )
+            self.assertEqual(self.repository.count_tasks(filter_text.value), unsharded.count_tasks(filter_text.value))
+        self.assertEqual(self.repository.stats(), unsharded.stats())
+        self.assertEqual(self.repository.tasks_due_between(today, None), unsharded.tasks_due_between(today, None))
+        self.assertEqual(self.repository.task_versions([2, 3, 99]), unsharded.task_versions([2, 3, 99]))
+        self.assertEqual(
+            list(self.repository.iter_tasks(batch_size=4, after_id=3, include_archived=True)),
+            list(unsharded.iter_tasks(batch_size=4, after_id=3, include_archived=True)),
+        )
+        self.assertEqual(self.repository.range_digest(), unsharded.range_digest())
+        self.assertEqual(self.repository.range_digest(5, 17), unsharded.range_digest(5, 17))
+
+    def test_duplicates_across_shards(self):
+        self.repository.create_tasks([
+            Task(title="Buy milk", description=""),
+            Task(title="Call mom", description=""),
+            Task(title="buy milk", description=""),
+            Task(title="Buy milk", description=""),
+        ])
+        self.assertEqual(self.repository.find_duplicate(Task(title="Buy Milk", description="")).id, 1)
+        created_tasks = self.repository.create_tasks(
+            [Task(title="Call mom", description=""), Task(title="Water plants", description="")] * 2,
+            skip_duplicates=True,
+        )
+        self.assertEqual([task.title for task in created_tasks], ["Water plants"])
+        self.assertEqual(self.repository.deduplicate_tasks(), 2)
+        self.assertEqual([task.id for task in self.repository.list_tasks()], [1, 2, 5])
+
+    def test_task_lists_recurrences_and_backup(self):
+        self.repository.create_task(Task(title="Default", description=""))
+        self.repository.use_task_list("work")
+        self.assertEqual(self.repository.list_tasks(), [])
+        rule = self.repository.create_recurrence(
+            RecurrenceRule(title="Stand-up", description="", start_date=date.today())
+        )
+        task = self.repository.materialize_occurrence(rule.id, date.today())
+        self.assertEqual(self.repository.list_tasks(), [task])
+        self.assertEqual(self.repository.task_lists(), ["default", "work"])
+
+        backup_dir = os.path.join(self.temp_dir.name, "backup")
+        os.makedirs(backup_dir)
+        self.assertEqual(
+            self.repository.backup(backup_dir), ["tasks.shard0.db", "tasks.shard1.db", "tasks.shard2.db"]
+        )
+
+    def test_insert_tasks_keeps_other_lists_tasks(self):
+        unsharded = SQLiteTaskRepository(
+            dt_settings=self.settings.model_copy(update={
+                "sqlite_settings": SQLiteSettings(db_path=os.path.join(self.temp_dir.name, "single.db"))
+            }),
+            dt_preferences=test_preferences,
+        )
+        old = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        for repository in (unsharded, self.repository):
+            with self.subTest(repository=type(repository).__name__):
+                repository.create_task(Task(title="Default A", description=""))
+                repository.create_task(Task(title="Default B", description="", completed=True, completed_at=old))
+                repository.archive_completed_tasks(older_than=old + timedelta(days=1))
+                repository.use_task_list("work")
+                self.assertEqual(repository.taken_task_ids([1, 2, 3]), {1, 2})
+                for task_id in (1, 2):
+                    with self.assertRaises(ValueError):
+                        repository.insert_tasks([Task(id=task_id, title="Work", description="")])
+                repository.insert_tasks([Task(id=3, title="Work", description="")])
+                self.assertEqual(repository.max_task_id(), 3)
+
+                repository.use_task_list("default")
+                self.assertEqual(repository.read_task(1).title, "Default A")
+                self.assertEqual(
+                    [task.title for task in repository.iter_tasks(include_archived=True)], ["Default A", "Default B"]
+                )
+
+    def test_transaction(self):
+        self.repository.create_tasks([Task(title=f"Task {i}", description="") for i in range(3)])
+        with self.repository.transaction():
+            created_tasks = self.repository.create_tasks([Task(title=f"New {i}", description="") for i in range(3)])
+            self.repository.update_task(1, {"completed": True})
+            self.assertEqual(self.repository.count_tasks(TaskFilter.COMPLETED.value), 1)
+            self.assertEqual(self._shard_ids(1), [1])
+        self.assertEqual([task.id for task in created_tasks], [4, 5, 6])
+        self.assertEqual(self._shard_ids(1), [1, 4])
+
+        with self.assertRaises(RuntimeError):
+            with self.repository.transaction():
+                self.repository.delete_task(2)
+                self.repository.create_task(Task(title="Rolled back", description=""))
+                raise RuntimeError()
+        self.assertEqual([task.id for task in self.repository.list_tasks()], list(range(1, 7)))
+
+    def test_invalid_shard_count(self):
+        settings = self.settings.model_copy(update={
+            "sqlite_settings": SQLiteSettings(db_path=os.path.join(self.temp_dir.name, "tasks.db"), shard_count=0)
+        })
+        with self.assertRaises(ValueError):
+            ShardedSQLiteTaskRepository(dt_settings=settings, dt_preferences=test_preferences)
+
+
+if __name__ == "__main__":
+    unittest.main()
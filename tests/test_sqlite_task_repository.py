@@ -1,9 +1,19 @@
 import unittest
 import os
+import pickle
+import sqlite3
 import tempfile
+import threading
+from datetime import date, datetime, timedelta, timezone
+from typing import List
+from unittest.mock import patch
+
+from pydantic import TypeAdapter
 
 from tests import test_settings, test_preferences
-from daily_tasks.models import Task, TaskFilter
+from daily_tasks.compression import decompress_description
+from daily_tasks.models import CompressionSettings, RecurrenceRule, Task, TaskFilter
+from daily_tasks.repository import TaskRepository, VersionConflictError
 from daily_tasks.repository.sqlite_task_repository import SQLiteTaskRepository
 
 
@@ -18,6 +28,7 @@ class TestSQLiteTaskRepository(unittest.TestCase):
         self.repository = SQLiteTaskRepository(dt_settings=self.settings, dt_preferences=self.preferences)
 
     def tearDown(self):
+        self.repository.close()
         os.close(self.db_fd)
         os.unlink(self.db_path)
 
@@ -46,6 +57,21 @@ class TestSQLiteTaskRepository(unittest.TestCase):
         self.assertEqual(updated_task.title, "Updated Task")
         self.assertTrue(updated_task.completed)
 
+    def test_update_task_rejects_invalid_changes(self):
+        created_task = self.repository.create_task(Task(title="Test Task", description=""))
+        for data in (
+            {"list_id": "work"},
+            {"content_hash": "0"},
+            {"title = 'x' --": "Injected"},
+            {"due_date": "not a date"},
+            {"title": None},
+        ):
+            with self.assertRaises(ValueError):
+                self.repository.update_task(created_task.id, data)
+        self.assertEqual(self.repository.read_task(created_task.id), created_task)
+        updated_task = self.repository.update_task(created_task.id, {"due_date": "2024-05-01", "version": 9})
+        self.assertEqual((updated_task.due_date, updated_task.version), (date(2024, 5, 1), 2))
+
     def test_delete_task(self):
         task = Task(title="Test Task", description="This is a test task", completed=False)
         created_task = self.repository.create_task(task)
@@ -139,5 +165,466 @@ class TestSQLiteTaskRepository(unittest.TestCase):
         with self.assertRaises(ValueError):
             self.repository.read_task(created_task1.id)
 
+    def test_update_task_increments_version(self):
+        created_task = self.repository.create_task(Task(title="Test Task", description="This is a test task"))
+        self.assertEqual(created_task.version, 1)
+        updated_task = self.repository.update_task(created_task.id, {"title": "Updated Task"})
+        self.assertEqual(updated_task.version, 2)
+        self.assertEqual(self.repository.read_task(created_task.id).version, 2)
+
+    def test_update_task_with_expected_version(self):
+        created_task = self.repository.create_task(Task(title="Test Task", description="This is a test task"))
+        self.repository.update_task(created_task.id, {"title": "First edit"}, expected_version=1)
+        with self.assertRaises(VersionConflictError):
+            self.repository.update_task(created_task.id, {"title": "Stale edit"}, expected_version=1)
+        self.assertEqual(self.repository.read_task(created_task.id).title, "First edit")
+
+    def test_task_versions(self):
+        task1 = self.repository.create_task(Task(title="Task 1", description="This is task 1"))
+        task2 = self.repository.create_task(Task(title="Task 2", description="This is task 2"))
+        self.repository.update_task(task2.id, {"completed": True})
+        self.assertEqual(self.repository.task_versions(), {task1.id: 1, task2.id: 2})
+        self.assertEqual(self.repository.task_versions([task2.id, 999]), {task2.id: 2})
+
+    def test_change_token(self):
+        task = self.repository.create_task(Task(title="Task", description=""))
+        token = self.repository.change_token()
+        self.repository.read_task(task.id)
+        self.assertEqual(self.repository.change_token(), token)
+        other = SQLiteTaskRepository(dt_settings=self.settings, dt_preferences=self.preferences)
+        self.addCleanup(other.close)
+        other.update_task(task.id, {"title": "Edited elsewhere"})
+        self.assertNotEqual(self.repository.change_token(), token)
+        token = self.repository.change_token()
+        other.use_task_list("work")
+        other.create_task(Task(title="Other list", description=""))
+        self.assertEqual(self.repository.change_token(), token)
+
+    def test_changes_since(self):
+        task1 = self.repository.create_task(Task(title="Task 1", description="First task"))
+        task2 = self.repository.create_task(Task(title="Task 2", description="Second task"))
+        self.repository.update_task(task1.id, {"completed": True})
+        self.repository.delete_task(task2.id)
+
+        changes = self.repository.changes_since(0)
+        self.assertEqual(
+            [(change.task_id, change.operation, change.version) for change in changes],
+            [(task1.id, "insert", 1), (task2.id, "insert", 1), (task1.id, "update", 2), (task2.id, "delete", 1)]
+        )
+        self.assertEqual(self.repository.changes_since(changes[1].sequence, limit=1), changes[2:3])
+        self.assertEqual(self.repository.last_change_sequence(), changes[-1].sequence)
+
+        self.assertEqual(self.repository.prune_changes(changes[1].sequence), 2)
+        self.assertEqual(self.repository.changes_since(0), changes[2:])
+
+    def test_changes_since_only_returns_current_list(self):
+        task1 = self.repository.create_task(Task(title="Task 1", description=""))
+        self.repository.use_task_list("work")
+        task2 = self.repository.create_task(Task(title="Work", description=""))
+        self.assertEqual([change.task_id for change in self.repository.changes_since()], [task2.id])
+        self.repository.use_task_list("default")
+        self.assertEqual([change.task_id for change in self.repository.changes_since()], [task1.id])
+
+    def test_close(self):
+        self.repository.close()
+        self.repository.close()
+        self.assertEqual(self.repository.list_tasks(), [])
+        self.repository.has_changed()
+        self.assertFalse(self.repository.has_changed())
+
+    def test_changes_of_archived_tasks(self):
+        task1 = self.repository.create_task(Task(title="Task 1", description="", completed=True))
+        task2 = self.repository.create_task(Task(title="Task 2", description="", completed=True))
+        sequence = self.repository.last_change_sequence()
+        self.repository.archive_completed_tasks(older_than=datetime.now(timezone.utc))
+        self.repository.update_task(task1.id, {"title": "Restored"})
+        self.repository.delete_task(task2.id)
+        self.assertEqual(
+            [(change.task_id, change.operation) for change in self.repository.changes_since(sequence)],
+            [(task1.id, "archive"), (task2.id, "archive"), (task1.id, "restore"), (task1.id, "update"),
+             (task2.id, "delete")]
+        )
+
+    def test_has_changed(self):
+        self.assertFalse(self.repository.has_changed())
+        task = self.repository.create_task(Task(title="Task 1", description="First task"))
+        self.assertTrue(self.repository.has_changed())
+        self.assertFalse(self.repository.has_changed())
+        self.repository.read_task(task.id)
+        self.assertFalse(self.repository.has_changed())
+
+    def test_filter_tasks_by_due_date(self):
+        today = date.today()
+        self.repository.create_task(Task(title="Overdue", description="Overdue task", due_date=today - timedelta(days=2)))
+        self.repository.create_task(Task(title="Done", description="Completed task", due_date=today - timedelta(days=1), completed=True))
+        self.repository.create_task(Task(title="Today", description="Due today", due_date=today))
+        self.repository.create_task(Task(title="Upcoming", description="Due soon", due_date=today + timedelta(days=3)))
+        self.repository.create_task(Task(title="Later", description="Due later", due_date=today + timedelta(days=30)))
+        self.repository.create_task(Task(title="Undated", description="No due date"))
+
+        def titles(tasks):
+            return [task.title for task in tasks]
+
+        self.assertEqual(titles(self.repository.filter_tasks(TaskFilter.TODAY.value)), ["Today"])
+        self.assertEqual(titles(self.repository.filter_tasks(TaskFilter.OVERDUE.value)), ["Overdue"])
+        self.assertEqual(titles(self.repository.filter_tasks(TaskFilter.UPCOMING.value)), ["Upcoming"])
+        self.assertEqual(
+            titles(self.repository.tasks_due_between(today - timedelta(days=1), today + timedelta(days=30))),
+            ["Done", "Today", "Upcoming", "Later"]
+        )
+
+    def test_update_due_date(self):
+        today = date.today()
+        created_task = self.repository.create_task(Task(title="Task", description="Task", due_date=today))
+        self.repository.update_task(created_task.id, {"due_date": today + timedelta(days=1)})
+        self.assertEqual(self.repository.filter_tasks(TaskFilter.TODAY.value), [])
+        self.assertEqual(self.repository.read_task(created_task.id).due_date, today + timedelta(days=1))
+        self.assertEqual(len(self.repository.filter_tasks(TaskFilter.UPCOMING.value)), 1)
+
+    def test_archive_completed_tasks(self):
+        active_task = self.repository.create_task(Task(title="Active", description="Active task"))
+        done_task = self.repository.create_task(Task(title="Done", description="Completed task", completed=True))
+        self.assertIsNotNone(done_task.completed_at)
+
+        self.assertEqual(self.repository.archive_completed_tasks(older_than=done_task.completed_at - timedelta(days=1)), 0)
+        self.assertEqual(self.repository.archive_completed_tasks(older_than=datetime.now(timezone.utc)), 1)
+
+        self.assertEqual(self.repository.list_tasks(), [active_task])
+        self.assertEqual(self.repository.read_task(done_task.id), done_task)
+        self.assertEqual(self.repository.filter_tasks(TaskFilter.COMPLETED.value), [done_task])
+        self.assertEqual(list(self.repository.iter_tasks(include_archived=True)), [active_task, done_task])
+        created_task = self.repository.create_task(Task(title="New", description="After archiving"))
+        self.assertEqual(created_task.id, done_task.id + 1)
+
+    def test_archive_compares_completion_times_in_utc(self):
+        eastern = timezone(timedelta(hours=-5))
+        cutoff = datetime(2024, 1, 2, 3, 0, tzinfo=timezone.utc)
+        created = self.repository.create_task(Task(
+            title="Created", description="", completed=True, completed_at=datetime(2024, 1, 1, 23, 0, tzinfo=eastern)
+        ))
+        self.assertEqual(created.completed_at, datetime(2024, 1, 2, 4, 0, tzinfo=timezone.utc))
+        edited = self.repository.create_task(Task(title="Edited", description=""))
+        self.repository.update_task(edited.id, {"completed": True, "completed_at": "2024-01-01T23:30:00-05:00"})
+        self.repository.insert_tasks([Task(
+            id=10, title="Inserted", description="", completed=True,
+            completed_at=datetime(2024, 1, 1, 22, 30, tzinfo=eastern),
+        )])
+        naive = self.repository.create_task(Task(
+            title="Naive", description="", completed=True, completed_at=datetime(2024, 1, 2, 2, 59, 59, 500000)
+        ))
+        self.assertEqual(self.repository.archive_completed_tasks(older_than=cutoff), 1)
+        self.assertEqual([task.id for task in self.repository.list_tasks()], [created.id, edited.id, 10])
+        self.assertEqual(self.repository.read_task(10).completed_at, datetime(2024, 1, 2, 3, 30, tzinfo=timezone.utc))
+        self.assertEqual(self.repository.range_digest(), TaskRepository.range_digest(self.repository))
+
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("UPDATE tasks SET completed_at = '2024-01-01T21:00:00-05:00' WHERE id = ?", (created.id,))
+        reopened = SQLiteTaskRepository(dt_settings=self.settings, dt_preferences=self.preferences)
+        self.addCleanup(reopened.close)
+        self.assertEqual(reopened.archive_completed_tasks(older_than=cutoff), 1)
+        self.assertEqual(reopened.range_digest(), TaskRepository.range_digest(reopened))
+
+    def test_update_archived_task_restores_it(self):
+        done_task = self.repository.create_task(Task(title="Done", description="Completed task", completed=True))
+        self.repository.archive_completed_tasks(older_than=datetime.now(timezone.utc))
+        updated_task = self.repository.update_task(done_task.id, {"completed": False})
+        self.assertIsNone(updated_task.completed_at)
+        self.assertEqual(self.repository.list_tasks(), [updated_task])
+        self.assertEqual(list(self.repository.iter_tasks(include_archived=True)), [updated_task])
+
+    def test_delete_archived_task(self):
+        done_task = self.repository.create_task(Task(title="Done", description="Completed task", completed=True))
+        self.repository.archive_completed_tasks(older_than=datetime.now(timezone.utc))
+        self.repository.delete_task(done_task.id)
+        with self.assertRaises(ValueError):
+            self.repository.read_task(done_task.id)
+
+    def test_recurring_tasks(self):
+        today = date.today()
+        rule = self.repository.create_recurrence(
+            RecurrenceRule(title="Stand-up", description="Daily sync", start_date=today - timedelta(days=30))
+        )
+        other_rule = self.repository.create_recurrence(
+            RecurrenceRule(title="Review", description="Weekly", frequency="weekly", start_date=today)
+        )
+        self.assertEqual(self.repository.list_tasks(), [])
+        occurrences = list(self.repository.iter_occurrences(today, today + timedelta(days=6)))
+        self.assertEqual(len(occurrences), 8)
+        self.assertEqual([occurrence.recurrence_id for occurrence in occurrences[:2]], [rule.id, other_rule.id])
+
+        task = self.repository.materialize_occurrence(rule.id, today, {"completed": True})
+        self.assertTrue(task.completed)
+        self.assertEqual((task.title, task.due_date), ("Stand-up", today))
+        self.assertEqual(self.repository.list_tasks(), [task])
+        self.repository.skip_occurrence(rule.id, today + timedelta(days=1))
+        occurrences = self.repository.iter_occurrences(today, today + timedelta(days=2))
+        days = [occurrence.occurrence_date for occurrence in occurrences if occurrence.recurrence_id == rule.id]
+        self.assertEqual(days, [today + timedelta(days=2)])
+        with self.assertRaises(ValueError):
+            self.repository.materialize_occurrence(rule.id, today)
+        self.assertEqual(self.repository.read_recurrence(rule.id).exception_dates, [today, today + timedelta(days=1)])
+
+        self.repository.delete_recurrence(other_rule.id)
+        self.assertEqual([saved_rule.id for saved_rule in self.repository.list_recurrences()], [rule.id])
+        with self.assertRaises(ValueError):
+            self.repository.delete_recurrence(other_rule.id)
+        self.repository.use_task_list("work")
+        self.assertEqual(self.repository.list_recurrences(), [])
+
+    def test_recurrences_are_keyed_by_list(self):
+        today = date.today()
+        rule = self.repository.create_recurrence(RecurrenceRule(title="Stand-up", description="", start_date=today))
+        self.repository.skip_occurrence(rule.id, today)
+        self.repository.use_task_list("work")
+        work_rule = self.repository.create_recurrence(RecurrenceRule(title="Review", description="", start_date=today))
+        self.assertEqual(work_rule.id, rule.id)
+        self.repository.save_recurrence(work_rule.model_copy(update={"title": "Weekly review"}))
+        self.assertEqual(self.repository.read_recurrence(rule.id).exception_dates, [])
+        self.repository.delete_recurrence(rule.id)
+
+        self.repository.use_task_list("default")
+        default_rule = self.repository.read_recurrence(rule.id)
+        self.assertEqual((default_rule.title, default_rule.exception_dates), ("Stand-up", [today]))
+
+    def test_recurrences_of_older_schema_are_migrated(self):
+        today = date.today()
+        self.repository.close()
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("DROP TABLE recurrences")
+            conn.execute("DROP TABLE recurrence_exceptions")
+            conn.execute(
+                "CREATE TABLE recurrences (id INTEGER PRIMARY KEY, list_id TEXT NOT NULL, title TEXT NOT NULL, "
+                "description TEXT NOT NULL, frequency TEXT NOT NULL, interval INTEGER NOT NULL, "
+                "start_date TEXT NOT NULL, end_date TEXT)"
+            )
+            conn.execute(
+                "CREATE TABLE recurrence_exceptions (recurrence_id INTEGER NOT NULL, exception_date TEXT NOT NULL, "
+                "PRIMARY KEY (recurrence_id, exception_date)) WITHOUT ROWID"
+            )
+            conn.execute(
+                "INSERT INTO recurrences VALUES (1, 'default', 'Stand-up', '', 'daily', 1, ?, NULL), "
+                "(2, 'work', 'Review', '', 'weekly', 1, ?, NULL)", (today.isoformat(), today.isoformat())
+            )
+            conn.execute("INSERT INTO recurrence_exceptions VALUES (2, ?)", (today.isoformat(),))
+        self.repository = SQLiteTaskRepository(dt_settings=self.settings, dt_preferences=self.preferences)
+        self.assertEqual([rule.title for rule in self.repository.list_recurrences()], ["Stand-up"])
+        self.repository.use_task_list("work")
+        self.assertEqual(self.repository.read_recurrence(2).exception_dates, [today])
+        self.assertEqual(self.repository.create_recurrence(
+            RecurrenceRule(title="Retro", description="", start_date=today)
+        ).id, 3)
+
+    def test_duplicate_detection(self):
+        first_task = self.repository.create_task(Task(title="Buy milk", description="From the shop"))
+        self.repository.create_task(Task(title="Call mom", description="Sunday"))
+        self.assertEqual(self.repository.find_duplicate(Task(title="buy  milk", description="from the shop ")), first_task)
+        self.assertIsNone(self.repository.find_duplicate(Task(title="Buy milk", description="From the market")))
+
+        created_tasks = self.repository.create_tasks([
+            Task(title="Buy milk", description="From the shop"),
+            Task(title="Water plants", description="Balcony"),
+            Task(title="water plants", description="balcony"),
+        ], skip_duplicates=True)
+        self.assertEqual([task.title for task in created_tasks], ["Water plants"])
+        self.assertEqual(len(self.repository.list_tasks()), 3)
+
+        self.repository.create_tasks([
+            Task(title="Buy milk", description="From the shop"),
+            Task(title="Call mom", description="Sunday"),
+        ])
+        self.assertEqual(len(self.repository.list_tasks()), 5)
+
+        renamed_task = self.repository.create_task(Task(title="Renamed", description="Sunday"))
+        self.repository.update_task(renamed_task.id, {"title": "Call Mom"})
+        self.assertEqual(self.repository.deduplicate_tasks(), 3)
+        self.assertEqual(
+            sorted(task.title for task in self.repository.list_tasks()), ["Buy milk", "Call mom", "Water plants"]
+        )
+        self.assertEqual(self.repository.read_task(first_task.id), first_task)
+        self.assertEqual(self.repository.deduplicate_tasks(), 0)
+
+    def test_count_tasks_and_stats(self):
+        today = date.today()
+        self.repository.create_task(Task(title="Active", description="Active task"))
+        self.repository.create_task(Task(title="Overdue", description="Overdue task", due_date=today - timedelta(days=1)))
+        self.repository.create_task(Task(title="Due", description="Due today", due_date=today))
+        done_task = self.repository.create_task(Task(title="Done", description="Completed task", completed=True))
+        self.repository.create_task(Task(title="Old", description="Archived task", completed=True))
+        self.repository.archive_completed_tasks(older_than=datetime.now(timezone.utc))
+        self.repository.update_task(done_task.id, {"title": "Done again"})
+
+        self.assertEqual(self.repository.count_tasks(), 4)
+        self.assertEqual(self.repository.count_tasks(TaskFilter.ACTIVE.value), 3)
+        self.assertEqual(self.repository.count_tasks(TaskFilter.COMPLETED.value), 2)
+        self.assertEqual(self.repository.count_tasks(TaskFilter.OVERDUE.value), 1)
+        self.assertEqual(self.repository.count_tasks(TaskFilter.TODAY.value), 1)
+        for filter_option in TaskFilter:
+            self.assertEqual(
+                self.repository.count_tasks(filter_option.value),
+                len(self.repository.filter_tasks(filter_option.value)),
+            )
+
+        stats = self.repository.stats()
+        self.assertEqual((stats.total, stats.active, stats.completed, stats.archived), (5, 3, 2, 1))
+        self.assertEqual(stats.display_text(), "3 active / 2 done")
+
+        self.repository.use_task_list("work")
+        self.assertEqual(self.repository.stats().total, 0)
+
+    def test_task_lists_are_independent(self):
+        default_task = self.repository.create_task(Task(title="Default", description="Default list task"))
+        self.repository.use_task_list("work")
+        self.assertEqual(self.repository.list_tasks(), [])
+        work_task = self.repository.create_task(Task(title="Work", description="Work list task"))
+        self.assertEqual(self.repository.list_tasks(), [work_task])
+        self.assertEqual(self.repository.task_lists(), ["default", "work"])
+
+        self.repository.use_task_list("default")
+        self.assertEqual(self.repository.list_tasks(), [default_task])
+        if work_task.id != default_task.id:
+            with self.assertRaises(ValueError):
+                self.repository.read_task(work_task.id)
+
+    def test_invalid_task_list_name(self):
+        with self.assertRaises(ValueError):
+            self.repository.use_task_list("../escape")
+
+    def test_list_task_summaries(self):
+        long_description = "x" * 5000
+        active_task = self.repository.create_task(Task(title="Active", description=long_description))
+        done_task = self.repository.create_task(Task(title="Done", description="Short", completed=True))
+
+        summaries = self.repository.list_task_summaries()
+        self.assertEqual([summary.id for summary in summaries], [active_task.id, done_task.id])
+        self.assertEqual(summaries[0].description_preview, active_task.description_display_text())
+        self.assertEqual(summaries[0].description_display_text(), "x" * 50 + "...")
+        self.assertEqual(
+            self.repository.list_task_summaries(TaskFilter.COMPLETED.value), [done_task.summary()]
+        )
+
+        self.repository.update_task(active_task.id, {"description": "Now short"})
+        self.assertEqual(
+            self.repository.list_task_summaries(TaskFilter.ACTIVE.value)[0].description_preview, "Now short..."
+        )
+
+    def test_large_descriptions_are_stored_compressed(self):
+        description = "A long pasted log line\n" * 1000
+        created_task = self.repository.create_task(Task(title="Log", description=description))
+        self.assertEqual(self._stored_description_encoding(created_task.id), "zlib")
+        self.assertEqual(self.repository.read_task(created_task.id).description, description)
+        self.assertEqual(
+            self.repository.list_task_summaries()[0].description_preview, created_task.description_display_text()
+        )
+
+        self.repository.update_task(created_task.id, {"description": "Short again"})
+        self.assertIsNone(self._stored_description_encoding(created_task.id))
+        self.assertEqual(self.repository.read_task(created_task.id).description, "Short again")
+
+    def test_compressed_descriptions_are_plain_task_fields(self):
+        description = "A long pasted log line\n" * 1000
+        created_task = self.repository.create_task(Task(title="Log", description=description))
+        with patch("daily_tasks.repository.sqlite_task_repository.decompress_description",
+                   wraps=decompress_description) as decompress:
+            self.repository.list_task_summaries()
+            decompress.assert_not_called()
+            task = self.repository.read_task(created_task.id)
+        self.assertEqual(dict(task), dict(created_task))
+        self.assertEqual(TypeAdapter(List[Task]).dump_python([task]), [created_task.model_dump()])
+        self.assertEqual(pickle.loads(pickle.dumps(task)), created_task)
+
+    def test_recompress_descriptions(self):
+        description = "A long pasted log line\n" * 1000
+        created_task = self.repository.create_task(Task(title="Log", description=description))
+        self.repository.create_task(Task(title="Short", description="Short"))
+        self.repository.dt_settings = self.settings.model_copy(
+            update={"compression_settings": CompressionSettings(enabled=False)}
+        )
+        self.assertEqual(self.repository.recompress_descriptions(), 1)
+        self.assertIsNone(self._stored_description_encoding(created_task.id))
+        self.assertEqual(self.repository.read_task(created_task.id).description, description)
+
+    def _stored_description_encoding(self, task_id):
+        with sqlite3.connect(self.db_path) as conn:
+            return conn.execute("SELECT description_encoding FROM tasks WHERE id = ?", (task_id,)).fetchone()[0]
+
+    def test_content_hashes_are_backfilled(self):
+        description = "A long pasted log line\n" * 1000
+        created_task = self.repository.create_task(Task(title="Log", description=description))
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("DROP INDEX idx_tasks_list_content_hash")
+            conn.execute("ALTER TABLE tasks DROP COLUMN content_hash")
+        repository = SQLiteTaskRepository(dt_settings=self.settings, dt_preferences=self.preferences)
+        self.assertEqual(repository.find_duplicate(Task(title="log", description=description)), created_task)
+
+    def test_range_digest_reads_stored_sync_digests(self):
+        for i in range(5):
+            self.repository.create_task(Task(title=f"Task {i}", description="", completed=i % 2 == 0))
+        self.repository.update_task(2, {"completed": True})
+        self.repository.archive_completed_tasks(datetime.now(timezone.utc) + timedelta(days=1))
+        self.assertEqual(self.repository.range_digest(), TaskRepository.range_digest(self.repository))
+        self.assertEqual(self.repository.range_digest(2, 4), TaskRepository.range_digest(self.repository, 2, 4))
+        self.assertEqual(self.repository.range_digest(2, 4).count, 2)
+        updates = [change for change in self.repository.changes_since() if change.operation == "update"]
+        self.assertEqual(len(updates), 1)
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("DROP INDEX idx_tasks_sync_digest")
+            conn.execute("ALTER TABLE tasks DROP COLUMN sync_digest")
+        repository = SQLiteTaskRepository(dt_settings=self.settings, dt_preferences=self.preferences)
+        self.assertEqual(repository.range_digest(), TaskRepository.range_digest(repository))
+
+    def test_transaction(self):
+        self.repository.create_task(Task(title="Kept", description=""))
+        with self.repository.transaction():
+            self.repository.create_task(Task(title="Created", description=""))
+            self.repository.update_task(1, {"completed": True})
+            with self.assertRaises(VersionConflictError):
+                self.repository.update_task(1, {"title": "Stale"}, expected_version=1)
+            with self.repository.transaction():
+                self.repository.delete_task(2)
+            self.assertEqual([task.title for task in self.repository.iter_tasks()], ["Kept"])
+            with sqlite3.connect(self.db_path) as conn:
+                self.assertEqual(conn.execute("SELECT COUNT(*) FROM tasks WHERE completed = 1").fetchone()[0], 0)
+        self.assertEqual(
+            [(task.id, task.title, task.completed) for task in self.repository.list_tasks()], [(1, "Kept", True)]
+        )
+
+        with self.assertRaises(RuntimeError):
+            with self.repository.transaction():
+                self.repository.delete_task(1)
+                self.repository.create_task(Task(title="Rolled back", description=""))
+                raise RuntimeError()
+        self.assertEqual([task.title for task in self.repository.list_tasks()], ["Kept"])
+        self.assertEqual(self.repository.create_task(Task(title="Next", description="")).id, 2)
+
+    def test_concurrent_threads(self):
+        threads_count, tasks_per_thread, updates_per_task = 8, 10, 3
+        errors = []
+
+        def work(thread_index):
+            try:
+                for i in range(tasks_per_thread):
+                    task = self.repository.create_task(Task(title=f"Thread {thread_index}", description=f"Task {i}"))
+                    for _ in range(updates_per_task):
+                        current = self.repository.read_task(task.id)
+                        self.repository.update_task(task.id, {"description": current.description + "+"})
+                    self.repository.list_tasks()
+                    self.repository.filter_tasks(TaskFilter.ACTIVE.value)
+            except Exception as e:  # pragma: no cover - reported below
+                errors.append(e)
+
+        threads = [threading.Thread(target=work, args=(i,)) for i in range(threads_count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        tasks = self.repository.list_tasks()
+        self.assertEqual(len(tasks), threads_count * tasks_per_thread)
+        self.assertEqual(len({task.id for task in tasks}), len(tasks))
+        for task in tasks:
+            self.assertEqual(task.version, updates_per_task + 1)
+            self.assertTrue(task.description.endswith("+" * updates_per_task))
+
 if __name__ == "__main__":
     unittest.main()
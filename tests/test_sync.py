@@ -0,0 +1,208 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+from tests import test_preferences
+from daily_tasks.migration import migrate_tasks, repository_checksum
+from daily_tasks.models import Settings, JSONSettings, NDJSONSettings, SQLiteSettings, SyncConflictPolicy, Task
+from daily_tasks.repository import TaskRepository
+from daily_tasks.repository.json_task_repository import JSONTaskRepository
+from daily_tasks.repository.memory_task_repository import MemoryTaskRepository
+from daily_tasks.repository.ndjson_task_repository import NDJSONTaskRepository
+from daily_tasks.repository.sqlite_task_repository import SQLiteTaskRepository
+from daily_tasks.sync import sync_repositories
+
+
+class TestSyncRepositories(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.settings = Settings(
+            json_settings=JSONSettings(tasks_path=os.path.join(self.temp_dir.name, "tasks.json")),
+            sqlite_settings=SQLiteSettings(db_path=os.path.join(self.temp_dir.name, "tasks.db"))
+        )
+        self.local = JSONTaskRepository(dt_settings=self.settings, dt_preferences=test_preferences)
+        self.remote = SQLiteTaskRepository(dt_settings=self.settings, dt_preferences=test_preferences)
+        self.state_path = os.path.join(self.temp_dir.name, "sync-state.db")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _create_synced_tasks(self, count):
+        self.local.create_tasks([Task(title=f"Task {i}", description=f"Task number {i}") for i in range(count)])
+        migrate_tasks(self.local, self.remote)
+        sync_repositories(self.local, self.remote, state_path=self.state_path)
+
+    def assertInSync(self):
+        self.assertEqual(repository_checksum(self.local), repository_checksum(self.remote))
+
+    def test_range_digests_match_across_backends(self):
+        self._create_synced_tasks(20)
+        self.assertEqual(self.local.range_digest(), self.remote.range_digest())
+        self.assertEqual(self.local.range_digest(5, 9), self.remote.range_digest(5, 9))
+        self.assertNotEqual(self.local.range_digest(5, 9), self.local.range_digest(5, 10))
+
+    def test_only_differing_ranges_are_transferred(self):
+        self._create_synced_tasks(500)
+        self.remote.update_task(123, {"title": "Edited on the server"})
+        self.local.update_task(400, {"completed": True})
+
+        result = sync_repositories(self.local, self.remote, state_path=self.state_path)
+
+        self.assertEqual((result.pulled, result.pushed, result.deleted, result.conflicts), (1, 1, 0, 0))
+        self.assertLessEqual(result.compared_ranges, 17)
+        self.assertEqual(self.local.read_task(123).title, "Edited on the server")
+        self.assertTrue(self.remote.read_task(400).completed)
+        self.assertInSync()
+        result = sync_repositories(self.local, self.remote, state_path=self.state_path)
+        self.assertEqual((result.pulled, result.pushed, result.compared_ranges), (0, 0, 1))
+
+    def test_small_diff_in_large_store_digests_few_tasks(self):
+        self._create_synced_tasks(1900)
+        sync_repositories(self.local, self.remote, state_path=self.state_path)
+        self.remote.update_task(1234, {"title": "Edited on the server"})
+
+        with patch.object(Task, "sync_digest", autospec=True, side_effect=Task.sync_digest) as sync_digest:
+            result = sync_repositories(self.local, self.remote, state_path=self.state_path)
+        self.assertEqual(result.pulled, 1)
+        self.assertLessEqual(result.compared_ranges, 1 + 16 * 2)
+        # Only the tasks of the differing leaf range on both sides and the resolved task are digested.
+        self.assertLess(sync_digest.call_count, 40)
+        self.assertInSync()
+
+    def test_cached_range_digests_follow_writes(self):
+        settings = self.settings.model_copy(update={
+            "ndjson_settings": NDJSONSettings(tasks_path=os.path.join(self.temp_dir.name, "tasks.ndjson"))
+        })
+        repositories = [
+            self.local,
+            MemoryTaskRepository(dt_settings=settings, dt_preferences=test_preferences),
+            NDJSONTaskRepository(dt_settings=settings, dt_preferences=test_preferences),
+        ]
+        for repository in repositories:
+            with self.subTest(repository=type(repository).__name__):
+                repository.create_tasks([Task(title=f"Task {i}", description="") for i in range(10)])
+                self.assertEqual(repository.range_digest(3, 8), TaskRepository.range_digest(repository, 3, 8))
+                repository.update_task(4, {"completed": True, "completed_at": datetime(2024, 1, 1, tzinfo=timezone.utc)})
+                repository.archive_completed_tasks(datetime(2024, 1, 2, tzinfo=timezone.utc))
+                repository.delete_task(5)
+                repository.insert_tasks([Task(id=20, title="Inserted", description="")])
+                with self.assertRaises(RuntimeError):
+                    with repository.transaction():
+                        repository.update_task(6, {"title": "Rolled back"})
+                        repository.delete_task(7)
+                        raise RuntimeError()
+                for start_id, end_id in [(None, None), (3, 8), (8, None)]:
+                    self.assertEqual(
+                        repository.range_digest(start_id, end_id),
+                        TaskRepository.range_digest(repository, start_id, end_id),
+                    )
+            if hasattr(repository, "close") and repository is not self.local:
+                repository.close()
+
+    def test_first_sync_copies_missing_tasks(self):
+        self.local.create_task(Task(title="Laptop", description=""))
+        self.remote.insert_tasks([Task(id=2, title="Server", description="")])
+        result = sync_repositories(self.local, self.remote)
+        self.assertEqual((result.pulled, result.pushed), (1, 1))
+        self.assertInSync()
+
+    def test_deletions_and_creations_since_last_sync(self):
+        self._create_synced_tasks(4)
+        self.local.delete_task(2)
+        self.remote.delete_task(3)
+        self.remote.delete_task(4)
+        # The server reuses the ID of its deleted task 4, the laptop allocates 5.
+        self.remote.create_task(Task(title="Created on the server", description=""))
+        self.local.create_task(Task(title="Created on the laptop", description=""))
+
+        result = sync_repositories(self.local, self.remote, state_path=self.state_path)
+
+        self.assertEqual((result.deleted, result.conflicts), (2, 0))
+        self.assertEqual(
+            [task.title for task in self.local.iter_tasks()],
+            ["Task 0", "Created on the server", "Created on the laptop"],
+        )
+        self.assertInSync()
+
+    def test_tasks_created_on_both_sides_are_kept(self):
+        self._create_synced_tasks(1)
+        self.local.create_task(Task(title="Created on the laptop", description=""))
+        self.remote.create_task(Task(title="Created on the server", description=""))
+        result = sync_repositories(self.local, self.remote, state_path=self.state_path)
+        self.assertEqual(result.conflicts, 0)
+        self.assertEqual(
+            [task.title for task in self.remote.iter_tasks()],
+            ["Task 0", "Created on the laptop", "Created on the server"],
+        )
+        self.assertInSync()
+
+    def test_edit_wins_over_deletion(self):
+        self._create_synced_tasks(2)
+        self.local.delete_task(1)
+        self.remote.update_task(1, {"completed": True})
+        result = sync_repositories(self.local, self.remote, state_path=self.state_path)
+        self.assertEqual((result.pulled, result.conflicts), (1, 1))
+        self.assertTrue(self.local.read_task(1).completed)
+        self.assertInSync()
+
+    def test_newer_version_wins_without_state(self):
+        self._create_synced_tasks(1)
+        self.local.update_task(1, {"title": "Edited once"})
+        self.remote.update_task(1, {"title": "Edited"})
+        self.remote.update_task(1, {"title": "Edited twice"})
+        result = sync_repositories(self.local, self.remote)
+        self.assertEqual(result.conflicts, 0)
+        self.assertEqual(self.local.read_task(1).title, "Edited twice")
+
+    def test_conflict_policies(self):
+        self._create_synced_tasks(1)
+        for policy, expected_titles in [
+            (SyncConflictPolicy.LOCAL.value, ["Laptop 1"]),
+            (SyncConflictPolicy.REMOTE.value, ["Server 2"]),
+            (SyncConflictPolicy.KEEP_BOTH.value, ["Laptop 3", "Server 3"]),
+        ]:
+            round_number = expected_titles[0][-1]
+            self.local.update_task(1, {"title": f"Laptop {round_number}"})
+            self.remote.update_task(1, {"title": f"Server {round_number}"})
+            result = sync_repositories(self.local, self.remote, policy, self.state_path)
+            self.assertEqual(result.conflicts, 1)
+            self.assertEqual([task.title for task in self.local.iter_tasks()], expected_titles)
+            self.assertInSync()
+        with self.assertRaises(ValueError):
+            sync_repositories(self.local, self.remote, "newest")
+
+    def _sync_every_list(self):
+        for task_list in sorted(set(self.local.task_lists()) | set(self.remote.task_lists())):
+            self.local.use_task_list(task_list)
+            self.remote.use_task_list(task_list)
+            sync_repositories(self.local, self.remote, state_path=self.state_path)
+
+    def _titles_by_list(self, repository):
+        titles = {}
+        for task_list in repository.task_lists():
+            repository.use_task_list(task_list)
+            titles[task_list] = [task.title for task in repository.iter_tasks(include_archived=True)]
+        return titles
+
+    def test_lists_sharing_ids_across_repositories(self):
+        self.remote.create_tasks([Task(title="Default A", description=""), Task(title="Default B", description="")])
+        self.local.use_task_list("work")
+        self.local.create_task(Task(title="Work 1", description=""))
+        self.local.use_task_list("default")
+        self.local.create_task(Task(title="Default C", description=""))
+
+        for _ in range(2):
+            self._sync_every_list()
+            # Both sides created a task 1 before the first sync, so the remote one moved to a new ID.
+            expected_titles = {"default": ["Default C", "Default B", "Default A"], "work": ["Work 1"]}
+            self.assertEqual(self._titles_by_list(self.remote), expected_titles)
+            self.assertEqual(self._titles_by_list(self.local), expected_titles)
+        for repository in (self.local, self.remote):
+            repository.use_task_list("work")
+            self.assertEqual([task.id for task in repository.iter_tasks()], [4])
+
+
+if __name__ == "__main__":
+    unittest.main()
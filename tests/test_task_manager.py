@@ -1,8 +1,9 @@
 import unittest
+from datetime import date
 from unittest.mock import MagicMock
 
 from tests import test_settings, test_preferences
-from daily_tasks.models import Task
+from daily_tasks.models import Task, TaskFilter, TaskStats
 from daily_tasks.repository import TaskRepository
 from daily_tasks.ui import UI
 from daily_tasks.task_manager import TaskManager
@@ -14,6 +15,7 @@ class TestTaskManager(unittest.TestCase):
         self.preferences = test_preferences
 
         self.gui_class = MagicMock(spec=UI)
+        self.gui_class.uses_task_summaries = False
         self.repository_class = MagicMock(spec=TaskRepository)
 
         self.repository = MagicMock(spec=TaskRepository)
@@ -50,7 +52,7 @@ class TestTaskManager(unittest.TestCase):
         task_id = 1
         data = {"title": "Updated Task"}
         self.task_manager.handle_edit_task(task_id, data)
-        self.repository.update_task.assert_called_once_with(task_id, data)
+        self.repository.update_task.assert_called_once_with(task_id, data, expected_version=None)
 
     def test_handle_delete_task(self):
         task_id = 1
@@ -62,6 +64,103 @@ class TestTaskManager(unittest.TestCase):
         self.task_manager.handle_complete_task(task_id)
         self.repository.update_task.assert_called_once_with(task_id, {'completed': True})
 
+    def test_handle_switch_task_list(self):
+        task = Task(title="Test Task", description="This is a test task")
+        self.repository.list_tasks.return_value = [task]
+        result = self.task_manager.handle_switch_task_list("work")
+        self.assertEqual(result, [task])
+        self.repository.use_task_list.assert_called_once_with("work")
+
+    def test_handle_get_stats(self):
+        stats = TaskStats(total=3, active=2, completed=1)
+        self.repository.stats.return_value = stats
+        self.assertEqual(self.task_manager.handle_get_stats(), stats)
+
+    def test_handle_complete_occurrence(self):
+        today = date.today()
+        self.task_manager.handle_complete_occurrence(1, today)
+        self.repository.materialize_occurrence.assert_called_once_with(1, today, {'completed': True})
+
+    def test_handle_edit_occurrence(self):
+        today = date.today()
+        self.task_manager.handle_edit_occurrence(1, today, {'title': "Moved stand-up"})
+        self.repository.materialize_occurrence.assert_called_once_with(1, today, {'title': "Moved stand-up"})
+        self.task_manager.run()
+        self.task_manager.gui.register_recurrence_callbacks.assert_called_once_with(
+            self.task_manager.handle_create_recurrence,
+            self.task_manager.handle_list_occurrences,
+            self.task_manager.handle_complete_occurrence,
+            self.task_manager.handle_edit_occurrence,
+        )
+
+    def test_handle_search_tasks(self):
+        tasks = {
+            1: Task(id=1, title="Review pull request", description="Backend"),
+            2: Task(id=2, title="Buy groceries", description="Milk"),
+        }
+        self.repository.iter_tasks.return_value = iter(tasks.values())
+        self.repository.read_task.side_effect = lambda task_id: tasks[task_id]
+        self.repository.task_versions.side_effect = lambda: {task_id: task.version for task_id, task in tasks.items()}
+        self.assertEqual(self.task_manager.handle_search_tasks("reveiw"), [tasks[1]])
+
+        created_task = Task(id=3, title="Review budget", description="Finance")
+        tasks[3] = created_task
+        self.repository.create_task.return_value = created_task
+        self.task_manager.handle_create_task(Task(title="Review budget", description="Finance"))
+        self.assertEqual(self.task_manager.handle_search_tasks("budget")[0], created_task)
+
+        del tasks[1]
+        self.task_manager.handle_delete_task(1)
+        self.assertEqual(self.task_manager.handle_search_tasks("pull request"), [])
+        self.repository.iter_tasks.assert_called_once()
+
+    def test_search_sees_changes_of_other_processes(self):
+        tasks = {
+            1: Task(id=1, title="Review pull request", description="Backend"),
+            2: Task(id=2, title="Buy groceries", description="Milk"),
+        }
+        self.repository.iter_tasks.return_value = iter(tasks.values())
+        self.repository.read_task.side_effect = lambda task_id: tasks[task_id]
+        self.repository.task_versions.side_effect = lambda: {task_id: task.version for task_id, task in tasks.items()}
+        self.repository.change_token.return_value = ("default", 1)
+        self.assertEqual(self.task_manager.handle_search_tasks("groceries"), [tasks[2]])
+        self.assertEqual(self.task_manager.handle_search_tasks("groceries"), [tasks[2]])
+        self.repository.task_versions.assert_not_called()
+
+        tasks[2] = Task(id=2, title="Buy stamps", description="Post office", version=2)
+        tasks[3] = Task(id=3, title="Groceries for the party", description="")
+        del tasks[1]
+        self.repository.change_token.return_value = ("default", 2)
+        self.assertEqual(self.task_manager.handle_search_tasks("groceries"), [tasks[3]])
+        self.assertEqual(self.task_manager.handle_search_tasks("review"), [])
+        self.assertEqual(self.task_manager.handle_search_tasks("stamps"), [tasks[2]])
+        self.repository.iter_tasks.assert_called_once()
+        self.repository.task_versions.assert_called_once()
+
+    def test_transaction(self):
+        self.repository.iter_tasks.return_value = iter([Task(id=1, title="Review", description="")])
+        self.task_manager.handle_search_tasks("review")
+        self.repository.update_task.return_value = Task(id=1, title="Review", description="", completed=True)
+        with self.task_manager.transaction():
+            self.task_manager.handle_complete_task(1)
+        self.repository.transaction.assert_called_once_with()
+        self.assertIsNotNone(self.task_manager.search_index)
+
+        with self.assertRaises(ValueError):
+            with self.task_manager.transaction():
+                self.task_manager.handle_delete_task(1)
+                raise ValueError("Rolled back")
+        self.assertIsNone(self.task_manager.search_index)
+
+    def test_summary_ui_gets_task_summaries(self):
+        self.gui_class.uses_task_summaries = True
+        summary = Task(id=1, title="Test Task", description="This is a test task").summary()
+        self.repository.list_task_summaries.return_value = [summary]
+        result = self.task_manager.handle_filter_tasks(TaskFilter.ACTIVE.value)
+        self.assertEqual(result, [summary])
+        self.repository.list_task_summaries.assert_called_once_with(TaskFilter.ACTIVE.value)
+        self.repository.filter_tasks.assert_not_called()
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file